@@ -5,10 +5,16 @@ GUI om bestanden te uploaden naar de Raspberry Pi (alleen file transfer, geen in
 Gebruik: python deploy_regenboog.py  (of: python -m deploy.deploy_regenboog vanuit projectroot)
 """
 
+import hashlib
 import json
 import os
+import posixpath
+import queue
+import shlex
 import sys
+import tarfile
 import threading
+import time
 import tkinter as tk
 from tkinter import ttk, scrolledtext, messagebox, filedialog
 from pathlib import Path
@@ -18,6 +24,37 @@ SCRIPT_DIR = Path(__file__).resolve().parent
 PROJECT_ROOT = SCRIPT_DIR.parent
 CONFIG_FILE = SCRIPT_DIR / "deploy_config.json"
 
+# Wat naar de Pi gaat: deze mappen (recursief, zonder EXCLUDED_NAMES) en losse bestanden in de root
+DEPLOY_DIRS = ("server", "public", "scripts")
+DEPLOY_FILES = ("package.json", "package-lock.json", "README.md")
+EXCLUDED_NAMES = (
+    "node_modules", ".git", "__pycache__", "data", "deploy", ".venv", "venv",
+    "loadtest_history.db",  # lokale load-test-geschiedenis (scripts/), hoort niet op de Pi
+)
+# Manifest (pad → grootte, mtime, sha256): lokaal als hash-cache, op de Pi als stand van de laatste deploy
+MANIFEST_NAME = ".deploy_manifest.json"
+LOCAL_MANIFEST_FILE = SCRIPT_DIR / MANIFEST_NAME
+HASH_CHUNK = 1024 * 1024
+# Parallel uploaden: SFTP-kanalen over één SSH-verbinding (OpenSSH staat standaard 10 sessies toe)
+DEFAULT_UPLOAD_WORKERS = 4
+MAX_UPLOAD_WORKERS = 8
+PROGRESS_INTERVAL_SEC = 1.0
+# Upload-methoden: incrementeel per bestand (SFTP) of alles in één gecomprimeerde tar-stream
+UPLOAD_SFTP = "sftp"
+UPLOAD_TAR = "tar"
+# Releases: elke deploy in releases/<tijdstip>, `current` wijst (symlink) naar de actieve
+RELEASES_DIR = "releases"
+CURRENT_LINK = "current"
+KEEP_RELEASES = 5
+SHARED_DIRS = ("data",)  # scores.db e.d.: één map in remote_dir, in elke release als symlink
+PACKAGE_FILES = ("package.json", "package-lock.json")  # ongewijzigd: node_modules van de vorige release hergebruiken
+# Niet uit de vorige release (of de oude in-place map) meekopiëren naar een nieuwe release
+RELEASE_SEED_EXCLUDED = ("node_modules", RELEASES_DIR, CURRENT_LINK, CURRENT_LINK + ".tmp", ".env") + SHARED_DIRS
+# PM2 cluster-modus met één instantie: reload start eerst de nieuwe, wacht op process.send('ready'), stopt dan de oude
+PM2_RELOAD_OPTIONS = "-i 1 --wait-ready --listen-timeout 15000 --kill-timeout 5000"
+READY_TIMEOUT_SEC = 30
+NPM_TIMEOUT_SEC = 900
+
 try:
     import paramiko
 except ImportError:
@@ -38,6 +75,11 @@ except ImportError:
     print("\n" + "=" * 60)
     sys.exit(1)
 
+try:
+    from . import ssh_pool  # python -m deploy.<tool>
+except ImportError:
+    import ssh_pool  # python deploy/<tool>.py
+
 
 def log(area, msg, also_print=True):
     """Log message to text area and optionally print."""
@@ -48,65 +90,311 @@ def log(area, msg, also_print=True):
         print(msg)
 
 
-def deploy_files_sftp(host, port, username, password, key_filename, remote_dir, log_area):
-    """Upload project files (excluding node_modules, .git, data) via SFTP."""
-    client = None
+def connect_ssh(host, port, username, password, key_filename, log_area):
+    """Pooled SSHClient from ssh_pool (connects only the first time); raises paramiko exceptions."""
+    if ssh_pool.is_connected(host, port, username, password, key_filename):
+        log(log_area, f"Bestaande verbinding met {username}@{host}:{port} hergebruikt")
+        return ssh_pool.get_client(host, port, username, password, key_filename)
+    log(log_area, f"Verbinden met {username}@{host}:{port}...")
+    client = ssh_pool.get_client(host, port, username, password, key_filename)
+    log(log_area, "✓ Verbinding geslaagd!")
+    return client
+
+
+def format_bytes(n):
+    """Human-readable size (B, KB, MB)."""
+    if n < 1024:
+        return f"{n} B"
+    if n < 1024 * 1024:
+        return f"{n / 1024:.1f} KB"
+    return f"{n / (1024 * 1024):.1f} MB"
+
+
+def iter_deploy_files():
+    """Yield (relative posix path, local Path) for every file in the deploy set, sorted per directory."""
+    def walk(local: Path):
+        for p in sorted(local.iterdir()):
+            if p.name in EXCLUDED_NAMES:
+                continue
+            if p.is_dir():
+                yield from walk(p)
+            elif p.is_file():
+                yield p.relative_to(PROJECT_ROOT).as_posix(), p
+
+    for name in DEPLOY_DIRS:
+        path = PROJECT_ROOT / name
+        if path.is_dir():
+            yield from walk(path)
+    for name in DEPLOY_FILES:
+        path = PROJECT_ROOT / name
+        if path.is_file():
+            yield name, path
+
+
+def _sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as fp:
+        for chunk in iter(lambda: fp.read(HASH_CHUNK), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def load_local_manifest():
+    """Last local manifest (hash cache), or {} if missing or unreadable."""
     try:
-        log(log_area, f"Verbinden met {username}@{host}:{port}...")
-        client = paramiko.SSHClient()
-        client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-        kws = {"hostname": host, "port": port, "username": username, "timeout": 10}
-        if key_filename and os.path.isfile(key_filename):
-            kws["key_filename"] = key_filename
-        if password:
-            kws["password"] = password
-        client.connect(**kws)
-        log(log_area, "✓ Verbinding geslaagd!")
-        sftp = client.open_sftp()
+        with open(LOCAL_MANIFEST_FILE, "r", encoding="utf-8") as fp:
+            return json.load(fp).get("files", {})
+    except (OSError, ValueError, AttributeError):
+        return {}
+
+
+def build_manifest(cache=None):
+    """
+    Manifest {path: {"size", "mtime", "sha256"}} of the deploy set. Files whose size and mtime
+    match the cache keep their cached hash, so only edited files are read again.
+    """
+    cache = cache or {}
+    manifest = {}
+    for rel, path in iter_deploy_files():
+        st = path.stat()
+        old = cache.get(rel)
+        if old and old.get("size") == st.st_size and old.get("mtime") == st.st_mtime_ns:
+            digest = old["sha256"]
+        else:
+            digest = _sha256(path)
+        manifest[rel] = {"size": st.st_size, "mtime": st.st_mtime_ns, "sha256": digest}
+    return manifest
+
+
+def save_local_manifest(manifest):
+    try:
+        with open(LOCAL_MANIFEST_FILE, "w", encoding="utf-8") as fp:
+            json.dump({"files": manifest}, fp)
+    except OSError:
+        pass
+
+
+def read_remote_manifest(sftp, remote_dir):
+    """Manifest of the last deploy on the Pi; {} if there is none (first deploy) or it is unreadable."""
+    try:
+        with sftp.open(f"{remote_dir}/{MANIFEST_NAME}", "r") as fp:
+            return json.loads(fp.read().decode("utf-8")).get("files", {})
+    except (OSError, ValueError, AttributeError):
+        return {}
+
 
-        def put_dir(local: Path, remote: str):
+def write_remote_manifest(sftp, remote_dir, manifest):
+    """Write to a temp file and rename, so an interrupted deploy never leaves half a manifest."""
+    tmp = f"{remote_dir}/{MANIFEST_NAME}.tmp"
+    with sftp.open(tmp, "w") as fp:
+        fp.write(json.dumps({"files": manifest}).encode("utf-8"))
+    sftp.posix_rename(tmp, f"{remote_dir}/{MANIFEST_NAME}")
+
+
+def diff_manifests(local, remote):
+    """(paths to upload: new or different content, paths to delete: in remote but no longer local)."""
+    changed = [
+        rel for rel, entry in local.items()
+        if rel not in remote
+        or remote[rel].get("sha256") != entry["sha256"]
+        or remote[rel].get("size") != entry["size"]
+    ]
+    removed = sorted(rel for rel in remote if rel not in local)
+    return changed, removed
+
+
+def _remote_dirs(paths):
+    """All parent directories of paths (relative), parents before children."""
+    dirs = set()
+    for rel in paths:
+        d = posixpath.dirname(rel)
+        while d and d not in dirs:
+            dirs.add(d)
+            d = posixpath.dirname(d)
+    return sorted(dirs, key=lambda d: (d.count("/"), d))
+
+
+def make_remote_dirs(client, sftp, dirs):
+    """
+    Create all remote directories (absolute, parents first) in one round trip: mkdir -p via xargs
+    on the Pi. Falls back to stat/mkdir per directory over SFTP if exec is not available.
+    """
+    if not dirs:
+        return
+    try:
+        stdin, stdout, stderr = client.exec_command("xargs -0 mkdir -p --", timeout=30)
+        stdin.write("\0".join(dirs).encode("utf-8"))
+        stdin.channel.shutdown_write()
+        if stdout.channel.recv_exit_status() == 0:
+            return
+    except paramiko.SSHException:
+        pass
+    for d in dirs:
+        try:
+            sftp.stat(d)
+        except FileNotFoundError:
+            sftp.mkdir(d)
+
+
+def upload_parallel(client, jobs, workers, log_area):
+    """
+    Upload jobs [(local path, remote path, size, label)] from a work queue over `workers` SFTP
+    channels on the existing SSH transport. Only the calling thread logs (finished files and the
+    aggregate throughput every PROGRESS_INTERVAL_SEC); the first error stops all workers and is raised.
+    """
+    if not jobs:
+        return 0.0
+    todo = queue.Queue()
+    for job in jobs:
+        todo.put(job)
+    finished = queue.Queue()
+    lock = threading.Lock()
+    stop = threading.Event()
+    errors = []
+    sent = [0]
+
+    def worker():
+        try:
+            sftp = client.open_sftp()
+        except Exception as e:
+            errors.append(e)
+            stop.set()
+            return
+        try:
+            while not stop.is_set():
+                try:
+                    local, remote, _, label = todo.get_nowait()
+                except queue.Empty:
+                    return
+                last = [0]
+
+                def progress(done, _total, last=last):
+                    with lock:
+                        sent[0] += done - last[0]
+                    last[0] = done
+
+                sftp.put(local, remote, callback=progress)
+                finished.put(label)
+        except Exception as e:
+            errors.append(e)
+            stop.set()
+        finally:
+            sftp.close()
+
+    total = sum(job[2] for job in jobs)
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(min(workers, len(jobs)))]
+    start = last_report = time.perf_counter()
+    for t in threads:
+        t.start()
+    count = 0
+    while any(t.is_alive() for t in threads) or not finished.empty():
+        try:
+            log(log_area, f"  📤 {finished.get(timeout=0.2)}")
+            count += 1
+        except queue.Empty:
+            pass
+        now = time.perf_counter()
+        if now - last_report >= PROGRESS_INTERVAL_SEC:
+            last_report = now
+            log(log_area, f"  … {count}/{len(jobs)} bestanden  |  {format_bytes(sent[0])} van {format_bytes(total)}"
+                          f"  |  {format_bytes(int(sent[0] / (now - start)))}/s")
+    if errors:
+        raise errors[0]
+    elapsed = time.perf_counter() - start
+    log(log_area, f"  {len(jobs)} bestanden, {format_bytes(total)} in {elapsed:.1f} s "
+                  f"({format_bytes(int(total / max(elapsed, 1e-3)))}/s over {len(threads)} kanalen)")
+    return elapsed
+
+
+def remove_stale(sftp, remote_dir, removed, local, log_area):
+    """Delete files that are no longer in the deploy set, then directories that became empty."""
+    for rel in removed:
+        log(log_area, f"  🗑 Verwijderd: {rel}")
+        try:
+            sftp.remove(f"{remote_dir}/{rel}")
+        except FileNotFoundError:
+            pass
+    # rmdir faalt op niet-lege mappen (bijv. met bestanden die niet uit de deploy komen)
+    still_used = set(_remote_dirs(local))
+    for d in reversed(_remote_dirs(removed)):
+        if d not in still_used:
             try:
-                sftp.stat(remote)
-            except FileNotFoundError:
-                sftp.mkdir(remote)
-            for p in local.iterdir():
-                if p.name in ("node_modules", ".git", "__pycache__", "data", "deploy", ".venv", "venv"):
-                    continue
-                r = f"{remote}/{p.name}"
-                if p.is_dir():
-                    put_dir(p, r)
-                else:
-                    log(log_area, f"  📤 Upload: {p.relative_to(PROJECT_ROOT)}")
-                    sftp.put(str(p), r)
+                sftp.rmdir(f"{remote_dir}/{d}")
+            except OSError:
+                pass
+
 
-        log(log_area, "Maken remote map...")
+class _ChannelWriter:
+    """Write-only file object for tarfile's stream mode: sends into an SSH channel, counts bytes, logs progress."""
+
+    def __init__(self, channel, log_area):
+        self.channel = channel
+        self.log_area = log_area
+        self.bytes = 0
+        self.start = self.last_report = time.perf_counter()
+
+    def write(self, data):
+        self.channel.sendall(data)
+        self.bytes += len(data)
+        now = time.perf_counter()
+        if now - self.last_report >= PROGRESS_INTERVAL_SEC:
+            self.last_report = now
+            log(self.log_area, f"  … {format_bytes(self.bytes)} verstuurd  |  "
+                               f"{format_bytes(int(self.bytes / (now - self.start)))}/s")
+        return len(data)
+
+
+def deploy_files_sftp(host, port, username, password, key_filename, remote_dir, log_area, full=False,
+                      workers=DEFAULT_UPLOAD_WORKERS):
+    """
+    Upload the deploy set via SFTP, incrementally: only files that are new or changed compared to
+    the manifest on the Pi are sent, files that were removed locally are deleted there.
+    full=True ignores the remote manifest and uploads everything (e.g. after manual edits on the Pi).
+    workers: number of parallel SFTP channels for the upload.
+    """
+    sftp = None
+    try:
+        client = connect_ssh(host, port, username, password, key_filename, log_area)
+        sftp = client.open_sftp()
+
+        log(log_area, "Manifest vergelijken...")
+        local = build_manifest(load_local_manifest())
+        save_local_manifest(local)
+        remote = {} if full else read_remote_manifest(sftp, remote_dir)
+        if full:
+            log(log_area, "  Volledige upload (manifest op de Pi genegeerd)")
+        elif not remote:
+            log(log_area, "  Geen manifest op de Pi: alles wordt geüpload")
+        changed, removed = diff_manifests(local, remote)
+
+        log(log_area, "Maken remote mappen...")
         parts = remote_dir.strip("/").split("/")
-        for i in range(1, len(parts) + 1):
-            d = "/" + "/".join(parts[:i])
-            try:
-                sftp.stat(d)
-            except FileNotFoundError:
-                sftp.mkdir(d)
-        
-        log(log_area, "\nBestanden uploaden...")
-        for name in ("server", "public", "scripts"):
-            path = PROJECT_ROOT / name
-            if path.is_dir():
-                put_dir(path, f"{remote_dir}/{name}")
-        for name in ("package.json", "package-lock.json", "README.md"):
-            path = PROJECT_ROOT / name
-            if path.is_file():
-                log(log_area, f"  📤 Upload: {name}")
-                sftp.put(str(path), f"{remote_dir}/{name}")
-        
-        sftp.close()
-        log(log_area, "\n✓ Alle bestanden succesvol geüpload!")
+        dirs = ["/" + "/".join(parts[:i]) for i in range(1, len(parts) + 1)]
+        known_dirs = set(_remote_dirs(remote))
+        dirs += [f"{remote_dir}/{d}" for d in _remote_dirs(changed) if d not in known_dirs]
+        make_remote_dirs(client, sftp, dirs)
+
+        workers = max(1, min(MAX_UPLOAD_WORKERS, workers))
+        log(log_area, f"\nBestanden uploaden ({len(changed)} van {len(local)}, {workers} parallel)...")
+        upload_parallel(client, [
+            (str(PROJECT_ROOT / rel), f"{remote_dir}/{rel}", local[rel]["size"], rel) for rel in changed
+        ], workers, log_area)
+        remove_stale(sftp, remote_dir, removed, local, log_area)
+        write_remote_manifest(sftp, remote_dir, local)
+
+        sent = sum(local[rel]["size"] for rel in changed)
+        total = sum(entry["size"] for entry in local.values())
+        log(log_area, f"\nVerstuurd:     {len(changed)} bestanden, {format_bytes(sent)}")
+        log(log_area, f"Overgeslagen:  {len(local) - len(changed)} ongewijzigd, {format_bytes(total - sent)}")
+        log(log_area, f"Verwijderd:    {len(removed)} bestanden")
+        log(log_area, "\n✓ Deploy klaar!" if changed or removed else "\n✓ Alles was al up-to-date!")
         return True, None
     except paramiko.AuthenticationException:
         error_msg = f"Authenticatie mislukt voor {username}@{host}. Controleer gebruikersnaam en wachtwoord."
         log(log_area, f"✗ {error_msg}")
         return False, error_msg
     except paramiko.SSHException as e:
+        ssh_pool.discard(host, port, username)
         error_msg = f"SSH fout: {str(e)}"
         log(log_area, f"✗ {error_msg}")
         return False, error_msg
@@ -116,24 +404,94 @@ def deploy_files_sftp(host, port, username, password, key_filename, remote_dir,
         log(log_area, f"✗ {error_msg}")
         return False, error_msg
     finally:
-        if client:
-            client.close()
+        if sftp:
+            sftp.close()
+
+
+def deploy_files_tar(host, port, username, password, key_filename, remote_dir, log_area):
+    """
+    Upload the whole deploy set as one gzip-compressed tar stream: tarfile in stream mode writes
+    straight into `tar -x` on the Pi over a single exec channel, without a temporary archive on
+    either side. Meant for a first deploy or a full refresh (thousands of small files); afterwards
+    stale files are removed and the manifest is written, so the next SFTP deploy is incremental again.
+    """
+    sftp = None
+    try:
+        client = connect_ssh(host, port, username, password, key_filename, log_area)
+        sftp = client.open_sftp()
+
+        log(log_area, "Manifest opbouwen...")
+        local = build_manifest(load_local_manifest())
+        save_local_manifest(local)
+        previous = read_remote_manifest(sftp, remote_dir)
+        raw = sum(entry["size"] for entry in local.values())
+
+        target = shlex.quote(remote_dir)
+        log(log_area, f"\nTar-stream naar de Pi ({len(local)} bestanden, {format_bytes(raw)})...")
+        stdin, stdout, stderr = client.exec_command(f"mkdir -p {target} && tar -xzf - -C {target}")
+        writer = _ChannelWriter(stdout.channel, log_area)
+        broken = None
+        try:
+            with tarfile.open(fileobj=writer, mode="w|gz") as tar:
+                for rel in local:
+                    tar.add(str(PROJECT_ROOT / rel), arcname=rel, recursive=False)
+            stdout.channel.shutdown_write()
+        except OSError as e:
+            broken = e  # tar op de Pi is gestopt; de reden staat in stderr
+        status = stdout.channel.recv_exit_status()
+        elapsed = time.perf_counter() - writer.start
+        if status != 0 or broken:
+            err = stderr.read().decode("utf-8", errors="replace").strip() or str(broken)
+            error_msg = f"tar op de Pi faalde (exit {status}): {err}"
+            log(log_area, f"✗ {error_msg}")
+            return False, error_msg
+
+        remove_stale(sftp, remote_dir, diff_manifests(local, previous)[1], local, log_area)
+        write_remote_manifest(sftp, remote_dir, local)
+
+        log(log_area, f"\nTar-stream:    {len(local)} bestanden, {format_bytes(raw)} → {format_bytes(writer.bytes)} "
+                      f"gecomprimeerd ({100 * writer.bytes / max(raw, 1):.0f}%)")
+        log(log_area, f"Tijd:          {elapsed:.1f} s  |  {format_bytes(int(writer.bytes / max(elapsed, 1e-3)))}/s "
+                      f"over de lijn  |  {format_bytes(int(raw / max(elapsed, 1e-3)))}/s aan bestanden")
+        log(log_area, "\n✓ Deploy klaar!")
+        return True, None
+    except paramiko.AuthenticationException:
+        error_msg = f"Authenticatie mislukt voor {username}@{host}. Controleer gebruikersnaam en wachtwoord."
+        log(log_area, f"✗ {error_msg}")
+        return False, error_msg
+    except paramiko.SSHException as e:
+        ssh_pool.discard(host, port, username)
+        error_msg = f"SSH fout: {str(e)}"
+        log(log_area, f"✗ {error_msg}")
+        return False, error_msg
+    except Exception as e:
+        error_type = type(e).__name__
+        error_msg = f"Fout bij tar-stream ({error_type}): {str(e)}"
+        log(log_area, f"✗ {error_msg}")
+        return False, error_msg
+    finally:
+        if sftp:
+            sftp.close()
+
+
+def run_remote(client, cmd, log_area, timeout=30, quiet=False):
+    """Run one command on the (pooled) connection; logs command and output unless quiet. Returns (exit, out, err)."""
+    if not quiet:
+        log(log_area, f"$ {cmd}")
+    stdin, stdout, stderr = client.exec_command(cmd, timeout=timeout)
+    out = stdout.read().decode("utf-8", errors="replace").strip()
+    err = stderr.read().decode("utf-8", errors="replace").strip()
+    if out and not quiet:
+        log(log_area, out)
+    if err and not quiet:
+        log(log_area, f"⚠ stderr: {err}")
+    return stdout.channel.recv_exit_status(), out, err
 
 
 def restart_pm2_app(log_area, host, port, username, password, key_filename, app_name="regenboog"):
     """Restart PM2 app after deployment."""
-    client = None
     try:
-        log(log_area, f"Verbinden met {username}@{host}:{port}...")
-        client = paramiko.SSHClient()
-        client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-        kws = {"hostname": host, "port": port, "username": username, "timeout": 10}
-        if key_filename and os.path.isfile(key_filename):
-            kws["key_filename"] = key_filename
-        if password:
-            kws["password"] = password
-        client.connect(**kws)
-        log(log_area, "✓ Verbinding geslaagd!")
+        client = connect_ssh(host, port, username, password, key_filename, log_area)
         
         commands = [
             f"pm2 restart {app_name}",
@@ -141,15 +499,7 @@ def restart_pm2_app(log_area, host, port, username, password, key_filename, app_
         ]
         
         for cmd in commands:
-            log(log_area, f"$ {cmd}")
-            stdin, stdout, stderr = client.exec_command(cmd, timeout=30)
-            out = stdout.read().decode("utf-8", errors="replace").strip()
-            err = stderr.read().decode("utf-8", errors="replace").strip()
-            if out:
-                log(log_area, out)
-            if err:
-                log(log_area, f"⚠ stderr: {err}")
-            exit_status = stdout.channel.recv_exit_status()
+            exit_status, _, err = run_remote(client, cmd, log_area)
             if exit_status != 0:
                 return False, err or f"Command failed with exit code {exit_status}"
         
@@ -158,9 +508,299 @@ def restart_pm2_app(log_area, host, port, username, password, key_filename, app_
         error_msg = f"Fout bij PM2 restart: {str(e)}"
         log(log_area, f"✗ {error_msg}")
         return False, error_msg
+
+
+def list_releases(sftp, remote_dir):
+    """(release names oldest first, name `current` points to or None before the first release)."""
+    try:
+        names = sorted(sftp.listdir(f"{remote_dir}/{RELEASES_DIR}"))
+    except OSError:
+        names = []
+    try:
+        current = posixpath.basename(sftp.readlink(f"{remote_dir}/{CURRENT_LINK}").rstrip("/"))
+    except OSError:
+        current = None
+    return names, current if current in names else None
+
+
+def release_layout(client, remote_dir):
+    """
+    Release state of remote_dir for the tools that otherwise work in place (update, setup):
+    (current release or None, True if releases/ or a `current` link exists at all). A present layout
+    without a current release is broken or half migrated; in-place work would bypass it.
+    """
+    sftp = client.open_sftp()
+    try:
+        names, current = list_releases(sftp, remote_dir)
+        if names or current:
+            return current, True
+        try:
+            sftp.lstat(f"{remote_dir}/{CURRENT_LINK}")
+            return None, True
+        except OSError:
+            return None, False
+    finally:
+        sftp.close()
+
+
+def switch_current(client, remote_dir, release, log_area):
+    """
+    Point `current` at releases/<release> atomically: a new symlink is renamed over the old one
+    (rename(2)), so there is never a moment without a valid `current`.
+    """
+    link = f"{remote_dir}/{CURRENT_LINK}"
+    status, _, err = run_remote(
+        client, f"ln -sfn {shlex.quote(f'{RELEASES_DIR}/{release}')} {shlex.quote(link + '.tmp')} && "
+                f"mv -Tf {shlex.quote(link + '.tmp')} {shlex.quote(link)}", log_area)
+    if status != 0:
+        raise RuntimeError(f"{CURRENT_LINK} omzetten naar {release} mislukt: {err}")
+    log(log_area, f"✓ {CURRENT_LINK} → {RELEASES_DIR}/{release}")
+
+
+def pm2_app_env(client, app_name):
+    """pm2_env of app_name from `pm2 jlist` (exec path, mode, status, env), or None if PM2 does not know it."""
+    status, out, err = run_remote(client, "pm2 jlist", None, quiet=True)
+    if status != 0:
+        raise RuntimeError(f"pm2 jlist mislukt: {err or status}")
+    for line in reversed(out.splitlines()):  # pm2 kan eerst meldingen over de daemon printen
+        if line.startswith("["):
+            for app in json.loads(line):
+                if app.get("name") == app_name:
+                    return app.get("pm2_env", {})
+            break
+    return None
+
+
+def wait_app_ready(client, app_name, app_port, log_area):
+    """Readiness after a reload: PM2 reports the app online and, with a known port, it answers HTTP on the Pi."""
+    deadline = time.monotonic() + READY_TIMEOUT_SEC
+    env = pm2_app_env(client, app_name)
+    while not env or env.get("status") != "online":
+        if time.monotonic() > deadline:
+            return False, f"PM2-app '{app_name}' is niet online (status: {env.get('status') if env else 'onbekend'})"
+        time.sleep(1)
+        env = pm2_app_env(client, app_name)
+    if not app_port:
+        log(log_area, f"✓ PM2-app '{app_name}' online (poort onbekend, geen HTTP-controle)")
+        return True, None
+    url = f"http://127.0.0.1:{app_port}/"
+    status, _, _ = run_remote(
+        client, f"command -v curl >/dev/null || exit 3; for i in $(seq {READY_TIMEOUT_SEC}); do "
+                f"curl -fs -o /dev/null --max-time 2 {url} && exit 0; sleep 1; done; exit 1",
+        None, timeout=READY_TIMEOUT_SEC * 4, quiet=True)
+    if status == 3:
+        log(log_area, f"✓ PM2-app '{app_name}' online (geen curl op de Pi, geen HTTP-controle)")
+    elif status != 0:
+        return False, f"App antwoordt niet op {url} binnen {READY_TIMEOUT_SEC} s"
+    else:
+        log(log_area, f"✓ App online en antwoordt op {url}")
+    return True, None
+
+
+def reload_pm2_app(client, remote_dir, app_name, log_area, app_port=None):
+    """
+    Zero-downtime reload of the app from `current`: PM2 in cluster mode starts the new process, waits
+    for its 'ready' message and only then stops the old one. An app that still runs from the old
+    in-place layout (or is not known to PM2) is registered once under current/ (a normal restart),
+    as is one whose port differs from app_port (setup); without app_port the known PORT is kept.
+    Returns (ok, error message) after the readiness wait.
+    """
+    script = f"{remote_dir}/{CURRENT_LINK}/server/server.js"
+    name = shlex.quote(app_name)
+    env = pm2_app_env(client, app_name)
+    known_port = env and (env.get("PORT") or env.get("env", {}).get("PORT"))
+    same_port = not app_port or str(app_port) == str(known_port)
+    app_port = app_port or known_port
+    if env and env.get("pm_exec_path") == script and env.get("exec_mode") == "cluster_mode" and same_port:
+        status, _, err = run_remote(client, f"pm2 reload {name}", log_area, timeout=READY_TIMEOUT_SEC + 30)
+    else:
+        reason = f"draait nog niet vanuit {CURRENT_LINK}/" if same_port else f"krijgt poort {app_port} (was {known_port})"
+        log(log_area, f"PM2-app '{app_name}' {reason}: eenmalig opnieuw registreren "
+                      f"(korte herstart, daarna zonder onderbreking)")
+        port_env = f"PORT={shlex.quote(str(app_port))} " if app_port else ""
+        status, _, err = run_remote(
+            client, f"cd {shlex.quote(remote_dir)} && (pm2 delete {name} >/dev/null 2>&1 || true) && "
+                    f"{port_env}pm2 start {shlex.quote(script)} --name {name} {PM2_RELOAD_OPTIONS} && pm2 save",
+            log_area, timeout=READY_TIMEOUT_SEC + 30)
+    if status != 0:
+        return False, err or f"pm2 faalde (exit {status})"
+    return wait_app_ready(client, app_name, app_port, log_area)
+
+
+def _prepare_release(client, remote_dir, release, seed, log_area):
+    """
+    Create releases/<release> as a copy of seed (the current release, or the old in-place remote dir)
+    so the upload stays incremental. Real copies, no hard links: an upload must never change a file
+    of a release that is still running.
+    """
+    target = f"{remote_dir}/{RELEASES_DIR}/{release}"
+    cmd = f"mkdir -p {shlex.quote(target)}"
+    if seed:
+        excluded = " ".join(f"! -name {shlex.quote(n)}" for n in RELEASE_SEED_EXCLUDED)
+        cmd += (f" && find {shlex.quote(seed)} -mindepth 1 -maxdepth 1 {excluded} "
+                f"-exec cp -a -t {shlex.quote(target)} {{}} +")
+    status, _, err = run_remote(client, cmd, log_area, timeout=120)
+    if status != 0:
+        raise RuntimeError(f"Release-map aanmaken mislukt: {err}")
+    return target
+
+
+def _link_shared_and_modules(client, sftp, remote_dir, target, seed, seed_manifest, log_area):
+    """Symlink SHARED_DIRS into the release; reuse node_modules (hard links) or run npm ci when packages changed."""
+    for name in SHARED_DIRS:
+        shared = shlex.quote(f"{remote_dir}/{name}")
+        status, _, err = run_remote(client, f"mkdir -p {shared} && ln -sfn {shared} {shlex.quote(f'{target}/{name}')}",
+                                    log_area)
+        if status != 0:
+            raise RuntimeError(f"Gedeelde map {name} koppelen mislukt: {err}")
+    manifest = read_remote_manifest(sftp, target)
+    unchanged = bool(seed_manifest) and all(
+        seed_manifest.get(n, {}).get("sha256") == manifest.get(n, {}).get("sha256") for n in PACKAGE_FILES
+    )
+    try:
+        has_modules = seed is not None and bool(sftp.stat(f"{seed}/node_modules"))
+    except OSError:
+        has_modules = False
+    if unchanged and has_modules:
+        # Hard links: snel en zonder extra ruimte; deze node_modules wordt in de release niet meer gewijzigd
+        cmd = f"cp -al {shlex.quote(f'{seed}/node_modules')} {shlex.quote(target)}/"
+        log(log_area, "Pakketten ongewijzigd: node_modules van de vorige release hergebruiken")
+    else:
+        cmd = f"cd {shlex.quote(target)} && (npm ci --omit=dev || npm install --omit=dev)"
+        log(log_area, "Pakketten gewijzigd of nog niet geïnstalleerd: npm ci in de nieuwe release...")
+    status, _, err = run_remote(client, cmd, log_area, timeout=NPM_TIMEOUT_SEC)
+    if status != 0:
+        raise RuntimeError(f"node_modules klaarzetten mislukt: {err}")
+
+
+def _prune_releases(client, remote_dir, names, keep, log_area):
+    """Remove the oldest releases beyond KEEP_RELEASES, never one in `keep` (current and the rollback target)."""
+    old = [n for n in names[:-KEEP_RELEASES] if n not in keep] if len(names) > KEEP_RELEASES else []
+    if old:
+        paths = " ".join(shlex.quote(f"{remote_dir}/{RELEASES_DIR}/{n}") for n in old)
+        run_remote(client, f"rm -rf {paths}", log_area, timeout=120)
+
+
+def deploy_release(host, port, username, password, key_filename, remote_dir, log_area, app_name="regenboog",
+                   mode=UPLOAD_SFTP, full=False, workers=DEFAULT_UPLOAD_WORKERS, reload=True):
+    """
+    Deploy into a fresh releases/<timestamp> directory instead of overwriting the running files:
+    seed it from the current release, upload the changes into it (SFTP or tar stream), link the shared
+    data dir and node_modules, switch `current` atomically and `pm2 reload` with a readiness wait.
+    If the new release does not come up, `current` is switched back to the previous one.
+    reload=False only switches `current` (active after the next reload).
+    """
+    client = sftp = target = None
+    try:
+        client = connect_ssh(host, port, username, password, key_filename, log_area)
+        sftp = client.open_sftp()
+        names, current = list_releases(sftp, remote_dir)
+        release = time.strftime("%Y%m%d-%H%M%S")
+        while release in names:
+            release += "b"
+        if current:
+            seed, basis = f"{remote_dir}/{RELEASES_DIR}/{current}", f"release {current}"
+        else:
+            try:
+                sftp.stat(remote_dir)
+                seed, basis = remote_dir, "de oude in-place map"
+            except OSError:
+                seed, basis = None, "leeg"
+        log(log_area, f"\nNieuwe release {release} (basis: {basis})...")
+        target = _prepare_release(client, remote_dir, release, seed, log_area)
+        seed_manifest = read_remote_manifest(sftp, seed) if seed else {}
+
+        if mode == UPLOAD_TAR:
+            ok, err = deploy_files_tar(host, port, username, password, key_filename, target, log_area)
+        else:
+            ok, err = deploy_files_sftp(host, port, username, password, key_filename, target, log_area,
+                                        full=full, workers=workers)
+        if not ok:
+            raise RuntimeError(err)
+        _link_shared_and_modules(client, sftp, remote_dir, target, seed, seed_manifest, log_area)
+
+        log(log_area, "\nOmschakelen...")
+        switch_current(client, remote_dir, release, log_area)
+        target = None  # vanaf hier actief: niet meer opruimen bij een fout
+        if reload:
+            ok, err = reload_pm2_app(client, remote_dir, app_name, log_area)
+            if not ok:
+                log(log_area, f"✗ Nieuwe release komt niet op: {err}")
+                if current:
+                    log(log_area, f"Terugzetten naar {current}...")
+                    switch_current(client, remote_dir, current, log_area)
+                    reload_pm2_app(client, remote_dir, app_name, log_area)
+                    run_remote(client, f"rm -rf {shlex.quote(f'{remote_dir}/{RELEASES_DIR}/{release}')}", log_area,
+                               timeout=120)
+                    err += f"\nTeruggezet naar release {current}."
+                return False, err
+        else:
+            log(log_area, f"PM2 niet herladen: release {release} is actief na de volgende reload")
+        _prune_releases(client, remote_dir, names + [release], {release, current}, log_area)
+        log(log_area, f"\n✓ Release {release} actief" + (f" (vorige: {current})" if current else ""))
+        return True, None
+    except paramiko.AuthenticationException:
+        error_msg = f"Authenticatie mislukt voor {username}@{host}. Controleer gebruikersnaam en wachtwoord."
+        log(log_area, f"✗ {error_msg}")
+        return False, error_msg
+    except paramiko.SSHException as e:
+        ssh_pool.discard(host, port, username)
+        error_msg = f"SSH fout: {str(e)}"
+        log(log_area, f"✗ {error_msg}")
+        return False, error_msg
+    except Exception as e:
+        error_msg = f"Fout bij release-deploy ({type(e).__name__}): {str(e)}"
+        log(log_area, f"✗ {error_msg}")
+        if target:
+            # Half opgebouwde release weghalen; `current` wijst nog naar de vorige
+            try:
+                run_remote(client, f"rm -rf {shlex.quote(target)}", log_area, timeout=120)
+            except Exception:
+                pass
+        return False, error_msg
     finally:
-        if client:
-            client.close()
+        if sftp:
+            sftp.close()
+
+
+def rollback_release(host, port, username, password, key_filename, remote_dir, log_area, app_name="regenboog"):
+    """
+    Switch `current` back to the release before it and reload: nothing is uploaded or installed,
+    the previous release is still complete on the Pi. Returns (ok, error message).
+    """
+    try:
+        client = connect_ssh(host, port, username, password, key_filename, log_area)
+        sftp = client.open_sftp()
+        try:
+            names, current = list_releases(sftp, remote_dir)
+        finally:
+            sftp.close()
+        if current is None:
+            return False, f"Geen releases in {remote_dir}/{RELEASES_DIR} (nog nooit als release gedeployed)"
+        if names.index(current) == 0:
+            return False, f"Release {current} is de oudste: er is geen vorige release"
+        previous = names[names.index(current) - 1]
+        log(log_area, f"Terugzetten: {current} → {previous}")
+        switch_current(client, remote_dir, previous, log_area)
+        ok, err = reload_pm2_app(client, remote_dir, app_name, log_area)
+        if ok:
+            log(log_area, f"\n✓ Release {previous} weer actief")
+        return ok, err
+    except Exception as e:
+        error_msg = f"Fout bij terugzetten ({type(e).__name__}): {str(e)}"
+        log(log_area, f"✗ {error_msg}")
+        return False, error_msg
+
+
+def reload_release_app(host, port, username, password, key_filename, remote_dir, log_area, app_name="regenboog"):
+    """`pm2 reload` of the current release with readiness wait (the release variant of restart_pm2_app)."""
+    try:
+        client = connect_ssh(host, port, username, password, key_filename, log_area)
+        return reload_pm2_app(client, remote_dir, app_name, log_area)
+    except Exception as e:
+        error_msg = f"Fout bij PM2 reload: {str(e)}"
+        log(log_area, f"✗ {error_msg}")
+        return False, error_msg
 
 
 def load_config():
@@ -255,6 +895,30 @@ class DeployApp:
         self.pm2_app_name.grid(row=2, column=1, sticky=tk.W, pady=2, padx=(8, 0))
         self.pm2_app_name.bind("<KeyRelease>", lambda e: self._auto_save_config())
 
+        # Standaard alleen nieuwe/gewijzigde bestanden (manifest); volledig na handmatige wijzigingen op de Pi
+        self.full_upload = tk.BooleanVar(value=False)
+        ttk.Checkbutton(deploy_frame, text="Volledige upload (manifest op de Pi negeren)", variable=self.full_upload).grid(row=3, column=0, columnspan=2, sticky=tk.W, pady=4)
+
+        ttk.Label(deploy_frame, text="Parallelle uploads:").grid(row=4, column=0, sticky=tk.W, pady=2)
+        self.upload_workers = ttk.Spinbox(deploy_frame, from_=1, to=MAX_UPLOAD_WORKERS, width=5)
+        self.upload_workers.set(cfg.get("upload_workers", DEFAULT_UPLOAD_WORKERS))
+        self.upload_workers.grid(row=4, column=1, sticky=tk.W, pady=2, padx=(8, 0))
+        self.upload_workers.bind("<KeyRelease>", lambda e: self._auto_save_config())
+
+        ttk.Label(deploy_frame, text="Upload-methode:").grid(row=5, column=0, sticky=tk.W, pady=2)
+        mode_f = ttk.Frame(deploy_frame)
+        mode_f.grid(row=5, column=1, sticky=tk.W, pady=2, padx=(8, 0))
+        self.upload_mode = tk.StringVar(value=cfg.get("upload_mode", UPLOAD_SFTP))
+        ttk.Radiobutton(mode_f, text="Alleen wijzigingen (SFTP)", value=UPLOAD_SFTP, variable=self.upload_mode,
+                        command=self._auto_save_config).pack(side=tk.LEFT)
+        ttk.Radiobutton(mode_f, text="Alles als één tar-stream (eerste deploy)", value=UPLOAD_TAR,
+                        variable=self.upload_mode, command=self._auto_save_config).pack(side=tk.LEFT, padx=(12, 0))
+
+        # Elke deploy in een eigen releases/<tijdstip>-map, `current` omzetten en pm2 reload (geen downtime)
+        self.use_releases = tk.BooleanVar(value=cfg.get("use_releases", True))
+        ttk.Checkbutton(deploy_frame, text="Releases: nieuwe map per deploy, atomisch omschakelen + pm2 reload",
+                        variable=self.use_releases, command=self._auto_save_config).grid(row=6, column=0, columnspan=2, sticky=tk.W, pady=4)
+
         f.columnconfigure(1, weight=1)
 
         # Info label
@@ -266,7 +930,8 @@ class DeployApp:
         btn_f = ttk.Frame(f)
         btn_f.grid(row=3, column=0, columnspan=2, sticky=tk.EW, pady=12)
         ttk.Button(btn_f, text="📤 Bestanden Uploaden", command=self._on_deploy).pack(side=tk.LEFT, padx=(0, 8))
-        ttk.Button(btn_f, text="🔄 Alleen PM2 Herstarten", command=self._on_restart_only).pack(side=tk.LEFT)
+        ttk.Button(btn_f, text="🔄 Alleen PM2 Herstarten", command=self._on_restart_only).pack(side=tk.LEFT, padx=(0, 8))
+        ttk.Button(btn_f, text="⏪ Vorige release terugzetten", command=self._on_rollback).pack(side=tk.LEFT)
 
         ttk.Label(f, text="Log", font=("", 11, "bold")).grid(row=4, column=0, columnspan=2, sticky=tk.W, pady=(8, 4))
         self.log = scrolledtext.ScrolledText(f, height=14, wrap=tk.WORD, font=("Consolas", 9))
@@ -292,6 +957,9 @@ class DeployApp:
             "key_path": self.key_path.get().strip() or "",
             "restart_pm2": self.restart_pm2.get(),
             "pm2_app_name": self.pm2_app_name.get().strip() or "regenboog",
+            "upload_workers": self._get_upload_workers(),
+            "upload_mode": self.upload_mode.get(),
+            "use_releases": self.use_releases.get(),
         })
     
     def _auto_save_config(self):
@@ -300,6 +968,12 @@ class DeployApp:
             self.win.after_cancel(self._save_timer)
         self._save_timer = self.win.after(500, self._save_config)
 
+    def _get_upload_workers(self):
+        try:
+            return max(1, min(MAX_UPLOAD_WORKERS, int(self.upload_workers.get())))
+        except ValueError:
+            return DEFAULT_UPLOAD_WORKERS
+
     def _get_ssh_params(self):
         try:
             port = int(self.ssh_port.get().strip() or "22")
@@ -331,11 +1005,19 @@ class DeployApp:
         log(self.log, "=" * 60)
 
         def run():
+            if self.use_releases.get():
+                self._deploy_release(p, remote)
+                return
             # Upload files
-            ok, err = deploy_files_sftp(
-                p["host"], p["port"], p["username"], p["password"], p["key_filename"], 
-                remote, self.log
-            )
+            if self.upload_mode.get() == UPLOAD_TAR:
+                ok, err = deploy_files_tar(
+                    p["host"], p["port"], p["username"], p["password"], p["key_filename"], remote, self.log
+                )
+            else:
+                ok, err = deploy_files_sftp(
+                    p["host"], p["port"], p["username"], p["password"], p["key_filename"], 
+                    remote, self.log, full=self.full_upload.get(), workers=self._get_upload_workers()
+                )
             
             if not ok:
                 def done():
@@ -370,9 +1052,30 @@ class DeployApp:
 
         threading.Thread(target=run, daemon=True).start()
 
+    def _deploy_release(self, p, remote):
+        """Release deploy (runs in the worker thread of _on_deploy)."""
+        pm2_name = self.pm2_app_name.get().strip() or "regenboog"
+        ok, err = deploy_release(
+            p["host"], p["port"], p["username"], p["password"], p["key_filename"], remote, self.log,
+            app_name=pm2_name, mode=self.upload_mode.get(), full=self.full_upload.get(),
+            workers=self._get_upload_workers(), reload=self.restart_pm2.get()
+        )
+
+        def done():
+            self._save_config()
+            if ok:
+                msg = "✓ Nieuwe release staat klaar en is actief!"
+                if self.restart_pm2.get():
+                    msg += f"\n✓ PM2 app '{pm2_name}' zonder onderbreking herladen"
+                messagebox.showinfo("Klaar", msg)
+            else:
+                messagebox.showerror("Fout", f"Release-deploy mislukt:\n{err}")
+        self.win.after(0, done)
+
     def _on_restart_only(self):
-        """Only restart PM2 without uploading files."""
+        """Only restart PM2 without uploading files (pm2 reload of the current release in release mode)."""
         p = self._get_ssh_params()
+        remote = (self.remote_dir.get().strip() or "/home/pi/regenboog-game").rstrip("/")
         
         if not p["host"]:
             messagebox.showerror("Fout", "Vul host/IP-adres in.")
@@ -386,10 +1089,15 @@ class DeployApp:
 
         def run():
             pm2_name = self.pm2_app_name.get().strip() or "regenboog"
-            ok, err = restart_pm2_app(
-                self.log, p["host"], p["port"], p["username"], p["password"], 
-                p["key_filename"], pm2_name
-            )
+            if self.use_releases.get():
+                ok, err = reload_release_app(
+                    p["host"], p["port"], p["username"], p["password"], p["key_filename"], remote, self.log, pm2_name
+                )
+            else:
+                ok, err = restart_pm2_app(
+                    self.log, p["host"], p["port"], p["username"], p["password"], 
+                    p["key_filename"], pm2_name
+                )
             def done():
                 self._save_config()
                 if ok:
@@ -400,8 +1108,39 @@ class DeployApp:
 
         threading.Thread(target=run, daemon=True).start()
 
+    def _on_rollback(self):
+        """Switch back to the previous release: symlink + pm2 reload, nothing is uploaded."""
+        p = self._get_ssh_params()
+        remote = (self.remote_dir.get().strip() or "/home/pi/regenboog-game").rstrip("/")
+
+        if not p["host"]:
+            messagebox.showerror("Fout", "Vul host/IP-adres in.")
+            return
+        if not p["password"] and not (p["key_filename"] and os.path.isfile(p["key_filename"])):
+            messagebox.showerror("Fout", "Vul wachtwoord in of kies een SSH-sleutel.")
+            return
+
+        self.log.delete(1.0, tk.END)
+        log(self.log, "Vorige release terugzetten...")
+
+        def run():
+            pm2_name = self.pm2_app_name.get().strip() or "regenboog"
+            ok, err = rollback_release(
+                p["host"], p["port"], p["username"], p["password"], p["key_filename"], remote, self.log, pm2_name
+            )
+            def done():
+                self._save_config()
+                if ok:
+                    messagebox.showinfo("Klaar", "Vorige release is weer actief!")
+                else:
+                    messagebox.showerror("Fout", f"Terugzetten mislukt:\n{err}")
+            self.win.after(0, done)
+
+        threading.Thread(target=run, daemon=True).start()
+
     def _on_close(self):
         self._save_config()
+        ssh_pool.close_all()
         self.win.destroy()
 
     def run(self):
@@ -28,6 +28,13 @@ except ImportError:
     print("\n" + "=" * 60)
     sys.exit(1)
 
+try:
+    from . import ssh_pool  # python -m deploy.<tool>
+    from .deploy_regenboog import CURRENT_LINK, RELEASES_DIR, deploy_release, release_layout, reload_pm2_app
+except ImportError:
+    import ssh_pool  # python deploy/<tool>.py
+    from deploy_regenboog import CURRENT_LINK, RELEASES_DIR, deploy_release, release_layout, reload_pm2_app
+
 
 def log(area, msg, also_print=True):
     """Log message to text area and optionally print."""
@@ -38,22 +45,22 @@ def log(area, msg, also_print=True):
         print(msg)
 
 
+def connect_ssh(host, port, username, password, key_filename, log_area):
+    """Pooled SSHClient from ssh_pool: the whole setup authenticates once. Raises paramiko exceptions."""
+    if ssh_pool.is_connected(host, port, username, password, key_filename):
+        return ssh_pool.get_client(host, port, username, password, key_filename)
+    log(log_area, f"Verbinden met {username}@{host}:{port}...")
+    if key_filename and os.path.isfile(key_filename):
+        log(log_area, f"Gebruik SSH-sleutel: {key_filename}")
+    client = ssh_pool.get_client(host, port, username, password, key_filename)
+    log(log_area, "✓ Verbinding geslaagd!")
+    return client
+
+
 def run_ssh(host, port, username, password, key_filename, commands, log_area, timeout=300):
     """Run commands over SSH. Returns (success, output_lines, error_message)."""
-    client = None
     try:
-        log(log_area, f"Verbinden met {username}@{host}:{port}...")
-        client = paramiko.SSHClient()
-        client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-        kws = {"hostname": host, "port": port, "username": username, "timeout": 10}
-        if key_filename and os.path.isfile(key_filename):
-            kws["key_filename"] = key_filename
-            log(log_area, f"Gebruik SSH-sleutel: {key_filename}")
-        if password:
-            kws["password"] = password
-        
-        client.connect(**kws)
-        log(log_area, "✓ Verbinding geslaagd!")
+        client = connect_ssh(host, port, username, password, key_filename, log_area)
         
         output_lines = []
         for i, cmd in enumerate(commands, 1):
@@ -84,6 +91,7 @@ def run_ssh(host, port, username, password, key_filename, commands, log_area, ti
         log(log_area, f"✗ {error_msg}")
         return False, [], error_msg
     except paramiko.SSHException as e:
+        ssh_pool.discard(host, port, username)
         error_msg = f"SSH fout: {str(e)}\nControleer of SSH service draait op de Raspberry Pi."
         log(log_area, f"✗ {error_msg}")
         return False, [], error_msg
@@ -96,26 +104,13 @@ def run_ssh(host, port, username, password, key_filename, commands, log_area, ti
         error_msg = f"Onverwachte fout ({error_type}): {str(e)}\nControleer je netwerkverbinding en SSH instellingen."
         log(log_area, f"✗ {error_msg}")
         return False, [], error_msg
-    finally:
-        if client:
-            client.close()
-            log(log_area, "SSH verbinding gesloten.")
 
 
 def deploy_files_sftp(host, port, username, password, key_filename, remote_dir, log_area):
     """Upload project files (excluding node_modules, .git, data) via SFTP."""
-    client = None
+    sftp = None
     try:
-        log(log_area, f"SFTP verbinding opzetten naar {username}@{host}:{port}...")
-        client = paramiko.SSHClient()
-        client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-        kws = {"hostname": host, "port": port, "username": username, "timeout": 10}
-        if key_filename and os.path.isfile(key_filename):
-            kws["key_filename"] = key_filename
-        if password:
-            kws["password"] = password
-        client.connect(**kws)
-        log(log_area, "✓ SFTP verbinding geslaagd!")
+        client = connect_ssh(host, port, username, password, key_filename, log_area)
         sftp = client.open_sftp()
 
         def put_dir(local: Path, remote: str):
@@ -155,7 +150,6 @@ def deploy_files_sftp(host, port, username, password, key_filename, remote_dir,
                 log(log_area, f"  Upload: {name}")
                 sftp.put(str(path), f"{remote_dir}/{name}")
         
-        sftp.close()
         log(log_area, "✓ Alle bestanden succesvol geüpload!")
         return True, None
     except paramiko.AuthenticationException:
@@ -163,6 +157,7 @@ def deploy_files_sftp(host, port, username, password, key_filename, remote_dir,
         log(log_area, f"✗ {error_msg}")
         return False, error_msg
     except paramiko.SSHException as e:
+        ssh_pool.discard(host, port, username)
         error_msg = f"SFTP fout: {str(e)}"
         log(log_area, f"✗ {error_msg}")
         return False, error_msg
@@ -172,8 +167,8 @@ def deploy_files_sftp(host, port, username, password, key_filename, remote_dir,
         log(log_area, f"✗ {error_msg}")
         return False, error_msg
     finally:
-        if client:
-            client.close()
+        if sftp:
+            sftp.close()
 
 
 def load_config():
@@ -448,7 +443,17 @@ class SetupApp:
             log(self.log, "\n" + "="*60)
             log(self.log, "[4/6] Bestanden deployen naar Raspberry Pi...")
             log(self.log, "="*60)
-            ok, err = deploy_files_sftp(p["host"], p["port"], p["username"], p["password"], p["key_filename"], remote, self.log)
+            current, err = self._release_layout(p, remote)
+            if err:
+                self._show_result(False, f"❌ Bestanden deployen mislukt\n\n{err}")
+                return
+            if current:
+                # Niet over de draaiende release heen: nieuwe release, die stap 6 met pm2 reload start
+                log(self.log, f"Release-indeling gevonden ({CURRENT_LINK} → {RELEASES_DIR}/{current}): deploy als nieuwe release")
+                ok, err = deploy_release(p["host"], p["port"], p["username"], p["password"], p["key_filename"], remote,
+                                         self.log, reload=False)
+            else:
+                ok, err = deploy_files_sftp(p["host"], p["port"], p["username"], p["password"], p["key_filename"], remote, self.log)
             if not ok:
                 success = False
                 error_msg = f"❌ Bestanden deployen mislukt\n\n{err}\n\n" \
@@ -576,8 +581,31 @@ class SetupApp:
         ]
         return run_ssh(p["host"], p["port"], p["username"], p["password"], p["key_filename"], commands, self.log, timeout=300)
 
+    def _release_layout(self, p, remote_dir):
+        """
+        (current release or None, error message). A releases/ layout without a valid `current` is
+        refused: installing or starting in place would bypass the releases.
+        """
+        try:
+            client = connect_ssh(p["host"], p["port"], p["username"], p["password"], p["key_filename"], self.log)
+            current, present = release_layout(client, remote_dir)
+        except Exception as e:
+            return None, f"Release-indeling controleren mislukt: {str(e)}"
+        if present and not current:
+            return None, (f"{remote_dir}/{RELEASES_DIR} bestaat, maar {CURRENT_LINK} wijst niet naar een release.\n"
+                          f"Herstel eerst met deploy_regenboog.py (Releases aan); in-place installeren en starten "
+                          f"zou naast de releases gebeuren.")
+        return current, None
+
     def _setup_nginx_and_start(self, p, domain, app_port, remote_dir):
-        """Configure nginx and start the app."""
+        """Configure nginx and start the app (from `current` with pm2 reload when the Pi uses releases)."""
+        current = None
+        if remote_dir:
+            current, err = self._release_layout(p, remote_dir)
+            if err:
+                log(self.log, f"✗ {err}")
+                return False, [], err
+
         # Nginx config content
         # Eerst HTTP-only config (voor als SSL nog niet werkt)
         nginx_config_http = f"""server {{
@@ -619,27 +647,16 @@ class SetupApp:
         temp_config = f"/tmp/regenboog_nginx_{domain.replace('.', '_')}.conf"
         
         # Upload config naar temp file
-        client = None
         try:
-            client = paramiko.SSHClient()
-            client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-            kws = {"hostname": p["host"], "port": p["port"], "username": p["username"], "timeout": 10}
-            if p["key_filename"] and os.path.isfile(p["key_filename"]):
-                kws["key_filename"] = p["key_filename"]
-            if p["password"]:
-                kws["password"] = p["password"]
-            client.connect(**kws)
+            client = connect_ssh(p["host"], p["port"], p["username"], p["password"], p["key_filename"], self.log)
             sftp = client.open_sftp()
-            
-            # Schrijf config naar temp file
-            with sftp.file(temp_config, 'w') as f:
-                f.write(nginx_config_http)
-            sftp.close()
-            client.close()
-            client = None
+            try:
+                # Schrijf config naar temp file
+                with sftp.file(temp_config, 'w') as f:
+                    f.write(nginx_config_http)
+            finally:
+                sftp.close()
         except Exception as e:
-            if client:
-                client.close()
             return False, [], f"Config upload mislukt: {str(e)}"
         
         # Commands om nginx te configureren
@@ -660,6 +677,20 @@ class SetupApp:
             "sudo systemctl reload nginx",
         ]
         
+        # Releases: de app draait vanuit current/; reload (met PORT) in plaats van npm install + pm2 start in de map
+        if current:
+            ok, output_lines, err = run_ssh(p["host"], p["port"], p["username"], p["password"], p["key_filename"],
+                                            commands, self.log, timeout=300)
+            if not ok:
+                return ok, output_lines, err
+            log(self.log, f"\nApp starten vanuit {CURRENT_LINK} (release {current})...")
+            try:
+                client = connect_ssh(p["host"], p["port"], p["username"], p["password"], p["key_filename"], self.log)
+                ok, err = reload_pm2_app(client, remote_dir, "regenboog", self.log, app_port=app_port)
+            except Exception as e:
+                ok, err = False, f"PM2 reload mislukt: {str(e)}"
+            return ok, output_lines, err
+
         # Als remote_dir gegeven is, start ook de app
         if remote_dir:
             commands.extend([
@@ -707,6 +738,7 @@ class SetupApp:
 
     def _on_close(self):
         self._save_config()
+        ssh_pool.close_all()
         self.win.destroy()
 
     def run(self):
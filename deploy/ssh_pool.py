@@ -0,0 +1,101 @@
+"""
+Regenboog – gedeelde SSH-verbindingen voor de deploy-, update- en setup-tools.
+
+Per (host, poort, gebruiker) blijft één geauthenticeerde paramiko-transport open, met keep-alive.
+Exec- en SFTP-kanalen worden daarop geopend, zodat een GUI-sessie maar één keer verbindt en
+authenticeert, ook over meerdere knoppen en stappen heen. Een verbinding die weggevallen is, wordt
+bij het volgende gebruik vanzelf opnieuw opgezet.
+
+Gebruik:
+  client = ssh_pool.get_client(host, port, username, password, key_filename)
+  client.exec_command(...) / client.open_sftp()   # kanalen zelf sluiten, de client niet
+  ssh_pool.close_all()                              # bij afsluiten van de tool
+"""
+
+import atexit
+import os
+import threading
+
+import paramiko
+
+CONNECT_TIMEOUT_SEC = 10
+# Houdt de verbinding open achter NAT/routers en merkt een weggevallen Pi op
+KEEPALIVE_SEC = 30
+
+_lock = threading.Lock()
+_pool = {}  # (host, port, username) -> (client, (password, key_filename))
+
+
+def _key(host, port, username):
+    return (host, int(port), username)
+
+
+def _alive(client):
+    transport = client.get_transport()
+    return transport is not None and transport.is_active() and transport.is_authenticated()
+
+
+def _credentials(password, key_filename):
+    return (password or None, key_filename if key_filename and os.path.isfile(key_filename) else None)
+
+
+def is_connected(host, port, username, password=None, key_filename=None):
+    """True if get_client with these arguments would reuse a live pooled connection."""
+    with _lock:
+        entry = _pool.get(_key(host, port, username))
+        return entry is not None and entry[1] == _credentials(password, key_filename) and _alive(entry[0])
+
+
+def get_client(host, port, username, password=None, key_filename=None):
+    """
+    Connected SSHClient for (host, port, username) from the pool. Connects and authenticates only
+    when there is no live transport yet or the credentials changed; raises paramiko exceptions.
+    Callers close the channels they open (exec, SFTP) but never the client itself.
+    """
+    key = _key(host, port, username)
+    credentials = _credentials(password, key_filename)
+    password, key_filename = credentials
+    with _lock:
+        entry = _pool.pop(key, None)
+        if entry is not None:
+            client, used = entry
+            if used == credentials and _alive(client):
+                _pool[key] = entry
+                return client
+            client.close()
+
+        client = paramiko.SSHClient()
+        client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+        kws = {"hostname": host, "port": int(port), "username": username, "timeout": CONNECT_TIMEOUT_SEC}
+        if key_filename:
+            kws["key_filename"] = key_filename
+        if password:
+            kws["password"] = password
+        try:
+            client.connect(**kws)
+        except Exception:
+            client.close()
+            raise
+        client.get_transport().set_keepalive(KEEPALIVE_SEC)
+        _pool[key] = (client, credentials)
+        return client
+
+
+def discard(host, port, username):
+    """Close and forget the pooled connection (e.g. after an SSH error); the next use reconnects."""
+    with _lock:
+        entry = _pool.pop(_key(host, port, username), None)
+    if entry is not None:
+        entry[0].close()
+
+
+def close_all():
+    """Close every pooled connection."""
+    with _lock:
+        entries = list(_pool.values())
+        _pool.clear()
+    for client, _ in entries:
+        client.close()
+
+
+atexit.register(close_all)
@@ -10,6 +10,11 @@ Als je die setup ooit hebt gedraaid, hoef je niets in te vullen.
 
 Als er geen config is, kun je host/gebruiker/wachtwoord ook via environment variabelen
 meegeven: REGENBOOG_PI_HOST, REGENBOOG_PI_USER, REGENBOOG_PI_PASSWORD, REGENBOOG_PI_REMOTE_DIR
+
+Staat de app op de Pi in releases (current → releases/<tijd>, zie deploy_regenboog.py), dan zou
+git pull in de map de draaiende release niet raken: dan worden de lokale bestanden als nieuwe
+release gedeployed en herladen (pm2 reload, zonder onderbreking). Een releases-map zonder geldige
+current wordt geweigerd.
 """
 
 import json
@@ -27,6 +32,13 @@ except ImportError:
     print("Fout: paramiko niet gevonden. Installeer met: pip install paramiko")
     sys.exit(1)
 
+try:
+    from . import ssh_pool  # python -m deploy.<tool>
+    from .deploy_regenboog import CURRENT_LINK, RELEASES_DIR, deploy_release, release_layout
+except ImportError:
+    import ssh_pool  # python deploy/<tool>.py
+    from deploy_regenboog import CURRENT_LINK, RELEASES_DIR, deploy_release, release_layout
+
 
 def load_config():
     """Laad instellingen uit setup_config.json (dezelfde als setup_regenboog_pi.py)."""
@@ -41,20 +53,16 @@ def load_config():
 
 def run_ssh_commands(host, port, username, password, key_filename, commands, timeout=120):
     """Voer commando's via SSH uit. Logt naar stdout. Returns (success, error_message)."""
-    client = None
     try:
-        print(f"Verbinden met {username}@{host}:{port}...")
-        client = paramiko.SSHClient()
-        client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-        kws = {"hostname": host, "port": port, "username": username, "timeout": 10}
-        if key_filename and os.path.isfile(key_filename):
-            kws["key_filename"] = key_filename
-            print("Gebruik SSH-sleutel:", key_filename)
-        if password:
-            kws["password"] = password
-
-        client.connect(**kws)
-        print("Verbinding geslaagd.\n")
+        if ssh_pool.is_connected(host, port, username, password, key_filename):
+            print(f"Bestaande verbinding met {username}@{host}:{port} hergebruikt.\n")
+            client = ssh_pool.get_client(host, port, username, password, key_filename)
+        else:
+            print(f"Verbinden met {username}@{host}:{port}...")
+            if key_filename and os.path.isfile(key_filename):
+                print("Gebruik SSH-sleutel:", key_filename)
+            client = ssh_pool.get_client(host, port, username, password, key_filename)
+            print("Verbinding geslaagd.\n")
 
         for i, cmd in enumerate(commands, 1):
             print(f"[{i}/{len(commands)}] $ {cmd}")
@@ -74,12 +82,26 @@ def run_ssh_commands(host, port, username, password, key_filename, commands, tim
 
     except paramiko.AuthenticationException:
         return False, f"Authenticatie mislukt voor {username}@{host}. Controleer wachtwoord of SSH-sleutel."
+    except paramiko.SSHException as e:
+        ssh_pool.discard(host, port, username)
+        return False, f"Fout: {type(e).__name__}: {e}"
     except Exception as e:
         return False, f"Fout: {type(e).__name__}: {e}"
-    finally:
-        if client:
-            client.close()
-            print("SSH-verbinding gesloten.")
+
+
+def check_release_layout(host, port, username, password, key_filename, remote_dir):
+    """Releasestatus van remote_dir (zie release_layout). Returns (current, releases aanwezig, error_message)."""
+    try:
+        print(f"Verbinden met {username}@{host}:{port}...")
+        client = ssh_pool.get_client(host, port, username, password, key_filename)
+        return (*release_layout(client, remote_dir), None)
+    except paramiko.AuthenticationException:
+        return None, False, f"Authenticatie mislukt voor {username}@{host}. Controleer wachtwoord of SSH-sleutel."
+    except paramiko.SSHException as e:
+        ssh_pool.discard(host, port, username)
+        return None, False, f"Fout: {type(e).__name__}: {e}"
+    except Exception as e:
+        return None, False, f"Fout: {type(e).__name__}: {e}"
 
 
 def main():
@@ -119,19 +141,35 @@ def main():
     ]
 
     print("=" * 60)
-    print("Regenboog – Pi bijwerken (git pull + npm install + pm2 restart)")
+    print("Regenboog – Pi bijwerken")
     print("=" * 60)
     print(f"Host: {host}:{port}  |  Gebruiker: {username}  |  Map: {remote_dir}")
     print("=" * 60)
 
-    success, err = run_ssh_commands(
-        host, port, username, password, key_filename, commands, timeout=300
-    )
+    current, has_releases, err = check_release_layout(host, port, username, password, key_filename, remote_dir)
+    if err:
+        success = False
+    elif current:
+        print(f"Release-indeling gevonden ({CURRENT_LINK} → {RELEASES_DIR}/{current}): "
+              "lokale bestanden als nieuwe release deployen + pm2 reload.")
+        success, err = deploy_release(host, port, username, password, key_filename, remote_dir, None)
+    elif has_releases:
+        success = False
+        err = (f"{remote_dir}/{RELEASES_DIR} bestaat, maar {CURRENT_LINK} wijst niet naar een release. "
+               f"In-place bijwerken (git pull) zou naast de releases gebeuren; herstel eerst met "
+               f"deploy_regenboog.py (Releases aan).")
+    else:
+        print("Geen releases: in-place bijwerken (git pull + npm install + pm2 restart).\n")
+        success, err = run_ssh_commands(
+            host, port, username, password, key_filename, commands, timeout=300
+        )
+    ssh_pool.close_all()
+    print("SSH-verbinding gesloten.")
 
     if not success:
         print("\n❌ Update mislukt:", err, file=sys.stderr)
         sys.exit(1)
-    print("\n✅ Pi is bijgewerkt. App is herstart met pm2.")
+    print("\n✅ Pi is bijgewerkt. " + ("Nieuwe release is actief (pm2 reload)." if current else "App is herstart met pm2."))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,396 @@
+"""
+Verdeelde load test: load-agents op andere laptops (of een paar op localhost) voeren samen één
+gesloten of open scenario uit; de GUI is de coördinator. Een agent (zonder Tkinter, dus ook op een
+headless machine): python scripts/load_test_agents.py --port 8790 --bind 0.0.0.0
+
+Protocol: TCP, één compact JSON-object per regel (UTF-8).
+  coördinator → agent   {"type": "hello", "version"}           agent → {"type": "hello", "version", "name", "time"}
+  coördinator → agent   {"type": "run", "plan", "start_at"}    start_at in de klok van de agent
+  agent → coördinator   {"type": "interval", "metrics", "in_flight"} elke PROCESS_REPORT_SEC (RunMetrics.drain)
+  coördinator → agent   {"type": "stop"}                        annuleren
+  agent → coördinator   {"type": "done", "started", "arrival_timeline"} of {"type": "error", "error"}
+De klokverschuiving per agent wordt bij hello geschat (halve rondreistijd, zoals NTP), zodat alle
+agents op hetzelfde moment beginnen. Agents draaien hun deel met de asyncio-engine, net als de
+werkprocessen van de processes-engine; hun interval-histogrammen worden samengevoegd.
+
+Beveiliging: het protocol heeft geen authenticatie of versleuteling. Wie de poort bereikt, kan de
+agent elke URL laten belasten met het volle aantal gebruikers. Daarom luistert een agent standaard
+alleen op 127.0.0.1; voor laptops in het netwerk expliciet --bind 0.0.0.0 (of het eigen LAN-adres)
+meegeven, alleen op een vertrouwd netwerk en alleen zolang de test loopt.
+"""
+
+import argparse
+import asyncio
+import ipaddress
+import json
+import queue
+import socket
+import threading
+import time
+
+from load_test_core import (
+    PROCESS_REPORT_SEC,
+    ArrivalProfile,
+    ArrivalTimeline,
+    RunMetrics,
+    _raise_fd_limit,
+    _run_load_test_async,
+    _run_open_async,
+    _summarize,
+    _summarize_open,
+)
+from load_test_scenarios import Scenario
+
+PROTOCOL_VERSION = 1
+ENGINE_AGENTS = "agents"
+DEFAULT_AGENT_PORT = 8790
+DEFAULT_AGENT_BIND = "127.0.0.1"  # alleen lokaal; LAN alleen via expliciete --bind (zie docstring)
+AGENT_CONNECT_TIMEOUT_SEC = 5
+# Tijd tussen het versturen van het plan en de gezamenlijke start (alle agents moeten het plan hebben)
+START_DELAY_SEC = 2.0
+# Na de stop nog zo lang wachten op de laatste intervallen van de agents
+STOP_GRACE_SEC = 10.0
+
+
+class AgentError(Exception):
+    """Agent onbereikbaar, of antwoordt niet volgens het protocol."""
+
+
+def parse_agents(text: str) -> list[tuple[str, int]]:
+    """'host:poort, host2' → [(host, poort), (host2, DEFAULT_AGENT_PORT)]; AgentError bij een ongeldige poort."""
+    agents = []
+    for part in text.replace(";", ",").split(","):
+        part = part.strip()
+        if not part:
+            continue
+        host, sep, port = part.rpartition(":")
+        if not sep:
+            host, port = part, str(DEFAULT_AGENT_PORT)
+        try:
+            port = int(port)
+        except ValueError:
+            raise AgentError(f"ongeldige poort in {part!r}") from None
+        if not host or not 0 < port < 65536:
+            raise AgentError(f"ongeldige agent {part!r} (verwacht host:poort)")
+        agents.append((host.strip("[]"), port))
+    return agents
+
+
+def _encode(msg: dict) -> bytes:
+    return (json.dumps(msg, separators=(",", ":")) + "\n").encode("utf-8")
+
+
+# ——— Agent ———
+
+
+def _agent_run(plan: dict, cancel_event: threading.Event, send) -> None:
+    """Eén run van de coördinator uitvoeren en elke PROCESS_REPORT_SEC het interval terugsturen."""
+    metrics = RunMetrics(plan.get("per_second", False))
+    scenario = Scenario(plan["scenario"], plan["scenario_name"]) if plan.get("scenario") else None
+    profile = ArrivalProfile(**plan["profile"]) if plan.get("profile") else None
+
+    async def main():
+        async def reporter():
+            while True:
+                await asyncio.sleep(PROCESS_REPORT_SEC)
+                send({"type": "interval", "metrics": metrics.drain().to_dict(), "in_flight": metrics.in_flight})
+
+        rep = asyncio.create_task(reporter())
+        try:
+            if profile is not None:
+                return await _run_open_async(
+                    plan["base_url"], profile, plan["timeout"], cancel_event, plan["keep_alive"], metrics,
+                    tuple(plan["shard"]), plan["assets"], scenario,
+                )
+            return await _run_load_test_async(
+                plan["base_url"], plan["users"], plan["timeout"], cancel_event, plan["keep_alive"], metrics,
+                plan["first_player_id"], plan["assets"], scenario,
+            )
+        finally:
+            rep.cancel()
+
+    if profile is not None:
+        peak = max(profile.rate, profile.peak_rate) / plan["shard"][1]
+        _raise_fd_limit(int(peak * plan["timeout"] * 2) + 256)
+    else:
+        _raise_fd_limit(plan["users"] + 256)
+    r = asyncio.run(main())
+    send({"type": "interval", "metrics": metrics.drain().to_dict(), "in_flight": 0})
+    send({"type": "done", "started": r["concurrent"], "arrival_timeline": r.get("arrival_timeline")})
+
+
+def _serve_coordinator(conn: socket.socket, name: str, log) -> None:
+    """Berichten van één coördinator afhandelen tot die de verbinding sluit; de run loopt in een eigen thread."""
+    lock = threading.Lock()
+    cancel_event = threading.Event()
+    worker = None
+
+    def send(msg: dict) -> None:
+        try:
+            with lock:
+                conn.sendall(_encode(msg))
+        except OSError:
+            cancel_event.set()  # coördinator weg: niet doorgaan met belasten
+
+    def run(plan: dict, start_at: float) -> None:
+        if cancel_event.wait(max(0.0, start_at - time.time())):
+            send({"type": "done", "started": 0, "arrival_timeline": None})
+            return
+        log(f"Run gestart: {plan['base_url']} – "
+            + (f"open model, aankomst {plan['shard'][0] + 1} van elke {plan['shard'][1]}"
+               if plan.get("profile") else f"{plan['users']} gebruikers"))
+        try:
+            _agent_run(plan, cancel_event, send)
+        except Exception as e:
+            # Elke fout melden: zonder done of error wacht de coördinator tot iemand stopt
+            send({"type": "error", "error": f"{type(e).__name__}: {e}"})
+        log("Run klaar.")
+
+    with conn, conn.makefile("r", encoding="utf-8") as fp:
+        for line in fp:
+            try:
+                msg = json.loads(line)
+            except ValueError:
+                send({"type": "error", "error": "ongeldig bericht (geen JSON)"})
+                continue
+            kind = msg.get("type")
+            if kind == "hello":
+                send({"type": "hello", "version": PROTOCOL_VERSION, "name": name, "time": time.time()})
+            elif kind == "run":
+                if worker is not None and worker.is_alive():
+                    send({"type": "error", "error": "agent is al bezig met een run"})
+                    continue
+                cancel_event.clear()
+                worker = threading.Thread(target=run, args=(msg["plan"], msg["start_at"]), daemon=True)
+                worker.start()
+            elif kind == "stop":
+                cancel_event.set()
+        cancel_event.set()
+        if worker is not None:
+            worker.join()
+
+
+def _is_loopback(host: str) -> bool:
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return host == "localhost"
+
+
+def run_agent(host: str = DEFAULT_AGENT_BIND, port: int = DEFAULT_AGENT_PORT,
+              stop_event: threading.Event | None = None, log=print) -> None:
+    """Luister op host:port en bedien coördinatoren één voor één, tot stop_event (of Ctrl+C)."""
+    stop_event = stop_event or threading.Event()
+    name = f"{socket.gethostname()}:{port}"
+    with socket.create_server((host, port)) as server:
+        server.settimeout(0.5)
+        log(f"Load-agent {name} luistert op {host}:{port} (Ctrl+C om te stoppen)")
+        if not _is_loopback(host):
+            log("⚠ Bereikbaar vanaf het netwerk zonder authenticatie: iedereen die deze poort bereikt kan runs "
+                "starten. Alleen op een vertrouwd netwerk gebruiken.")
+        while not stop_event.is_set():
+            try:
+                conn, addr = server.accept()
+            except socket.timeout:
+                continue
+            conn.settimeout(None)
+            log(f"Coördinator verbonden: {addr[0]}:{addr[1]}")
+            _serve_coordinator(conn, name, log)
+            log("Coördinator losgekoppeld.")
+
+
+# ——— Coördinator ———
+
+
+class _AgentLink:
+    """Verbinding met één agent: hello met klokschatting, daarna berichten naar een gedeelde queue."""
+
+    def __init__(self, index: int, host: str, port: int):
+        self.index = index
+        self.address = f"{host}:{port}"
+        self.done = False
+        try:
+            self.sock = socket.create_connection((host, port), timeout=AGENT_CONNECT_TIMEOUT_SEC)
+            self.fp = self.sock.makefile("r", encoding="utf-8")
+            t0 = time.time()
+            self.sock.sendall(_encode({"type": "hello", "version": PROTOCOL_VERSION}))
+            reply = json.loads(self.fp.readline() or "{}")
+            t1 = time.time()
+        except socket.timeout:
+            raise AgentError(f"agent {self.address}: geen antwoord (bezig met een andere coördinator?)") from None
+        except (OSError, ValueError) as e:
+            raise AgentError(f"agent {self.address}: {e}") from None
+        if reply.get("type") != "hello" or reply.get("version") != PROTOCOL_VERSION:
+            self.sock.close()
+            raise AgentError(f"agent {self.address}: onverwacht antwoord of andere protocolversie")
+        self.name = reply.get("name") or self.address
+        self.offset = reply["time"] - (t0 + t1) / 2  # klok agent − klok coördinator
+        self.rtt_ms = round((t1 - t0) * 1000, 1)
+        self.sock.settimeout(None)
+
+    def send(self, msg: dict) -> None:
+        try:
+            self.sock.sendall(_encode(msg))
+        except OSError:
+            pass  # de reader meldt de verbroken verbinding
+
+    def start_reader(self, out_queue: queue.Queue) -> None:
+        def read():
+            try:
+                for line in self.fp:
+                    out_queue.put((self.index, json.loads(line)))
+            except (OSError, ValueError) as e:
+                if not self.done:
+                    out_queue.put((self.index, {"type": "error", "error": f"{type(e).__name__}: {e}"}))
+                return
+            if not self.done:
+                out_queue.put((self.index, {"type": "error", "error": "verbinding verbroken"}))
+
+        threading.Thread(target=read, name=f"agent-{self.index}", daemon=True).start()
+
+    def close(self) -> None:
+        """shutdown() en niet alleen close(): de reader-thread houdt via makefile() de socket anders open."""
+        self.done = True
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.fp.close()
+        self.sock.close()
+
+
+def run_distributed(
+    agents: list[tuple[str, int]],
+    base_url: str,
+    timeout_sec: int,
+    cancel_flag: threading.Event,
+    keep_alive: bool = True,
+    metrics: RunMetrics | None = None,
+    concurrent: int | None = None,
+    profile: ArrivalProfile | None = None,
+    assets: bool = False,
+    scenario: Scenario | None = None,
+) -> dict:
+    """
+    Zelfde verdeling als run_multiprocess, maar over load-agents: gesloten model = concurrent
+    gebruikers verdeeld over de agents, open model = elke agent neemt elke N-de aankomst van profile.
+    Alle agents starten op hetzelfde moment (START_DELAY_SEC na het plan). AgentError als een agent
+    niet bereikbaar is; een agent die halverwege wegvalt staat in r["agent_errors"].
+    """
+    base_url = base_url.rstrip("/")
+    metrics = metrics or RunMetrics()
+    if profile is None:
+        agents = agents[:max(1, concurrent)]
+    links = []
+    try:
+        for i, (host, port) in enumerate(agents):
+            links.append(_AgentLink(i, host, port))
+    except AgentError:
+        for link in links:
+            link.close()
+        raise
+    count = len(links)
+    out_queue: queue.Queue = queue.Queue()
+    start_epoch = time.time() + START_DELAY_SEC
+    base = {
+        "base_url": base_url, "timeout": timeout_sec, "keep_alive": keep_alive, "assets": assets,
+        "scenario": scenario.data if scenario else None, "scenario_name": scenario.name if scenario else None,
+        "per_second": metrics.per_second,
+    }
+    if profile is not None:
+        base["profile"] = {"kind": profile.kind, "rate": profile.rate, "peak_rate": profile.peak_rate,
+                           "duration_sec": profile.duration_sec}
+    stats = []
+    first_player_id = 1
+    for link in links:
+        plan = dict(base, shard=[link.index, count])
+        users = 0
+        if profile is None:
+            users = concurrent // count + (1 if link.index < concurrent % count else 0)
+            plan.update(users=users, first_player_id=first_player_id)
+            first_player_id += users
+        stats.append({"agent": link.name, "rtt_ms": link.rtt_ms, "offset_ms": round(link.offset * 1000, 1),
+                      "users": users, "started": 0, "requests": 0, "errors": 0})
+        link.start_reader(out_queue)
+        link.send({"type": "run", "plan": plan, "start_at": start_epoch + link.offset})
+    start = time.perf_counter() + (start_epoch - time.time())
+
+    in_flight = [0] * count
+    finished = set()
+    timelines = []
+    errors = []
+    stop_sent = None
+    while len(finished) < count:
+        if cancel_flag.is_set() and stop_sent is None:
+            for link in links:
+                link.send({"type": "stop"})
+            stop_sent = time.perf_counter()
+        if stop_sent is not None and time.perf_counter() - stop_sent > STOP_GRACE_SEC:
+            errors += [f"{links[i].name}: geen antwoord na stop" for i in range(count) if i not in finished]
+            break
+        try:
+            index, msg = out_queue.get(timeout=0.2)
+        except queue.Empty:
+            continue
+        if index in finished:
+            continue
+        kind = msg.get("type")
+        if kind == "interval":
+            part = RunMetrics.from_dict(msg["metrics"])
+            metrics.merge(part)
+            stats[index]["requests"] += sum(s.histogram.count for s in part.endpoints.values())
+            stats[index]["errors"] += sum(s.errors for s in part.endpoints.values())
+            in_flight[index] = msg.get("in_flight", 0)
+            metrics.set_in_flight(sum(in_flight))
+        elif kind == "done":
+            finished.add(index)
+            stats[index]["started"] = msg.get("started", 0)
+            if msg.get("arrival_timeline"):
+                timelines.append(msg["arrival_timeline"])
+        else:
+            errors.append(f"{links[index].name}: {msg.get('error', msg)}")
+            finished.add(index)
+    for link in links:
+        link.close()
+
+    total_ms = int((time.perf_counter() - start) * 1000)
+    started = sum(s["started"] for s in stats)
+    if profile is not None:
+        timeline = ArrivalTimeline(profile.duration_sec)
+        for rows in timelines:
+            for row in rows[:timeline.seconds]:
+                timeline.achieved[row["t"]] += row["achieved"]
+                timeline.peak[row["t"]] += row["in_flight"]
+        r = _summarize_open(base_url, profile, total_ms, metrics, timeline, started, ENGINE_AGENTS, keep_alive, assets)
+    else:
+        r = _summarize(base_url, concurrent, total_ms, metrics, ENGINE_AGENTS, keep_alive, assets=assets)
+    r["agents"] = stats
+    if errors:
+        r["agent_errors"] = errors
+    return r
+
+
+def agent_summary_lines(r: dict) -> list[str]:
+    """Per agent: aandeel, requests, fouten en de geschatte klokverschuiving (ms)."""
+    lines = [f"{'Agent':<28} {'gebruikers':>10} {'gestart':>8} {'requests':>9} {'fouten':>7} {'rtt':>6} {'klok':>8}"]
+    for a in r["agents"]:
+        lines.append(f"{a['agent']:<28} {a['users'] or '–':>10} {a['started']:>8} {a['requests']:>9} "
+                     f"{a['errors']:>7} {a['rtt_ms']:>6.1f} {a['offset_ms']:>+8.1f}")
+    return lines + [f"⚠ {err}" for err in r.get("agent_errors", [])]
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Load-agent voor een verdeelde load test (coördinator: de GUI)")
+    parser.add_argument("--port", type=int, default=DEFAULT_AGENT_PORT, help=f"Poort (standaard {DEFAULT_AGENT_PORT})")
+    parser.add_argument("--bind", default=DEFAULT_AGENT_BIND,
+                        help=f"Adres (standaard {DEFAULT_AGENT_BIND}, alleen deze pc; 0.0.0.0 = bereikbaar "
+                        "vanaf het netwerk, zonder authenticatie: alleen op een vertrouwd netwerk)")
+    args = parser.parse_args(argv)
+    try:
+        run_agent(args.bind, args.port)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+"""
+Capaciteit zoeken: korte proefruns met oplopende belasting tot een SLO (p95 en foutpercentage)
+niet meer gehaald wordt, daarna bisectie tussen de laatste geslaagde en eerste gefaalde belasting.
+Gesloten model: belasting = gelijktijdige gebruikers; open model: aankomstritme (spelers/sec,
+constant profiel). Alle proeven samen vormen de curve belasting → latency, die als CSV of JSON
+bewaard kan worden.
+"""
+
+import csv
+import json
+import threading
+import time
+from typing import Callable, NamedTuple
+
+from load_test_core import (
+    MIN_CONCURRENT,
+    MODEL_CLOSED,
+    MODEL_OPEN,
+    PROFILE_CONSTANT,
+    ArrivalProfile,
+    LatencyHistogram,
+    RunMetrics,
+    max_concurrent_for,
+    run_open_model,
+    run_with_engine,
+)
+from load_test_scenarios import Scenario
+
+DEFAULT_SLO_P95_MS = 500
+DEFAULT_SLO_ERROR_PCT = 1.0
+DEFAULT_TRIAL_SEC = 30  # duur van één proef in het open model
+COOLDOWN_SEC = 5  # rust tussen proeven zodat wachtrijen op de Pi leeglopen
+SEARCH_PRECISION = 0.05  # stop als het zoekinterval kleiner is dan 5% van de gevonden capaciteit
+MIN_RATE_STEP = 0.1  # kleinste stap in spelers/sec (open model)
+MAX_TRIALS = 20
+
+CURVE_FIELDS = (
+    "load", "passed", "requests", "rps", "error_pct", "p50", "p95", "p99", "p99_corrected", "journey_p95",
+    "achieved_rate",
+)
+
+
+class SLO(NamedTuple):
+    """Doel per proef: p95 van alle requests en het percentage mislukte requests."""
+
+    p95_ms: float = DEFAULT_SLO_P95_MS
+    error_pct: float = DEFAULT_SLO_ERROR_PCT
+
+    def check(self, point: dict) -> bool:
+        return point["requests"] > 0 and point["p95"] < self.p95_ms and point["error_pct"] < self.error_pct
+
+    def describe(self) -> str:
+        return f"p95 < {self.p95_ms:g} ms en fouten < {self.error_pct:g}%"
+
+
+def trial_point(load: float, r: dict) -> dict:
+    """Eén punt van de curve uit een run-resultaat: latency over alle requests samen."""
+    total = LatencyHistogram()
+    for data in r.get("histograms", {}).values():
+        total.merge(LatencyHistogram.from_dict(data))
+    errors = sum(e["errors"] for e in r.get("endpoints", {}).values())
+    duration_sec = r.get("total_ms", 0) / 1000
+    point = {
+        "load": load,
+        "requests": total.count,
+        "rps": round(total.count / duration_sec, 1) if duration_sec > 0 else 0.0,
+        "error_pct": round(100 * errors / total.count, 2) if total.count else 0.0,
+        "p50": round(total.percentile(0.50)),
+        "p95": round(total.percentile(0.95)),
+        "p99": round(total.percentile(0.99)),
+        "p99_corrected": round(r.get("latency", {}).get("corrected", {}).get("p99", 0)),
+        "journey_p95": r.get("p95", 0),
+    }
+    if r.get("model") == MODEL_OPEN:
+        point["achieved_rate"] = r.get("achieved_rate", 0.0)
+    return point
+
+
+def capacity_search(
+    trial: Callable[[float], dict],
+    start: float,
+    limit: float,
+    slo: SLO,
+    cancel_flag: threading.Event,
+    integer: bool = True,
+    on_trial: Callable[[dict], None] | None = None,
+) -> dict:
+    """
+    Zoek de hoogste belasting tussen 0 en limit die de SLO haalt. trial(load) voert één proef uit en
+    geeft een punt (zie trial_point) terug. Eerst verdubbelen vanaf start tot een proef faalt of limit
+    bereikt is, dan bisectie. integer=True: belasting in hele gebruikers, anders stappen van 0,1/s.
+    """
+    step = 1 if integer else MIN_RATE_STEP
+    curve = []
+
+    def snap(x: float) -> float:
+        return max(step, int(x) if integer else round(x, 1))
+
+    def measure(load: float) -> bool | None:
+        """None = afgebroken; een half uitgevoerde proef telt niet mee."""
+        if curve and cancel_flag.wait(COOLDOWN_SEC):
+            return None
+        point = trial(load)
+        if cancel_flag.is_set():
+            return None
+        point["passed"] = slo.check(point)
+        curve.append(point)
+        if on_trial is not None:
+            on_trial(point)
+        return point["passed"]
+
+    good, bad = None, None
+    load = snap(min(start, limit))
+    while not cancel_flag.is_set() and len(curve) < MAX_TRIALS:
+        passed = measure(load)
+        if passed is None:
+            break
+        if not passed:
+            bad = load
+            break
+        good = load
+        if load >= limit:
+            break
+        load = snap(min(limit, load * 2))
+
+    while bad is not None and not cancel_flag.is_set() and len(curve) < MAX_TRIALS:
+        low = good or 0
+        if bad - low <= max(step, low * SEARCH_PRECISION):
+            break
+        mid = snap((low + bad) / 2)
+        if mid <= low or mid >= bad:
+            break
+        passed = measure(mid)
+        if passed is None:
+            break
+        if passed:
+            good = mid
+        else:
+            bad = mid
+
+    return {
+        "slo": slo._asdict(),
+        "slo_text": slo.describe(),
+        "capacity": good,
+        "first_failure": bad,
+        "limit": limit,
+        "limit_reached": good is not None and good >= limit,
+        "trials": len(curve),
+        "cancelled": cancel_flag.is_set(),
+        "curve": sorted(curve, key=lambda p: p["load"]),
+    }
+
+
+def run_capacity_search(
+    engine: str,
+    base_url: str,
+    model: str,
+    start: float,
+    limit: float,
+    slo: SLO,
+    timeout_sec: int,
+    cancel_flag: threading.Event,
+    keep_alive: bool = True,
+    assets: bool = False,
+    scenario: Scenario | None = None,
+    trial_sec: float = DEFAULT_TRIAL_SEC,
+    on_trial: Callable[[dict], None] | None = None,
+    on_metrics: Callable[[RunMetrics], None] | None = None,
+) -> dict:
+    """
+    Capaciteit zoeken met de gewone runs als proef. model gesloten: start/limit = gebruikers
+    (begrensd door de engine); open: start/limit = spelers/sec, elke proef trial_sec lang.
+    on_metrics krijgt per proef de nieuwe RunMetrics (live-paneel), on_trial elk gemeten punt.
+    """
+    def trial(load: float) -> dict:
+        metrics = RunMetrics()
+        if on_metrics is not None:
+            on_metrics(metrics)
+        if model == MODEL_OPEN:
+            profile = ArrivalProfile(PROFILE_CONSTANT, load, load, trial_sec)
+            r = run_open_model(
+                engine, base_url, profile, timeout_sec, cancel_flag, keep_alive, metrics, assets, scenario
+            )
+        else:
+            r = run_with_engine(
+                engine, base_url, int(load), timeout_sec, cancel_flag, keep_alive, metrics, assets, scenario
+            )
+        return trial_point(load, r)
+
+    if model == MODEL_OPEN:
+        start, limit = max(MIN_RATE_STEP, start), max(MIN_RATE_STEP, limit)
+    else:
+        limit = max(MIN_CONCURRENT, min(max_concurrent_for(engine), int(limit)))
+    search_start = time.perf_counter()
+    r = capacity_search(trial, start, limit, slo, cancel_flag, integer=model != MODEL_OPEN, on_trial=on_trial)
+    r.update({
+        "base_url": base_url,
+        "engine": engine,
+        "model": model,
+        "unit": "spelers/sec" if model == MODEL_OPEN else "gebruikers",
+        "trial_sec": trial_sec if model == MODEL_OPEN else None,
+        "total_ms": int((time.perf_counter() - search_start) * 1000),
+    })
+    return r
+
+
+def trial_line(point: dict, unit: str) -> str:
+    verdict = "ok" if point["passed"] else "SLO gemist"
+    return (
+        f"{point['load']:>8g} {unit}: p95 {point['p95']:>6} ms  fouten {point['error_pct']:>5.2f}%  "
+        f"{point['rps']:>7.1f} req/s  → {verdict}"
+    )
+
+
+def capacity_summary_lines(r: dict) -> list[str]:
+    """Conclusie plus de curve, gesorteerd op belasting."""
+    unit = r["unit"]
+    lines = [f"SLO:               {r['slo_text']}"]
+    if r["capacity"] is None:
+        lines.append(f"Capaciteit:        SLO niet gehaald, ook niet bij {r['first_failure']:g} {unit}")
+    elif r["limit_reached"]:
+        lines.append(f"Capaciteit:        ≥ {r['capacity']:g} {unit} (zoeklimiet bereikt, SLO nog gehaald)")
+    else:
+        lines.append(
+            f"Capaciteit:        {r['capacity']:g} {unit} (eerste overschrijding bij {r['first_failure']:g})"
+        )
+    if r["cancelled"]:
+        lines.append("Gestopt:           zoektocht afgebroken, resultaat is voorlopig")
+    lines.append(f"Proeven:           {r['trials']} in {r['total_ms'] / 1000:.0f} s")
+    lines.append("")
+    header = f"{'belasting':>10} {'req/s':>7} {'fout%':>6} {'p50':>6} {'p95':>6} {'p99':>6}  SLO"
+    if r["model"] == MODEL_OPEN:
+        header += "   behaald/s"
+    lines.append(header)
+    for p in r["curve"]:
+        line = (
+            f"{p['load']:>10g} {p['rps']:>7.1f} {p['error_pct']:>6.2f} {p['p50']:>6} {p['p95']:>6} "
+            f"{p['p99']:>6}  {'ok ' if p['passed'] else 'mis'}"
+        )
+        if r["model"] == MODEL_OPEN:
+            line += f"   {p.get('achieved_rate', 0):>9g}"
+        lines.append(line)
+    return lines
+
+
+def write_curve(r: dict, path: str) -> None:
+    """Curve belasting → latency opslaan: .json = volledig resultaat, anders CSV (één rij per proef)."""
+    if path.lower().endswith(".json"):
+        with open(path, "w", encoding="utf-8") as fp:
+            json.dump(r, fp, indent=2, ensure_ascii=False)
+        return
+    with open(path, "w", encoding="utf-8", newline="") as fp:
+        writer = csv.DictWriter(fp, fieldnames=CURVE_FIELDS, extrasaction="ignore")
+        writer.writeheader()
+        for p in r["curve"]:
+            writer.writerow(p)
+
+
+def default_curve_name(r: dict) -> str:
+    model = "open" if r["model"] == MODEL_OPEN else MODEL_CLOSED
+    return f"capaciteit-{model}-{time.strftime('%Y%m%d-%H%M%S')}.csv"
@@ -0,0 +1,808 @@
+#!/usr/bin/env python3
+"""
+Load test voor Regenboog Raspberry Pi server – headless (zonder Tkinter).
+Zelfde scenario's als load_test_pi_gui.py, bedoeld voor scripts en nachtelijke capaciteitschecks.
+
+Gebruik:
+  python scripts/load_test_cli.py --url https://regenboog.jbouquet.be --users 50
+  python scripts/load_test_cli.py --url http://192.168.1.10:3001 --scenario ramp --rate 2 --peak-rate 20 --duration 300
+  python scripts/load_test_cli.py --url ... --json rapport.json --csv rapport.csv --baseline baseline.json
+  python scripts/load_test_cli.py --url http://192.168.1.10:3001 --scenario multiplayer --users 40 --duration 120
+  python scripts/load_test_cli.py --url ... --scenario-file speelkwartier --scenario constant --rate 5 --duration 300
+  python scripts/load_test_cli.py --url http://192.168.1.10:3001 --scenario replay --replay-log access.log.gz --replay-speed 5
+  python scripts/load_test_cli.py --url http://192.168.1.10:3001 --scenario schrijfdruk --writers 30 --readers 20 --duration 60
+  python scripts/load_test_cli.py --url http://192.168.1.10:3001 --scenario hartslag --tabs 300 --admin-password ...
+  python scripts/load_test_cli.py --url https://regenboog.jbouquet.be --users 200 --engine asyncio --pi-monitor
+  python scripts/load_test_cli.py --url ... --capacity --slo-p95 500 --slo-errors 1 --users 10 --csv curve.csv
+  python scripts/load_test_cli.py --benchmark --engine asyncio --bench-users 10,100,500 --standin-latency 5
+  python scripts/load_test_cli.py --standin --users 50
+  python scripts/load_test_cli.py --url ... --users 200 --profile --json rapport.json  (→ rapport.folded)
+  python scripts/load_test_cli.py --history-list 20
+  python scripts/load_test_cli.py --history-compare 12 17
+
+Elke run en capaciteitszoektocht komt in de geschiedenis (scripts/loadtest_history.db), tenzij --no-history.
+
+Exitcodes: 0 = ok, 1 = regressie t.o.v. de baseline (p95 of foutpercentage), 2 = ongeldige argumenten of een
+onleesbare/ongeldige baseline.
+"""
+
+import argparse
+import csv
+import json
+import os
+import signal
+import sqlite3
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+
+from load_test_core import (
+    DEFAULT_CONCURRENT,
+    DEFAULT_DURATION,
+    DEFAULT_ENGINE,
+    DEFAULT_PEAK_RATE,
+    DEFAULT_RATE,
+    DEFAULT_TIMEOUT,
+    DEFAULT_URL,
+    ENGINES,
+    MAX_CONCURRENT_ASYNC,
+    MIN_CONCURRENT,
+    MODEL_CLOSED,
+    MODEL_CONTENTION,
+    MODEL_MULTIPLAYER,
+    MODEL_OPEN,
+    MODEL_REPLAY,
+    MODEL_SOAK,
+    PROFILES,
+    ArrivalProfile,
+    RunMetrics,
+    endpoint_table_lines,
+    max_concurrent_for,
+    omission_lines,
+    run_open_model,
+    run_with_engine,
+    transfer_summary_lines,
+)
+from load_test_capacity import (
+    DEFAULT_SLO_ERROR_PCT,
+    DEFAULT_SLO_P95_MS,
+    DEFAULT_TRIAL_SEC,
+    SLO,
+    capacity_summary_lines,
+    run_capacity_search,
+    trial_line,
+    write_curve,
+)
+from load_test_contention import (
+    DEFAULT_BURST_INTERVAL_SEC,
+    DEFAULT_CONTENTION_GAME,
+    DEFAULT_READ_INTERVAL_SEC,
+    DEFAULT_READERS,
+    DEFAULT_WRITERS,
+    MAX_CONTENTION_CLIENTS,
+    burst_timeline_lines,
+    contention_summary_lines,
+    run_contention,
+)
+from load_test_heartbeat import (
+    DEFAULT_PAGE_MINUTES,
+    DEFAULT_SOAK_SEC,
+    DEFAULT_TABS,
+    MAX_TABS,
+    run_soak,
+    soak_summary_lines,
+    soak_timeline_lines,
+)
+from load_test_history import DEFAULT_HISTORY_DB, DEFAULT_HISTORY_LIMIT, RunHistory, compare_lines, trend_lines
+from load_test_profiler import DEFAULT_PROFILE_INTERVAL_MS, StackSampler, profile_paths, profile_summary_lines
+from load_test_scenarios import DEFAULT_SCENARIO, ScenarioError, load_scenario
+from load_test_pi_monitor import (
+    SSH_CONFIG_FILE,
+    PiMonitorError,
+    attach_pi_results,
+    pi_summary_lines,
+    pi_timeline_lines,
+    start_pi_monitor,
+)
+from load_test_replay import DEFAULT_ACCESS_LOG, replay_summary_lines, run_replay
+from load_test_socketio import DEFAULT_GAME, GAMES, games_timeline_lines, multiplayer_summary_lines, run_multiplayer
+from load_test_standin import (
+    BENCH_FIELDS,
+    BENCH_LEVEL_SEC,
+    BENCH_USERS,
+    DEFAULT_STANDIN_LATENCY_MS,
+    DEFAULT_STANDIN_PAYLOAD,
+    StandInServer,
+    benchmark_level_line,
+    benchmark_summary_lines,
+    run_benchmark,
+)
+
+# Scenario "gesloten" = N gebruikers tegelijk, 1 ronde; de profielen = open model;
+# "multiplayer" = --users spelers in paren via Socket.IO gedurende --duration;
+# "replay" = verkeer uit de nginx access log (--replay-log) op --replay-speed;
+# "schrijfdruk" = --writers scores per burst tegen --readers leaderboard-lezers op --game, gedurende --duration;
+# "hartslag" = --tabs open tabbladen met analytics-heartbeats gedurende --duration (standaard een uur)
+SCENARIOS = (MODEL_CLOSED,) + PROFILES + (MODEL_MULTIPLAYER, MODEL_REPLAY, MODEL_CONTENTION, MODEL_SOAK)
+# Modellen met eigen verkeer: geen routes uit --scenario-file en geen capaciteit zoeken
+OWN_TRAFFIC = (MODEL_MULTIPLAYER, MODEL_REPLAY, MODEL_CONTENTION, MODEL_SOAK)
+
+# Standaardtoleranties voor de baseline-vergelijking
+DEFAULT_P95_TOLERANCE = 20.0  # procent trager dan de baseline
+DEFAULT_ERROR_TOLERANCE = 1.0  # procentpunt meer fouten dan de baseline
+DEFAULT_MIN_DELTA_MS = 20.0  # kleinere p95-verschillen zijn ruis
+DEFAULT_PROGRESS_SEC = 10
+
+EXIT_OK = 0
+EXIT_REGRESSION = 1
+EXIT_USAGE = 2
+
+CSV_FIELDS = (
+    "endpoint", "count", "errors", "error_rate", "rps", "mean", "p50", "p90", "p95", "p99", "p999", "max",
+    "p95_corrected", "p99_corrected", "filled",
+)
+
+
+def _error_rate(errors: int, total: int) -> float:
+    """Foutpercentage (0–100)."""
+    return round(100.0 * errors / total, 3) if total else 0.0
+
+
+def build_report(r: dict, settings: dict) -> dict:
+    """Machineleesbaar rapport: result dict zonder de ruwe outcomes, plus instellingen en foutvoorbeelden."""
+    report = {k: v for k, v in r.items() if k != "outcomes"}
+    report["generated_at"] = datetime.now(timezone.utc).isoformat(timespec="seconds")
+    report["settings"] = settings
+    report["error_rate"] = _error_rate(r["fail_count"], r["success_count"] + r["fail_count"])
+    for e in report["endpoints"].values():
+        e["error_rate"] = _error_rate(e["errors"], e["count"])
+    samples = []
+    for o in r["outcomes"]:
+        for x in o.get("results", []):
+            if not x.get("ok", False) and x.get("required", True):
+                samples.append({"path": x.get("path", "?"), "error": x.get("error") or x.get("status_code")})
+                break
+        if len(samples) >= 5:
+            break
+    report["error_samples"] = samples
+    return report
+
+
+def write_json_report(report: dict, path: str) -> None:
+    with open(path, "w", encoding="utf-8") as fp:
+        json.dump(report, fp, indent=2)
+
+
+def write_csv_report(report: dict, path: str) -> None:
+    """Eén rij per endpoint plus een rij "TOTAAL" met de tijd per bezoeker (journey)."""
+    with open(path, "w", encoding="utf-8", newline="") as fp:
+        writer = csv.DictWriter(fp, fieldnames=CSV_FIELDS)
+        writer.writeheader()
+        for key, e in report["endpoints"].items():
+            writer.writerow({"endpoint": key, **{f: e.get(f, "") for f in CSV_FIELDS[1:]}})
+        writer.writerow({
+            "endpoint": "TOTAAL (per bezoeker)",
+            "count": report["success_count"] + report["fail_count"],
+            "errors": report["fail_count"],
+            "error_rate": report["error_rate"],
+            "mean": report["avg_ms"],
+            "p50": report["p50"],
+            "p90": "",
+            "p95": report["p95"],
+            "p99": "",
+            "p999": "",
+            "max": "",
+            "rps": "",
+            # Aanvulling voor coordinated omission bestaat alleen over alle endpoints samen
+            "p95_corrected": report.get("latency", {}).get("corrected", {}).get("p95", ""),
+            "p99_corrected": report.get("latency", {}).get("corrected", {}).get("p99", ""),
+            "filled": report.get("latency", {}).get("filled", ""),
+        })
+
+
+def load_report(path: str) -> dict:
+    """
+    Lees een eerder JSON-rapport als baseline. ValueError als het geen rapport is (geen object,
+    of p95/error_rate/endpoints ontbreken), zodat de poort niet op een kapotte baseline vergelijkt.
+    """
+    with open(path, "r", encoding="utf-8") as fp:
+        report = json.load(fp)
+    if not isinstance(report, dict):
+        raise ValueError(f"geen rapport maar {type(report).__name__}")
+    missing = [key for key in ("p95", "error_rate", "endpoints") if key not in report]
+    if missing:
+        raise ValueError(f"ontbrekende velden: {', '.join(missing)}")
+    if not isinstance(report["endpoints"], dict) or not all(
+        isinstance(e, dict) for e in report["endpoints"].values()
+    ):
+        raise ValueError("endpoints is geen object met een rapport per endpoint")
+    for key in ("p95", "error_rate"):
+        if not isinstance(report[key], (int, float)) or isinstance(report[key], bool):
+            raise ValueError(f"{key} is geen getal")
+    return report
+
+
+def compare_to_baseline(
+    report: dict,
+    baseline: dict,
+    p95_tolerance: float = DEFAULT_P95_TOLERANCE,
+    error_tolerance: float = DEFAULT_ERROR_TOLERANCE,
+    min_delta_ms: float = DEFAULT_MIN_DELTA_MS,
+) -> tuple[list[str], list[str]]:
+    """
+    Vergelijk met een eerder rapport. Regressie als p95 meer dan p95_tolerance procent (en minstens
+    min_delta_ms) hoger ligt, of het foutpercentage meer dan error_tolerance procentpunt stijgt.
+    Geldt voor het totaal per bezoeker en per endpoint dat in beide rapporten voorkomt.
+    Returns (regressies, vergelijkingsregels).
+    """
+    regressions = []
+    lines = [f"{'Meting':<40} {'baseline':>10} {'nu':>10} {'verschil':>10}"]
+
+    def check(name: str, base_p95: float, cur_p95: float, base_err: float, cur_err: float) -> None:
+        delta = cur_p95 - base_p95
+        pct = (100.0 * delta / base_p95) if base_p95 else 0.0
+        lines.append(f"{name + ' p95 (ms)':<40} {base_p95:>10.0f} {cur_p95:>10.0f} {pct:>+9.1f}%")
+        lines.append(f"{name + ' fouten (%)':<40} {base_err:>10.2f} {cur_err:>10.2f} {cur_err - base_err:>+9.2f}pp")
+        if delta > min_delta_ms and cur_p95 > base_p95 * (1 + p95_tolerance / 100):
+            regressions.append(f"{name}: p95 {base_p95:.0f} → {cur_p95:.0f} ms (+{pct:.0f}%, max +{p95_tolerance:g}%)")
+        if cur_err - base_err > error_tolerance:
+            regressions.append(
+                f"{name}: fouten {base_err:.2f}% → {cur_err:.2f}% (+{cur_err - base_err:.2f}pp, max +{error_tolerance:g}pp)"
+            )
+
+    check("TOTAAL", baseline.get("p95", 0), report["p95"], baseline.get("error_rate", 0.0), report["error_rate"])
+    base_endpoints = baseline.get("endpoints", {})
+    for key, e in report["endpoints"].items():
+        b = base_endpoints.get(key)
+        if b is None:
+            continue
+        check(
+            key,
+            b.get("p95", 0),
+            e["p95"],
+            b.get("error_rate", _error_rate(b.get("errors", 0), b.get("count", 0))),
+            e["error_rate"],
+        )
+    return regressions, lines
+
+
+def _parse_args(argv):
+    parser = argparse.ArgumentParser(
+        description="Headless load test voor de Regenboog Pi (zelfde scenario's als de GUI).",
+    )
+    parser.add_argument("--url", default=DEFAULT_URL, help=f"Server-URL (standaard {DEFAULT_URL})")
+    parser.add_argument(
+        "--scenario",
+        choices=SCENARIOS,
+        default=MODEL_CLOSED,
+        help="'gesloten' = --users spelers tegelijk (1 ronde); constant/ramp/step/spike = open model; "
+        "'multiplayer' = --users spelers in paren via Socket.IO; 'replay' = nginx access log afspelen; "
+        "'schrijfdruk' = score-bursts tegen leaderboard-lezers op één spel; 'hartslag' = soak met heartbeats",
+    )
+    parser.add_argument("--users", type=int, default=DEFAULT_CONCURRENT,
+                        help="Gelijktijdige gebruikers (gesloten, multiplayer)")
+    parser.add_argument("--duration", type=float,
+                        help=f"Duur in seconden (open model, multiplayer, schrijfdruk: standaard {DEFAULT_DURATION}; "
+                        f"hartslag: standaard {DEFAULT_SOAK_SEC})")
+    parser.add_argument("--rate", type=float, default=DEFAULT_RATE, help="Nieuwe spelers/sec bij de start (open model)")
+    parser.add_argument("--peak-rate", type=float, default=DEFAULT_PEAK_RATE, help="Piek-/eindritme (open model)")
+    parser.add_argument("--engine", choices=ENGINES, default=DEFAULT_ENGINE)
+    parser.add_argument("--timeout", type=int, default=DEFAULT_TIMEOUT, help="Timeout per request (sec)")
+    parser.add_argument("--no-keep-alive", action="store_true", help="Nieuwe TCP/TLS-verbinding per request")
+    parser.add_argument("--assets", action="store_true",
+                        help="Browsermodus: CSS/JS/afbeeldingen per pagina ophalen, met cache per gebruiker")
+    parser.add_argument("--scenario-file", metavar="NAAM|PAD", default=DEFAULT_SCENARIO,
+                        help=f"Routes per bezoeker: naam in scripts/scenarios/ of pad naar JSON/TOML "
+                        f"(standaard {DEFAULT_SCENARIO})")
+    parser.add_argument("--replay-log", metavar="PAD", default=DEFAULT_ACCESS_LOG,
+                        help=f"Access log (combined-formaat, ook .gz) voor replay (standaard {DEFAULT_ACCESS_LOG})")
+    parser.add_argument("--replay-speed", type=float, default=1.0, help="Replay-snelheid, bijv. 1, 5 of 10 (×)")
+    parser.add_argument("--replay-limit", type=float, default=0,
+                        help="Replay stoppen na zoveel seconden (0 = hele log)")
+    parser.add_argument("--lobby", choices=list(GAMES), default=DEFAULT_GAME,
+                        help=f"Multiplayer: spel-lobby (Socket.IO-namespace) die gespeeld wordt (standaard {DEFAULT_GAME})")
+    parser.add_argument("--game", default=DEFAULT_CONTENTION_GAME,
+                        help=f"Schrijfdruk: spel (leaderboard) waarop geschreven en gelezen wordt "
+                        f"(standaard {DEFAULT_CONTENTION_GAME}; de scores blijven staan)")
+    parser.add_argument("--writers", type=int, default=DEFAULT_WRITERS,
+                        help=f"Schrijfdruk: kinderen die per burst tegelijk een score opslaan (standaard {DEFAULT_WRITERS})")
+    parser.add_argument("--readers", type=int, default=DEFAULT_READERS,
+                        help=f"Schrijfdruk: toeschouwers die het leaderboard verversen (standaard {DEFAULT_READERS})")
+    parser.add_argument("--burst-interval", type=float, default=DEFAULT_BURST_INTERVAL_SEC,
+                        help=f"Schrijfdruk: seconden tussen twee score-bursts (standaard {DEFAULT_BURST_INTERVAL_SEC:g})")
+    parser.add_argument("--read-interval", type=float, default=DEFAULT_READ_INTERVAL_SEC,
+                        help=f"Schrijfdruk: seconden tussen twee leaderboard-verversingen per lezer "
+                        f"(standaard {DEFAULT_READ_INTERVAL_SEC:g})")
+    parser.add_argument("--tabs", type=int, default=DEFAULT_TABS,
+                        help=f"Hartslag: open speltabbladen die heartbeats sturen (standaard {DEFAULT_TABS})")
+    parser.add_argument("--page-minutes", type=float, default=DEFAULT_PAGE_MINUTES,
+                        help=f"Hartslag: elk tabblad gaat na zoveel minuten naar een ander spel, een nieuwe visits-rij "
+                        f"(standaard {DEFAULT_PAGE_MINUTES:g}; 0 = nooit)")
+    parser.add_argument("--admin-password", default=os.environ.get("ADMIN_PASSWORD", ""),
+                        help="Hartslag: admin-wachtwoord om getActiveVisitors en het aantal visits-rijen te meten "
+                        "(standaard $ADMIN_PASSWORD; leeg = niet meten)")
+    parser.add_argument("--pi-monitor", action="store_true",
+                        help="Pi elke seconde bemeten via SSH (CPU, load, RSS, temperatuur, I/O, pm2-herstarts)")
+    parser.add_argument("--pi-config", metavar="PAD", default=SSH_CONFIG_FILE,
+                        help="SSH-instellingen voor --pi-monitor (standaard deploy/setup_config.json)")
+    parser.add_argument("--capacity", action="store_true",
+                        help="Capaciteit zoeken: proeven vanaf --users (gesloten) of --rate tot --peak-rate (open, "
+                        "constant) en bisectie tegen de SLO; --json/--csv bewaren de curve")
+    parser.add_argument("--slo-p95", type=float, default=DEFAULT_SLO_P95_MS,
+                        help=f"SLO: p95 van alle requests in ms (standaard {DEFAULT_SLO_P95_MS})")
+    parser.add_argument("--slo-errors", type=float, default=DEFAULT_SLO_ERROR_PCT,
+                        help=f"SLO: maximaal foutpercentage (standaard {DEFAULT_SLO_ERROR_PCT:g})")
+    parser.add_argument("--max-users", type=int,
+                        help="Bovengrens bij capaciteit zoeken (gesloten; standaard het maximum van de engine)")
+    parser.add_argument("--trial-duration", type=float, default=DEFAULT_TRIAL_SEC,
+                        help=f"Duur van één proef in het open model (standaard {DEFAULT_TRIAL_SEC} s)")
+    parser.add_argument("--standin", action="store_true",
+                        help="Test tegen een lokale stand-in van de server (in dit proces) in plaats van --url")
+    parser.add_argument("--benchmark", action="store_true",
+                        help="Meet de generator zelf tegen de stand-in: max. req/s en CPU per request per niveau "
+                        "van --bench-users (gesloten model)")
+    parser.add_argument("--standin-latency", type=float, default=DEFAULT_STANDIN_LATENCY_MS,
+                        help=f"Stand-in: latency per request in ms (standaard {DEFAULT_STANDIN_LATENCY_MS:g})")
+    parser.add_argument("--standin-payload", type=int, default=DEFAULT_STANDIN_PAYLOAD,
+                        help=f"Stand-in: grootte van HTML-pagina's in bytes (standaard {DEFAULT_STANDIN_PAYLOAD})")
+    parser.add_argument("--bench-users", default=",".join(str(u) for u in BENCH_USERS),
+                        help="Benchmark: niveaus gelijktijdige gebruikers, komma-gescheiden")
+    parser.add_argument("--bench-duration", type=float, default=BENCH_LEVEL_SEC,
+                        help=f"Benchmark: meetduur per niveau in seconden (standaard {BENCH_LEVEL_SEC:g})")
+    parser.add_argument("--profile", action="store_true",
+                        help="Profiel van de generator zelf: collapsed stacks (flame graph) en tijd per fase, "
+                        "naast het --json/--csv-rapport")
+    parser.add_argument("--profile-interval", type=float, default=DEFAULT_PROFILE_INTERVAL_MS,
+                        help=f"Profiel: ms tussen twee samples (standaard {DEFAULT_PROFILE_INTERVAL_MS:g})")
+    parser.add_argument("--json", metavar="PAD", help="Schrijf rapport als JSON")
+    parser.add_argument("--csv", metavar="PAD", help="Schrijf per-endpoint rapport als CSV")
+    parser.add_argument("--baseline", metavar="PAD", help="Vergelijk met eerder JSON-rapport; exit 1 bij regressie")
+    parser.add_argument("--write-baseline", metavar="PAD", help="Sla dit rapport op als nieuwe baseline")
+    parser.add_argument("--p95-tolerance", type=float, default=DEFAULT_P95_TOLERANCE,
+                        help=f"Toegestane p95-stijging in procent (standaard {DEFAULT_P95_TOLERANCE:g})")
+    parser.add_argument("--error-tolerance", type=float, default=DEFAULT_ERROR_TOLERANCE,
+                        help=f"Toegestane stijging foutpercentage in procentpunt (standaard {DEFAULT_ERROR_TOLERANCE:g})")
+    parser.add_argument("--min-delta-ms", type=float, default=DEFAULT_MIN_DELTA_MS,
+                        help=f"p95-verschillen kleiner dan dit zijn geen regressie (standaard {DEFAULT_MIN_DELTA_MS:g})")
+    parser.add_argument("--progress", type=float, default=DEFAULT_PROGRESS_SEC,
+                        help="Voortgang elke N seconden naar stderr (0 = uit)")
+    parser.add_argument("--history-db", metavar="PAD", default=DEFAULT_HISTORY_DB,
+                        help="SQLite-database met de run-geschiedenis (standaard scripts/loadtest_history.db)")
+    parser.add_argument("--no-history", action="store_true", help="Deze run niet in de geschiedenis bewaren")
+    parser.add_argument("--label", default="", help="Korte notitie bij de run in de geschiedenis")
+    parser.add_argument("--history-list", type=int, nargs="?", const=DEFAULT_HISTORY_LIMIT, metavar="N",
+                        help=f"Toon p95 en capaciteit van de laatste N runs per server (standaard {DEFAULT_HISTORY_LIMIT})"
+                             " en stop")
+    parser.add_argument("--history-compare", type=int, nargs=2, metavar="ID",
+                        help="Leg twee runs uit de geschiedenis naast elkaar (percentielen, p95 per endpoint) en stop")
+    args = parser.parse_args(argv)
+    if not args.url.strip():
+        parser.error("--url mag niet leeg zijn")
+    args.url = args.url.strip()
+    if args.history_list is not None and args.history_list < 1:
+        parser.error("--history-list verwacht minstens 1 run")
+    limit = MAX_CONCURRENT_ASYNC if args.scenario == MODEL_MULTIPLAYER else max_concurrent_for(args.engine)
+    args.users = max(MIN_CONCURRENT, min(limit, args.users))
+    args.timeout = max(1, args.timeout)
+    if args.duration is None:
+        args.duration = DEFAULT_SOAK_SEC if args.scenario == MODEL_SOAK else DEFAULT_DURATION
+    if args.capacity and args.scenario in OWN_TRAFFIC:
+        parser.error("--capacity werkt met het gesloten model of een open profiel, niet met multiplayer, replay, "
+                     "schrijfdruk of hartslag")
+    if args.scenario == MODEL_SOAK:
+        args.tabs = max(1, min(MAX_TABS, args.tabs))
+        if args.page_minutes < 0:
+            parser.error("--page-minutes mag niet negatief zijn")
+    if args.scenario == MODEL_CONTENTION:
+        if not args.game.strip():
+            parser.error("--game mag niet leeg zijn")
+        args.game = args.game.strip()
+        args.writers = max(0, min(MAX_CONTENTION_CLIENTS, args.writers))
+        args.readers = max(0, min(MAX_CONTENTION_CLIENTS, args.readers))
+        if args.writers + args.readers == 0:
+            parser.error("schrijfdruk heeft minstens één schrijver of lezer nodig")
+        if args.burst_interval <= 0 or args.read_interval <= 0:
+            parser.error("--burst-interval en --read-interval moeten groter dan 0 zijn")
+    if args.scenario == MODEL_REPLAY:
+        if args.replay_speed <= 0:
+            parser.error("--replay-speed moet groter dan 0 zijn")
+        if not os.path.isfile(args.replay_log):
+            parser.error(f"access log niet gevonden: {args.replay_log}")
+    if args.capacity and args.pi_monitor:
+        parser.error("--pi-monitor werkt per run, niet met --capacity")
+    if args.capacity and (args.baseline or args.write_baseline):
+        parser.error("--capacity maakt een curve, geen rapport voor --baseline/--write-baseline")
+    if (args.standin or args.benchmark) and args.scenario in (MODEL_MULTIPLAYER, MODEL_REPLAY):
+        parser.error("de stand-in kent geen Socket.IO en geen replay-routes; gebruik het gesloten of open model")
+    if args.benchmark and (args.capacity or args.pi_monitor or args.baseline or args.write_baseline):
+        parser.error("--benchmark meet de generator; niet te combineren met --capacity, --pi-monitor of een baseline")
+    try:
+        args.bench_users = tuple(int(x) for x in args.bench_users.split(",") if x.strip())
+    except ValueError:
+        parser.error("--bench-users verwacht getallen, bijv. 1,10,50,200")
+    if args.benchmark and not args.bench_users:
+        parser.error("--bench-users is leeg")
+    try:
+        args.journeys = load_scenario(args.scenario_file)
+    except ScenarioError as e:
+        parser.error(str(e))
+    return args
+
+
+def _start_profiler(args) -> StackSampler | None:
+    return StackSampler(args.profile_interval).start() if args.profile else None
+
+
+def _finish_profile(sampler: StackSampler | None, args, r: dict) -> list[str]:
+    """Sampler stoppen, .folded en .profiel.txt naast het rapport schrijven; samenvatting in r["profile"]."""
+    if sampler is None:
+        return []
+    sampler.stop()
+    summary = sampler.summary()
+    folded_path, text_path = profile_paths(args.json or args.csv)
+    lines = profile_summary_lines(summary)
+    try:
+        sampler.write_collapsed(folded_path)
+        with open(text_path, "w", encoding="utf-8") as fp:
+            fp.write("\n".join(lines) + "\n")
+    except OSError as e:
+        lines.append(f"Profiel niet bewaard: {e}")
+    else:
+        summary["collapsed_path"] = folded_path
+        lines.append(f"Flame graph:       {folded_path} (collapsed stacks, bijv. flamegraph.pl of speedscope)")
+    r["profile"] = summary
+    return lines
+
+
+def save_history(args, r: dict, settings: dict) -> None:
+    """Run of capaciteitszoektocht in de geschiedenis zetten; een kapotte database stopt de test niet."""
+    if args.no_history:
+        return
+    try:
+        history = RunHistory(args.history_db)
+        try:
+            run_id = history.save(r, settings, args.label)
+        finally:
+            history.close()
+    except (sqlite3.Error, OSError) as e:
+        print(f"Geschiedenis niet bijgewerkt ({args.history_db}): {e}", file=sys.stderr)
+    else:
+        print(f"Geschiedenis:      run #{run_id} in {args.history_db}")
+
+
+def show_history(args) -> int:
+    """--history-list / --history-compare: alleen de database lezen, geen test."""
+    try:
+        history = RunHistory(args.history_db)
+    except (sqlite3.Error, OSError) as e:
+        print(f"Geschiedenis niet te openen ({args.history_db}): {e}", file=sys.stderr)
+        return EXIT_USAGE
+    try:
+        if args.history_compare:
+            runs = [history.run(run_id) for run_id in args.history_compare]
+            missing = [str(i) for i, run in zip(args.history_compare, runs) if run is None]
+            if missing:
+                print(f"Onbekende run(s) in de geschiedenis: {', '.join(missing)}", file=sys.stderr)
+                return EXIT_USAGE
+            for line in compare_lines(*runs):
+                print(line)
+            return EXIT_OK
+        targets = history.targets()
+        if not targets:
+            print(f"Nog geen runs in {args.history_db}")
+        for i, target in enumerate(targets):
+            print(("\n" if i else "") + f"--- {target} ---")
+            for line in trend_lines(history.runs(args.history_list, target)):
+                print(line)
+        return EXIT_OK
+    finally:
+        history.close()
+
+
+def run_capacity(args) -> int:
+    """--capacity: capaciteit zoeken tegen de SLO en de curve belasting → latency tonen/bewaren."""
+    keep_alive = not args.no_keep_alive
+    slo = SLO(args.slo_p95, args.slo_errors)
+    model = MODEL_CLOSED if args.scenario == MODEL_CLOSED else MODEL_OPEN
+    if model == MODEL_OPEN:
+        start, limit = args.rate, max(args.rate, args.peak_rate)
+        print(f"Capaciteit zoeken – {args.url} – open model {start:g}–{limit:g} spelers/sec, "
+              f"proeven van {args.trial_duration:g} s – engine {args.engine}")
+    else:
+        start, limit = args.users, args.max_users or max_concurrent_for(args.engine)
+        print(f"Capaciteit zoeken – {args.url} – gesloten model vanaf {start} tot max. {limit} gebruikers "
+              f"– engine {args.engine}")
+    print(f"SLO: {slo.describe()}  |  Routes: {args.journeys.describe()}")
+
+    cancel_flag = threading.Event()
+    signal.signal(signal.SIGINT, lambda *_: cancel_flag.set())
+    unit = "spelers/sec" if model == MODEL_OPEN else "gebruikers"
+    sampler = _start_profiler(args)
+    r = run_capacity_search(
+        args.engine, args.url, model, start, limit, slo, args.timeout, cancel_flag, keep_alive,
+        args.assets, args.journeys, args.trial_duration,
+        on_trial=lambda point: print(trial_line(point, unit), flush=True),
+    )
+    print("")
+    for line in capacity_summary_lines(r) + [""] + _finish_profile(sampler, args, r):
+        print(line)
+    r["generated_at"] = datetime.now(timezone.utc).isoformat(timespec="seconds")
+    r["settings"] = {
+        "url": args.url,
+        "engine": args.engine,
+        "timeout": args.timeout,
+        "keep_alive": keep_alive,
+        "assets": args.assets,
+        "scenario_file": args.journeys.name,
+    }
+    save_history(args, r, r["settings"])
+    if args.json:
+        write_curve(r, args.json)
+        print(f"\nJSON-rapport: {args.json}")
+    if args.csv:
+        write_curve(r, args.csv)
+        print(f"CSV-curve:    {args.csv}")
+    return EXIT_OK
+
+
+def run_generator_benchmark(args) -> int:
+    """--benchmark: de generator tegen de stand-in, per niveau gebruikers; --json/--csv bewaren de niveaus."""
+    keep_alive = not args.no_keep_alive
+    print(f"Generator-benchmark – engine {args.engine} – niveaus {', '.join(map(str, args.bench_users))} "
+          f"gebruikers, {args.bench_duration:g} s per niveau")
+    print(f"Routes: {args.journeys.describe()}")
+    cancel_flag = threading.Event()
+    signal.signal(signal.SIGINT, lambda *_: cancel_flag.set())
+    sampler = _start_profiler(args)
+    try:
+        r = run_benchmark(
+            args.engine, cancel_flag, args.standin_latency, args.standin_payload, args.bench_users,
+            args.bench_duration, keep_alive, args.assets, args.journeys,
+            on_level=lambda row: print(benchmark_level_line(row), flush=True),
+        )
+    except OSError as e:
+        if sampler is not None:
+            sampler.stop()
+        print(f"Stand-in kon niet starten: {e}", file=sys.stderr)
+        return EXIT_USAGE
+    print("")
+    for line in benchmark_summary_lines(r) + [""] + _finish_profile(sampler, args, r):
+        print(line)
+    r["generated_at"] = datetime.now(timezone.utc).isoformat(timespec="seconds")
+    r["scenario_file"] = args.journeys.name
+    if args.json:
+        write_json_report(r, args.json)
+        print(f"\nJSON-rapport: {args.json}")
+    if args.csv:
+        with open(args.csv, "w", encoding="utf-8", newline="") as fp:
+            writer = csv.DictWriter(fp, fieldnames=BENCH_FIELDS, extrasaction="ignore")
+            writer.writeheader()
+            writer.writerows(r["levels"])
+        print(f"CSV-rapport:  {args.csv}")
+    return EXIT_OK
+
+
+def main(argv=None) -> int:
+    args = _parse_args(argv)
+    if args.history_list is not None or args.history_compare:
+        return show_history(args)
+    if args.benchmark:
+        return run_generator_benchmark(args)
+    baseline = None
+    if args.baseline:
+        # Vooraf lezen: een verdwenen of kapotte baseline mag een nachtelijke poort niet laten slagen
+        try:
+            baseline = load_report(args.baseline)
+        except (OSError, ValueError) as e:
+            print(f"Ongeldige baseline {args.baseline}: {e}", file=sys.stderr)
+            return EXIT_USAGE
+    if args.standin:
+        try:
+            args.url = StandInServer(args.standin_latency, args.standin_payload).start()
+        except OSError as e:
+            print(f"Stand-in kon niet starten: {e}", file=sys.stderr)
+            return EXIT_USAGE
+        print(f"Stand-in: {args.url} (latency {args.standin_latency:g} ms, pagina's {args.standin_payload} bytes)")
+    if args.capacity:
+        return run_capacity(args)
+    keep_alive = not args.no_keep_alive
+    profile = None
+    multiplayer = args.scenario == MODEL_MULTIPLAYER
+    replay = args.scenario == MODEL_REPLAY
+    contention = args.scenario == MODEL_CONTENTION
+    soak = args.scenario == MODEL_SOAK
+    if args.scenario != MODEL_CLOSED and args.scenario not in OWN_TRAFFIC:
+        profile = ArrivalProfile(args.scenario, args.rate, args.peak_rate, args.duration)
+
+    settings = {
+        "url": args.url,
+        "scenario": args.scenario,
+        "engine": args.engine,
+        "timeout": args.timeout,
+        "keep_alive": keep_alive,
+        "assets": args.assets,
+    }
+    if args.scenario not in OWN_TRAFFIC:
+        settings["scenario_file"] = args.journeys.name
+    if profile:
+        settings.update({"rate": args.rate, "peak_rate": args.peak_rate, "duration": args.duration})
+        print(f"Load test – {args.url} – open model: {profile.describe()} – engine {args.engine}")
+    elif multiplayer:
+        settings.update({"users": args.users, "duration": args.duration, "lobby": args.lobby})
+        print(f"Load test – {args.url} – multiplayer {args.lobby}: {args.users // 2 or 1} paren gedurende "
+              f"{args.duration:g} s")
+    elif replay:
+        settings.update({"replay_log": args.replay_log, "replay_speed": args.replay_speed,
+                         "replay_limit": args.replay_limit})
+        print(f"Load test – {args.url} – replay van {args.replay_log} op {args.replay_speed:g}×")
+    elif contention:
+        settings.update({"game": args.game, "writers": args.writers, "readers": args.readers,
+                         "burst_interval": args.burst_interval, "read_interval": args.read_interval,
+                         "duration": args.duration})
+        print(f"Load test – {args.url} – schrijfdruk op {args.game}: {args.writers} schrijvers elke "
+              f"{args.burst_interval:g} s, {args.readers} lezers elke {args.read_interval:g} s, {args.duration:g} s")
+    elif soak:
+        settings.update({"tabs": args.tabs, "page_minutes": args.page_minutes, "duration": args.duration,
+                         "admin_probes": bool(args.admin_password)})
+        print(f"Load test – {args.url} – hartslag: {args.tabs} tabbladen gedurende {args.duration:g} s"
+              + ("" if args.admin_password else " (zonder admin-wachtwoord: geen active-visitors-metingen)"))
+    else:
+        settings["users"] = args.users
+        print(f"Load test – {args.url} – {args.users} gelijktijdige gebruikers – engine {args.engine}")
+    if args.scenario not in OWN_TRAFFIC:
+        print(f"Routes: {args.journeys.describe()}")
+
+    monitor = None
+    if args.pi_monitor:
+        try:
+            monitor = start_pi_monitor(args.pi_config)
+        except PiMonitorError as e:
+            print(f"Pi-monitoring: {e}", file=sys.stderr)
+            return EXIT_USAGE
+        print(f"Pi-monitoring: {monitor.settings['username']}@{monitor.settings['host']} (elke seconde)")
+
+    cancel_flag = threading.Event()
+    signal.signal(signal.SIGINT, lambda *_: cancel_flag.set())
+    metrics = RunMetrics(per_second=monitor is not None)
+    holder = {}
+    start_epoch = time.time()
+
+    def run():
+        if multiplayer:
+            holder["result"] = run_multiplayer(
+                args.url, args.users, args.duration, args.timeout, cancel_flag, metrics, game=args.lobby
+            )
+        elif replay:
+            holder["result"] = run_replay(
+                args.replay_log, args.url, args.replay_speed, args.timeout, cancel_flag, keep_alive, metrics,
+                args.replay_limit,
+            )
+        elif contention:
+            holder["result"] = run_contention(
+                args.url, args.game, args.writers, args.readers, args.burst_interval, args.read_interval,
+                args.duration, args.timeout, cancel_flag, keep_alive, metrics,
+            )
+        elif soak:
+            holder["result"] = run_soak(
+                args.url, args.tabs, args.duration, args.page_minutes, args.admin_password, args.timeout, cancel_flag,
+                keep_alive, metrics,
+            )
+        elif profile:
+            holder["result"] = run_open_model(
+                args.engine, args.url, profile, args.timeout, cancel_flag, keep_alive, metrics,
+                args.assets, args.journeys,
+            )
+        else:
+            holder["result"] = run_with_engine(
+                args.engine, args.url, args.users, args.timeout, cancel_flag, keep_alive, metrics,
+                args.assets, args.journeys,
+            )
+
+    worker = threading.Thread(target=run, daemon=True)
+    sampler = _start_profiler(args)
+    start = time.perf_counter()
+    worker.start()
+    while worker.is_alive():
+        worker.join(timeout=args.progress if args.progress > 0 else None)
+        if worker.is_alive() and args.progress > 0:
+            snap = metrics.live_snapshot()
+            print(
+                f"[{time.perf_counter() - start:6.0f} s] {snap['rps']:7.1f} req/s  {snap['eps']:5.1f} fouten/s  "
+                f"{snap['in_flight']} bezig  {snap['requests_total']} totaal",
+                file=sys.stderr,
+            )
+
+    r = holder["result"]
+    if monitor is not None:
+        attach_pi_results(r, monitor, metrics, start_epoch)
+    profile_lines = _finish_profile(sampler, args, r)
+    report = build_report(r, settings)
+    print("")
+    print(f"Geslaagd: {r['success_count']}  |  Gefaald: {r['fail_count']} ({report['error_rate']:.2f}%)  |  "
+          f"Totale tijd: {r['total_ms'] / 1000:.1f} s")
+    unit = "Per bezoeker"
+    if r["model"] in OWN_TRAFFIC:
+        unit = "Per spel" if r["model"] == MODEL_MULTIPLAYER else "Per request"
+    print(f"{unit}: gem {r['avg_ms']} ms  |  p50 {r['p50']} ms  |  p95 {r['p95']} ms")
+    if r["model"] == MODEL_OPEN:
+        print(f"Aankomstritme: doel {r['target_rate']}/s  |  behaald {r['achieved_rate']}/s")
+    if r["model"] == MODEL_MULTIPLAYER:
+        for line in multiplayer_summary_lines(r):
+            print(line)
+    elif r["model"] == MODEL_REPLAY:
+        for line in replay_summary_lines(r):
+            print(line)
+    elif r["model"] == MODEL_CONTENTION:
+        for line in contention_summary_lines(r):
+            print(line)
+    elif r["model"] == MODEL_SOAK:
+        for line in soak_summary_lines(r):
+            print(line)
+    else:
+        for line in transfer_summary_lines(r):
+            print(line)
+    for sample in report["error_samples"][:1]:
+        print(f"Voorbeeld fout: {sample['error']} bij {sample['path']}")
+    print("")
+    for line in endpoint_table_lines(r["endpoints"]):
+        print(line)
+    print("")
+    for line in omission_lines(r):
+        print(line)
+    if r["model"] == MODEL_MULTIPLAYER:
+        print("")
+        for line in games_timeline_lines(r["games_timeline"]):
+            print(line)
+    if r["model"] == MODEL_CONTENTION:
+        print("")
+        for line in burst_timeline_lines(r["burst_timeline"]):
+            print(line)
+    if r["model"] == MODEL_SOAK:
+        print("")
+        for line in soak_timeline_lines(r["soak_timeline"]):
+            print(line)
+    if "pi" in r:
+        print("")
+        for line in pi_summary_lines(r["pi"]):
+            print(line)
+        print("")
+        for line in pi_timeline_lines(r["pi"]["timeline"]):
+            print(line)
+    if profile_lines:
+        print("")
+        for line in profile_lines:
+            print(line)
+
+    print("")
+    save_history(args, report, settings)
+    if args.json:
+        write_json_report(report, args.json)
+        print(f"\nJSON-rapport: {args.json}")
+    if args.csv:
+        write_csv_report(report, args.csv)
+        print(f"CSV-rapport:  {args.csv}")
+
+    exit_code = EXIT_OK
+    if baseline is not None:
+        regressions, lines = compare_to_baseline(
+            report, baseline, args.p95_tolerance, args.error_tolerance, args.min_delta_ms
+        )
+        print(f"\n--- Vergelijking met baseline {args.baseline} ---")
+        for line in lines:
+            print(line)
+        if regressions:
+            print("\n❌ Regressie:")
+            for reg in regressions:
+                print(f"  - {reg}")
+            exit_code = EXIT_REGRESSION
+        else:
+            print("\n✅ Geen regressie binnen de toleranties.")
+    if args.write_baseline:
+        write_json_report(report, args.write_baseline)
+        print(f"Baseline opgeslagen: {args.write_baseline}")
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,325 @@
+"""
+Schrijfdruk op één spel: score-bursts tegen leaderboard-lezers (asyncio-engine).
+Nabootsing van een klas die tegelijk een ronde afsluit: --writers kinderen posten samen een score
+(POST /api/score) elke burst-interval, terwijl --readers anderen het leaderboard van hetzelfde spel
+blijven verversen (GET /api/leaderboard/:class). SQLite (WAL) laat één schrijver tegelijk toe, dus de
+interessante cijfers zijn lezen terwijl er geschreven wordt en schrijven terwijl er gelezen wordt.
+
+Elk request telt als "onder druk" als er tijdens het request (ook maar even) een request van de andere
+soort liep, anders als "rustig". Een 500 op /api/score is "Score kon niet worden opgeslagen": onder
+schrijfdruk meestal SQLITE_BUSY (de oorzaak staat in het pm2-log van de server).
+De scores komen in het echte leaderboard van --game; opruimen via het admin-paneel (scores per spel wissen).
+"""
+
+import asyncio
+import random
+import threading
+import urllib.parse
+from collections import Counter
+
+from load_test_core import (
+    ENGINE_ASYNCIO,
+    MODEL_CONTENTION,
+    AsyncConnectionPool,
+    LatencyHistogram,
+    RunMetrics,
+    _raise_fd_limit,
+    _summarize,
+)
+
+DEFAULT_CONTENTION_GAME = "loadtest"
+DEFAULT_WRITERS = 30
+DEFAULT_READERS = 20
+DEFAULT_BURST_INTERVAL_SEC = 10.0
+DEFAULT_READ_INTERVAL_SEC = 1.0
+MAX_CONTENTION_CLIENTS = 2000
+BURST_SPREAD_SEC = 0.1  # kinderen drukken niet op exact dezelfde ms op "opslaan"
+MIN_INTERVAL_SEC = 0.05
+
+READ = "lezen"
+WRITE = "schrijven"
+_OTHER = {READ: WRITE, WRITE: READ}
+
+# Foutsoorten, in deze volgorde in de samenvatting
+ERROR_5XX = "5xx"
+ERROR_RATE_LIMIT = "429"
+ERROR_TIMEOUT = "timeout"
+ERROR_CONNECTION = "verbinding"
+ERROR_OTHER = "andere"
+ERROR_KINDS = (ERROR_5XX, ERROR_RATE_LIMIT, ERROR_TIMEOUT, ERROR_CONNECTION, ERROR_OTHER)
+RATE_LIMIT_NOTE = (
+    "429 = rate limiter van de server (scores 30/min, /api 200 per 15 min per IP): verhoog die "
+    "op de testserver, anders meet je de limiter en niet SQLite."
+)
+
+
+def error_kind(r: dict) -> str | None:
+    """Soort fout van een result dict (None = geslaagd)."""
+    if r["ok"]:
+        return None
+    code = r.get("status_code")
+    if code is None:
+        return ERROR_TIMEOUT if r.get("error") == "timeout" else ERROR_CONNECTION
+    if code >= 500:
+        return ERROR_5XX
+    return ERROR_RATE_LIMIT if code == 429 else ERROR_OTHER
+
+
+def _latency(h: LatencyHistogram) -> dict:
+    return {
+        "count": h.count,
+        "p50": h.percentile(0.50),
+        "p95": h.percentile(0.95),
+        "p99": h.percentile(0.99),
+        "max": h.max_us / 1000,
+    }
+
+
+class _Burst:
+    """Eén score-burst: schrijflatency, leeslatency onder die burst en fouten."""
+
+    def __init__(self, offset_sec: float):
+        self.offset_sec = offset_sec
+        self.writes = LatencyHistogram()
+        self.reads = LatencyHistogram()
+        self.errors = 0
+
+
+class _ContentionRun:
+    """Gedeelde staat: lopende en gestarte requests per soort, histogrammen rustig/onder druk, bursts."""
+
+    def __init__(self, base_url: str, game: str, timeout_sec: int, keep_alive: bool, metrics: RunMetrics):
+        self.base_url = base_url
+        self.game = game
+        self.timeout_sec = timeout_sec
+        self.keep_alive = keep_alive
+        self.metrics = metrics
+        self.read_path = "/api/leaderboard/" + urllib.parse.quote(game, safe="")
+        self.in_flight = {READ: 0, WRITE: 0}
+        self.started = {READ: 0, WRITE: 0}
+        self.latency = {(kind, busy): LatencyHistogram() for kind in (READ, WRITE) for busy in (False, True)}
+        self.errors = {READ: Counter(), WRITE: Counter()}
+        self.bursts: list[_Burst] = []
+        self.requests = 0
+
+    def burst(self, k: int, offset_sec: float) -> _Burst:
+        while len(self.bursts) <= k:
+            self.bursts.append(_Burst(offset_sec))
+        return self.bursts[k]
+
+    async def timed(self, kind: str, pool: AsyncConnectionPool, method: str, path: str, body: dict | None,
+                    lag_ms: int) -> dict:
+        other = _OTHER[kind]
+        busy = self.in_flight[other] > 0
+        seen = self.started[other]
+        self.in_flight[kind] += 1
+        self.started[kind] += 1
+        self.requests += 1
+        self.metrics.request_started()
+        self.metrics.set_in_flight(self.in_flight[READ] + self.in_flight[WRITE])
+        try:
+            r = await pool.request(method, path, body)
+        finally:
+            self.in_flight[kind] -= 1
+        # Onder druk: bij de start liep er al een request van de andere soort, of er begon er een tijdens dit request
+        r["contended"] = busy or self.started[other] != seen
+        r["lag_ms"] = lag_ms
+        self.latency[(kind, r["contended"])].record(r["ms"])
+        err = error_kind(r)
+        if err is not None:
+            self.errors[kind][err] += 1
+        self.metrics.record_request(method, path, r)
+        self.metrics.record_journey({"results": [r]})
+        return r
+
+
+async def _sleep_until(loop, due: float, cancel_flag: threading.Event) -> None:
+    while not cancel_flag.is_set():
+        delay = due - loop.time()
+        if delay <= 0:
+            return
+        await asyncio.sleep(min(delay, 0.2))
+
+
+async def _writer(run: _ContentionRun, index: int, start: float, burst_sec: float, duration_sec: float,
+                  cancel_flag: threading.Event) -> None:
+    loop = asyncio.get_running_loop()
+    pool = AsyncConnectionPool(run.base_url, run.timeout_sec, run.keep_alive)
+    try:
+        k = 0
+        while k * burst_sec < duration_sec and not cancel_flag.is_set():
+            due = start + k * burst_sec + random.uniform(0, BURST_SPREAD_SEC)
+            await _sleep_until(loop, due, cancel_flag)
+            if cancel_flag.is_set():
+                break
+            burst = run.burst(k, k * burst_sec)
+            body = {"class_name": run.game, "player_name": f"Loadtest {index + 1}",
+                    "student_class": "Loadtest", "score": random.randint(50, 500)}
+            lag_ms = max(0, int((loop.time() - due) * 1000))
+            r = await run.timed(WRITE, pool, "POST", "/api/score", body, lag_ms)
+            burst.writes.record(r["ms"])
+            if not r["ok"]:
+                burst.errors += 1
+            # Duurde de vorige score langer dan een interval, dan doet dit kind pas bij de volgende burst mee
+            k = max(k + 1, int((loop.time() - start) // burst_sec) + 1)
+    finally:
+        run.metrics.connections_opened += pool.connections_opened
+        pool.close()
+
+
+async def _reader(run: _ContentionRun, start: float, interval_sec: float, duration_sec: float,
+                  cancel_flag: threading.Event) -> None:
+    loop = asyncio.get_running_loop()
+    pool = AsyncConnectionPool(run.base_url, run.timeout_sec, run.keep_alive)
+    try:
+        due = start + random.uniform(0, interval_sec)
+        while due - start < duration_sec and not cancel_flag.is_set():
+            await _sleep_until(loop, due, cancel_flag)
+            if cancel_flag.is_set():
+                break
+            lag_ms = max(0, int((loop.time() - due) * 1000))
+            r = await run.timed(READ, pool, "GET", run.read_path, None, lag_ms)
+            if r["contended"] and run.bursts:
+                run.bursts[-1].reads.record(r["ms"])
+            due = max(due + interval_sec, loop.time())
+    finally:
+        run.metrics.connections_opened += pool.connections_opened
+        pool.close()
+
+
+async def _run_contention_async(
+    base_url: str,
+    game: str,
+    writers: int,
+    readers: int,
+    burst_sec: float,
+    read_interval_sec: float,
+    duration_sec: float,
+    timeout_sec: int,
+    cancel_flag: threading.Event,
+    keep_alive: bool,
+    metrics: RunMetrics,
+) -> dict:
+    loop = asyncio.get_running_loop()
+    run = _ContentionRun(base_url, game, timeout_sec, keep_alive, metrics)
+    start = loop.time()
+    tasks = [asyncio.create_task(_writer(run, i, start, burst_sec, duration_sec, cancel_flag)) for i in range(writers)]
+    tasks += [
+        asyncio.create_task(_reader(run, start, read_interval_sec, duration_sec, cancel_flag)) for _ in range(readers)
+    ]
+    pending = set(tasks)
+    while pending:
+        if cancel_flag.is_set():
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+            break
+        _, pending = await asyncio.wait(pending, timeout=0.2)
+    metrics.set_in_flight(0)
+
+    total_ms = int((loop.time() - start) * 1000)
+    r = _summarize(base_url, run.requests, total_ms, metrics, ENGINE_ASYNCIO, keep_alive)
+    r.update({
+        "model": MODEL_CONTENTION,
+        "game": game,
+        "writers": writers,
+        "readers": readers,
+        "burst_interval": burst_sec,
+        "read_interval": read_interval_sec,
+        "duration_sec": duration_sec,
+        "contention": {
+            "read_quiet": _latency(run.latency[(READ, False)]),
+            "read_contended": _latency(run.latency[(READ, True)]),
+            "write_quiet": _latency(run.latency[(WRITE, False)]),
+            "write_contended": _latency(run.latency[(WRITE, True)]),
+        },
+        "contention_errors": {kind: dict(run.errors[kind]) for kind in (READ, WRITE)},
+        "burst_timeline": [
+            {
+                "burst": k + 1,
+                "t": round(b.offset_sec, 1),
+                "writes": b.writes.count,
+                "write_p95": b.writes.percentile(0.95),
+                "reads": b.reads.count,
+                "read_p95": b.reads.percentile(0.95),
+                "errors": b.errors,
+            }
+            for k, b in enumerate(run.bursts)
+        ],
+    })
+    return r
+
+
+def run_contention(
+    base_url: str,
+    game: str,
+    writers: int,
+    readers: int,
+    burst_sec: float,
+    read_interval_sec: float,
+    duration_sec: float,
+    timeout_sec: int,
+    cancel_flag: threading.Event,
+    keep_alive: bool = True,
+    metrics: RunMetrics | None = None,
+) -> dict:
+    """
+    Score-bursts van writers schrijvers elke burst_sec tegen readers lezers van het leaderboard van game
+    (elk om de read_interval_sec), gedurende duration_sec. Elke schrijver en lezer heeft een eigen
+    verbinding, zoals aparte toestellen. Een journey is hier één request (zoals bij replay).
+    """
+    base_url = base_url.rstrip("/")
+    writers = max(0, min(MAX_CONTENTION_CLIENTS, writers))
+    readers = max(0, min(MAX_CONTENTION_CLIENTS, readers))
+    _raise_fd_limit(writers + readers + 256)
+    return asyncio.run(
+        _run_contention_async(
+            base_url, game, writers, readers, max(MIN_INTERVAL_SEC, burst_sec), max(MIN_INTERVAL_SEC, read_interval_sec),
+            duration_sec, timeout_sec, cancel_flag, keep_alive, metrics or RunMetrics(),
+        )
+    )
+
+
+def contention_summary_lines(r: dict) -> list[str]:
+    """Lezen/schrijven rustig en onder druk plus fouten per soort, voor GUI-log en CLI."""
+    c = r["contention"]
+    lines = [
+        f"Spel:              {r['game']}  |  {r['writers']} schrijvers elke {r['burst_interval']:g} s  |  "
+        f"{r['readers']} lezers elke {r['read_interval']:g} s  |  {len(r['burst_timeline'])} bursts",
+        f"{'Latency (ms)':<30} {'aantal':>7} {'p50':>7} {'p95':>7} {'p99':>7} {'max':>7}",
+    ]
+    for key, label in (
+        ("read_quiet", "lezen, rustig"),
+        ("read_contended", "lezen onder schrijfdruk"),
+        ("write_quiet", "schrijven, rustig"),
+        ("write_contended", "schrijven onder leesdruk"),
+    ):
+        s = c[key]
+        lines.append(f"{label:<30} {s['count']:>7} {s['p50']:>7.0f} {s['p95']:>7.0f} {s['p99']:>7.0f} {s['max']:>7.0f}")
+    errors = r["contention_errors"]
+    for kind in (READ, WRITE):
+        counts = errors[kind]
+        lines.append(f"Fouten {kind + ':':<11} " + "  |  ".join(f"{e} {counts.get(e, 0)}" for e in ERROR_KINDS))
+    if errors[WRITE].get(ERROR_5XX):
+        lines.append("5xx bij schrijven = 'Score kon niet worden opgeslagen': onder schrijfdruk meestal SQLITE_BUSY "
+                     "(zie pm2-log).")
+    if errors[READ].get(ERROR_RATE_LIMIT) or errors[WRITE].get(ERROR_RATE_LIMIT):
+        lines.append(RATE_LIMIT_NOTE)
+    return lines
+
+
+def burst_timeline_lines(rows: list) -> list[str]:
+    """Per burst: schrijflatency, leeslatency onder die burst en fouten; max. 20 rijen."""
+    if not rows:
+        return []
+    per_row = max(1, -(-len(rows) // 20))
+    lines = ["Burst    tijd (s)  scores  p95 score  lezingen  p95 lezen  fouten"]
+    for i in range(0, len(rows), per_row):
+        chunk = rows[i:i + per_row]
+        label = f"{chunk[0]['burst']}" if len(chunk) == 1 else f"{chunk[0]['burst']}-{chunk[-1]['burst']}"
+        lines.append(
+            f"{label:<8} {chunk[0]['t']:>8g}  {sum(x['writes'] for x in chunk):>6}  "
+            f"{max(x['write_p95'] for x in chunk):>9.0f}  {sum(x['reads'] for x in chunk):>8}  "
+            f"{max(x['read_p95'] for x in chunk):>9.0f}  {sum(x['errors'] for x in chunk):>6}"
+        )
+    return lines
@@ -0,0 +1,1961 @@
+"""
+Load test voor Regenboog Raspberry Pi server – engine (zonder GUI, zonder tkinter).
+Simuleert realistisch bezoek: homepage, spel openen, tracking, leaderboard, score opslaan.
+Gebruikt door load_test_pi_gui.py (Tkinter) en load_test_cli.py (headless/nightly).
+"""
+
+import asyncio
+import gzip
+import json
+import math
+import multiprocessing
+import os
+import re
+import ssl
+import urllib.parse
+import time
+import threading
+from collections import deque
+from itertools import islice
+import queue
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import http.client
+from http import HTTPStatus
+from html.parser import HTMLParser
+
+from load_test_profiler import (
+    PHASE_BOOKKEEPING,
+    PHASE_CONNECT,
+    PHASE_ENCODE,
+    PHASE_EXCHANGE,
+    PHASE_SCENARIO,
+    StackSampler,
+    active_phases,
+    active_sampler,
+)
+from load_test_scenarios import Scenario, default_scenario
+
+# Standaardinstellingen
+DEFAULT_URL = "https://regenboog.jbouquet.be"
+DEFAULT_CONCURRENT = 10
+DEFAULT_TIMEOUT = 15
+MIN_CONCURRENT = 1
+MAX_CONCURRENT = 500
+# asyncio-engine: alle gebruikers in één thread, dus geen thread-limiet
+MAX_CONCURRENT_ASYNC = 10000
+
+# Engines: "threads" = 1 OS-thread per gebruiker, "asyncio" = non-blocking client in één event loop
+ENGINE_THREADS = "threads"
+ENGINE_ASYNCIO = "asyncio"
+# "processes" = asyncio-engine in 1 werkproces per CPU-kern (geen GIL-limiet), resultaten samengevoegd
+ENGINE_PROCESSES = "processes"
+ENGINES = (ENGINE_THREADS, ENGINE_ASYNCIO, ENGINE_PROCESSES)
+DEFAULT_ENGINE = ENGINE_THREADS
+MAX_CONCURRENT_PROCESSES = 50000
+# Werkprocessen sturen elke PROCESS_REPORT_SEC hun histogrammen van dat interval naar de coördinator
+PROCESS_REPORT_SEC = 1.0
+
+# Testmodel: "gesloten" = N spelers tegelijk, 1 ronde; "open" = nieuwe spelers komen binnen
+# volgens een doel-aankomstritme (spelers/sec), los van de responstijden van de server;
+# "multiplayer" = paren spelers via Socket.IO (zie load_test_socketio.py);
+# "replay" = verkeer uit de nginx access log (zie load_test_replay.py);
+# "schrijfdruk" = score-bursts tegen leaderboard-lezers op één spel (zie load_test_contention.py)
+# "hartslag" = soak: open tabbladen die urenlang analytics-heartbeats sturen (zie load_test_heartbeat.py)
+MODEL_CLOSED = "gesloten"
+MODEL_OPEN = "open"
+MODEL_MULTIPLAYER = "multiplayer"
+MODEL_REPLAY = "replay"
+MODEL_CONTENTION = "schrijfdruk"
+MODEL_SOAK = "hartslag"
+MODELS = (MODEL_CLOSED, MODEL_OPEN, MODEL_MULTIPLAYER, MODEL_REPLAY, MODEL_CONTENTION, MODEL_SOAK)
+
+# Ramp-profielen voor het open model
+PROFILE_CONSTANT = "constant"
+PROFILE_RAMP = "ramp"
+PROFILE_STEP = "step"
+PROFILE_SPIKE = "spike"
+PROFILES = (PROFILE_CONSTANT, PROFILE_RAMP, PROFILE_STEP, PROFILE_SPIKE)
+DEFAULT_RATE = 2.0
+DEFAULT_PEAK_RATE = 10.0
+DEFAULT_DURATION = 60
+MAX_DURATION = 24 * 3600
+STEP_COUNT = 4
+SPIKE_START = 0.4  # spike loopt van 40% tot 50% van de duur
+SPIKE_END = 0.5
+
+USER_AGENT = "RegenboogLoadTest/1.0 (simulated browser)"
+
+# Endpoints groeperen voor de histogrammen: per spel/klas verschillende paden → één route
+ENDPOINT_PATTERNS = [
+    (re.compile(r"^/games/[^/]+\.html$"), "/games/*.html"),
+    (re.compile(r"^/api/leaderboard/[^/]+$"), "/api/leaderboard/:class"),
+    (re.compile(r"^/api/vlinders/word/[^/]+$"), "/api/vlinders/word/:round"),
+    (re.compile(r"^/js/games/[^/]+\.js$"), "/js/games/*.js"),
+    (re.compile(r"^/assets/images/"), "/assets/images/*"),
+]
+# Percentielen in het resultaat per endpoint
+PERCENTILES = (("p50", 0.50), ("p90", 0.90), ("p95", 0.95), ("p99", 0.99), ("p999", 0.999))
+# Coordinated omission: max. ingevulde waarden per trage request (daarboven gewogen)
+CO_MAX_FILL = 1000
+# Stappen zonder bedenktijd: verwacht interval = mediaan van het endpoint, pas na zoveel metingen,
+# en om de CO_TYPICAL_REFRESH metingen opnieuw bepaald
+CO_MIN_SAMPLES = 20
+CO_TYPICAL_REFRESH = 50
+# Live-paneel: verversen per seconde, p95 over de laatste ROLLING_WINDOW_SEC seconden
+LIVE_INTERVAL_MS = 1000
+ROLLING_WINDOW_SEC = 10
+# Gefaalde bezoekers die bewaard worden als voorbeeld (rest telt alleen mee in de statistiek)
+MAX_FAILED_SAMPLES = 20
+
+# Browsermodus: per HTML-pagina ook CSS/JS/afbeeldingen ophalen, parallel over max. 6 verbindingen
+# per host (zoals Chrome en Firefox), met een cache per gebruiker (ETag / Last-Modified)
+BROWSER_CONNECTIONS_PER_HOST = 6
+CACHE_COUNTERS = ("requests", "not_modified", "hits", "bytes_saved", "time_saved_ms")
+
+
+def _http_error_text(status: int) -> str:
+    """Zelfde foutmelding als urllib.error.HTTPError ("HTTP Error 404: Not Found")."""
+    try:
+        reason = HTTPStatus(status).phrase
+    except ValueError:
+        reason = ""
+    return f"HTTP Error {status}: {reason}"
+
+
+_ssl_context = None
+
+
+def _get_ssl_context() -> ssl.SSLContext:
+    """Eén gedeelde SSL-context; per verbinding aanmaken kost veel CPU."""
+    global _ssl_context
+    if _ssl_context is None:
+        _ssl_context = ssl.create_default_context()
+    return _ssl_context
+
+
+def _result(path: str, start: float, status: int | None = None, error: str | None = None, **extra) -> dict:
+    """Result dict van één request: ok, status_code, ms, path, (error), plus verbindingsinfo."""
+    ms = int((time.perf_counter() - start) * 1000)
+    if error is None and status is not None and status >= 400:
+        error = _http_error_text(status)
+    r = {"ok": error is None and status is not None and 200 <= status < 400, "status_code": status, "ms": ms, "path": path}
+    if error is not None:
+        r["error"] = error
+    r.update(extra)
+    return r
+
+
+class _Target:
+    """Geparste basis-URL (scheme, host, poort) gedeeld door de connection pools."""
+
+    def __init__(self, base_url: str):
+        url = urllib.parse.urlsplit(base_url.rstrip("/"))
+        self.is_https = url.scheme == "https"
+        self.host = url.hostname or "localhost"
+        self.port = url.port or (443 if self.is_https else 80)
+        self.host_header = url.netloc.rsplit("@", 1)[-1]
+        self.prefix = url.path.rstrip("/")
+
+
+def _encode_body(method: str, body: dict | None) -> bytes | None:
+    if method == "GET":
+        return None
+    return json.dumps(body or {}).encode("utf-8")
+
+
+def _body_text(headers: dict, payload: bytes) -> str:
+    if headers.get("content-encoding", "").lower() == "gzip":
+        payload = gzip.decompress(payload)
+    return payload.decode("utf-8", "replace")
+
+
+def _add_cache_info(r: dict, headers: dict, payload: bytes) -> None:
+    """Browsermodus: validators en Cache-Control in het result; bij HTML ook de (uitgepakte) body."""
+    for name in ("etag", "last-modified", "cache-control"):
+        if name in headers:
+            r[name] = headers[name]
+    if "text/html" in headers.get("content-type", "") and payload:
+        r["body"] = _body_text(headers, payload)
+
+
+class ConnectionPool:
+    """
+    HTTP/1.1-verbindingen van één virtuele gebruiker (thread-engine).
+    keep_alive=True: verbindingen blijven open en worden hergebruikt over de hele route,
+    zoals een browser doet. keep_alive=False: nieuwe TCP/TLS-verbinding per request.
+    """
+
+    def __init__(self, base_url: str, timeout_sec: int, keep_alive: bool = True):
+        self.target = _Target(base_url)
+        self.timeout_sec = timeout_sec
+        self.keep_alive = keep_alive
+        self.connections_opened = 0
+        self._idle: list[http.client.HTTPConnection] = []
+        self._lock = threading.Lock()  # browsermodus: tot 6 threads delen de pool
+
+    def _connect(self) -> tuple[http.client.HTTPConnection, int]:
+        t = self.target
+        if t.is_https:
+            conn = http.client.HTTPSConnection(t.host, t.port, timeout=self.timeout_sec, context=_get_ssl_context())
+        else:
+            conn = http.client.HTTPConnection(t.host, t.port, timeout=self.timeout_sec)
+        start = time.perf_counter()
+        conn.connect()
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self.connections_opened += 1
+        phases = active_phases()
+        if phases is not None:
+            phases.add(PHASE_CONNECT, elapsed)
+        return conn, int(elapsed * 1000)
+
+    def request(
+        self,
+        method: str,
+        path: str,
+        body: dict | None = None,
+        extra_headers: dict | None = None,
+        cache_info: bool = False,
+    ) -> dict:
+        """
+        Eén HTTP request (GET of POST met JSON); retourneert ok, status_code, ms, path, error, bytes.
+        cache_info (browsermodus): ook de cache-headers en, bij HTML, de body in het result.
+        """
+        phases = active_phases()  # profilering (load_test_profiler); None = geen metingen
+        t0 = time.perf_counter()
+        data = _encode_body(method, body)
+        headers = {
+            "Host": self.target.host_header,
+            "User-Agent": USER_AGENT,
+            "Accept": "*/*",
+            "Connection": "keep-alive" if self.keep_alive else "close",
+        }
+        if data is not None:
+            headers["Content-Type"] = "application/json"
+        if extra_headers:
+            headers.update(extra_headers)
+        start = time.perf_counter()
+        if phases is not None:
+            phases.add(PHASE_ENCODE, start - t0)
+        # Een hergebruikte verbinding kan intussen door de server gesloten zijn (keep-alive timeout);
+        # dan één keer opnieuw proberen op een verse verbinding, net als een browser.
+        for attempt in (0, 1):
+            # browsermodus: meerdere threads delen _idle, dus pop en append alleen onder de lock
+            with self._lock:
+                try:
+                    conn = self._idle.pop()
+                except IndexError:
+                    conn = None
+            reused = conn is not None
+            connect_ms = 0
+            try:
+                if conn is None:
+                    conn, connect_ms = self._connect()
+                t0 = time.perf_counter()
+                conn.request(method, self.target.prefix + path, body=data, headers=headers)
+                resp = conn.getresponse()
+                payload = resp.read()
+                if phases is not None:
+                    phases.add(PHASE_EXCHANGE, time.perf_counter() - t0)
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError) as e:
+                if conn is not None:
+                    conn.close()
+                if reused and attempt == 0:
+                    continue
+                return _result(path, start, error=str(e) or type(e).__name__, connect_ms=connect_ms, reused=reused)
+            except TimeoutError:
+                if conn is not None:
+                    conn.close()
+                r = _result(path, start, error="timeout", connect_ms=connect_ms, reused=reused)
+                r["ms"] = self.timeout_sec * 1000
+                return r
+            except Exception as e:
+                if conn is not None:
+                    conn.close()
+                return _result(path, start, error=str(e) or type(e).__name__, connect_ms=connect_ms, reused=reused)
+            if self.keep_alive and not resp.will_close:
+                with self._lock:
+                    self._idle.append(conn)
+            else:
+                conn.close()
+            r = _result(path, start, resp.status, connect_ms=connect_ms, reused=reused, bytes=len(payload))
+            if cache_info:
+                _add_cache_info(r, {k.lower(): v for k, v in resp.getheaders()}, payload)
+            return r
+        raise AssertionError("unreachable")
+
+    def close(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+
+class _timeout:
+    """Minimale asyncio.timeout() (pas vanaf Python 3.11) voor een blok met meerdere awaits."""
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self._handle = None
+        self._task = None
+        self._expired = False
+
+    async def __aenter__(self):
+        self._task = asyncio.current_task()
+        self._handle = asyncio.get_running_loop().call_later(self.seconds, self._expire)
+        return self
+
+    def _expire(self):
+        self._expired = True
+        self._task.cancel()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self._handle.cancel()
+        if self._expired and exc_type is asyncio.CancelledError:
+            raise asyncio.TimeoutError
+        return False
+
+
+async def _read_http_response(reader: asyncio.StreamReader) -> tuple[int, dict, bytes]:
+    """Lees één HTTP/1.1 response (Content-Length, chunked of tot EOF)."""
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionResetError("Verbinding gesloten door server")
+    parts = status_line.decode("latin-1").split(" ", 2)
+    status = int(parts[1])
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    if status in (204, 304) or 100 <= status < 200:
+        body = b""  # nooit een body, ook niet als er een Content-Length meekomt
+    elif headers.get("transfer-encoding", "").lower() == "chunked":
+        chunks = []
+        while True:
+            size_line = await reader.readline()
+            size = int(size_line.split(b";")[0].strip() or b"0", 16)
+            if size == 0:
+                # Trailers overslaan
+                while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    pass
+                break
+            chunks.append(await reader.readexactly(size))
+            await reader.readexactly(2)
+        body = b"".join(chunks)
+    elif "content-length" in headers:
+        body = await reader.readexactly(int(headers["content-length"]))
+    else:
+        headers["connection"] = "close"
+        body = await reader.read()
+    return status, headers, body
+
+
+class AsyncConnectionPool:
+    """Async tegenhanger van ConnectionPool (asyncio streams, geen threads); zelfde result dict."""
+
+    def __init__(self, base_url: str, timeout_sec: int, keep_alive: bool = True):
+        self.target = _Target(base_url)
+        self.timeout_sec = timeout_sec
+        self.keep_alive = keep_alive
+        self.connections_opened = 0
+        self._idle: list[tuple[asyncio.StreamReader, asyncio.StreamWriter]] = []
+
+    async def _connect(self) -> tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        t = self.target
+        reader, writer = await asyncio.open_connection(
+            t.host,
+            t.port,
+            ssl=_get_ssl_context() if t.is_https else None,
+            server_hostname=t.host if t.is_https else None,
+        )
+        self.connections_opened += 1
+        return reader, writer
+
+    def _encode_request(self, method: str, path: str, body: dict | None, extra_headers: dict | None = None) -> bytes:
+        data = _encode_body(method, body)
+        lines = [
+            f"{method} {self.target.prefix + path} HTTP/1.1",
+            f"Host: {self.target.host_header}",
+            f"User-Agent: {USER_AGENT}",
+            "Accept: */*",
+            "Connection: keep-alive" if self.keep_alive else "Connection: close",
+        ]
+        lines.extend(f"{k}: {v}" for k, v in (extra_headers or {}).items())
+        if data is not None:
+            lines.append("Content-Type: application/json")
+            lines.append(f"Content-Length: {len(data)}")
+        return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + (data or b"")
+
+    async def request(
+        self,
+        method: str,
+        path: str,
+        body: dict | None = None,
+        extra_headers: dict | None = None,
+        cache_info: bool = False,
+        keep_body: bool = False,
+    ) -> dict:
+        """Zelfde result dict als ConnectionPool.request; keep_body: ook de body als tekst (bijv. JSON van een API)."""
+        phases = active_phases()
+        t0 = time.perf_counter()
+        raw = self._encode_request(method, path, body, extra_headers)
+        start = time.perf_counter()
+        if phases is not None:
+            phases.add(PHASE_ENCODE, start - t0)
+        for attempt in (0, 1):
+            conn = self._idle.pop() if self._idle else None
+            reused = conn is not None
+            connect_ms = 0
+            writer = None
+            try:
+                async with _timeout(self.timeout_sec):
+                    if conn is None:
+                        connect_start = time.perf_counter()
+                        conn = await self._connect()
+                        connect_ms = int((time.perf_counter() - connect_start) * 1000)
+                        if phases is not None:
+                            phases.add(PHASE_CONNECT, time.perf_counter() - connect_start)
+                    reader, writer = conn
+                    t0 = time.perf_counter()
+                    writer.write(raw)
+                    await writer.drain()
+                    status, headers, payload = await _read_http_response(reader)
+                    if phases is not None:
+                        phases.add(PHASE_EXCHANGE, time.perf_counter() - t0)
+            except (ConnectionResetError, BrokenPipeError, asyncio.IncompleteReadError) as e:
+                if writer is not None:
+                    writer.close()
+                if reused and attempt == 0:
+                    continue
+                return _result(path, start, error=str(e) or type(e).__name__, connect_ms=connect_ms, reused=reused)
+            except asyncio.TimeoutError:
+                if writer is not None:
+                    writer.close()
+                r = _result(path, start, error="timeout", connect_ms=connect_ms, reused=reused)
+                r["ms"] = self.timeout_sec * 1000
+                return r
+            except Exception as e:
+                if writer is not None:
+                    writer.close()
+                return _result(path, start, error=str(e) or type(e).__name__, connect_ms=connect_ms, reused=reused)
+            if self.keep_alive and headers.get("connection", "").lower() != "close":
+                self._idle.append(conn)
+            else:
+                writer.close()
+            r = _result(path, start, status, connect_ms=connect_ms, reused=reused, bytes=len(payload))
+            if cache_info:
+                _add_cache_info(r, headers, payload)
+            if keep_body and payload:
+                r["body"] = _body_text(headers, payload)
+            return r
+        raise AssertionError("unreachable")
+
+    def close(self) -> None:
+        while self._idle:
+            self._idle.pop()[1].close()
+
+
+class _AssetParser(HTMLParser):
+    """Verzamelt de sub-resources die een browser bij het laden van de pagina ophaalt."""
+
+    LINK_RELS = {"stylesheet", "icon", "shortcut", "apple-touch-icon", "preload", "modulepreload", "manifest"}
+
+    def __init__(self):
+        super().__init__()
+        self.urls: list[str] = []
+
+    def handle_starttag(self, tag, attrs):
+        a = dict(attrs)
+        if tag == "link" and a.get("href") and set((a.get("rel") or "").lower().split()) & self.LINK_RELS:
+            self.urls.append(a["href"])
+        elif tag in ("script", "img", "source", "audio", "video") and a.get("src"):
+            self.urls.append(a["src"])
+
+
+def page_assets(html: str, page_path: str, target: _Target) -> list[str]:
+    """Paden (zonder prefix) van de sub-resources op dezelfde host, in documentvolgorde, zonder dubbels."""
+    parser = _AssetParser()
+    try:
+        parser.feed(html)
+        parser.close()
+    except Exception:
+        pass
+    paths = []
+    for url in parser.urls:
+        parts = urllib.parse.urlsplit(urllib.parse.urljoin(target.prefix + page_path, url.strip()))
+        if parts.scheme not in ("", "http", "https") or (parts.netloc and parts.netloc != target.host_header):
+            continue  # data:, andere hosts (CDN) – niet de Pi
+        path = parts.path or "/"
+        if target.prefix and path.startswith(target.prefix + "/"):
+            path = path[len(target.prefix):]
+        if parts.query:
+            path += "?" + parts.query
+        if path not in paths:
+            paths.append(path)
+    return paths
+
+
+def _max_age(cache_control: str) -> float | None:
+    """max-age uit Cache-Control (None = niet opgegeven); no-cache/no-store → 0."""
+    cc = cache_control.lower()
+    if "no-store" in cc or "no-cache" in cc:
+        return 0.0
+    m = re.search(r"max-age=(\d+)", cc)
+    return float(m.group(1)) if m else None
+
+
+class BrowserCache:
+    """
+    HTTP-cache van één virtuele gebruiker, zoals de browsercache. Nog verse items (max-age) worden
+    niet opgevraagd; verlopen items worden gerevalideerd met If-None-Match / If-Modified-Since.
+    Per item onthouden we de grootte en de duur van de volledige download, zodat een 304 of een
+    cachetreffer omgerekend kan worden naar bespaarde bytes en tijd.
+    """
+
+    def __init__(self):
+        self.entries: dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def lookup(self, path: str) -> tuple[dict | None, dict]:
+        """(vers cache-item of None, extra request-headers)."""
+        headers = {"Accept-Encoding": "gzip"}
+        with self._lock:
+            entry = self.entries.get(path)
+        if entry is None:
+            return None, headers
+        if entry["expires"] > time.monotonic():
+            return entry, headers
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last-modified"):
+            headers["If-Modified-Since"] = entry["last-modified"]
+        return None, headers
+
+    def update(self, path: str, r: dict) -> tuple[str, dict | None]:
+        """
+        Verwerk een response: ("200"|"304"|"", oud cache-item). Haalt de cache-headers en de
+        HTML-body uit r (blijven niet in de outcomes hangen); bij 304 komt de body uit de cache.
+        """
+        info = {name: r.pop(name) for name in ("etag", "last-modified", "cache-control") if name in r}
+        body = r.pop("body", None)
+        with self._lock:
+            old = self.entries.get(path)
+            if r.get("status_code") == 304 and old is not None:
+                max_age = _max_age(info.get("cache-control", old.get("cache-control", "")))
+                old["expires"] = time.monotonic() + (max_age or 0.0)
+                r["body"] = old.get("body")
+                return "304", old
+            if r.get("status_code") != 200:
+                return "", None
+            max_age = _max_age(info.get("cache-control", ""))
+            if "no-store" not in info.get("cache-control", "").lower() and (
+                info.get("etag") or info.get("last-modified") or max_age
+            ):
+                self.entries[path] = {
+                    **info,
+                    "expires": time.monotonic() + (max_age or 0.0),
+                    "bytes": r.get("bytes", 0),
+                    "ms": r.get("ms", 0),
+                    "body": body,
+                }
+        r["body"] = body
+        return "200", None
+
+
+def _is_page(method: str, path: str) -> bool:
+    path = path.split("?", 1)[0]
+    return method == "GET" and (path.endswith("/") or path.endswith(".html"))
+
+
+def _cached_result(path: str) -> dict:
+    """Result van een cachetreffer: geen request, dus 0 ms."""
+    return {"ok": True, "status_code": 200, "ms": 0, "path": path, "cached": True}
+
+
+def _browser_get(pool: ConnectionPool, cache: BrowserCache, path: str, metrics: "RunMetrics | None") -> dict:
+    """GET via de browsercache (thread-engine); r["body"] bevat de HTML bij een pagina."""
+    fresh, headers = cache.lookup(path)
+    if fresh is not None:
+        if metrics is not None:
+            metrics.record_cache("hit", fresh["ms"], fresh["bytes"])
+        return {**_cached_result(path), "body": fresh.get("body")}
+    if metrics is not None:
+        metrics.request_started()
+    r = pool.request("GET", path, extra_headers=headers, cache_info=True)
+    event, old = cache.update(path, r)
+    if metrics is not None:
+        metrics.record_request("GET", path, r)
+        metrics.record_cache(event, max(0, old["ms"] - r["ms"]) if old else 0, old["bytes"] if old else 0)
+    return r
+
+
+async def _browser_get_async(
+    pool: AsyncConnectionPool, cache: BrowserCache, path: str, metrics: "RunMetrics | None"
+) -> dict:
+    fresh, headers = cache.lookup(path)
+    if fresh is not None:
+        if metrics is not None:
+            metrics.record_cache("hit", fresh["ms"], fresh["bytes"])
+        return {**_cached_result(path), "body": fresh.get("body")}
+    if metrics is not None:
+        metrics.request_started()
+    r = await pool.request("GET", path, extra_headers=headers, cache_info=True)
+    event, old = cache.update(path, r)
+    if metrics is not None:
+        metrics.record_request("GET", path, r)
+        metrics.record_cache(event, max(0, old["ms"] - r["ms"]) if old else 0, old["bytes"] if old else 0)
+    return r
+
+
+def _load_page(
+    pool: ConnectionPool, cache: BrowserCache, path: str, metrics: "RunMetrics | None"
+) -> tuple[list[dict], dict]:
+    """
+    Pagina zoals een browser: eerst het HTML-document, dan de sub-resources parallel over
+    max. BROWSER_CONNECTIONS_PER_HOST verbindingen. Eerste result = het document (bepaalt ok).
+    Cachetreffers zijn geen request en komen niet in de lijst. De sub-resources lopen parallel,
+    dus voor de tijd per bezoeker telt load_ms van het document (tot de laatste sub-resource).
+    """
+    start = time.perf_counter()
+    page = _browser_get(pool, cache, path, metrics)
+    html = page.pop("body", None)
+    results = [] if page.get("cached") else [page]
+    assets = page_assets(html, path, pool.target) if html and page.get("ok") else []
+    if assets:
+        with ThreadPoolExecutor(max_workers=min(BROWSER_CONNECTIONS_PER_HOST, len(assets))) as ex:
+            for r in ex.map(lambda p: _browser_get(pool, cache, p, metrics), assets):
+                r.pop("body", None)
+                if not r.get("cached"):
+                    r["required"] = False
+                    r["asset"] = True
+                    results.append(r)
+    page["load_ms"] = int((time.perf_counter() - start) * 1000)
+    return results, page
+
+
+async def _load_page_async(
+    pool: AsyncConnectionPool, cache: BrowserCache, path: str, metrics: "RunMetrics | None"
+) -> tuple[list[dict], dict]:
+    start = time.perf_counter()
+    page = await _browser_get_async(pool, cache, path, metrics)
+    html = page.pop("body", None)
+    results = [] if page.get("cached") else [page]
+    assets = page_assets(html, path, pool.target) if html and page.get("ok") else []
+    if assets:
+        lanes = asyncio.Semaphore(BROWSER_CONNECTIONS_PER_HOST)
+
+        async def fetch(p: str) -> dict:
+            async with lanes:
+                return await _browser_get_async(pool, cache, p, metrics)
+
+        for r in await asyncio.gather(*(fetch(p) for p in assets)):
+            r.pop("body", None)
+            if not r.get("cached"):
+                r["required"] = False
+                r["asset"] = True
+                results.append(r)
+    page["load_ms"] = int((time.perf_counter() - start) * 1000)
+    return results, page
+
+
+def player_journey(player_id: int, revisit: bool = False, scenario: Scenario | None = None):
+    """
+    Stappen van één bezoeker volgens scenario (standaard: scenarios/standaard.json, homepage →
+    spel → tracking → leaderboard → score). Generator die Step(method, path, body, required,
+    headers, think) oplevert en per stap terugkrijgt of die gelukt is; zo delen de thread- en
+    asyncio-engine exact dezelfde route. Optionele stappen (zoals tracking) mogen falen.
+    revisit: daarna terug naar de homepage (herhaalbezoek; browsermodus revalideert de cache).
+    """
+    return (scenario or default_scenario()).journey(player_id, revisit)
+
+
+def simulate_one_player(
+    base_url: str,
+    timeout_sec: int,
+    player_id: int,
+    keep_alive: bool = True,
+    metrics: "RunMetrics | None" = None,
+    assets: bool = False,
+    scenario: Scenario | None = None,
+    cancel_flag: threading.Event | None = None,
+    lag_ms: int = 0,
+) -> dict:
+    """
+    Simuleer één bezoeker met blocking requests (thread-engine), met een eigen connection pool.
+    assets=True: browsermodus, pagina's met sub-resources en een eigen browsercache.
+    scenario: gecompileerd scenario (load_test_scenarios); None = standaardscenario.
+    cancel_flag: onderbreekt de bedenktijd tussen stappen bij stoppen.
+    lag_ms: achterstand van deze bezoeker op het aankomstschema (open model); telt bij de eerste
+    request mee in de gecorrigeerde latency. Een request na een stap met bedenktijd krijgt expected_ms
+    mee: het eigen ritme van de bezoeker (service- plus bedenktijd van de vorige stap), voor de
+    CO-correctie. Zonder bedenktijd kiest RunMetrics de gewone servicetijd van het endpoint.
+    """
+    results = []
+    pool = ConnectionPool(base_url, timeout_sec, keep_alive)
+    cache = BrowserCache() if assets else None
+    journey = player_journey(player_id, assets, scenario)
+    phases = active_phases()
+    ok = None
+    # Start tot start van twee stappen van deze bezoeker zonder stilstand; zonder bedenktijd volgt
+    # de volgende stap gewoon op het antwoord en neemt RunMetrics de gewone servicetijd van het endpoint
+    cadence_ms = 0
+    try:
+        while True:
+            t0 = time.perf_counter()
+            step = journey.send(ok)
+            if phases is not None:
+                phases.add(PHASE_SCENARIO, time.perf_counter() - t0)
+            if cache is not None and _is_page(step.method, step.path):
+                page_results, page = _load_page(pool, cache, step.path, metrics)
+                page["required"] = step.required
+                lag_ms = 0  # browsermodus: pagina's (document + sub-resources) tellen ongecorrigeerd
+                cadence_ms = page["load_ms"] + step.think * 1000 if step.think else 0
+                results.extend(page_results)
+                ok = page.get("ok", False)
+            else:
+                if metrics is not None:
+                    metrics.request_started()
+                r = pool.request(step.method, step.path, step.body, step.headers)
+                r["required"] = step.required
+                r["lag_ms"], lag_ms = lag_ms, 0
+                if cadence_ms:
+                    r["expected_ms"] = cadence_ms
+                cadence_ms = r["ms"] + step.think * 1000 if step.think else 0
+                if metrics is not None:
+                    metrics.record_request(step.method, step.path, r)
+                results.append(r)
+                ok = r.get("ok", False)
+            if step.think:
+                if cancel_flag is None:
+                    time.sleep(step.think)
+                elif cancel_flag.wait(step.think):
+                    break
+    except StopIteration:
+        pass
+    finally:
+        pool.close()
+    return {"player_id": player_id, "results": results, "connections": pool.connections_opened}
+
+
+async def simulate_one_player_async(
+    base_url: str,
+    timeout_sec: int,
+    player_id: int,
+    keep_alive: bool = True,
+    metrics: "RunMetrics | None" = None,
+    assets: bool = False,
+    scenario: Scenario | None = None,
+    lag_ms: int = 0,
+) -> dict:
+    """Simuleer één bezoeker als coroutine (asyncio-engine); zelfde route en result dict."""
+    results = []
+    pool = AsyncConnectionPool(base_url, timeout_sec, keep_alive)
+    cache = BrowserCache() if assets else None
+    journey = player_journey(player_id, assets, scenario)
+    phases = active_phases()
+    ok = None
+    # Start tot start van twee stappen van deze bezoeker zonder stilstand; zonder bedenktijd volgt
+    # de volgende stap gewoon op het antwoord en neemt RunMetrics de gewone servicetijd van het endpoint
+    cadence_ms = 0
+    try:
+        while True:
+            t0 = time.perf_counter()
+            step = journey.send(ok)
+            if phases is not None:
+                phases.add(PHASE_SCENARIO, time.perf_counter() - t0)
+            if cache is not None and _is_page(step.method, step.path):
+                page_results, page = await _load_page_async(pool, cache, step.path, metrics)
+                page["required"] = step.required
+                lag_ms = 0  # browsermodus: pagina's (document + sub-resources) tellen ongecorrigeerd
+                cadence_ms = page["load_ms"] + step.think * 1000 if step.think else 0
+                results.extend(page_results)
+                ok = page.get("ok", False)
+            else:
+                if metrics is not None:
+                    metrics.request_started()
+                r = await pool.request(step.method, step.path, step.body, step.headers)
+                r["required"] = step.required
+                r["lag_ms"], lag_ms = lag_ms, 0
+                if cadence_ms:
+                    r["expected_ms"] = cadence_ms
+                cadence_ms = r["ms"] + step.think * 1000 if step.think else 0
+                if metrics is not None:
+                    metrics.record_request(step.method, step.path, r)
+                results.append(r)
+                ok = r.get("ok", False)
+            if step.think:
+                await asyncio.sleep(step.think)
+    except StopIteration:
+        pass
+    finally:
+        pool.close()
+    return {"player_id": player_id, "results": results, "connections": pool.connections_opened}
+
+
+def endpoint_key(method: str, path: str) -> str:
+    """Histogram-sleutel: HTTP-methode + genormaliseerd pad, bijv. "GET /api/leaderboard/:class"."""
+    path = path.split("?", 1)[0]
+    for pattern, name in ENDPOINT_PATTERNS:
+        if pattern.match(path):
+            path = name
+            break
+    return f"{method} {path}"
+
+
+class LatencyHistogram:
+    """
+    Compact, samenvoegbaar latency-histogram in HDR-stijl. Waarden worden in µs opgeslagen in
+    logaritmische buckets met SUB_BUCKET_BITS bits precisie (relatieve fout < 1%), dus het
+    geheugen blijft O(aantal buckets), hoe lang de test ook loopt.
+    """
+
+    SUB_BUCKET_BITS = 8
+    _SUB = 1 << SUB_BUCKET_BITS
+    _HALF = _SUB >> 1
+
+    def __init__(self):
+        self.counts: dict[int, int] = {}
+        self.count = 0
+        self.total_us = 0
+        self.min_us = 0
+        self.max_us = 0
+
+    @classmethod
+    def _index(cls, us: int) -> int:
+        if us < cls._SUB:
+            return us
+        shift = us.bit_length() - cls.SUB_BUCKET_BITS
+        return cls._SUB + (shift - 1) * cls._HALF + ((us >> shift) - cls._HALF)
+
+    @classmethod
+    def _upper(cls, index: int) -> int:
+        """Hoogste waarde (µs) die in bucket index valt."""
+        if index < cls._SUB:
+            return index
+        shift, sub = divmod(index - cls._SUB, cls._HALF)
+        shift += 1
+        return ((sub + cls._HALF + 1) << shift) - 1
+
+    def record(self, ms: float, count: int = 1) -> None:
+        us = max(0, int(ms * 1000))
+        idx = self._index(us)
+        self.counts[idx] = self.counts.get(idx, 0) + count
+        if self.count == 0 or us < self.min_us:
+            self.min_us = us
+        if us > self.max_us:
+            self.max_us = us
+        self.count += count
+        self.total_us += us * count
+
+    def record_corrected(self, ms: float, expected_ms: float) -> None:
+        """
+        record() met correctie voor coordinated omission (zoals HdrHistogram): duurde een request
+        langer dan expected_ms, het normale interval tussen twee stappen van deze bezoeker (of de
+        gewone servicetijd van het endpoint), dan had die bezoeker in die tijd nog stappen gezet.
+        Die worden ingevuld met ms - expected_ms, ms - 2 × expected_ms, ... (boven CO_MAX_FILL
+        waarden gewogen, zodat één timeout goedkoop blijft).
+        """
+        self.record(ms)
+        if expected_ms <= 0:
+            return
+        missing = int(ms // expected_ms) - 1
+        if missing <= 0:
+            return
+        stride = -(-missing // CO_MAX_FILL)
+        for k in range(1, missing + 1, stride):
+            self.record(ms - k * expected_ms, min(stride, missing - k + 1))
+
+    def merge(self, other: "LatencyHistogram") -> None:
+        if other.count == 0:
+            return
+        for idx, n in other.counts.items():
+            self.counts[idx] = self.counts.get(idx, 0) + n
+        if self.count == 0 or other.min_us < self.min_us:
+            self.min_us = other.min_us
+        self.max_us = max(self.max_us, other.max_us)
+        self.count += other.count
+        self.total_us += other.total_us
+
+    def percentile(self, q: float) -> float:
+        """Nearest-rank percentiel in ms (0 als het histogram leeg is)."""
+        if self.count == 0:
+            return 0.0
+        rank = max(1, math.ceil(q * self.count))
+        seen = 0
+        for idx in sorted(self.counts):
+            seen += self.counts[idx]
+            if seen >= rank:
+                return min(self._upper(idx), self.max_us) / 1000
+        return self.max_us / 1000
+
+    def mean(self) -> float:
+        return self.total_us / self.count / 1000 if self.count else 0.0
+
+    def to_dict(self) -> dict:
+        """JSON-vriendelijke vorm (bucket-index → aantal), bijv. om tussen processen te versturen."""
+        return {
+            "counts": {str(k): v for k, v in self.counts.items()},
+            "count": self.count,
+            "total_us": self.total_us,
+            "min_us": self.min_us,
+            "max_us": self.max_us,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "LatencyHistogram":
+        h = cls()
+        h.counts = {int(k): v for k, v in data.get("counts", {}).items()}
+        h.count = data.get("count", 0)
+        h.total_us = data.get("total_us", 0)
+        h.min_us = data.get("min_us", 0)
+        h.max_us = data.get("max_us", 0)
+        return h
+
+
+class EndpointStats:
+    """
+    Histogrammen plus fouten voor één endpoint (methode + pad): histogram = gemeten latency,
+    corrected = gemeten vanaf de bedoelde starttijd (de aanvulling voor coordinated omission zit
+    in RunMetrics.corrected, over alle endpoints samen).
+    """
+
+    def __init__(self):
+        self.histogram = LatencyHistogram()
+        self.corrected = LatencyHistogram()
+        self.errors = 0
+
+    def merge(self, other: "EndpointStats") -> None:
+        self.histogram.merge(other.histogram)
+        self.corrected.merge(other.corrected)
+        self.errors += other.errors
+
+    def summary(self, duration_sec: float) -> dict:
+        h = self.histogram
+        out = {
+            "count": h.count,
+            "errors": self.errors,
+            "rps": round(h.count / duration_sec, 2) if duration_sec > 0 else 0.0,
+            "mean": round(h.mean(), 1),
+        }
+        for name, q in PERCENTILES:
+            out[name] = round(h.percentile(q), 1)
+        out["max"] = round(h.max_us / 1000, 1)
+        c = self.corrected
+        for name, q in PERCENTILES:
+            out[f"{name}_corrected"] = round(c.percentile(q), 1)
+        out["max_corrected"] = round(c.max_us / 1000, 1)
+        return out
+
+    def to_dict(self) -> dict:
+        return {"histogram": self.histogram.to_dict(), "corrected": self.corrected.to_dict(), "errors": self.errors}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "EndpointStats":
+        e = cls()
+        e.histogram = LatencyHistogram.from_dict(data.get("histogram", {}))
+        e.corrected = LatencyHistogram.from_dict(data.get("corrected", {}))
+        e.errors = data.get("errors", 0)
+        return e
+
+
+class RunMetrics:
+    """
+    Incrementele aggregatie van een run: per-endpoint histogrammen, bezoekers geslaagd/gefaald,
+    journey-tijden, verbindingen, overgedragen bytes en (browsermodus) cachecijfers.
+    per_second=True: per wandklok-seconde ook een histogram plus fouten (seconds), zodat latency
+    naast de Pi-metingen gelegd kan worden; alleen dan, want dat groeit met de duur van de run.
+    corrected = alle requests vanaf hun bedoelde
+    start plus de stappen die bezoekers tijdens een stilstand niet konden zetten (coordinated
+    omission). Workers voeden dit per request; thread-safe.
+    Houdt ook live-cijfers bij (lopend interval + rollend venster) voor het live-paneel.
+    """
+
+    def __init__(self, per_second: bool = False):
+        self._lock = threading.Lock()
+        self.per_second = per_second
+        self.in_flight = 0
+        self.requests_total = 0
+        self._interval: dict[str, LatencyHistogram] = {}
+        self._interval_errors = 0
+        self._interval_start = time.perf_counter()
+        self._window: deque = deque(maxlen=ROLLING_WINDOW_SEC)
+        self.endpoints: dict[str, EndpointStats] = {}
+        self.journeys = LatencyHistogram()
+        self.corrected = LatencyHistogram()
+        self.success_count = 0
+        self.fail_count = 0
+        self.connections_opened = 0
+        self.connect_ms_total = 0
+        self.connect_count = 0
+        self.bytes_total = 0
+        self.cache: dict[str, int] = dict.fromkeys(CACHE_COUNTERS, 0)
+        self.failed_samples: list[dict] = []
+        # Servicetijd per endpoint over de hele run (niet geleegd door drain) → verwacht interval
+        # voor stappen zonder bedenktijd: [histogram, mediaan in ms of 0 zolang er te weinig metingen zijn]
+        self._typical: dict[str, list] = {}
+        self.seconds: dict[int, list] = {}  # epoch-seconde → [LatencyHistogram, fouten]
+
+    def request_started(self) -> None:
+        with self._lock:
+            self.in_flight += 1
+
+    def record_request(self, method: str, path: str, r: dict) -> None:
+        phases = active_phases()
+        t0 = time.perf_counter()
+        key = endpoint_key(method, path)
+        ms = r.get("ms", 0)
+        with self._lock:
+            bucket = None
+            if self.per_second:
+                second = int(time.time())
+                bucket = self.seconds.get(second)
+                if bucket is None:
+                    bucket = self.seconds[second] = [LatencyHistogram(), 0]
+                bucket[0].record(ms)
+            stats = self.endpoints.get(key)
+            if stats is None:
+                stats = self.endpoints[key] = EndpointStats()
+            # Correctie voor coordinated omission: vanaf de bedoelde start (achterstand op het schema
+            # telt mee). De gemiste stappen zijn die van de bezoeker, op andere endpoints: die vullen
+            # alleen het totaal aan, op basis van het eigen ritme van de bezoeker (expected_ms)
+            intended_ms = ms + r.get("lag_ms", 0)
+            stats.corrected.record(intended_ms)
+            expected_ms = r.get("expected_ms", 0)
+            if not r.get("asset"):
+                typical_ms = self._typical_ms(key, ms)
+                if not expected_ms:
+                    expected_ms = typical_ms
+            self.corrected.record_corrected(intended_ms, expected_ms)
+            stats.histogram.record(ms)
+            interval = self._interval.get(key)
+            if interval is None:
+                interval = self._interval[key] = LatencyHistogram()
+            interval.record(ms)
+            self.requests_total += 1
+            self.bytes_total += r.get("bytes", 0)
+            if self.in_flight > 0:
+                self.in_flight -= 1
+            if not r.get("ok", False):
+                stats.errors += 1
+                self._interval_errors += 1
+                if bucket is not None:
+                    bucket[1] += 1
+            if r.get("connect_ms"):
+                self.connect_ms_total += r["connect_ms"]
+                self.connect_count += 1
+        if phases is not None:
+            phases.add(PHASE_BOOKKEEPING, time.perf_counter() - t0)
+
+    def _typical_ms(self, key: str, ms: float) -> float:
+        """
+        Gewone servicetijd van een endpoint vóór deze meting (mediaan, om de CO_TYPICAL_REFRESH
+        metingen bijgewerkt): het verwachte interval voor een stap zonder bedenktijd, zoals
+        HdrHistogram met een vast verwacht interval. 0 = nog te weinig metingen. Onder self._lock.
+        """
+        entry = self._typical.get(key)
+        if entry is None:
+            entry = self._typical[key] = [LatencyHistogram(), 0.0]
+        h, typical_ms = entry
+        h.record(ms)
+        if h.count >= CO_MIN_SAMPLES and (not typical_ms or h.count % CO_TYPICAL_REFRESH == 0):
+            entry[1] = h.percentile(0.5)
+        return typical_ms
+
+    def record_cache(self, event: str, saved_ms: int, saved_bytes: int) -> None:
+        """Browsermodus: event "200"/"304" = request verstuurd, "hit" = vers uit de cache (geen request)."""
+        with self._lock:
+            if event in ("200", "304"):
+                self.cache["requests"] += 1
+            if event == "304":
+                self.cache["not_modified"] += 1
+            elif event == "hit":
+                self.cache["hits"] += 1
+            else:
+                return
+            self.cache["bytes_saved"] += saved_bytes
+            self.cache["time_saved_ms"] += saved_ms
+
+    def record_journey(self, outcome: dict) -> None:
+        results = outcome.get("results", [])
+        required_ok = all(r.get("ok", False) for r in results if r.get("required", True))
+        with self._lock:
+            self.connections_opened += outcome.get("connections", 0)
+            if required_ok and results:
+                self.success_count += 1
+                # Sub-resources lopen parallel en zitten al in load_ms van hun pagina
+                self.journeys.record(sum(r.get("load_ms", r.get("ms", 0)) for r in results if not r.get("asset")))
+            else:
+                self.fail_count += 1
+                if len(self.failed_samples) < MAX_FAILED_SAMPLES:
+                    self.failed_samples.append(outcome)
+
+    def merge(self, other: "RunMetrics") -> None:
+        """Voeg other toe (bijv. een interval van een werkproces); telt ook mee voor de live-cijfers."""
+        with self._lock:
+            for key, stats in other.endpoints.items():
+                self.endpoints.setdefault(key, EndpointStats()).merge(stats)
+                self._interval.setdefault(key, LatencyHistogram()).merge(stats.histogram)
+                self._interval_errors += stats.errors
+                self.requests_total += stats.histogram.count
+            self.journeys.merge(other.journeys)
+            self.corrected.merge(other.corrected)
+            self.success_count += other.success_count
+            self.fail_count += other.fail_count
+            self.connections_opened += other.connections_opened
+            self.connect_ms_total += other.connect_ms_total
+            self.connect_count += other.connect_count
+            self.bytes_total += other.bytes_total
+            for name in CACHE_COUNTERS:
+                self.cache[name] += other.cache.get(name, 0)
+            room = MAX_FAILED_SAMPLES - len(self.failed_samples)
+            self.failed_samples.extend(other.failed_samples[:max(0, room)])
+            for second, (h, errors) in (other.seconds.items() if self.per_second else ()):
+                bucket = self.seconds.get(second)
+                if bucket is None:
+                    bucket = self.seconds[second] = [LatencyHistogram(), 0]
+                bucket[0].merge(h)
+                bucket[1] += errors
+
+    def drain(self) -> "RunMetrics":
+        """Geef alles sinds de vorige drain() terug als losse RunMetrics en begin opnieuw (werkprocessen)."""
+        out = RunMetrics(self.per_second)
+        with self._lock:
+            out.endpoints, self.endpoints = self.endpoints, {}
+            out.journeys, self.journeys = self.journeys, LatencyHistogram()
+            out.corrected, self.corrected = self.corrected, LatencyHistogram()
+            out.success_count, self.success_count = self.success_count, 0
+            out.fail_count, self.fail_count = self.fail_count, 0
+            out.connections_opened, self.connections_opened = self.connections_opened, 0
+            out.connect_ms_total, self.connect_ms_total = self.connect_ms_total, 0
+            out.connect_count, self.connect_count = self.connect_count, 0
+            out.bytes_total, self.bytes_total = self.bytes_total, 0
+            out.cache, self.cache = self.cache, dict.fromkeys(CACHE_COUNTERS, 0)
+            out.failed_samples, self.failed_samples = self.failed_samples, []
+            out.seconds, self.seconds = self.seconds, {}
+            self._interval = {}
+        return out
+
+    def set_in_flight(self, n: int) -> None:
+        """Coördinator: requests bezig = som van wat de werkprocessen laatst meldden."""
+        with self._lock:
+            self.in_flight = n
+
+    def live_snapshot(self) -> dict:
+        """
+        Sluit het lopende interval af en geef req/s, fouten/s, requests bezig en per endpoint
+        req/s plus rollende p95 (laatste ROLLING_WINDOW_SEC intervallen). Eén lezer (het live-paneel).
+        """
+        now = time.perf_counter()
+        with self._lock:
+            elapsed = max(1e-6, now - self._interval_start)
+            self._interval_start = now
+            interval, self._interval = self._interval, {}
+            errors, self._interval_errors = self._interval_errors, 0
+            self._window.append(interval)
+            window = list(self._window)
+            in_flight = self.in_flight
+            requests_total = self.requests_total
+        rolling: dict[str, LatencyHistogram] = {}
+        for bucket in window:
+            for key, h in bucket.items():
+                rolling.setdefault(key, LatencyHistogram()).merge(h)
+        return {
+            "rps": sum(h.count for h in interval.values()) / elapsed,
+            "eps": errors / elapsed,
+            "in_flight": in_flight,
+            "requests_total": requests_total,
+            "endpoints": {
+                key: {
+                    "rps": (interval[key].count / elapsed) if key in interval else 0.0,
+                    "p95": rolling[key].percentile(0.95),
+                }
+                for key in sorted(rolling)
+            },
+        }
+
+    def endpoint_summary(self, duration_sec: float) -> dict:
+        with self._lock:
+            return {key: self.endpoints[key].summary(duration_sec) for key in sorted(self.endpoints)}
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            data = {
+                "endpoints": {k: v.to_dict() for k, v in self.endpoints.items()},
+                "journeys": self.journeys.to_dict(),
+                "corrected": self.corrected.to_dict(),
+                "success_count": self.success_count,
+                "fail_count": self.fail_count,
+                "connections_opened": self.connections_opened,
+                "connect_ms_total": self.connect_ms_total,
+                "connect_count": self.connect_count,
+                "bytes_total": self.bytes_total,
+                "cache": dict(self.cache),
+                "failed_samples": list(self.failed_samples),
+            }
+            if self.per_second:
+                data["seconds"] = {str(k): [h.to_dict(), e] for k, (h, e) in self.seconds.items()}
+            return data
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "RunMetrics":
+        m = cls(per_second="seconds" in data)
+        m.endpoints = {k: EndpointStats.from_dict(v) for k, v in data.get("endpoints", {}).items()}
+        m.journeys = LatencyHistogram.from_dict(data.get("journeys", {}))
+        m.corrected = LatencyHistogram.from_dict(data.get("corrected", {}))
+        m.success_count = data.get("success_count", 0)
+        m.fail_count = data.get("fail_count", 0)
+        m.connections_opened = data.get("connections_opened", 0)
+        m.connect_ms_total = data.get("connect_ms_total", 0)
+        m.connect_count = data.get("connect_count", 0)
+        m.bytes_total = data.get("bytes_total", 0)
+        m.cache.update(data.get("cache", {}))
+        m.failed_samples = list(data.get("failed_samples", []))
+        m.seconds = {int(k): [LatencyHistogram.from_dict(h), e] for k, (h, e) in data.get("seconds", {}).items()}
+        return m
+
+    def latency_timeline(self) -> list[dict]:
+        """Per epoch-seconde: requests, fouten en p95 (ms), oplopend in tijd (leeg zonder per_second)."""
+        with self._lock:
+            items = sorted(self.seconds.items())
+        return [
+            {"epoch": second, "requests": h.count, "errors": errors, "p95": round(h.percentile(0.95))}
+            for second, (h, errors) in items
+        ]
+
+    def request_latency(self) -> dict:
+        """
+        Latency over alle requests samen, ruw en gecorrigeerd voor coordinated omission, plus het
+        aantal ingevulde requests (filled) die tijdens een stilstand van de server niet verstuurd zijn.
+        """
+        raw, corrected = LatencyHistogram(), LatencyHistogram()
+        with self._lock:
+            sent = 0
+            for stats in self.endpoints.values():
+                raw.merge(stats.histogram)
+                sent += stats.corrected.count  # zonder extra endpoints die niet via record_request lopen
+            corrected.merge(self.corrected)
+        out = {"filled": corrected.count - sent}
+        for label, h in (("raw", raw), ("corrected", corrected)):
+            out[label] = {name: round(h.percentile(q), 1) for name, q in PERCENTILES}
+            out[label]["max"] = round(h.max_us / 1000, 1)
+        return out
+
+
+def _summarize(
+    base_url: str,
+    concurrent: int,
+    total_ms: int,
+    metrics: RunMetrics,
+    engine: str,
+    keep_alive: bool,
+    outcomes: list | None = None,
+    assets: bool = False,
+) -> dict:
+    """
+    Bouw het result dict dat de GUI toont; identiek voor alle engines. avg/p50/p95 gaan over de
+    totale tijd per bezoeker, "endpoints" geeft per route de latency-verdeling.
+    outcomes: alle bezoekers (gesloten model) of None → alleen de bewaarde foutvoorbeelden.
+    assets: browsermodus; dan ook "cache" (304-ratio, bespaarde bytes en tijd).
+    """
+    journeys = metrics.journeys
+    r = {
+        "base_url": base_url,
+        "engine": engine,
+        "model": MODEL_CLOSED,
+        "keep_alive": keep_alive,
+        "concurrent": concurrent,
+        "success_count": metrics.success_count,
+        "fail_count": metrics.fail_count,
+        "total_ms": total_ms,
+        "avg_ms": round(journeys.mean()),
+        "p50": round(journeys.percentile(0.50)),
+        "p95": round(journeys.percentile(0.95)),
+        "connections_opened": metrics.connections_opened,
+        "avg_connect_ms": round(metrics.connect_ms_total / metrics.connect_count) if metrics.connect_count else 0,
+        "endpoints": metrics.endpoint_summary(total_ms / 1000),
+        "histograms": {k: v.histogram.to_dict() for k, v in metrics.endpoints.items()},
+        "latency": metrics.request_latency(),
+        "outcomes": outcomes if outcomes is not None else list(metrics.failed_samples),
+        "assets": assets,
+        "bytes_total": metrics.bytes_total,
+    }
+    if assets:
+        c = metrics.cache
+        r["cache"] = {
+            **c,
+            # 304-ratio over de verstuurde requests via de browsercache (documenten + sub-resources)
+            "not_modified_ratio": round(c["not_modified"] / c["requests"], 3) if c["requests"] else 0.0,
+        }
+    return r
+
+
+def run_load_test(
+    base_url: str,
+    concurrent: int,
+    timeout_sec: int,
+    cancel_flag: threading.Event,
+    keep_alive: bool = True,
+    metrics: RunMetrics | None = None,
+    assets: bool = False,
+    scenario: Scenario | None = None,
+) -> dict:
+    """
+    Voer load test uit; cancel_flag om (later) te kunnen stoppen.
+    metrics: optioneel een eigen RunMetrics, zodat de GUI tijdens de run live kan meelezen.
+    assets: browsermodus (sub-resources + cache per gebruiker), zie simulate_one_player.
+    scenario: routes per bezoeker (load_test_scenarios); None = standaardscenario.
+    """
+    base_url = base_url.rstrip("/")
+    start = time.perf_counter()
+    outcomes = []
+    metrics = metrics or RunMetrics()
+
+    with ThreadPoolExecutor(max_workers=concurrent) as ex:
+        futures = {
+            ex.submit(
+                simulate_one_player, base_url, timeout_sec, i + 1, keep_alive, metrics, assets, scenario, cancel_flag
+            ): i + 1
+            for i in range(concurrent)
+        }
+        for fut in as_completed(futures):
+            if cancel_flag.is_set():
+                break
+            try:
+                outcome = fut.result()
+            except Exception as e:
+                outcome = {"player_id": futures[fut], "results": [{"ok": False, "error": str(e)}]}
+            metrics.record_journey(outcome)
+            outcomes.append(outcome)
+
+    total_ms = int((time.perf_counter() - start) * 1000)
+    return _summarize(base_url, concurrent, total_ms, metrics, ENGINE_THREADS, keep_alive, outcomes, assets)
+
+
+def _raise_fd_limit(wanted: int) -> None:
+    """Verhoog (POSIX) de limiet op open sockets; elke virtuele gebruiker houdt er één open."""
+    try:
+        import resource
+    except ImportError:
+        return  # Windows: geen RLIMIT_NOFILE, Proactor-loop heeft die limiet niet
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    target = wanted if hard == resource.RLIM_INFINITY else min(wanted, hard)
+    if soft != resource.RLIM_INFINITY and soft < target:
+        try:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (target, hard))
+        except (ValueError, OSError):
+            pass
+
+
+async def _run_load_test_async(
+    base_url: str,
+    concurrent: int,
+    timeout_sec: int,
+    cancel_flag: threading.Event,
+    keep_alive: bool,
+    metrics: RunMetrics,
+    first_player_id: int = 1,
+    assets: bool = False,
+    scenario: Scenario | None = None,
+) -> dict:
+    start = time.perf_counter()
+    outcomes = []
+    tasks = {
+        asyncio.create_task(simulate_one_player_async(base_url, timeout_sec, pid, keep_alive, metrics, assets, scenario)): pid
+        for pid in range(first_player_id, first_player_id + concurrent)
+    }
+    pending = set(tasks)
+    while pending:
+        done, pending = await asyncio.wait(pending, timeout=0.2, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            try:
+                outcome = task.result()
+            except Exception as e:
+                outcome = {"player_id": tasks[task], "results": [{"ok": False, "error": str(e)}]}
+            metrics.record_journey(outcome)
+            outcomes.append(outcome)
+        if cancel_flag.is_set():
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+            break
+
+    total_ms = int((time.perf_counter() - start) * 1000)
+    return _summarize(base_url, concurrent, total_ms, metrics, ENGINE_ASYNCIO, keep_alive, outcomes, assets)
+
+
+def run_load_test_async(
+    base_url: str,
+    concurrent: int,
+    timeout_sec: int,
+    cancel_flag: threading.Event,
+    keep_alive: bool = True,
+    metrics: RunMetrics | None = None,
+    assets: bool = False,
+    scenario: Scenario | None = None,
+) -> dict:
+    """
+    Zelfde test als run_load_test, maar alle virtuele gebruikers draaien als coroutines
+    in één event loop. Schaalt tot duizenden gebruikers zonder 1 OS-thread per gebruiker.
+    """
+    base_url = base_url.rstrip("/")
+    _raise_fd_limit(concurrent + 256)
+    return asyncio.run(
+        _run_load_test_async(
+            base_url, concurrent, timeout_sec, cancel_flag, keep_alive, metrics or RunMetrics(), assets=assets, scenario=scenario
+        )
+    )
+
+
+def run_with_engine(
+    engine: str,
+    base_url: str,
+    concurrent: int,
+    timeout_sec: int,
+    cancel_flag: threading.Event,
+    keep_alive: bool = True,
+    metrics: RunMetrics | None = None,
+    assets: bool = False,
+    scenario: Scenario | None = None,
+) -> dict:
+    """Kies de engine ("threads" of "asyncio"); beide geven hetzelfde result dict terug."""
+    if engine == ENGINE_PROCESSES:
+        return run_multiprocess(
+            base_url, timeout_sec, cancel_flag, keep_alive, metrics, concurrent=concurrent, assets=assets, scenario=scenario
+        )
+    if engine == ENGINE_ASYNCIO:
+        return run_load_test_async(base_url, concurrent, timeout_sec, cancel_flag, keep_alive, metrics, assets, scenario)
+    return run_load_test(base_url, concurrent, timeout_sec, cancel_flag, keep_alive, metrics, assets, scenario)
+
+
+def max_concurrent_for(engine: str) -> int:
+    if engine == ENGINE_PROCESSES:
+        return MAX_CONCURRENT_PROCESSES
+    return MAX_CONCURRENT_ASYNC if engine == ENGINE_ASYNCIO else MAX_CONCURRENT
+
+
+class ArrivalProfile:
+    """
+    Doel-aankomstritme (nieuwe spelers per seconde) als stuksgewijs lineaire functie van de tijd.
+    constant: rate; ramp: rate → peak_rate; step: STEP_COUNT trappen van rate naar peak_rate;
+    spike: rate met een piek van peak_rate tussen SPIKE_START en SPIKE_END van de duur.
+    """
+
+    def __init__(self, kind: str, rate: float, peak_rate: float, duration_sec: float):
+        self.kind = kind
+        self.rate = max(0.0, rate)
+        self.peak_rate = max(0.0, peak_rate)
+        self.duration_sec = max(1.0, duration_sec)
+        d = self.duration_sec
+        if kind == PROFILE_RAMP:
+            self.segments = [(0.0, d, self.rate, self.peak_rate)]
+        elif kind == PROFILE_STEP:
+            width = d / STEP_COUNT
+            self.segments = []
+            for i in range(STEP_COUNT):
+                r = self.rate + (self.peak_rate - self.rate) * i / (STEP_COUNT - 1)
+                self.segments.append((i * width, (i + 1) * width, r, r))
+        elif kind == PROFILE_SPIKE:
+            a, b = d * SPIKE_START, d * SPIKE_END
+            self.segments = [
+                (0.0, a, self.rate, self.rate),
+                (a, b, self.peak_rate, self.peak_rate),
+                (b, d, self.rate, self.rate),
+            ]
+        else:
+            self.kind = PROFILE_CONSTANT
+            self.segments = [(0.0, d, self.rate, self.rate)]
+
+    def rate_at(self, t: float) -> float:
+        for t0, t1, r0, r1 in self.segments:
+            if t0 <= t < t1:
+                return r0 + (r1 - r0) * (t - t0) / (t1 - t0)
+        return 0.0
+
+    def expected_arrivals(self, start: float, end: float) -> float:
+        """Integraal van het doelritme over [start, end): verwacht aantal nieuwe spelers."""
+        total = 0.0
+        for t0, t1, r0, r1 in self.segments:
+            a, b = max(start, t0), min(end, t1)
+            if a < b:
+                ra = r0 + (r1 - r0) * (a - t0) / (t1 - t0)
+                rb = r0 + (r1 - r0) * (b - t0) / (t1 - t0)
+                total += (ra + rb) / 2 * (b - a)
+        return total
+
+    def arrival_times(self):
+        """Deterministische aankomsttijden (sec vanaf start): speler k komt als de integraal k bereikt."""
+        cumulative = 0.0
+        k = 1
+        for t0, t1, r0, r1 in self.segments:
+            length = t1 - t0
+            seg_total = (r0 + r1) / 2 * length
+            a = (r1 - r0) / (2 * length)
+            while k <= cumulative + seg_total + 1e-9:
+                need = k - cumulative
+                # a·τ² + r0·τ = need, numeriek stabiele wortel
+                disc = max(0.0, r0 * r0 + 4 * a * need)
+                denom = r0 + disc ** 0.5
+                tau = 2 * need / denom if denom > 0 else 0.0
+                t = t0 + min(tau, length)
+                if t >= self.duration_sec:
+                    return
+                yield t
+                k += 1
+            cumulative += seg_total
+
+    def describe(self) -> str:
+        if self.kind == PROFILE_CONSTANT:
+            return f"constant {self.rate:g}/s gedurende {self.duration_sec:g} s"
+        if self.kind == PROFILE_SPIKE:
+            return f"spike {self.rate:g}/s met piek {self.peak_rate:g}/s gedurende {self.duration_sec:g} s"
+        return f"{self.kind} {self.rate:g} → {self.peak_rate:g}/s gedurende {self.duration_sec:g} s"
+
+
+class ArrivalTimeline:
+    """
+    Per seconde van de run: behaalde aankomsten en het hoogste aantal spelers tegelijk bezig.
+    Incrementeel bijgewerkt door de workers, geheugen O(duur) in plaats van O(spelers).
+    """
+
+    def __init__(self, duration_sec: float):
+        self.seconds = int(math.ceil(duration_sec))
+        self.achieved = [0] * self.seconds
+        self.peak = [0] * self.seconds
+        self.level: list[int | None] = [None] * self.seconds
+        self.in_flight = 0
+        self._lock = threading.Lock()
+
+    def _mark(self, offset: float) -> None:
+        sec = int(offset)
+        if sec < self.seconds:
+            self.peak[sec] = max(self.peak[sec], self.in_flight)
+            self.level[sec] = self.in_flight
+
+    def started(self, offset: float) -> None:
+        with self._lock:
+            if int(offset) < self.seconds:
+                self.achieved[int(offset)] += 1
+            self.in_flight += 1
+            self._mark(offset)
+
+    def finished(self, offset: float) -> None:
+        with self._lock:
+            self.in_flight -= 1
+            self._mark(offset)
+
+    def rows(self, profile: ArrivalProfile) -> list:
+        """Doel- en behaalde aankomsten per seconde, plus spelers bezig (max. in die seconde)."""
+        rows = []
+        carry = 0
+        with self._lock:
+            for sec in range(self.seconds):
+                rows.append({
+                    "t": sec,
+                    "target": round(profile.expected_arrivals(sec, sec + 1), 2),
+                    "achieved": self.achieved[sec],
+                    "in_flight": max(self.peak[sec], carry),
+                })
+                if self.level[sec] is not None:
+                    carry = self.level[sec]
+        return rows
+
+
+def _summarize_open(
+    base_url: str,
+    profile: ArrivalProfile,
+    total_ms: int,
+    metrics: RunMetrics,
+    timeline: ArrivalTimeline,
+    started: int,
+    engine: str,
+    keep_alive: bool,
+    assets: bool = False,
+) -> dict:
+    r = _summarize(base_url, started, total_ms, metrics, engine, keep_alive, assets=assets)
+    rows = timeline.rows(profile)
+    target_total = sum(x["target"] for x in rows)
+    achieved_total = sum(x["achieved"] for x in rows)
+    r.update({
+        "model": MODEL_OPEN,
+        "profile": profile.kind,
+        "profile_text": profile.describe(),
+        "duration_sec": profile.duration_sec,
+        "target_rate": round(target_total / profile.duration_sec, 2),
+        "achieved_rate": round(achieved_total / profile.duration_sec, 2),
+        "peak_in_flight": max((x["in_flight"] for x in rows), default=0),
+        "arrival_timeline": rows,
+    })
+    return r
+
+
+def _run_open_threads(
+    base_url: str,
+    profile: ArrivalProfile,
+    timeout_sec: int,
+    cancel_flag: threading.Event,
+    keep_alive: bool,
+    metrics: RunMetrics,
+    assets: bool = False,
+    scenario: Scenario | None = None,
+) -> dict:
+    start = time.perf_counter()
+    timeline = ArrivalTimeline(profile.duration_sec)
+    started = 0
+
+    def player(player_id: int, offset: float):
+        now = time.perf_counter() - start
+        timeline.started(now)
+        try:
+            o = simulate_one_player(
+                base_url, timeout_sec, player_id, keep_alive, metrics, assets, scenario, cancel_flag,
+                max(0, int((now - offset) * 1000)),
+            )
+        except Exception as e:
+            o = {"player_id": player_id, "results": [{"ok": False, "error": str(e)}]}
+        timeline.finished(time.perf_counter() - start)
+        metrics.record_journey(o)
+
+    # Workers zijn begrensd: als alle threads bezet zijn lopen nieuwe spelers achter op schema,
+    # wat zichtbaar wordt als "behaald < doel" in de tijdlijn
+    ex = ThreadPoolExecutor(max_workers=MAX_CONCURRENT)
+    try:
+        for player_id, offset in enumerate(profile.arrival_times(), 1):
+            while not cancel_flag.is_set():
+                delay = start + offset - time.perf_counter()
+                if delay <= 0:
+                    break
+                cancel_flag.wait(min(delay, 0.2))
+            if cancel_flag.is_set():
+                break
+            ex.submit(player, player_id, offset)
+            started += 1
+    finally:
+        ex.shutdown(wait=True, cancel_futures=cancel_flag.is_set())
+
+    total_ms = int((time.perf_counter() - start) * 1000)
+    return _summarize_open(
+        base_url, profile, total_ms, metrics, timeline, started, ENGINE_THREADS, keep_alive, assets
+    )
+
+
+async def _run_open_async(
+    base_url: str,
+    profile: ArrivalProfile,
+    timeout_sec: int,
+    cancel_flag: threading.Event,
+    keep_alive: bool,
+    metrics: RunMetrics,
+    shard: tuple[int, int] = (0, 1),
+    assets: bool = False,
+    scenario: Scenario | None = None,
+) -> dict:
+    """shard=(index, count): dit proces neemt alleen elke count-ste aankomst vanaf index."""
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    timeline = ArrivalTimeline(profile.duration_sec)
+    started = 0
+    tasks = set()
+
+    async def player(player_id: int, offset: float):
+        now = loop.time() - start
+        timeline.started(now)
+        try:
+            o = await simulate_one_player_async(
+                base_url, timeout_sec, player_id, keep_alive, metrics, assets, scenario,
+                max(0, int((now - offset) * 1000)),
+            )
+        except Exception as e:
+            o = {"player_id": player_id, "results": [{"ok": False, "error": str(e)}]}
+        timeline.finished(loop.time() - start)
+        metrics.record_journey(o)
+
+    index, count = shard
+    for k, offset in enumerate(islice(profile.arrival_times(), index, None, count)):
+        player_id = index + k * count + 1
+        while not cancel_flag.is_set():
+            delay = start + offset - loop.time()
+            if delay <= 0:
+                break
+            await asyncio.sleep(min(delay, 0.2))
+        if cancel_flag.is_set():
+            break
+        task = asyncio.create_task(player(player_id, offset))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+        started += 1
+
+    while tasks:
+        if cancel_flag.is_set():
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            break
+        await asyncio.wait(tasks, timeout=0.2)
+
+    total_ms = int((loop.time() - start) * 1000)
+    return _summarize_open(
+        base_url, profile, total_ms, metrics, timeline, started, ENGINE_ASYNCIO, keep_alive, assets
+    )
+
+
+def run_open_model(
+    engine: str,
+    base_url: str,
+    profile: ArrivalProfile,
+    timeout_sec: int,
+    cancel_flag: threading.Event,
+    keep_alive: bool = True,
+    metrics: RunMetrics | None = None,
+    assets: bool = False,
+    scenario: Scenario | None = None,
+) -> dict:
+    """
+    Open model: nieuwe spelers starten volgens het aankomstritme van profile, ongeacht
+    hoe snel de server antwoordt. Zo wordt zichtbaar bij welk ritme de wachtrij begint te groeien.
+    Result dict = dat van run_load_test, aangevuld met doel- versus behaald ritme per seconde.
+    """
+    base_url = base_url.rstrip("/")
+    metrics = metrics or RunMetrics()
+    if engine == ENGINE_PROCESSES:
+        return run_multiprocess(base_url, timeout_sec, cancel_flag, keep_alive, metrics, profile=profile, assets=assets, scenario=scenario)
+    if engine == ENGINE_ASYNCIO:
+        peak = max(profile.rate, profile.peak_rate)
+        _raise_fd_limit(int(peak * timeout_sec * 2) + 256)
+        return asyncio.run(
+            _run_open_async(base_url, profile, timeout_sec, cancel_flag, keep_alive, metrics, assets=assets, scenario=scenario)
+        )
+    return _run_open_threads(base_url, profile, timeout_sec, cancel_flag, keep_alive, metrics, assets, scenario)
+
+
+def _process_worker(
+    index: int,
+    count: int,
+    base_url: str,
+    timeout_sec: int,
+    keep_alive: bool,
+    users: int,
+    first_player_id: int,
+    profile: ArrivalProfile | None,
+    cancel_event,
+    out_queue,
+    assets: bool = False,
+    scenario: Scenario | None = None,
+    profile_ms: float = 0,
+    per_second: bool = False,
+) -> None:
+    """
+    Werkproces: draait zijn deel van de gebruikers met de asyncio-engine en stuurt elke
+    PROCESS_REPORT_SEC de histogrammen van dat interval (RunMetrics.to_dict) naar de coördinator.
+    profile_ms > 0: ook de eigen stacks sampelen en aan het eind meesturen (load_test_profiler).
+    per_second: zoals RunMetrics van de coördinator (per-seconde histogrammen voor de Pi-monitor).
+    """
+    metrics = RunMetrics(per_second)
+    sampler = StackSampler(profile_ms, prefix="werkproces").start() if profile_ms else None
+
+    async def main():
+        async def reporter():
+            while True:
+                await asyncio.sleep(PROCESS_REPORT_SEC)
+                out_queue.put(("interval", index, metrics.drain().to_dict(), metrics.in_flight))
+
+        rep = asyncio.create_task(reporter())
+        try:
+            if profile is not None:
+                return await _run_open_async(
+                    base_url, profile, timeout_sec, cancel_event, keep_alive, metrics, (index, count), assets, scenario
+                )
+            return await _run_load_test_async(
+                base_url, users, timeout_sec, cancel_event, keep_alive, metrics, first_player_id, assets, scenario
+            )
+        finally:
+            rep.cancel()
+
+    try:
+        if profile is not None:
+            peak = max(profile.rate, profile.peak_rate) / count
+            _raise_fd_limit(int(peak * timeout_sec * 2) + 256)
+        else:
+            _raise_fd_limit(users + 256)
+        r = asyncio.run(main())
+        out_queue.put(("interval", index, metrics.drain().to_dict(), 0))
+        if sampler is not None:
+            sampler.stop()
+            out_queue.put(("profile", index, sampler.to_dict(), 0))
+        out_queue.put(("done", index, r.get("arrival_timeline"), r["concurrent"]))
+    except Exception as e:
+        out_queue.put(("error", index, f"{type(e).__name__}: {e}", 0))
+
+
+def run_multiprocess(
+    base_url: str,
+    timeout_sec: int,
+    cancel_flag: threading.Event,
+    keep_alive: bool = True,
+    metrics: RunMetrics | None = None,
+    concurrent: int | None = None,
+    profile: ArrivalProfile | None = None,
+    processes: int | None = None,
+    assets: bool = False,
+    scenario: Scenario | None = None,
+) -> dict:
+    """
+    Verdeel de virtuele gebruikers over werkprocessen (standaard 1 per CPU-kern), zodat JSON,
+    TLS en boekhouding niet op één kern (GIL) vastlopen. Gesloten model: concurrent gebruikers
+    verdeeld over de processen; open model: elk proces neemt elke N-de aankomst van profile.
+    De interval-histogrammen worden samengevoegd tot hetzelfde result dict als run_load_test.
+    """
+    base_url = base_url.rstrip("/")
+    metrics = metrics or RunMetrics()
+    count = processes or os.cpu_count() or 1
+    if profile is None:
+        count = max(1, min(count, concurrent))
+    ctx = multiprocessing.get_context()
+    out_queue = ctx.Queue()
+    cancel_event = ctx.Event()
+    sampler = active_sampler()
+
+    procs = []
+    first_player_id = 1
+    for index in range(count):
+        users = 0
+        if profile is None:
+            users = concurrent // count + (1 if index < concurrent % count else 0)
+        proc = ctx.Process(
+            target=_process_worker,
+            args=(index, count, base_url, timeout_sec, keep_alive, users, first_player_id, profile,
+                  cancel_event, out_queue, assets, scenario, sampler.interval_ms if sampler else 0,
+                  metrics.per_second),
+            daemon=True,
+        )
+        first_player_id += users
+        procs.append(proc)
+
+    start = time.perf_counter()
+    for proc in procs:
+        proc.start()
+
+    in_flight = [0] * count
+    finished = set()
+    started = 0
+    timelines = []
+    errors = []
+    while len(finished) < count:
+        if cancel_flag.is_set():
+            cancel_event.set()
+        try:
+            kind, index, payload, extra = out_queue.get(timeout=0.2)
+        except queue.Empty:
+            for i, proc in enumerate(procs):
+                if i not in finished and not proc.is_alive() and out_queue.empty():
+                    errors.append(f"proces {i} gestopt (exit {proc.exitcode})")
+                    finished.add(i)
+            continue
+        if kind == "interval":
+            metrics.merge(RunMetrics.from_dict(payload))
+            in_flight[index] = extra
+            metrics.set_in_flight(sum(in_flight))
+        elif kind == "profile":
+            if sampler is not None:
+                sampler.merge_dict(payload)
+        elif kind == "done":
+            finished.add(index)
+            started += extra
+            if payload:
+                timelines.append(payload)
+        else:
+            errors.append(f"proces {index}: {payload}")
+            finished.add(index)
+    for proc in procs:
+        proc.join(timeout=5)
+
+    total_ms = int((time.perf_counter() - start) * 1000)
+    if profile is not None:
+        timeline = ArrivalTimeline(profile.duration_sec)
+        # Per proces: behaalde aankomsten optellen; "bezig" is de som van de pieken per proces
+        for rows in timelines:
+            for row in rows[:timeline.seconds]:
+                timeline.achieved[row["t"]] += row["achieved"]
+                timeline.peak[row["t"]] += row["in_flight"]
+        r = _summarize_open(
+            base_url, profile, total_ms, metrics, timeline, started, ENGINE_PROCESSES, keep_alive, assets
+        )
+    else:
+        r = _summarize(base_url, concurrent, total_ms, metrics, ENGINE_PROCESSES, keep_alive, assets=assets)
+    r["processes"] = count
+    if errors:
+        r["process_errors"] = errors
+    return r
+
+
+def endpoint_table_lines(endpoints: dict) -> list[str]:
+    """Tabel (vaste breedte) met latency per endpoint in ms, voor GUI-log en CLI."""
+    if not endpoints:
+        return []
+    width = max(len("Endpoint"), max(len(k) for k in endpoints))
+    lines = [
+        f"{'Endpoint':<{width}}  {'aantal':>6} {'fout':>5} {'req/s':>7} "
+        f"{'p50':>6} {'p90':>6} {'p99':>6} {'p99.9':>6} {'max':>6}"
+    ]
+    for key, e in endpoints.items():
+        lines.append(
+            f"{key:<{width}}  {e['count']:>6} {e['errors']:>5} {e['rps']:>7.1f} "
+            f"{e['p50']:>6.0f} {e['p90']:>6.0f} {e['p99']:>6.0f} {e['p999']:>6.0f} {e['max']:>6.0f}"
+        )
+    return lines
+
+
+def omission_lines(r: dict) -> list[str]:
+    """
+    Ruwe versus voor coordinated omission gecorrigeerde latency (ms): eerst over alle requests
+    (vanaf de bedoelde starttijd, plus de stappen die een bezoeker tijdens een stilstand had willen
+    zetten; dat is wat kinderen werkelijk wachtten), dan per endpoint vanaf de bedoelde starttijd.
+    """
+    latency = r.get("latency")
+    if not latency:
+        return []
+    raw, cor = latency["raw"], latency["corrected"]
+    lines = [
+        f"Latency (ruw):     p50 {raw['p50']:.0f} ms  |  p95 {raw['p95']:.0f} ms  |  p99 {raw['p99']:.0f} ms  |  "
+        f"max {raw['max']:.0f} ms",
+        f"Gecorrigeerd (CO): p50 {cor['p50']:.0f} ms  |  p95 {cor['p95']:.0f} ms  |  p99 {cor['p99']:.0f} ms  |  "
+        f"max {cor['max']:.0f} ms  ({latency['filled']} ingevulde requests)",
+    ]
+    endpoints = {k: e for k, e in r.get("endpoints", {}).items() if "p99_corrected" in e}
+    if not latency["filled"] or not endpoints:
+        return lines
+    width = max(len("Endpoint"), max(len(k) for k in endpoints))
+    lines.append("")
+    lines.append(f"{'Endpoint':<{width}}  {'p95':>6} {'p95 CO':>7} {'p99':>6} {'p99 CO':>7}")
+    for key, e in endpoints.items():
+        lines.append(
+            f"{key:<{width}}  {e['p95']:>6.0f} {e['p95_corrected']:>7.0f} {e['p99']:>6.0f} {e['p99_corrected']:>7.0f}"
+        )
+    return lines
+
+
+def _format_bytes(n: int) -> str:
+    for unit in ("B", "KB", "MB"):
+        if n < 1024:
+            return f"{n:.0f} {unit}" if unit == "B" else f"{n:.1f} {unit}"
+        n /= 1024
+    return f"{n:.1f} GB"
+
+
+def transfer_summary_lines(r: dict) -> list[str]:
+    """Overgedragen bytes en, in browsermodus, het effect van de cache; voor GUI-log en CLI."""
+    lines = [f"Overgedragen:      {_format_bytes(r.get('bytes_total', 0))} (body's)"]
+    c = r.get("cache")
+    if c:
+        lines.append(
+            f"Browsercache:      {c['requests']} requests, {c['not_modified']} × 304 "
+            f"({100 * c['not_modified_ratio']:.0f}%), {c['hits']} × vers uit cache"
+        )
+        lines.append(
+            f"Bespaard:          {_format_bytes(c['bytes_saved'])}  |  "
+            f"{c['time_saved_ms'] / 1000:.1f} s (opgeteld over alle requests)"
+        )
+    return lines
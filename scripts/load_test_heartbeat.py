@@ -0,0 +1,388 @@
+"""
+Soak-test van het analytics-pad: --tabs open speltabbladen die lang (standaard een uur) heartbeats
+sturen, zoals public/js/analytics-tracker.js: bij het openen POST /api/track-visit plus meteen een
+heartbeat, daarna elke 30 s POST /api/track-visit-heartbeat. Op de server is elke heartbeat een UPDATE
+met gecorreleerde subquery op visits (pingVisit); elke nieuwe pagina (--page-minutes) is een nieuwe rij.
+
+Per minuut: heartbeat-latency, open tabbladen en het aantal visits-rijen dat de test toevoegde. Met het
+admin-wachtwoord ook hoe lang /api/admin/active-visitors (getActiveVisitors, COUNT DISTINCT over visits)
+erover doet naarmate de tabel groeit, en af en toe het totaal aantal rijen via /api/admin/analytics
+(niet vaker: de admin-routes mogen maar 20 requests per 15 min per IP).
+"""
+
+import asyncio
+import json
+import random
+import threading
+import time
+from collections import Counter
+
+from load_test_contention import ERROR_KINDS, ERROR_RATE_LIMIT, RATE_LIMIT_NOTE, _sleep_until, error_kind
+from load_test_core import (
+    ENGINE_ASYNCIO,
+    MODEL_SOAK,
+    AsyncConnectionPool,
+    LatencyHistogram,
+    RunMetrics,
+    _raise_fd_limit,
+    _summarize,
+)
+
+HEARTBEAT_INTERVAL_SEC = 30.0  # zoals analytics-tracker.js
+DEFAULT_TABS = 100
+MAX_TABS = 5000
+DEFAULT_SOAK_SEC = 3600
+DEFAULT_PAGE_MINUTES = 5.0  # 0 = elk tabblad blijft de hele test op dezelfde pagina
+PROBE_INTERVAL_SEC = 60.0
+ROWS_PROBE_EVERY = 5  # elke 5e probe ook het totaal aantal rijen: samen 18 admin-requests per 15 min
+TIMELINE_BUCKET_SEC = 60
+TREND_BUCKETS = 5  # eerste en laatste 5 minuten vergelijken
+# Helling van de probe-latency pas rapporteren met genoeg punten en groei (ms-resolutie is grof)
+MIN_SLOPE_PROBES = 5
+MIN_SLOPE_ROWS = 1000
+SOAK_USER_AGENT = "RegenboogLoadTest/1.0 (heartbeat soak)"
+SOAK_PAGES = tuple(
+    f"/games/{game}.html"
+    for game in ("beren", "dolfijnen", "draken", "egels", "konijnen", "pinguins", "uilen", "vlinders", "vossen",
+                 "zebras")
+)
+# Alle rijen, niet de standaard laatste 30 dagen van het admin-dashboard
+ANALYTICS_ALL_TIME = "/api/admin/analytics?startDate=2000-01-01T00:00:00.000Z"
+
+
+class _Minute:
+    """Eén tijdvak van de timeline: heartbeats, fouten, open tabbladen en de probe van dat moment."""
+
+    def __init__(self):
+        self.heartbeats = LatencyHistogram()
+        self.errors = 0
+        self.tabs = 0
+        self.rows_added = 0
+        self.probe_ms = None
+        self.active = None
+        self.total_visits = None
+
+
+class _SoakRun:
+    """Gedeelde staat van de soak: tabbladen, rijen toegevoegd, heartbeat-histogrammen per minuut en probes."""
+
+    def __init__(self, base_url: str, timeout_sec: int, keep_alive: bool, metrics: RunMetrics, start: float):
+        self.base_url = base_url
+        self.timeout_sec = timeout_sec
+        self.keep_alive = keep_alive
+        self.metrics = metrics
+        self.start = start
+        self.tag = time.strftime("%H%M%S")
+        self.minutes: list[_Minute] = []
+        self.tabs_open = 0
+        self.in_flight = 0
+        self.requests = 0
+        self.visits_added = 0
+        self.visits_ended = 0
+        self.heartbeat_errors = Counter()
+        self.probes: list[dict] = []
+        self.admin_error = None
+
+    def minute(self, now: float) -> _Minute:
+        index = max(0, int((now - self.start) // TIMELINE_BUCKET_SEC))
+        while len(self.minutes) <= index:
+            self.minutes.append(_Minute())
+            self.minutes[-1].rows_added = self.visits_added
+        m = self.minutes[index]
+        m.tabs = max(m.tabs, self.tabs_open)
+        m.rows_added = self.visits_added
+        return m
+
+    async def send(self, pool: AsyncConnectionPool, method: str, path: str, body: dict | None = None,
+                   lag_ms: int = 0, **kwargs) -> dict:
+        self.requests += 1
+        self.in_flight += 1
+        self.metrics.request_started()
+        self.metrics.set_in_flight(self.in_flight)
+        try:
+            r = await pool.request(method, path, body, **kwargs)
+        finally:
+            self.in_flight -= 1
+        r["lag_ms"] = lag_ms
+        self.metrics.record_request(method, path, r)
+        self.metrics.record_journey({"results": [r]})
+        return r
+
+    async def heartbeat(self, pool: AsyncConnectionPool, visitor: str, page: str, lag_ms: int) -> None:
+        r = await self.send(pool, "POST", "/api/track-visit-heartbeat", {"visitor_id": visitor, "page": page}, lag_ms)
+        m = self.minute(asyncio.get_running_loop().time())
+        m.heartbeats.record(r["ms"])
+        err = error_kind(r)
+        if err is not None:
+            m.errors += 1
+            self.heartbeat_errors[err] += 1
+
+
+async def _tab(run: _SoakRun, index: int, duration_sec: float, page_sec: float, cancel_flag: threading.Event) -> None:
+    """Eén tabblad: pagina openen, heartbeats, na page_sec (±20%) naar een ander spel, tot het einde van de test."""
+    loop = asyncio.get_running_loop()
+    visitor = f"hartslag-{run.tag}-{index}"
+    end = run.start + duration_sec
+    # Tabbladen gaan gespreid open, zoals een klas die na elkaar inlogt
+    await _sleep_until(loop, run.start + random.uniform(0, min(HEARTBEAT_INTERVAL_SEC, duration_sec)), cancel_flag)
+    run.tabs_open += 1
+    pool = AsyncConnectionPool(run.base_url, run.timeout_sec, run.keep_alive)
+    try:
+        while not cancel_flag.is_set() and loop.time() < end:
+            page = random.choice(SOAK_PAGES)
+            opened = loop.time()
+            r = await run.send(pool, "POST", "/api/track-visit", {
+                "visitor_id": visitor, "page": page, "user_agent": SOAK_USER_AGENT, "referrer": "/",
+            })
+            if r["ok"]:
+                run.visits_added += 1
+            run.minute(loop.time())
+            leave = opened + page_sec * random.uniform(0.8, 1.2) if page_sec else end
+            due = opened  # eerste heartbeat meteen, zoals startHeartbeat()
+            while True:
+                wake = min(due, leave, end)
+                await _sleep_until(loop, wake, cancel_flag)
+                if cancel_flag.is_set() or wake < due:
+                    break
+                await run.heartbeat(pool, visitor, page, max(0, int((loop.time() - due) * 1000)))
+                # Liep een heartbeat uit, dan schuift het interval op (setInterval haalt niets in)
+                due = max(due + HEARTBEAT_INTERVAL_SEC, loop.time())
+            if cancel_flag.is_set():
+                break
+            r = await run.send(pool, "POST", "/api/track-visit-end", {
+                "visitor_id": visitor, "page": page, "duration": int(loop.time() - opened),
+            })
+            if r["ok"]:
+                run.visits_ended += 1
+    finally:
+        run.tabs_open -= 1
+        run.metrics.connections_opened += pool.connections_opened
+        pool.close()
+
+
+def _json_body(r: dict) -> dict:
+    try:
+        data = json.loads(r.get("body") or "")
+    except ValueError:
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+async def _prober(run: _SoakRun, admin_password: str, duration_sec: float, cancel_flag: threading.Event) -> None:
+    """Elke PROBE_INTERVAL_SEC: latency van getActiveVisitors; elke ROWS_PROBE_EVERY keer ook het aantal rijen."""
+    loop = asyncio.get_running_loop()
+    pool = AsyncConnectionPool(run.base_url, run.timeout_sec, run.keep_alive)
+    headers = {"X-Admin-Password": admin_password}
+    try:
+        n = 0
+        due = run.start
+        while due - run.start <= duration_sec and not cancel_flag.is_set():
+            await _sleep_until(loop, due, cancel_flag)
+            if cancel_flag.is_set():
+                break
+            r = await run.send(pool, "GET", "/api/admin/active-visitors", extra_headers=headers, keep_body=True)
+            if r.get("status_code") == 401:
+                run.admin_error = "admin-wachtwoord geweigerd (401)"
+                break
+            if r.get("status_code") == 429:
+                run.admin_error = "admin-rate-limiter (429): minder vaak proben of de limiter verhogen"
+            probe = {"t": round(loop.time() - run.start), "ms": r["ms"], "ok": r["ok"],
+                     "rows_added": run.visits_added, "active": _json_body(r).get("currentVisitors")}
+            if n % ROWS_PROBE_EVERY == 0:
+                r = await run.send(pool, "GET", ANALYTICS_ALL_TIME, extra_headers=headers, keep_body=True)
+                probe["total_visits"] = _json_body(r).get("visitorStats", {}).get("totalVisits")
+            run.probes.append(probe)
+            m = run.minute(loop.time())
+            m.probe_ms = probe["ms"] if probe["ok"] else None
+            m.active = probe["active"]
+            if probe.get("total_visits") is not None:
+                m.total_visits = probe["total_visits"]
+            n += 1
+            due += PROBE_INTERVAL_SEC
+    finally:
+        run.metrics.connections_opened += pool.connections_opened
+        pool.close()
+
+
+def _merged(minutes: list[_Minute]) -> LatencyHistogram:
+    h = LatencyHistogram()
+    for m in minutes:
+        h.merge(m.heartbeats)
+    return h
+
+
+def _probe_slope(probes: list[dict]) -> float | None:
+    """Kleinste-kwadratenhelling van de probe-latency tegen de toegevoegde rijen, in ms per 10.000 rijen."""
+    points = [(p["rows_added"], p["ms"]) for p in probes if p["ok"]]
+    if len(points) < MIN_SLOPE_PROBES or points[-1][0] - points[0][0] < MIN_SLOPE_ROWS:
+        return None
+    mx = sum(x for x, _ in points) / len(points)
+    my = sum(y for _, y in points) / len(points)
+    sxx = sum((x - mx) ** 2 for x, _ in points)
+    if sxx == 0:
+        return None
+    return round(10000 * sum((x - mx) * (y - my) for x, y in points) / sxx, 1)
+
+
+def _median(values: list) -> float | None:
+    values = sorted(values)
+    return values[len(values) // 2] if values else None
+
+
+async def _run_soak_async(
+    base_url: str,
+    tabs: int,
+    duration_sec: float,
+    page_minutes: float,
+    admin_password: str,
+    timeout_sec: int,
+    cancel_flag: threading.Event,
+    keep_alive: bool,
+    metrics: RunMetrics,
+) -> dict:
+    loop = asyncio.get_running_loop()
+    run = _SoakRun(base_url, timeout_sec, keep_alive, metrics, loop.time())
+    page_sec = page_minutes * 60
+    tasks = [asyncio.create_task(_tab(run, i, duration_sec, page_sec, cancel_flag)) for i in range(tabs)]
+    if admin_password:
+        tasks.append(asyncio.create_task(_prober(run, admin_password, duration_sec, cancel_flag)))
+    pending = set(tasks)
+    while pending:
+        if cancel_flag.is_set():
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+            break
+        _, pending = await asyncio.wait(pending, timeout=0.2)
+    metrics.set_in_flight(0)
+
+    total_ms = int((loop.time() - run.start) * 1000)
+    window = min(TREND_BUCKETS, max(1, len(run.minutes) // 2))
+    first, last = _merged(run.minutes[:window]), _merged(run.minutes[-window:])
+    ok_probes = [p["ms"] for p in run.probes if p["ok"]]
+    totals = [p["total_visits"] for p in run.probes if p.get("total_visits") is not None]
+    r = _summarize(base_url, run.requests, total_ms, metrics, ENGINE_ASYNCIO, keep_alive)
+    r.update({
+        "model": MODEL_SOAK,
+        "tabs": tabs,
+        "duration_sec": duration_sec,
+        "page_minutes": page_minutes,
+        "heartbeat_interval": HEARTBEAT_INTERVAL_SEC,
+        "heartbeats": sum(m.heartbeats.count for m in run.minutes),
+        "heartbeat_errors": dict(run.heartbeat_errors),
+        "visits_added": run.visits_added,
+        "visits_ended": run.visits_ended,
+        "heartbeat_trend": {
+            "window_min": window * TIMELINE_BUCKET_SEC // 60,
+            "first_p50": first.percentile(0.50),
+            "first_p95": first.percentile(0.95),
+            "last_p50": last.percentile(0.50),
+            "last_p95": last.percentile(0.95),
+        },
+        "active_probe": {
+            "enabled": bool(admin_password),
+            "count": len(ok_probes),
+            "first_ms": _median(ok_probes[:3]),
+            "last_ms": _median(ok_probes[-3:]),
+            "ms_per_10k_rows": _probe_slope(run.probes),
+            "visits_total_first": totals[0] if totals else None,
+            "visits_total_last": totals[-1] if totals else None,
+            "error": run.admin_error,
+        },
+        "probes": run.probes,
+        "soak_timeline": [
+            {
+                "t": i * TIMELINE_BUCKET_SEC,
+                "tabs": m.tabs,
+                "heartbeats": m.heartbeats.count,
+                "hb_p50": m.heartbeats.percentile(0.50),
+                "hb_p95": m.heartbeats.percentile(0.95),
+                "errors": m.errors,
+                "rows_added": m.rows_added,
+                "probe_ms": m.probe_ms,
+                "active": m.active,
+                "total_visits": m.total_visits,
+            }
+            for i, m in enumerate(run.minutes)
+        ],
+    })
+    return r
+
+
+def run_soak(
+    base_url: str,
+    tabs: int,
+    duration_sec: float,
+    page_minutes: float,
+    admin_password: str,
+    timeout_sec: int,
+    cancel_flag: threading.Event,
+    keep_alive: bool = True,
+    metrics: RunMetrics | None = None,
+) -> dict:
+    """
+    Houd tabs tabbladen duration_sec open met heartbeats om de HEARTBEAT_INTERVAL_SEC; elk tabblad gaat na
+    ongeveer page_minutes naar een ander spel (0 = nooit). Zonder admin_password geen probes van
+    getActiveVisitors en geen totaal aantal rijen. Een journey is hier één request (zoals bij replay).
+    """
+    base_url = base_url.rstrip("/")
+    tabs = max(1, min(MAX_TABS, tabs))
+    _raise_fd_limit(tabs + 256)
+    return asyncio.run(
+        _run_soak_async(
+            base_url, tabs, duration_sec, max(0.0, page_minutes), admin_password, timeout_sec, cancel_flag,
+            keep_alive, metrics or RunMetrics(),
+        )
+    )
+
+
+def soak_summary_lines(r: dict) -> list[str]:
+    """Kerncijfers van de heartbeat-soak, voor GUI-log en CLI."""
+    trend = r["heartbeat_trend"]
+    probe = r["active_probe"]
+    pages = f"elke ~{r['page_minutes']:g} min een ander spel" if r["page_minutes"] else "vaste pagina"
+    lines = [
+        f"Tabbladen:         {r['tabs']}  |  heartbeat elke {r['heartbeat_interval']:g} s  |  {pages}  |  "
+        f"{r['duration_sec']:g} s",
+        f"Heartbeats:        {r['heartbeats']}  |  fouten: "
+        + "  |  ".join(f"{e} {r['heartbeat_errors'].get(e, 0)}" for e in ERROR_KINDS),
+        f"Heartbeat-trend:   eerste {trend['window_min']} min p50 {trend['first_p50']:.0f} / p95 {trend['first_p95']:.0f} ms"
+        f"  →  laatste {trend['window_min']} min p50 {trend['last_p50']:.0f} / p95 {trend['last_p95']:.0f} ms",
+        f"visits-rijen:      {r['visits_added']} toegevoegd door de test  |  {r['visits_ended']} netjes afgesloten",
+    ]
+    if probe["visits_total_first"] is not None:
+        lines.append(f"visits in de tabel: {probe['visits_total_first']} → {probe['visits_total_last']} "
+                     "(ook echt verkeer telt mee)")
+    if probe["count"]:
+        slope = probe["ms_per_10k_rows"]
+        lines.append(
+            f"active-visitors:   {probe['count']} probes  |  begin {probe['first_ms']} ms → eind {probe['last_ms']} ms"
+            + (f"  |  {slope:+g} ms per 10.000 nieuwe rijen" if slope is not None else "")
+        )
+    elif not probe["enabled"]:
+        lines.append("active-visitors:   niet gemeten (geen admin-wachtwoord)")
+    if probe["error"]:
+        lines.append(f"⚠ Admin-probes: {probe['error']}")
+    if r["heartbeat_errors"].get(ERROR_RATE_LIMIT):
+        lines.append(RATE_LIMIT_NOTE)
+    return lines
+
+
+def soak_timeline_lines(rows: list) -> list[str]:
+    """Heartbeat-latency, open tabbladen, rijen en probe over de tijd; lange runs samengevat in max. 20 rijen."""
+    if not rows:
+        return []
+    per_row = max(1, -(-len(rows) // 20))
+    lines = ["Tijd (min)  tabs  heartbeats  p50 hb  p95 hb  fouten  rijen+  active (ms)  visits"]
+    for i in range(0, len(rows), per_row):
+        chunk = rows[i:i + per_row]
+        label = f"{chunk[0]['t'] // 60}-{chunk[-1]['t'] // 60 + 1}"
+        probes = [x["probe_ms"] for x in chunk if x["probe_ms"] is not None]
+        totals = [x["total_visits"] for x in chunk if x["total_visits"] is not None]
+        lines.append(
+            f"{label:<11} {max(x['tabs'] for x in chunk):>4}  {sum(x['heartbeats'] for x in chunk):>10}  "
+            f"{max(x['hb_p50'] for x in chunk):>6.0f}  {max(x['hb_p95'] for x in chunk):>6.0f}  "
+            f"{sum(x['errors'] for x in chunk):>6}  {chunk[-1]['rows_added']:>6}  "
+            f"{(str(max(probes)) if probes else '–'):>11}  {(str(totals[-1]) if totals else '–'):>6}"
+        )
+    return lines
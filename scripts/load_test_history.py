@@ -0,0 +1,244 @@
+"""
+Geschiedenis van load-test-runs in een lokale SQLite-database (standaard scripts/loadtest_history.db).
+Per run: model/scenario, server, git-commit van deze checkout, instellingen, kerncijfers en per endpoint
+het latency-histogram, zodat twee runs later nog volledig vergeleken kunnen worden (niet alleen p95).
+Capaciteitszoektochten worden ook bewaard, met de gevonden capaciteit en de curve.
+De GUI (knop Geschiedenis) en de CLI (--history-list, --history-compare) lezen dezelfde database.
+"""
+
+import json
+import os
+import sqlite3
+import subprocess
+from datetime import datetime, timezone
+
+from load_test_core import LatencyHistogram
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_HISTORY_DB = os.path.join(REPO_DIR, "scripts", "loadtest_history.db")
+DEFAULT_HISTORY_LIMIT = 20
+KIND_RUN = "run"
+KIND_CAPACITY = "capaciteit"
+# Percentielen voor het naast elkaar leggen van twee runs (HdrHistogram-stijl: steeds dieper in de staart)
+OVERLAY_QUANTILES = (0.50, 0.75, 0.90, 0.95, 0.98, 0.99, 0.995, 0.999)
+# Niet in de samenvatting: staat al in eigen kolommen/tabellen of is te groot
+_SUMMARY_SKIP = ("histograms", "outcomes", "endpoints", "settings")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    model TEXT NOT NULL,
+    scenario TEXT,
+    target TEXT NOT NULL,
+    git_commit TEXT,
+    engine TEXT,
+    label TEXT,
+    requests INTEGER,
+    error_rate REAL,
+    p50 REAL,
+    p95 REAL,
+    p99 REAL,
+    capacity REAL,
+    settings TEXT NOT NULL,
+    summary TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_runs_target ON runs(target, created_at);
+CREATE TABLE IF NOT EXISTS endpoints (
+    run_id INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    endpoint TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    errors INTEGER NOT NULL,
+    p50 REAL,
+    p95 REAL,
+    p99 REAL,
+    max REAL,
+    histogram TEXT NOT NULL,
+    PRIMARY KEY (run_id, endpoint)
+);
+"""
+
+_RUN_COLUMNS = (
+    "id", "created_at", "kind", "model", "scenario", "target", "git_commit", "engine", "label",
+    "requests", "error_rate", "p50", "p95", "p99", "capacity",
+)
+
+
+def git_commit(repo_dir: str = REPO_DIR) -> str | None:
+    """Korte commit van deze checkout (met -dirty bij lokale wijzigingen), of None zonder git."""
+    try:
+        out = subprocess.run(
+            ["git", "-C", repo_dir, "describe", "--always", "--dirty"],
+            capture_output=True, text=True, timeout=5, check=True,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return out.stdout.strip() or None
+
+
+class RunHistory:
+    """Eén SQLite-bestand met runs en hun endpoint-histogrammen; maakt het schema zelf aan."""
+
+    def __init__(self, path: str = DEFAULT_HISTORY_DB):
+        self.path = path
+        self.db = sqlite3.connect(path)
+        self.db.row_factory = sqlite3.Row
+        self.db.execute("PRAGMA foreign_keys = ON")
+        self.db.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        self.db.close()
+
+    def save(self, r: dict, settings: dict, label: str = "", commit: str | None = None) -> int:
+        """
+        Bewaar een result dict (run of capaciteitszoektocht, herkend aan "curve"); geeft het run-id.
+        commit None: de huidige commit van deze checkout.
+        """
+        is_capacity = "curve" in r
+        latency = r.get("latency", {}).get("raw", {})
+        total = r.get("success_count", 0) + r.get("fail_count", 0)
+        summary = {k: v for k, v in r.items() if k not in _SUMMARY_SKIP}
+        with self.db:
+            cur = self.db.execute(
+                "INSERT INTO runs (created_at, kind, model, scenario, target, git_commit, engine, label, requests, "
+                "error_rate, p50, p95, p99, capacity, settings, summary) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                    KIND_CAPACITY if is_capacity else KIND_RUN,
+                    r["model"],
+                    settings.get("scenario_file") or settings.get("scenario") or r["model"],
+                    r["base_url"],
+                    commit if commit is not None else git_commit(),
+                    r.get("engine"),
+                    label,
+                    None if is_capacity else sum(e["count"] for e in r["endpoints"].values()),
+                    None if is_capacity else round(100.0 * r["fail_count"] / total, 3) if total else 0.0,
+                    latency.get("p50"),
+                    latency.get("p95"),
+                    latency.get("p99"),
+                    r.get("capacity") if is_capacity else None,
+                    json.dumps(settings, ensure_ascii=False),
+                    json.dumps(summary, ensure_ascii=False),
+                ),
+            )
+            run_id = cur.lastrowid
+            histograms = r.get("histograms", {})
+            self.db.executemany(
+                "INSERT INTO endpoints (run_id, endpoint, count, errors, p50, p95, p99, max, histogram) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (run_id, key, e["count"], e["errors"], e.get("p50"), e.get("p95"), e.get("p99"), e.get("max"),
+                     json.dumps(histograms.get(key, {})))
+                    for key, e in r.get("endpoints", {}).items()
+                ],
+            )
+        return run_id
+
+    def runs(self, limit: int = DEFAULT_HISTORY_LIMIT, target: str | None = None, model: str | None = None) -> list[dict]:
+        """De laatste limit runs (nieuwste eerst), optioneel alleen voor één server en/of model."""
+        where, params = [], []
+        if target:
+            where.append("target = ?")
+            params.append(target)
+        if model:
+            where.append("model = ?")
+            params.append(model)
+        sql = f"SELECT {', '.join(_RUN_COLUMNS)} FROM runs"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY id DESC LIMIT ?"
+        return [dict(row) for row in self.db.execute(sql, (*params, limit))]
+
+    def targets(self) -> list[str]:
+        return [row[0] for row in self.db.execute("SELECT DISTINCT target FROM runs ORDER BY target")]
+
+    def run(self, run_id: int) -> dict | None:
+        """Eén run met instellingen, samenvatting en per endpoint de kerncijfers plus het histogram."""
+        row = self.db.execute(
+            f"SELECT {', '.join(_RUN_COLUMNS)}, settings, summary FROM runs WHERE id = ?", (run_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        out = dict(row)
+        out["settings"] = json.loads(out["settings"])
+        out["summary"] = json.loads(out["summary"])
+        out["endpoints"] = {}
+        for e in self.db.execute(
+            "SELECT endpoint, count, errors, p50, p95, p99, max, histogram FROM endpoints WHERE run_id = ? "
+            "ORDER BY endpoint", (run_id,)
+        ):
+            e = dict(e)
+            e["histogram"] = LatencyHistogram.from_dict(json.loads(e["histogram"]))
+            out["endpoints"][e.pop("endpoint")] = e
+        return out
+
+    def delete(self, run_id: int) -> None:
+        with self.db:
+            self.db.execute("DELETE FROM runs WHERE id = ?", (run_id,))
+
+
+def total_histogram(run: dict) -> LatencyHistogram:
+    """Alle endpoint-histogrammen van een run (uit RunHistory.run) samen."""
+    total = LatencyHistogram()
+    for e in run["endpoints"].values():
+        total.merge(e["histogram"])
+    return total
+
+
+def overlay(run_a: dict, run_b: dict) -> list[dict]:
+    """Per percentiel de latency van beide runs over alle requests: [{"q", "a", "b"}] in ms."""
+    ha, hb = total_histogram(run_a), total_histogram(run_b)
+    return [{"q": q, "a": ha.percentile(q), "b": hb.percentile(q)} for q in OVERLAY_QUANTILES]
+
+
+def _delta(a: float | None, b: float | None) -> str:
+    if not a or b is None:
+        return ""
+    return f"{100.0 * (b - a) / a:+.0f}%"
+
+
+def run_label(run: dict) -> str:
+    """Korte naam voor lijsten en grafieken: #id datum commit."""
+    return f"#{run['id']} {run['created_at'][:16].replace('T', ' ')} {run['git_commit'] or '?'}"
+
+
+def compare_lines(run_a: dict, run_b: dict) -> list[str]:
+    """Twee runs naast elkaar: percentielen over alle requests, daarna p95 per endpoint dat in beide voorkomt."""
+    lines = [
+        f"A: {run_label(run_a)}  {run_a['model']} / {run_a['scenario']}  {run_a['target']}",
+        f"B: {run_label(run_b)}  {run_b['model']} / {run_b['scenario']}  {run_b['target']}",
+        "",
+        f"{'Percentiel':<34} {'A (ms)':>9} {'B (ms)':>9} {'verschil':>9}",
+    ]
+    for p in overlay(run_a, run_b):
+        lines.append(f"{'p' + format(100 * p['q'], 'g'):<34} {p['a']:>9.1f} {p['b']:>9.1f} {_delta(p['a'], p['b']):>9}")
+    lines.append(f"{'fouten (%)':<34} {run_a['error_rate'] or 0:>9.2f} {run_b['error_rate'] or 0:>9.2f}")
+    if run_a["capacity"] is not None or run_b["capacity"] is not None:
+        lines.append(f"{'capaciteit':<34} {run_a['capacity'] or 0:>9g} {run_b['capacity'] or 0:>9g} "
+                     f"{_delta(run_a['capacity'], run_b['capacity']):>9}")
+    common = [k for k in run_a["endpoints"] if k in run_b["endpoints"]]
+    if common:
+        lines += ["", f"{'p95 per endpoint':<34} {'A (ms)':>9} {'B (ms)':>9} {'verschil':>9}"]
+        for key in common:
+            a, b = run_a["endpoints"][key]["p95"], run_b["endpoints"][key]["p95"]
+            lines.append(f"{key:<34} {a or 0:>9.1f} {b or 0:>9.1f} {_delta(a, b):>9}")
+    return lines
+
+
+def trend_lines(runs: list[dict], bar_width: int = 24) -> list[str]:
+    """De runs (uit RunHistory.runs) van oud naar nieuw: p95 (ook als balk), fouten en capaciteit per commit."""
+    top = max((run["p95"] for run in runs if run["p95"]), default=0)
+    lines = [f"{'Run':<6} {'datum':<16} {'commit':<14} {'model':<12} {'p95 (ms)':>9} {'fout%':>7} {'capaciteit':>11}  "
+             f"{'p95':<{bar_width}}  label"]
+    for run in reversed(runs):
+        p95 = f"{run['p95']:.0f}" if run["p95"] is not None else "–"
+        err = f"{run['error_rate']:.2f}" if run["error_rate"] is not None else "–"
+        cap = f"{run['capacity']:g}" if run["capacity"] is not None else "–"
+        bar = "█" * max(1, round(bar_width * run["p95"] / top)) if run["p95"] and top else ""
+        lines.append(
+            f"#{run['id']:<5} {run['created_at'][:16].replace('T', ' '):<16} {(run['git_commit'] or '?')[:14]:<14} "
+            f"{run['model']:<12} {p95:>9} {err:>7} {cap:>11}  {bar:<{bar_width}}  {run['label'] or ''}"
+        )
+    return lines
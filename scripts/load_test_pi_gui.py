@@ -2,200 +2,112 @@
 """
 Load test voor Regenboog Raspberry Pi server – met GUI.
 Simuleert realistisch bezoek: homepage, spel openen, tracking, leaderboard, score opslaan.
+De engine zelf staat in load_test_core.py; zonder GUI: load_test_cli.py.
+Als load-agent voor een verdeelde test (de GUI op een andere pc coördineert) draait
+load_test_agents.py zonder Tkinter:
+  python scripts/load_test_agents.py --port 8790 --bind 0.0.0.0
+Zonder --bind luistert de agent alleen op 127.0.0.1; de agent heeft geen authenticatie, dus alleen
+op een vertrouwd netwerk openzetten. --agent hier doet hetzelfde, maar vraagt wel Tkinter.
 """
 
-import json
-import random
-import tkinter as tk
-from tkinter import ttk, scrolledtext, messagebox
-import urllib.request
-import urllib.error
+import argparse
+import os
+import sqlite3
 import time
 import threading
-from concurrent.futures import ThreadPoolExecutor, as_completed
-
-# Standaardinstellingen
-DEFAULT_URL = "https://regenboog.jbouquet.be"
-DEFAULT_CONCURRENT = 10
-DEFAULT_TIMEOUT = 15
-MIN_CONCURRENT = 1
-MAX_CONCURRENT = 500
-
-# Spellen (class_name voor leaderboard/score); zonder game-template
-GAMES = [
-    "beren", "dolfijnen", "draken", "eenden", "egels", "giraffen", "kangoeroes",
-    "koalas", "konijnen", "leeuwen", "lieveheersbeestjes", "muizen", "nijlpaarden",
-    "olifanten", "pandas", "pinguins", "uilen", "vlinders", "vossen", "wolven",
-    "zebras", "zwaluwen",
-]
-
-USER_AGENT = "RegenboogLoadTest/1.0 (simulated browser)"
-
-
-def _request(
-    base_url: str,
-    path: str,
-    timeout_sec: int,
-    method: str = "GET",
-    body: dict | None = None,
-) -> dict:
-    """Eén HTTP request (GET of POST met JSON); retourneert ok, status_code, ms, path, error."""
-    url = base_url.rstrip("/") + path
-    start = time.perf_counter()
-    try:
-        if method == "GET":
-            req = urllib.request.Request(url, method="GET")
-            req.add_header("User-Agent", USER_AGENT)
-        else:
-            data = json.dumps(body or {}).encode("utf-8")
-            req = urllib.request.Request(url, data=data, method=method)
-            req.add_header("Content-Type", "application/json")
-            req.add_header("User-Agent", USER_AGENT)
-        with urllib.request.urlopen(req, timeout=timeout_sec) as resp:
-            resp.read()
-        ms = int((time.perf_counter() - start) * 1000)
-        status = resp.status
-        ok = 200 <= status < 400
-        return {"ok": ok, "status_code": status, "ms": ms, "path": path}
-    except urllib.error.HTTPError as e:
-        e.read()
-        ms = int((time.perf_counter() - start) * 1000)
-        return {"ok": False, "status_code": e.code, "ms": ms, "path": path, "error": str(e)}
-    except urllib.error.URLError as e:
-        ms = int((time.perf_counter() - start) * 1000)
-        return {"ok": False, "status_code": None, "ms": ms, "path": path, "error": str(e.reason)}
-    except TimeoutError:
-        ms = timeout_sec * 1000
-        return {"ok": False, "status_code": None, "ms": ms, "path": path, "error": "timeout"}
-    except Exception as e:
-        ms = int((time.perf_counter() - start) * 1000)
-        return {"ok": False, "status_code": None, "ms": ms, "path": path, "error": str(e)}
-
-
-def simulate_one_player(
-    base_url: str,
-    timeout_sec: int,
-    player_id: int,
-) -> dict:
-    """
-    Simuleer één bezoeker: homepage → spel → leaderboard → score.
-    Tracking-endpoints (track-visit, heartbeat, track-visit-end) worden
-    meegestuurd voor realisme maar zijn optioneel (404/oudere server = geen fout).
-    """
-    results = []
-    base_url = base_url.rstrip("/")
-    visitor_id = f"loadtest-{player_id}-{random.randint(10000, 99999)}"
-    game = random.choice(GAMES)
-    page_game = f"/games/{game}.html"
-
-    def step(method: str, path: str, body: dict | None = None, required: bool = True) -> bool:
-        r = _request(base_url, path, timeout_sec, method=method, body=body)
-        r["required"] = required
-        results.append(r)
-        return r.get("ok", False)
-
-    # 1. Homepage (verplicht)
-    if not step("GET", "/"):
-        return {"player_id": player_id, "results": results}
-    step("POST", "/api/track-visit", {
-        "visitor_id": visitor_id,
-        "page": "/",
-        "user_agent": USER_AGENT,
-        "referrer": "",
-    }, required=False)
-
-    # 2. Spelpagina (verplicht)
-    if not step("GET", page_game):
-        return {"player_id": player_id, "results": results}
-    step("POST", "/api/track-visit", {
-        "visitor_id": visitor_id,
-        "page": page_game,
-        "user_agent": USER_AGENT,
-        "referrer": "/",
-    }, required=False)
-
-    if game == "vlinders":
-        step("GET", "/api/vlinders/word/1", required=False)
-
-    step("POST", "/api/track-visit-heartbeat", {"visitor_id": visitor_id, "page": page_game}, required=False)
-
-    # 3. Leaderboard (verplicht)
-    if not step("GET", f"/api/leaderboard/{game}"):
-        return {"player_id": player_id, "results": results}
-
-    # 4. Score opslaan (verplicht)
-    if not step("POST", "/api/score", {
-        "class_name": game,
-        "player_name": f"Loadtest {player_id}",
-        "student_class": "Zebra's",
-        "score": random.randint(80, 450),
-    }):
-        return {"player_id": player_id, "results": results}
-
-    step("POST", "/api/track-visit-end", {
-        "visitor_id": visitor_id,
-        "page": page_game,
-        "duration": random.randint(20, 90),
-    }, required=False)
-
-    return {"player_id": player_id, "results": results}
-
-
-def run_load_test(
-    base_url: str,
-    concurrent: int,
-    timeout_sec: int,
-    cancel_flag: threading.Event,
-) -> dict:
-    """Voer load test uit; cancel_flag om (later) te kunnen stoppen."""
-    base_url = base_url.rstrip("/")
-    start = time.perf_counter()
-    outcomes = []
-
-    with ThreadPoolExecutor(max_workers=concurrent) as ex:
-        futures = {
-            ex.submit(simulate_one_player, base_url, timeout_sec, i + 1): i + 1
-            for i in range(concurrent)
-        }
-        for fut in as_completed(futures):
-            if cancel_flag.is_set():
-                break
-            try:
-                outcomes.append(fut.result())
-            except Exception as e:
-                outcomes.append({"player_id": futures[fut], "results": [{"ok": False, "error": str(e)}]})
-
-    total_ms = int((time.perf_counter() - start) * 1000)
-    success_count = 0
-    fail_count = 0
-    times = []
-
-    for item in outcomes:
-        results = item.get("results", [])
-        required_ok = all(r.get("ok", False) for r in results if r.get("required", True))
-        if required_ok and results:
-            success_count += 1
-            times.append(sum(r.get("ms", 0) for r in results))
-        else:
-            fail_count += 1
-
-    times.sort()
-    n = len(times)
-    avg_ms = round(sum(times) / n) if n else 0
-    p50 = times[n // 2] if n else 0
-    p95 = times[int(n * 0.95)] if n else 0
-
-    return {
-        "base_url": base_url,
-        "concurrent": concurrent,
-        "success_count": success_count,
-        "fail_count": fail_count,
-        "total_ms": total_ms,
-        "avg_ms": avg_ms,
-        "p50": p50,
-        "p95": p95,
-        "outcomes": outcomes,
-    }
+import tkinter as tk
+from tkinter import ttk, scrolledtext, messagebox, filedialog
+
+from load_test_core import (
+    DEFAULT_CONCURRENT,
+    DEFAULT_DURATION,
+    DEFAULT_ENGINE,
+    DEFAULT_PEAK_RATE,
+    DEFAULT_RATE,
+    DEFAULT_TIMEOUT,
+    DEFAULT_URL,
+    ENGINES,
+    LIVE_INTERVAL_MS,
+    MAX_CONCURRENT,
+    MAX_CONCURRENT_ASYNC,
+    MAX_DURATION,
+    MIN_CONCURRENT,
+    MODELS,
+    MODEL_CLOSED,
+    MODEL_CONTENTION,
+    MODEL_MULTIPLAYER,
+    MODEL_OPEN,
+    MODEL_REPLAY,
+    MODEL_SOAK,
+    PROFILES,
+    PROFILE_CONSTANT,
+    ROLLING_WINDOW_SEC,
+    ArrivalProfile,
+    RunMetrics,
+    endpoint_table_lines,
+    max_concurrent_for,
+    omission_lines,
+    run_open_model,
+    run_with_engine,
+    transfer_summary_lines,
+)
+from load_test_agents import (
+    DEFAULT_AGENT_BIND,
+    DEFAULT_AGENT_PORT,
+    AgentError,
+    agent_summary_lines,
+    parse_agents,
+    run_agent,
+    run_distributed,
+)
+from load_test_capacity import (
+    DEFAULT_SLO_ERROR_PCT,
+    DEFAULT_SLO_P95_MS,
+    SLO,
+    capacity_summary_lines,
+    default_curve_name,
+    run_capacity_search,
+    trial_line,
+    write_curve,
+)
+from load_test_contention import (
+    DEFAULT_BURST_INTERVAL_SEC,
+    DEFAULT_CONTENTION_GAME,
+    DEFAULT_READ_INTERVAL_SEC,
+    DEFAULT_READERS,
+    DEFAULT_WRITERS,
+    MAX_CONTENTION_CLIENTS,
+    burst_timeline_lines,
+    contention_summary_lines,
+    run_contention,
+)
+from load_test_heartbeat import (
+    DEFAULT_PAGE_MINUTES,
+    DEFAULT_SOAK_SEC,
+    DEFAULT_TABS,
+    MAX_TABS,
+    run_soak,
+    soak_summary_lines,
+    soak_timeline_lines,
+)
+from load_test_history import (
+    DEFAULT_HISTORY_LIMIT,
+    RunHistory,
+    compare_lines,
+    overlay,
+    run_label,
+    trend_lines,
+)
+from load_test_pi_monitor import (
+    PiMonitorError,
+    attach_pi_results,
+    pi_summary_lines,
+    pi_timeline_lines,
+    start_pi_monitor,
+)
+from load_test_replay import DEFAULT_ACCESS_LOG, DEFAULT_REPLAY_SPEED, REPLAY_SPEEDS, replay_summary_lines, run_replay
+from load_test_scenarios import DEFAULT_SCENARIO, ScenarioError, available_scenarios, load_scenario
+from load_test_socketio import DEFAULT_GAME, GAMES, games_timeline_lines, multiplayer_summary_lines, run_multiplayer
 
 
 class LoadTestApp:
@@ -203,10 +115,14 @@ class LoadTestApp:
         self.root = tk.Tk()
         self.root.title("Regenboog – Load test Pi")
         self.root.minsize(480, 420)
-        self.root.geometry("620x520")
+        self.root.geometry("720x900")
 
         self.cancel_flag = threading.Event()
         self.test_thread = None
+        self.metrics = None
+        self._live_job = None
+        self._live_start = 0.0
+        self._run_settings = None
         self._build_ui()
 
     def _build_ui(self):
@@ -245,6 +161,218 @@ class LoadTestApp:
         )
         self.timeout_spin.grid(row=2, column=1, sticky=tk.W, padx=(0, 8), pady=4)
 
+        ttk.Label(settings, text="Engine:").grid(row=3, column=0, sticky=tk.W, padx=(0, 8), pady=4)
+        self.engine_var = tk.StringVar(value=DEFAULT_ENGINE)
+        self.engine_combo = ttk.Combobox(
+            settings,
+            values=ENGINES,
+            textvariable=self.engine_var,
+            state="readonly",
+            width=10,
+        )
+        self.engine_combo.grid(row=3, column=1, sticky=tk.W, padx=(0, 8), pady=4)
+        self.engine_combo.bind("<<ComboboxSelected>>", lambda e: self._on_engine_changed())
+
+        self.keep_alive_var = tk.BooleanVar(value=True)
+        ttk.Checkbutton(
+            settings,
+            text="Keep-alive: verbindingen hergebruiken per gebruiker (zoals een browser)",
+            variable=self.keep_alive_var,
+        ).grid(row=4, column=0, columnspan=2, sticky=tk.W, pady=4)
+
+        self.assets_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            settings,
+            text="Browsermodus: CSS/JS/afbeeldingen ophalen (6 verbindingen, cache per gebruiker)",
+            variable=self.assets_var,
+        ).grid(row=5, column=0, columnspan=2, sticky=tk.W, pady=4)
+
+        ttk.Label(settings, text="Scenario:").grid(row=6, column=0, sticky=tk.W, padx=(0, 8), pady=4)
+        self.scenario_var = tk.StringVar(value=DEFAULT_SCENARIO)
+        self.scenario_combo = ttk.Combobox(
+            settings,
+            values=available_scenarios(),
+            textvariable=self.scenario_var,
+            state="readonly",
+            width=16,
+        )
+        self.scenario_combo.grid(row=6, column=1, sticky=tk.W, padx=(0, 8), pady=4)
+
+        ttk.Label(settings, text="Model:").grid(row=7, column=0, sticky=tk.W, padx=(0, 8), pady=4)
+        self.model_var = tk.StringVar(value=MODEL_CLOSED)
+        model_row = ttk.Frame(settings)
+        model_row.grid(row=7, column=1, sticky=tk.W, pady=4)
+        model_combo = ttk.Combobox(
+            model_row,
+            values=MODELS,
+            textvariable=self.model_var,
+            state="readonly",
+            width=10,
+        )
+        model_combo.pack(side=tk.LEFT)
+        model_combo.bind("<<ComboboxSelected>>", lambda e: self._on_model_changed())
+        ttk.Label(model_row, text="Lobby (multiplayer):").pack(side=tk.LEFT, padx=(16, 4))
+        self.lobby_var = tk.StringVar(value=DEFAULT_GAME)
+        self.lobby_combo = ttk.Combobox(
+            model_row,
+            values=list(GAMES),
+            textvariable=self.lobby_var,
+            state="readonly",
+            width=12,
+        )
+        self.lobby_combo.pack(side=tk.LEFT)
+
+        self.pi_monitor_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            settings,
+            text="Pi bemeten via SSH (CPU, RSS, temperatuur, I/O, pm2) – instellingen uit deploy/setup_config.json",
+            variable=self.pi_monitor_var,
+        ).grid(row=8, column=0, columnspan=2, sticky=tk.W, pady=4)
+
+        history_row = ttk.Frame(settings)
+        history_row.grid(row=9, column=0, columnspan=2, sticky=tk.W, pady=4)
+        self.history_var = tk.BooleanVar(value=True)
+        ttk.Checkbutton(history_row, text="Bewaren in de geschiedenis", variable=self.history_var).pack(side=tk.LEFT)
+        ttk.Label(history_row, text="Label:").pack(side=tk.LEFT, padx=(16, 4))
+        self.label_var = tk.StringVar(value="")
+        ttk.Entry(history_row, textvariable=self.label_var, width=30).pack(side=tk.LEFT)
+
+        ttk.Label(settings, text="Load-agents:").grid(row=10, column=0, sticky=tk.W, padx=(0, 8), pady=4)
+        agents_row = ttk.Frame(settings)
+        agents_row.grid(row=10, column=1, sticky=tk.EW, pady=4)
+        self.agents_var = tk.StringVar(value="")
+        ttk.Entry(agents_row, textvariable=self.agents_var, width=36).pack(side=tk.LEFT)
+        ttk.Label(
+            agents_row,
+            text=f"host:poort, … (leeg = alleen deze pc; agent: load_test_agents.py --port {DEFAULT_AGENT_PORT} --bind 0.0.0.0)",
+        ).pack(side=tk.LEFT, padx=(8, 0))
+
+        # ——— Open model (aankomstritme) ———
+        self.open_frame = ttk.LabelFrame(main, text="Open model – aankomstritme (nieuwe spelers/sec)", padding=8)
+        self.open_frame.pack(fill=tk.X, pady=(0, 10))
+
+        ttk.Label(self.open_frame, text="Profiel:").grid(row=0, column=0, sticky=tk.W, padx=(0, 8), pady=2)
+        self.profile_var = tk.StringVar(value=PROFILE_CONSTANT)
+        ttk.Combobox(
+            self.open_frame,
+            values=PROFILES,
+            textvariable=self.profile_var,
+            state="readonly",
+            width=10,
+        ).grid(row=0, column=1, sticky=tk.W, padx=(0, 16), pady=2)
+        self.duration_label = ttk.Label(self.open_frame, text="Duur (sec):")
+        self.duration_label.grid(row=0, column=2, sticky=tk.W, padx=(0, 8), pady=2)
+        self.duration_var = tk.StringVar(value=str(DEFAULT_DURATION))
+        self.duration_spin = ttk.Spinbox(
+            self.open_frame, from_=1, to=MAX_DURATION, textvariable=self.duration_var, width=8
+        )
+        self.duration_spin.grid(row=0, column=3, sticky=tk.W, pady=2)
+        ttk.Label(self.open_frame, text="Ritme (start):").grid(row=1, column=0, sticky=tk.W, padx=(0, 8), pady=2)
+        self.rate_var = tk.StringVar(value=str(DEFAULT_RATE))
+        ttk.Entry(self.open_frame, textvariable=self.rate_var, width=8).grid(row=1, column=1, sticky=tk.W, padx=(0, 16), pady=2)
+        ttk.Label(self.open_frame, text="Piek / eind:").grid(row=1, column=2, sticky=tk.W, padx=(0, 8), pady=2)
+        self.peak_rate_var = tk.StringVar(value=str(DEFAULT_PEAK_RATE))
+        ttk.Entry(self.open_frame, textvariable=self.peak_rate_var, width=8).grid(row=1, column=3, sticky=tk.W, pady=2)
+
+        # ——— Capaciteit zoeken (SLO) ———
+        self.capacity_frame = ttk.LabelFrame(main, text="Capaciteit zoeken – hoogste belasting binnen de SLO", padding=8)
+        self.capacity_frame.pack(fill=tk.X, pady=(0, 10))
+        self.capacity_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            self.capacity_frame,
+            text="Zoeken (gesloten: vanaf gebruikers tot engine-max.; open: ritme → piek, proef = duur)",
+            variable=self.capacity_var,
+        ).grid(row=0, column=0, columnspan=4, sticky=tk.W, pady=2)
+        ttk.Label(self.capacity_frame, text="p95 < (ms):").grid(row=1, column=0, sticky=tk.W, padx=(0, 8), pady=2)
+        self.slo_p95_var = tk.StringVar(value=str(DEFAULT_SLO_P95_MS))
+        ttk.Entry(self.capacity_frame, textvariable=self.slo_p95_var, width=8).grid(
+            row=1, column=1, sticky=tk.W, padx=(0, 16), pady=2
+        )
+        ttk.Label(self.capacity_frame, text="Fouten < (%):").grid(row=1, column=2, sticky=tk.W, padx=(0, 8), pady=2)
+        self.slo_errors_var = tk.StringVar(value=f"{DEFAULT_SLO_ERROR_PCT:g}")
+        ttk.Entry(self.capacity_frame, textvariable=self.slo_errors_var, width=8).grid(
+            row=1, column=3, sticky=tk.W, pady=2
+        )
+
+        # ——— Replay (nginx access log) ———
+        self.replay_frame = ttk.LabelFrame(
+            main, text="Replay – nginx access log (combined-formaat, ook .gz)", padding=8
+        )
+        self.replay_frame.pack(fill=tk.X, pady=(0, 10))
+        ttk.Label(self.replay_frame, text="Log:").grid(row=0, column=0, sticky=tk.W, padx=(0, 8), pady=2)
+        self.replay_log_var = tk.StringVar(value=DEFAULT_ACCESS_LOG)
+        ttk.Entry(self.replay_frame, textvariable=self.replay_log_var, width=44).grid(
+            row=0, column=1, sticky=tk.EW, padx=(0, 8), pady=2
+        )
+        ttk.Button(self.replay_frame, text="Bladeren...", command=self._on_browse_log).grid(
+            row=0, column=2, sticky=tk.W, padx=(0, 16), pady=2
+        )
+        ttk.Label(self.replay_frame, text="Snelheid (×):").grid(row=0, column=3, sticky=tk.W, padx=(0, 8), pady=2)
+        self.replay_speed_var = tk.StringVar(value=str(DEFAULT_REPLAY_SPEED))
+        ttk.Combobox(
+            self.replay_frame,
+            values=[str(x) for x in REPLAY_SPEEDS],
+            textvariable=self.replay_speed_var,
+            width=5,
+        ).grid(row=0, column=4, sticky=tk.W, pady=2)
+        self.replay_frame.columnconfigure(1, weight=1)
+
+        # ——— Schrijfdruk (score-bursts tegen leaderboard-lezers) ———
+        self.contention_frame = ttk.LabelFrame(
+            main, text="Schrijfdruk – score-bursts tegen leaderboard-lezers op één spel (duur = open model)", padding=8
+        )
+        self.contention_frame.pack(fill=tk.X, pady=(0, 10))
+        ttk.Label(self.contention_frame, text="Spel:").grid(row=0, column=0, sticky=tk.W, padx=(0, 8), pady=2)
+        self.contention_game_var = tk.StringVar(value=DEFAULT_CONTENTION_GAME)
+        ttk.Entry(self.contention_frame, textvariable=self.contention_game_var, width=14).grid(
+            row=0, column=1, sticky=tk.W, padx=(0, 16), pady=2
+        )
+        ttk.Label(self.contention_frame, text="Schrijvers:").grid(row=0, column=2, sticky=tk.W, padx=(0, 8), pady=2)
+        self.writers_var = tk.StringVar(value=str(DEFAULT_WRITERS))
+        ttk.Spinbox(
+            self.contention_frame, from_=0, to=MAX_CONTENTION_CLIENTS, textvariable=self.writers_var, width=6
+        ).grid(row=0, column=3, sticky=tk.W, padx=(0, 16), pady=2)
+        ttk.Label(self.contention_frame, text="Burst elke (s):").grid(row=0, column=4, sticky=tk.W, padx=(0, 8), pady=2)
+        self.burst_interval_var = tk.StringVar(value=f"{DEFAULT_BURST_INTERVAL_SEC:g}")
+        ttk.Entry(self.contention_frame, textvariable=self.burst_interval_var, width=6).grid(
+            row=0, column=5, sticky=tk.W, pady=2
+        )
+        ttk.Label(self.contention_frame, text="Lezers:").grid(row=1, column=2, sticky=tk.W, padx=(0, 8), pady=2)
+        self.readers_var = tk.StringVar(value=str(DEFAULT_READERS))
+        ttk.Spinbox(
+            self.contention_frame, from_=0, to=MAX_CONTENTION_CLIENTS, textvariable=self.readers_var, width=6
+        ).grid(row=1, column=3, sticky=tk.W, padx=(0, 16), pady=2)
+        ttk.Label(self.contention_frame, text="Lezen elke (s):").grid(row=1, column=4, sticky=tk.W, padx=(0, 8), pady=2)
+        self.read_interval_var = tk.StringVar(value=f"{DEFAULT_READ_INTERVAL_SEC:g}")
+        ttk.Entry(self.contention_frame, textvariable=self.read_interval_var, width=6).grid(
+            row=1, column=5, sticky=tk.W, pady=2
+        )
+
+        # ——— Hartslag (soak van het analytics-pad) ———
+        self.soak_frame = ttk.LabelFrame(
+            main, text="Hartslag – open tabbladen met heartbeats elke 30 s (soak, duur = open model)", padding=8
+        )
+        self.soak_frame.pack(fill=tk.X, pady=(0, 10))
+        ttk.Label(self.soak_frame, text="Tabbladen:").grid(row=0, column=0, sticky=tk.W, padx=(0, 8), pady=2)
+        self.tabs_var = tk.StringVar(value=str(DEFAULT_TABS))
+        ttk.Spinbox(self.soak_frame, from_=1, to=MAX_TABS, textvariable=self.tabs_var, width=6).grid(
+            row=0, column=1, sticky=tk.W, padx=(0, 16), pady=2
+        )
+        ttk.Label(self.soak_frame, text="Ander spel elke (min):").grid(row=0, column=2, sticky=tk.W, padx=(0, 8), pady=2)
+        self.page_minutes_var = tk.StringVar(value=f"{DEFAULT_PAGE_MINUTES:g}")
+        ttk.Entry(self.soak_frame, textvariable=self.page_minutes_var, width=6).grid(
+            row=0, column=3, sticky=tk.W, padx=(0, 16), pady=2
+        )
+        ttk.Label(self.soak_frame, text="Admin-wachtwoord:").grid(row=1, column=0, sticky=tk.W, padx=(0, 8), pady=2)
+        self.admin_password_var = tk.StringVar(value=os.environ.get("ADMIN_PASSWORD", ""))
+        ttk.Entry(self.soak_frame, textvariable=self.admin_password_var, show="*", width=16).grid(
+            row=1, column=1, columnspan=2, sticky=tk.W, padx=(0, 16), pady=2
+        )
+        ttk.Label(self.soak_frame, text="(leeg = getActiveVisitors en tabelgroei niet meten)").grid(
+            row=1, column=3, columnspan=2, sticky=tk.W, pady=2
+        )
+        self._on_model_changed()
+
         # ——— Knoppen ———
         btn_frame = ttk.Frame(main)
         btn_frame.pack(fill=tk.X, pady=(0, 8))
@@ -252,16 +380,202 @@ class LoadTestApp:
         self.start_btn.pack(side=tk.LEFT, padx=(0, 8))
         self.stop_btn = ttk.Button(btn_frame, text="Stop", command=self._on_stop, state=tk.DISABLED)
         self.stop_btn.pack(side=tk.LEFT)
+        ttk.Button(btn_frame, text="Geschiedenis", command=self._on_history).pack(side=tk.LEFT, padx=(8, 0))
 
         self.status_var = tk.StringVar(value="Klaar. Stel URL en aantal in en klik op Start test.")
         ttk.Label(btn_frame, textvariable=self.status_var).pack(side=tk.LEFT, padx=(20, 0))
 
+        # ——— Live-cijfers tijdens de run ———
+        live_frame = ttk.LabelFrame(main, text="Live (ververst elke seconde)", padding=4)
+        live_frame.pack(fill=tk.X, pady=(0, 8))
+        self.live_var = tk.StringVar(value="–")
+        ttk.Label(live_frame, textvariable=self.live_var).pack(anchor=tk.W, pady=(0, 4))
+        columns = ("rps", "p95")
+        self.live_tree = ttk.Treeview(live_frame, columns=columns, height=6)
+        self.live_tree.heading("#0", text="Endpoint")
+        self.live_tree.heading("rps", text="req/s")
+        self.live_tree.heading("p95", text=f"p95 ({ROLLING_WINDOW_SEC} s, ms)")
+        self.live_tree.column("#0", width=300)
+        self.live_tree.column("rps", width=80, anchor=tk.E)
+        self.live_tree.column("p95", width=120, anchor=tk.E)
+        self.live_tree.pack(fill=tk.X)
+
         # ——— Resultaat / log ———
         result_frame = ttk.LabelFrame(main, text="Resultaat", padding=4)
         result_frame.pack(fill=tk.BOTH, expand=True)
-        self.log_text = scrolledtext.ScrolledText(result_frame, height=18, wrap=tk.WORD, state=tk.DISABLED)
+        self.log_text = scrolledtext.ScrolledText(
+            result_frame, height=18, wrap=tk.NONE, state=tk.DISABLED, font=("Consolas", 9)
+        )
         self.log_text.pack(fill=tk.BOTH, expand=True)
 
+    def _on_model_changed(self):
+        """
+        Open-model-velden alleen actief bij model "open"; aantal gebruikers bij "gesloten" en
+        "multiplayer" (spelers, in paren). Multiplayer gebruikt van de open-model-velden alleen de duur.
+        Scenario en capaciteit zoeken gelden niet voor multiplayer, replay en schrijfdruk (die hebben
+        eigen verkeer); schrijfdruk en hartslag gebruiken de duur en hun eigen velden.
+        """
+        model = self.model_var.get()
+        uses_journeys = model in (MODEL_CLOSED, MODEL_OPEN)
+        is_open = model == MODEL_OPEN
+        for child in self.open_frame.winfo_children():
+            child.state(["!disabled"] if is_open else ["disabled"])
+        if model in (MODEL_MULTIPLAYER, MODEL_CONTENTION, MODEL_SOAK):
+            self.duration_label.state(["!disabled"])
+            self.duration_spin.state(["!disabled"])
+        if model == MODEL_SOAK and self.duration_var.get() == str(DEFAULT_DURATION):
+            self.duration_var.set(str(DEFAULT_SOAK_SEC))
+        if model == MODEL_MULTIPLAYER:
+            self.concurrent_spin.configure(to=MAX_CONCURRENT_ASYNC)
+        else:
+            self._on_engine_changed()
+        no_users = is_open or model in (MODEL_REPLAY, MODEL_CONTENTION, MODEL_SOAK)
+        self.concurrent_spin.state(["disabled"] if no_users else ["!disabled"])
+        self.scenario_combo.state(["!disabled", "readonly"] if uses_journeys else ["disabled"])
+        self.lobby_combo.state(["!disabled", "readonly"] if model == MODEL_MULTIPLAYER else ["disabled"])
+        for child in self.capacity_frame.winfo_children():
+            child.state(["!disabled"] if uses_journeys else ["disabled"])
+        for child in self.replay_frame.winfo_children():
+            child.state(["!disabled"] if model == MODEL_REPLAY else ["disabled"])
+        for child in self.contention_frame.winfo_children():
+            child.state(["!disabled"] if model == MODEL_CONTENTION else ["disabled"])
+        for child in self.soak_frame.winfo_children():
+            child.state(["!disabled"] if model == MODEL_SOAK else ["disabled"])
+
+    def _on_browse_log(self):
+        path = filedialog.askopenfilename(
+            title="nginx access log kiezen",
+            filetypes=[("Access logs", "*.log *.log.* *.gz"), ("Alle bestanden", "*")],
+        )
+        if path:
+            self.replay_log_var.set(path)
+
+    def _read_replay(self) -> tuple[str, float] | None:
+        path = self.replay_log_var.get().strip()
+        try:
+            speed = float(self.replay_speed_var.get().replace(",", "."))
+        except ValueError:
+            messagebox.showwarning("Ongeldig getal", "Replay-snelheid moet een getal zijn (bijv. 1, 5 of 10).")
+            return None
+        if speed <= 0:
+            messagebox.showwarning("Ongeldig getal", "Replay-snelheid moet groter dan 0 zijn.")
+            return None
+        try:
+            with open(path, "rb"):
+                pass
+        except OSError as e:
+            messagebox.showwarning("Access log", f"Kan de log niet openen: {e}")
+            return None
+        return path, speed
+
+    def _read_contention(self) -> dict | None:
+        game = self.contention_game_var.get().strip()
+        if not game:
+            messagebox.showwarning("Schrijfdruk", "Vul een spel in (bijv. loadtest).")
+            return None
+        try:
+            writers = int(self.writers_var.get())
+            readers = int(self.readers_var.get())
+            burst_sec = float(self.burst_interval_var.get().replace(",", "."))
+            read_sec = float(self.read_interval_var.get().replace(",", "."))
+        except ValueError:
+            messagebox.showwarning("Ongeldig getal", "Schrijvers, lezers en intervallen moeten getallen zijn.")
+            return None
+        if writers + readers <= 0 or burst_sec <= 0 or read_sec <= 0:
+            messagebox.showwarning("Ongeldig getal", "Minstens één schrijver of lezer, en intervallen groter dan 0.")
+            return None
+        duration = self._read_duration()
+        if duration is None:
+            return None
+        writers = max(0, min(MAX_CONTENTION_CLIENTS, writers))
+        readers = max(0, min(MAX_CONTENTION_CLIENTS, readers))
+        self.writers_var.set(str(writers))
+        self.readers_var.set(str(readers))
+        return {"game": game, "writers": writers, "readers": readers, "burst_sec": burst_sec,
+                "read_interval_sec": read_sec, "duration_sec": duration}
+
+    def _read_soak(self) -> dict | None:
+        try:
+            tabs = int(self.tabs_var.get())
+            page_minutes = float(self.page_minutes_var.get().replace(",", "."))
+        except ValueError:
+            messagebox.showwarning("Ongeldig getal", "Tabbladen en minuten per spel moeten getallen zijn.")
+            return None
+        if tabs <= 0 or page_minutes < 0:
+            messagebox.showwarning("Ongeldig getal", "Minstens één tabblad; minuten per spel 0 (nooit) of meer.")
+            return None
+        duration = self._read_duration()
+        if duration is None:
+            return None
+        tabs = min(MAX_TABS, tabs)
+        self.tabs_var.set(str(tabs))
+        return {"tabs": tabs, "page_minutes": page_minutes, "duration_sec": duration,
+                "admin_password": self.admin_password_var.get().strip()}
+
+    def _read_duration(self) -> int | None:
+        try:
+            duration = int(self.duration_var.get())
+        except ValueError:
+            messagebox.showwarning("Ongeldig getal", "Duur moet een getal zijn.")
+            return None
+        duration = max(1, min(MAX_DURATION, duration))
+        self.duration_var.set(str(duration))
+        return duration
+
+    def _read_profile(self) -> ArrivalProfile | None:
+        try:
+            rate = float(self.rate_var.get().replace(",", "."))
+            peak_rate = float(self.peak_rate_var.get().replace(",", "."))
+        except ValueError:
+            messagebox.showwarning("Ongeldig getal", "Ritme en piek moeten getallen zijn.")
+            return None
+        duration = self._read_duration()
+        if duration is None:
+            return None
+        return ArrivalProfile(self.profile_var.get(), rate, peak_rate, duration)
+
+    def _read_slo(self) -> SLO | None:
+        try:
+            p95_ms = float(self.slo_p95_var.get().replace(",", "."))
+            error_pct = float(self.slo_errors_var.get().replace(",", "."))
+        except ValueError:
+            messagebox.showwarning("Ongeldig getal", "SLO: p95 en foutpercentage moeten getallen zijn.")
+            return None
+        if p95_ms <= 0 or error_pct <= 0:
+            messagebox.showwarning("Ongeldige SLO", "p95 en foutpercentage moeten groter dan 0 zijn.")
+            return None
+        return SLO(p95_ms, error_pct)
+
+    def _refresh_live(self):
+        """Eén keer per seconde: cijfers uit de incrementele RunMetrics van de lopende test."""
+        if self.metrics is None:
+            return
+        snap = self.metrics.live_snapshot()
+        elapsed = time.perf_counter() - self._live_start
+        self.live_var.set(
+            f"{elapsed:6.0f} s  |  {snap['rps']:7.1f} req/s  |  {snap['eps']:5.1f} fouten/s  |  "
+            f"{snap['in_flight']} bezig  |  {snap['requests_total']} requests totaal"
+        )
+        for key, e in snap["endpoints"].items():
+            values = (f"{e['rps']:.1f}", f"{e['p95']:.0f}")
+            if self.live_tree.exists(key):
+                self.live_tree.item(key, values=values)
+            else:
+                self.live_tree.insert("", tk.END, iid=key, text=key, values=values)
+        self._live_job = self.root.after(LIVE_INTERVAL_MS, self._refresh_live)
+
+    def _stop_live(self):
+        if self._live_job is not None:
+            self.root.after_cancel(self._live_job)
+            self._live_job = None
+        self.metrics = None
+
+    def _on_engine_changed(self):
+        """Pas het maximum van de spinbox aan: asyncio kan veel meer gebruikers aan dan threads."""
+        if self.model_var.get() == MODEL_MULTIPLAYER:
+            return
+        self.concurrent_spin.configure(to=max_concurrent_for(self.engine_var.get()))
+
     def _log(self, msg: str):
         self.log_text.configure(state=tk.NORMAL)
         self.log_text.insert(tk.END, msg + "\n")
@@ -278,9 +592,14 @@ class LoadTestApp:
         if not url:
             messagebox.showwarning("URL leeg", "Vul een server-URL in (bijv. https://regenboog.jbouquet.be)")
             return
+        engine = self.engine_var.get()
+        if engine not in ENGINES:
+            engine = DEFAULT_ENGINE
+        model = self.model_var.get()
         try:
             concurrent = int(self.concurrent_var.get())
-            concurrent = max(MIN_CONCURRENT, min(MAX_CONCURRENT, concurrent))
+            limit = MAX_CONCURRENT_ASYNC if model == MODEL_MULTIPLAYER else max_concurrent_for(engine)
+            concurrent = max(MIN_CONCURRENT, min(limit, concurrent))
         except ValueError:
             messagebox.showwarning("Ongeldig getal", "Gelijktijdige gebruikers moet een getal zijn.")
             return
@@ -290,31 +609,240 @@ class LoadTestApp:
         except ValueError:
             timeout = DEFAULT_TIMEOUT
 
+        keep_alive = self.keep_alive_var.get()
+        assets = self.assets_var.get()
+        pi_monitor = self.pi_monitor_var.get()
+        scenario = None
+        profile = None
+        duration = None
+        lobby = self.lobby_var.get()
+        slo = None
+        replay = None
+        contention = None
+        soak = None
+        if self.capacity_var.get() and model in (MODEL_CLOSED, MODEL_OPEN):
+            slo = self._read_slo()
+            if slo is None:
+                return
+        if model == MODEL_OPEN:
+            profile = self._read_profile()
+            if profile is None:
+                return
+        elif model == MODEL_MULTIPLAYER:
+            duration = self._read_duration()
+            if duration is None:
+                return
+        elif model == MODEL_REPLAY:
+            replay = self._read_replay()
+            if replay is None:
+                return
+        elif model == MODEL_CONTENTION:
+            contention = self._read_contention()
+            if contention is None:
+                return
+        elif model == MODEL_SOAK:
+            soak = self._read_soak()
+            if soak is None:
+                return
+        if model in (MODEL_CLOSED, MODEL_OPEN):
+            try:
+                scenario = load_scenario(self.scenario_var.get() or DEFAULT_SCENARIO)
+            except ScenarioError as e:
+                messagebox.showwarning("Ongeldig scenario", str(e))
+                return
+        agents = None
+        if self.agents_var.get().strip():
+            if model not in (MODEL_CLOSED, MODEL_OPEN) or slo:
+                messagebox.showwarning("Load-agents", "Load-agents werken met het gesloten of open model, "
+                                                      "niet met capaciteit zoeken of de andere modellen.")
+                return
+            try:
+                agents = parse_agents(self.agents_var.get())
+            except AgentError as e:
+                messagebox.showwarning("Load-agents", str(e))
+                return
+
         self.concurrent_var.set(str(concurrent))
         self.timeout_var.set(str(timeout))
+        # Zelfde sleutels als het rapport van load_test_cli.py, voor de geschiedenis
+        settings = {"url": url, "scenario": profile.kind if profile else model, "engine": engine, "timeout": timeout,
+                    "keep_alive": keep_alive, "assets": assets}
+        if scenario:
+            settings["scenario_file"] = scenario.name
+        if slo:
+            settings.update({"slo_p95": slo.p95_ms, "slo_errors": slo.error_pct})
+        if profile:
+            settings.update({"rate": profile.rate, "peak_rate": profile.peak_rate, "duration": profile.duration_sec})
+        elif duration:
+            settings.update({"users": concurrent, "duration": duration, "lobby": lobby})
+        elif replay:
+            settings.update({"replay_log": replay[0], "replay_speed": replay[1]})
+        elif contention:
+            settings.update({"game": contention["game"], "writers": contention["writers"],
+                             "readers": contention["readers"], "burst_interval": contention["burst_sec"],
+                             "read_interval": contention["read_interval_sec"], "duration": contention["duration_sec"]})
+        elif soak:
+            settings.update({"tabs": soak["tabs"], "page_minutes": soak["page_minutes"],
+                             "duration": soak["duration_sec"], "admin_probes": bool(soak["admin_password"])})
+        else:
+            settings["users"] = concurrent
+        if agents:
+            settings["agents"] = [f"{host}:{port}" for host, port in agents]
+        self._run_settings = settings
         self.cancel_flag.clear()
         self.start_btn.configure(state=tk.DISABLED)
         self.stop_btn.configure(state=tk.NORMAL)
         self.status_var.set("Test wordt uitgevoerd...")
         self._clear_log()
         self._log(f"Load test – URL: {url}")
-        self._log(f"Gelijktijdige gebruikers: {concurrent}  |  Timeout: {timeout} s")
-        self._log("Simulatie: realistisch bezoek (homepage → spel → tracking → leaderboard → score opslaan).")
+        if agents:
+            self._log(f"Load-agents: {', '.join(settings['agents'])} (samen starten, elk met asyncio)")
+        if slo and profile:
+            self._log(f"Capaciteit zoeken (open model): {profile.rate:g} → max. {profile.peak_rate:g} spelers/sec, "
+                      f"proeven van {profile.duration_sec:g} s  |  SLO: {slo.describe()}  |  Engine: {engine}")
+        elif slo:
+            self._log(f"Capaciteit zoeken (gesloten model): vanaf {concurrent} tot max. {max_concurrent_for(engine)} "
+                      f"gebruikers  |  SLO: {slo.describe()}  |  Engine: {engine}")
+        elif profile:
+            self._log(f"Open model: {profile.describe()}  |  Timeout: {timeout} s  |  Engine: {engine}")
+        elif duration:
+            self._log(f"Multiplayer: {concurrent} spelers ({max(1, concurrent // 2)} paren)  |  "
+                      f"Duur: {duration} s  |  Timeout: {timeout} s")
+        elif replay:
+            self._log(f"Replay: {replay[0]}  |  Snelheid: {replay[1]:g}×  |  Timeout: {timeout} s  |  Engine: asyncio")
+        elif contention:
+            self._log(f"Schrijfdruk op spel {contention['game']}: {contention['writers']} schrijvers elke "
+                      f"{contention['burst_sec']:g} s  |  {contention['readers']} lezers elke "
+                      f"{contention['read_interval_sec']:g} s  |  Duur: {contention['duration_sec']} s  |  Engine: asyncio")
+        elif soak:
+            self._log(f"Hartslag: {soak['tabs']} tabbladen  |  Duur: {soak['duration_sec']} s  |  "
+                      f"Timeout: {timeout} s  |  Engine: asyncio")
+        else:
+            self._log(f"Gelijktijdige gebruikers: {concurrent}  |  Timeout: {timeout} s  |  Engine: {engine}")
+        if duration:
+            self._log("Simulatie: paren spelers via Socket.IO (verbinden → setName → uitnodigen → zetten en chat → verbreken).")
+        elif replay:
+            self._log("Simulatie: requests uit de log op hun oorspronkelijke tijdstip (POST-bodies nagemaakt).")
+        elif contention:
+            self._log("Simulatie: een klas slaat tegelijk scores op terwijl anderen het leaderboard verversen "
+                      "(scores blijven in het leaderboard van dit spel staan).")
+        elif soak:
+            self._log("Simulatie: tabbladen openen gespreid, sturen heartbeats elke 30 s en wisselen van spel "
+                      + (f"na ~{soak['page_minutes']:g} min." if soak["page_minutes"] else "niet."))
+            if not soak["admin_password"]:
+                self._log("Geen admin-wachtwoord: getActiveVisitors en het aantal visits-rijen worden niet gemeten.")
+        else:
+            self._log(f"Keep-alive: {'aan' if keep_alive else 'uit (nieuwe TCP/TLS-verbinding per request)'}")
+            self._log(f"Scenario: {scenario.describe()}")
+            if scenario.description:
+                self._log(f"  {scenario.description}")
+            if assets:
+                self._log("Browsermodus: sub-resources per pagina, daarna terug naar de homepage (revalidatie).")
         self._log("")
-        self._log("Bezig...")
+        self._log("Bezig... (live-cijfers hierboven)")
+
+        metrics = RunMetrics(per_second=pi_monitor)
+        self.metrics = metrics
+        self._live_start = time.perf_counter()
+        self.live_tree.delete(*self.live_tree.get_children())
+        self._live_job = self.root.after(LIVE_INTERVAL_MS, self._refresh_live)
+
+        def on_metrics(m: RunMetrics):
+            self.metrics = m
+
+        def on_trial(point: dict):
+            unit = "spelers/sec" if profile else "gebruikers"
+            self.root.after(0, lambda: self._log(trial_line(point, unit)))
 
         def run():
-            result = run_load_test(url, concurrent, timeout, self.cancel_flag)
+            if slo:
+                if profile:
+                    start, limit, trial_sec = profile.rate, max(profile.rate, profile.peak_rate), profile.duration_sec
+                else:
+                    start, limit, trial_sec = concurrent, max_concurrent_for(engine), 0
+                result = run_capacity_search(
+                    engine, url, MODEL_OPEN if profile else MODEL_CLOSED, start, limit, slo, timeout,
+                    self.cancel_flag, keep_alive, assets, scenario, trial_sec,
+                    on_trial=on_trial, on_metrics=on_metrics,
+                )
+                self.root.after(0, lambda: self._on_capacity_done(result))
+                return
+            monitor = None
+            pi_error = None
+            if pi_monitor:
+                self.root.after(0, lambda: self.status_var.set("Verbinden met de Pi (SSH)..."))
+                try:
+                    monitor = start_pi_monitor()
+                except PiMonitorError as e:
+                    pi_error = str(e)
+                self.root.after(0, lambda: self.status_var.set("Test wordt uitgevoerd..."))
+            start_epoch = time.time()
+            if agents:
+                try:
+                    result = run_distributed(
+                        agents, url, timeout, self.cancel_flag, keep_alive, metrics, concurrent, profile, assets, scenario
+                    )
+                except AgentError as e:
+                    msg = f"Load-agent niet bereikbaar: {e}"
+                    if monitor is not None:
+                        monitor.stop()
+                    self.root.after(0, lambda: self._on_run_error(msg))
+                    return
+            elif duration:
+                result = run_multiplayer(
+                    url, concurrent, duration, timeout, self.cancel_flag, metrics, game=lobby
+                )
+            elif replay:
+                try:
+                    result = run_replay(replay[0], url, replay[1], timeout, self.cancel_flag, keep_alive, metrics)
+                except OSError as e:
+                    msg = f"Access log niet leesbaar: {e}"
+                    if monitor is not None:
+                        monitor.stop()
+                    self.root.after(0, lambda: self._on_run_error(msg))
+                    return
+            elif contention:
+                result = run_contention(
+                    url, contention["game"], contention["writers"], contention["readers"], contention["burst_sec"],
+                    contention["read_interval_sec"], contention["duration_sec"], timeout, self.cancel_flag,
+                    keep_alive, metrics,
+                )
+            elif soak:
+                result = run_soak(
+                    url, soak["tabs"], soak["duration_sec"], soak["page_minutes"], soak["admin_password"], timeout,
+                    self.cancel_flag, keep_alive, metrics,
+                )
+            elif profile:
+                result = run_open_model(
+                    engine, url, profile, timeout, self.cancel_flag, keep_alive, metrics, assets, scenario
+                )
+            else:
+                result = run_with_engine(
+                    engine, url, concurrent, timeout, self.cancel_flag, keep_alive, metrics, assets, scenario
+                )
+            if monitor is not None:
+                attach_pi_results(result, monitor, metrics, start_epoch)
+            if pi_error:
+                result["pi_error"] = pi_error
             self.root.after(0, lambda: self._on_test_done(result))
 
         self.test_thread = threading.Thread(target=run, daemon=True)
         self.test_thread.start()
 
+    def _on_run_error(self, msg: str):
+        self._stop_live()
+        self.start_btn.configure(state=tk.NORMAL)
+        self.stop_btn.configure(state=tk.DISABLED)
+        self.status_var.set("Test mislukt.")
+        self._log(f"⚠ {msg}")
+
     def _on_stop(self):
         self.cancel_flag.set()
         self.status_var.set("Stoppen...")
 
     def _on_test_done(self, r: dict):
+        self._refresh_live()
+        self._stop_live()
         self.start_btn.configure(state=tk.NORMAL)
         self.stop_btn.configure(state=tk.DISABLED)
         self.status_var.set("Test klaar.")
@@ -326,7 +854,33 @@ class LoadTestApp:
 
         self._log("--- Resultaat ---")
         self._log(f"Server:            {r['base_url']}")
-        self._log(f"Gelijktijdig:      {r['concurrent']}")
+        self._log(f"Engine:            {r['engine']}")
+        if r.get("processes"):
+            self._log(f"Werkprocessen:     {r['processes']}")
+        for err in r.get("process_errors", []):
+            self._log(f"⚠ {err}")
+        if r.get("agents"):
+            for line in agent_summary_lines(r):
+                self._log(line)
+        if r["model"] == MODEL_OPEN:
+            self._log(f"Profiel:           {r['profile_text']}")
+            self._log(f"Spelers gestart:   {r['concurrent']}")
+            self._log(f"Aankomstritme:     doel {r['target_rate']}/s  |  behaald {r['achieved_rate']}/s")
+            self._log(f"Max. tegelijk bezig: {r['peak_in_flight']}")
+        elif r["model"] == MODEL_MULTIPLAYER:
+            for line in multiplayer_summary_lines(r):
+                self._log(line)
+        elif r["model"] == MODEL_REPLAY:
+            for line in replay_summary_lines(r):
+                self._log(line)
+        elif r["model"] == MODEL_CONTENTION:
+            for line in contention_summary_lines(r):
+                self._log(line)
+        elif r["model"] == MODEL_SOAK:
+            for line in soak_summary_lines(r):
+                self._log(line)
+        else:
+            self._log(f"Gelijktijdig:      {r['concurrent']}")
         self._log(f"Geslaagd:          {r['success_count']}")
         self._log(f"Gefaald:           {r['fail_count']}")
         self._log(f"Totale tijd:       {r['total_ms'] / 1000:.1f} s")
@@ -334,6 +888,11 @@ class LoadTestApp:
             self._log(f"Response (gem):   {r['avg_ms']} ms")
             self._log(f"Response (mediaan): {r['p50']} ms")
             self._log(f"Response (p95):   {r['p95']} ms")
+        self._log(f"Keep-alive:        {'aan' if r['keep_alive'] else 'uit'}")
+        self._log(f"Verbindingen:      {r['connections_opened']} geopend (gem. connect+TLS {r['avg_connect_ms']} ms)")
+        if r["model"] != MODEL_MULTIPLAYER:
+            for line in transfer_summary_lines(r):
+                self._log(line)
         if r["fail_count"] > 0:
             for o in r["outcomes"]:
                 res = o.get("results", [])
@@ -344,17 +903,303 @@ class LoadTestApp:
                     err = bad.get("error") or bad.get("status_code")
                     self._log(f"Voorbeeld fout:   {err} bij {bad.get('path', '?')}")
                     break
+        self._log_endpoints(r["endpoints"])
+        lines = omission_lines(r)
+        if lines:
+            self._log("")
+            for line in lines:
+                self._log(line)
+        if r["model"] == MODEL_OPEN:
+            self._log_arrival_timeline(r["arrival_timeline"])
+        if r["model"] == MODEL_MULTIPLAYER:
+            self._log("")
+            for line in games_timeline_lines(r["games_timeline"]):
+                self._log(line)
+        if r["model"] == MODEL_CONTENTION:
+            self._log("")
+            for line in burst_timeline_lines(r["burst_timeline"]):
+                self._log(line)
+        if r["model"] == MODEL_SOAK:
+            self._log("")
+            for line in soak_timeline_lines(r["soak_timeline"]):
+                self._log(line)
+        if r.get("pi_error"):
+            self._log("")
+            self._log(f"⚠ Pi-monitoring niet gestart: {r['pi_error']}")
+        if "pi" in r:
+            self._log("")
+            for line in pi_summary_lines(r["pi"]):
+                self._log(line)
+            self._log("")
+            for line in pi_timeline_lines(r["pi"]["timeline"]):
+                self._log(line)
         self._log("")
+        self._save_history(r)
+        if r["model"] != MODEL_CLOSED:
+            return
         if r["fail_count"] > 0 and r["fail_count"] < r["concurrent"]:
             self._log(f"Tip: Verlaag het aantal (bijv. {max(1, r['success_count'])}) voor stabiel gedrag.")
         if r["success_count"] == r["concurrent"]:
             self._log(f"Tip: Probeer een hoger getal (bijv. {r['concurrent'] + 10}) om het maximum te vinden.")
 
+    def _on_capacity_done(self, r: dict):
+        """Conclusie en curve loggen (de proeven staan er al boven) en de curve laten bewaren."""
+        self._refresh_live()
+        self._stop_live()
+        self.start_btn.configure(state=tk.NORMAL)
+        self.stop_btn.configure(state=tk.DISABLED)
+        self.status_var.set("Capaciteit zoeken klaar.")
+        self._log("")
+        self._log("--- Capaciteit ---")
+        for line in capacity_summary_lines(r):
+            self._log(line)
+        self._save_history(r)
+        if not r["curve"]:
+            return
+        path = filedialog.asksaveasfilename(
+            title="Curve belasting → latency opslaan",
+            initialfile=default_curve_name(r),
+            defaultextension=".csv",
+            filetypes=[("CSV", "*.csv"), ("JSON (volledig)", "*.json")],
+        )
+        if not path:
+            return
+        try:
+            write_curve(r, path)
+        except OSError as e:
+            messagebox.showerror("Opslaan mislukt", str(e))
+            return
+        self._log(f"Curve opgeslagen: {path}")
+
+    def _save_history(self, r: dict):
+        """Run in de geschiedenis zetten (als aangevinkt); een fout daar is geen reden om de run af te keuren."""
+        if not self.history_var.get() or self._run_settings is None:
+            return
+        try:
+            history = RunHistory()
+            try:
+                run_id = history.save(r, self._run_settings, self.label_var.get().strip())
+            finally:
+                history.close()
+        except (sqlite3.Error, OSError) as e:
+            self._log(f"⚠ Geschiedenis niet bijgewerkt: {e}")
+            return
+        self._log(f"Bewaard in de geschiedenis als run #{run_id} (knop Geschiedenis om te vergelijken).")
+
+    def _on_history(self):
+        try:
+            HistoryWindow(self.root, RunHistory(), self.url_var.get().strip())
+        except (sqlite3.Error, OSError) as e:
+            messagebox.showerror("Geschiedenis", f"Database niet te openen: {e}")
+
+    def _log_endpoints(self, endpoints: dict):
+        """Latency per endpoint (ms) uit de histogrammen, plus doorvoer in requests/sec."""
+        if not endpoints:
+            return
+        self._log("")
+        for line in endpoint_table_lines(endpoints):
+            self._log(line)
+
+    def _log_arrival_timeline(self, timeline: list):
+        """Doel versus behaald aankomstritme; lange runs samengevat in max. 20 rijen."""
+        if not timeline:
+            return
+        per_row = max(1, -(-len(timeline) // 20))
+        self._log("")
+        self._log("Tijd (s)     doel/s  behaald/s  bezig")
+        for i in range(0, len(timeline), per_row):
+            rows = timeline[i:i + per_row]
+            target = sum(x["target"] for x in rows) / len(rows)
+            achieved = sum(x["achieved"] for x in rows) / len(rows)
+            label = f"{rows[0]['t']}-{rows[-1]['t'] + 1}"
+            self._log(f"{label:<11} {target:>7.1f}  {achieved:>9.1f}  {rows[-1]['in_flight']:>5}")
+
     def run(self):
         self.root.mainloop()
 
 
+# Kleuren voor de grafieken in het geschiedenisvenster (run A / p95, run B / capaciteit)
+CHART_COLORS = ("#1f77b4", "#ff7f0e")
+CHART_MAX_LABELS = 12
+ALL = "(alle)"
+
+
+def _plot(canvas: tk.Canvas, box: tuple, x_labels: list[str], series: list[tuple], unit: str):
+    """
+    Lijngrafiek in box (x0, y0, x1, y1) op canvas; series = [(naam, kleur, waarden)], None = geen punt.
+    De y-as begint bij 0, zodat een verschil tussen twee runs niet groter lijkt dan het is.
+    """
+    x0, y0, x1, y1 = box
+    top = max((v for _, _, values in series for v in values if v is not None), default=0) * 1.1 or 1.0
+    font = ("TkDefaultFont", 8)
+    canvas.create_text(x0, y0 - 12, text=unit, anchor=tk.W, font=font)
+    for i in range(5):
+        y = y1 - (y1 - y0) * i / 4
+        canvas.create_line(x0, y, x1, y, fill="#e0e0e0")
+        canvas.create_text(x0 - 4, y, text=f"{top * i / 4:.0f}", anchor=tk.E, font=font)
+    canvas.create_line(x0, y0, x0, y1)
+    canvas.create_line(x0, y1, x1, y1)
+    n = len(x_labels)
+    xs = [x0 + (x1 - x0) * (i + 0.5) / n for i in range(n)]
+    every = max(1, -(-n // CHART_MAX_LABELS))
+    for i in range(0, n, every):
+        canvas.create_text(xs[i], y1 + 10, text=x_labels[i], font=font)
+    legend_x = x1
+    for name, color, values in reversed(series):
+        points = [(xs[i], y1 - (y1 - y0) * v / top) for i, v in enumerate(values) if v is not None]
+        if len(points) > 1:
+            canvas.create_line(*[c for p in points for c in p], fill=color, width=2)
+        for x, y in points:
+            canvas.create_oval(x - 3, y - 3, x + 3, y + 3, fill=color, outline=color)
+        item = canvas.create_text(legend_x, y0 - 12, text=name, fill=color, anchor=tk.E, font=font)
+        legend_x = canvas.bbox(item)[0] - 12
+
+
+class HistoryWindow:
+    """Geschiedenis van runs: lijst per server/model, twee runs naast elkaar of p95 en capaciteit als trend."""
+
+    COLUMNS = ("datum", "commit", "model", "scenario", "p95", "fout", "capaciteit", "label")
+
+    def __init__(self, parent: tk.Tk, history: RunHistory, target: str = ""):
+        self.history = history
+        self.runs = []
+        self.top = tk.Toplevel(parent)
+        self.top.title("Load test – geschiedenis")
+        self.top.geometry("860x820")
+        self.top.protocol("WM_DELETE_WINDOW", self._on_close)
+        frame = ttk.Frame(self.top, padding=8)
+        frame.pack(fill=tk.BOTH, expand=True)
+
+        filters = ttk.Frame(frame)
+        filters.pack(fill=tk.X, pady=(0, 6))
+        targets = history.targets()
+        ttk.Label(filters, text="Server:").pack(side=tk.LEFT, padx=(0, 4))
+        self.target_var = tk.StringVar(value=target if target in targets else ALL)
+        ttk.Combobox(filters, values=(ALL, *targets), textvariable=self.target_var, state="readonly",
+                     width=36).pack(side=tk.LEFT, padx=(0, 12))
+        ttk.Label(filters, text="Model:").pack(side=tk.LEFT, padx=(0, 4))
+        self.model_var = tk.StringVar(value=ALL)
+        ttk.Combobox(filters, values=(ALL, *MODELS), textvariable=self.model_var, state="readonly",
+                     width=12).pack(side=tk.LEFT, padx=(0, 12))
+        ttk.Label(filters, text="Laatste:").pack(side=tk.LEFT, padx=(0, 4))
+        self.limit_var = tk.StringVar(value=str(DEFAULT_HISTORY_LIMIT))
+        ttk.Spinbox(filters, from_=2, to=500, textvariable=self.limit_var, width=5).pack(side=tk.LEFT, padx=(0, 12))
+        ttk.Button(filters, text="Vernieuwen", command=self._refresh).pack(side=tk.LEFT)
+
+        self.tree = ttk.Treeview(frame, columns=self.COLUMNS, height=10)
+        self.tree.heading("#0", text="Run")
+        self.tree.column("#0", width=50)
+        widths = {"datum": 120, "commit": 100, "model": 90, "scenario": 100, "p95": 60, "fout": 55,
+                  "capaciteit": 75, "label": 160}
+        for col in self.COLUMNS:
+            self.tree.heading(col, text="fout%" if col == "fout" else col)
+            self.tree.column(col, width=widths[col], anchor=tk.E if col in ("p95", "fout", "capaciteit") else tk.W)
+        self.tree.pack(fill=tk.X)
+
+        buttons = ttk.Frame(frame)
+        buttons.pack(fill=tk.X, pady=6)
+        ttk.Button(buttons, text="Vergelijk (2 geselecteerd)", command=self._on_compare).pack(side=tk.LEFT)
+        ttk.Button(buttons, text="Trend p95 / capaciteit", command=self._on_trend).pack(side=tk.LEFT, padx=8)
+        ttk.Button(buttons, text="Verwijderen", command=self._on_delete).pack(side=tk.LEFT)
+
+        self.canvas = tk.Canvas(frame, height=300, background="white", highlightthickness=0)
+        self.canvas.pack(fill=tk.X, pady=(0, 6))
+        self.text = scrolledtext.ScrolledText(frame, height=12, wrap=tk.NONE, state=tk.DISABLED, font=("Consolas", 9))
+        self.text.pack(fill=tk.BOTH, expand=True)
+        self._refresh()
+
+    def _on_close(self):
+        self.history.close()
+        self.top.destroy()
+
+    def _refresh(self):
+        try:
+            limit = max(2, int(self.limit_var.get()))
+        except ValueError:
+            limit = DEFAULT_HISTORY_LIMIT
+        target, model = self.target_var.get(), self.model_var.get()
+        self.runs = self.history.runs(limit, None if target == ALL else target, None if model == ALL else model)
+        self.tree.delete(*self.tree.get_children())
+        for run in self.runs:
+            self.tree.insert("", tk.END, iid=str(run["id"]), text=f"#{run['id']}", values=(
+                run["created_at"][:16].replace("T", " "),
+                run["git_commit"] or "?",
+                run["model"],
+                run["scenario"] or "",
+                "–" if run["p95"] is None else f"{run['p95']:.0f}",
+                "–" if run["error_rate"] is None else f"{run['error_rate']:.2f}",
+                "–" if run["capacity"] is None else f"{run['capacity']:g}",
+                run["label"] or "",
+            ))
+
+    def _show(self, lines: list[str]):
+        self.text.configure(state=tk.NORMAL)
+        self.text.delete(1.0, tk.END)
+        self.text.insert(tk.END, "\n".join(lines))
+        self.text.configure(state=tk.DISABLED)
+
+    def _on_compare(self):
+        ids = sorted(int(iid) for iid in self.tree.selection())
+        if len(ids) != 2:
+            messagebox.showinfo("Vergelijken", "Selecteer precies twee runs (Ctrl+klik).", parent=self.top)
+            return
+        a, b = (self.history.run(run_id) for run_id in ids)
+        points = overlay(a, b)
+        self.canvas.delete("all")
+        self.canvas.update_idletasks()
+        width = self.canvas.winfo_width()
+        _plot(self.canvas, (50, 30, width - 20, 270), [f"p{100 * p['q']:g}" for p in points], [
+            (f"A: {run_label(a)}", CHART_COLORS[0], [p["a"] for p in points]),
+            (f"B: {run_label(b)}", CHART_COLORS[1], [p["b"] for p in points]),
+        ], "latency (ms) per percentiel, alle requests")
+        self._show(compare_lines(a, b))
+
+    def _on_trend(self):
+        if not self.runs:
+            return
+        runs = list(reversed(self.runs))
+        labels = [f"#{run['id']}" for run in runs]
+        capacities = [run["capacity"] for run in runs]
+        self.canvas.delete("all")
+        self.canvas.update_idletasks()
+        width = self.canvas.winfo_width()
+        if any(c is not None for c in capacities):
+            _plot(self.canvas, (50, 25, width - 20, 125), labels,
+                  [("p95", CHART_COLORS[0], [run["p95"] for run in runs])], "p95 (ms)")
+            _plot(self.canvas, (50, 165, width - 20, 270), labels,
+                  [("capaciteit", CHART_COLORS[1], capacities)], "capaciteit (gebruikers of spelers/sec)")
+        else:
+            _plot(self.canvas, (50, 30, width - 20, 270), labels,
+                  [("p95", CHART_COLORS[0], [run["p95"] for run in runs])], "p95 (ms) per run, oud → nieuw")
+        self._show(trend_lines(self.runs))
+
+    def _on_delete(self):
+        ids = [int(iid) for iid in self.tree.selection()]
+        if not ids:
+            return
+        if not messagebox.askyesno("Verwijderen", f"{len(ids)} run(s) uit de geschiedenis verwijderen?",
+                                   parent=self.top):
+            return
+        for run_id in ids:
+            self.history.delete(run_id)
+        self._refresh()
+
+
 def main():
+    parser = argparse.ArgumentParser(description="Load test Regenboog (GUI), of load-agent voor een verdeelde test")
+    parser.add_argument("--agent", action="store_true",
+                        help="Zonder GUI: wachten op runs van een coördinator (zonder Tkinter: load_test_agents.py)")
+    parser.add_argument("--port", type=int, default=DEFAULT_AGENT_PORT, help=f"Poort voor --agent ({DEFAULT_AGENT_PORT})")
+    parser.add_argument("--bind", default=DEFAULT_AGENT_BIND,
+                        help=f"Adres voor --agent (standaard {DEFAULT_AGENT_BIND}, alleen deze pc; 0.0.0.0 = bereikbaar "
+                        "vanaf het netwerk, zonder authenticatie: alleen op een vertrouwd netwerk)")
+    args = parser.parse_args()
+    if args.agent:
+        try:
+            run_agent(args.bind, args.port)
+        except KeyboardInterrupt:
+            pass
+        return
     app = LoadTestApp()
     app.run()
 
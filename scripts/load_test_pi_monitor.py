@@ -0,0 +1,369 @@
+"""
+Pi-metingen tijdens een load test: via één SSH-sessie (instellingen uit deploy/setup_config.json)
+draait op de Pi een kleine shell-lus die elke seconde /proc/stat, /proc/loadavg, het RSS van het
+node-proces van pm2, temperatuur en throttle-vlaggen (vcgencmd) en /proc/diskstats uitprint.
+De deltas (CPU %, I/O) worden lokaal berekend; elke meting krijgt de lokale epoch-seconde zodat ze
+naast de latency-tijdlijn van RunMetrics komt te staan. pm2-herstarts: via een nieuw pid en via
+`pm2 jlist` voor en na de run.
+"""
+
+import json
+import math
+import os
+import shlex
+import threading
+import time
+
+try:
+    import paramiko
+except ImportError:  # alleen nodig voor Pi-monitoring
+    paramiko = None
+
+from load_test_core import RunMetrics
+
+SSH_CONFIG_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "deploy", "setup_config.json")
+PM2_APP_NAME = "regenboog"
+SAMPLE_INTERVAL_SEC = 1
+CONNECT_TIMEOUT_SEC = 10
+DISK_DEVICES = ("mmcblk0", "sda", "nvme0n1")
+
+# vcgencmd get_throttled: bits 0–3 = nu, bits 16–19 = sinds boot
+THROTTLE_FLAGS = (
+    (0, "onderspanning"),
+    (1, "frequentie begrensd"),
+    (2, "throttled"),
+    (3, "zachte temperatuurgrens"),
+)
+
+# Eén sample per SAMPLE_INTERVAL_SEC; "." sluit een sample af. pid uit het pid-bestand van pm2
+# (geen `pm2`-aanroep per seconde: die start telkens node en kost op een Pi zelf veel CPU)
+_REMOTE_LOOP = f"""
+while :; do
+  pid=$(cat "$HOME"/.pm2/pids/{PM2_APP_NAME}-*.pid 2>/dev/null | head -n1)
+  head -n1 /proc/stat
+  echo "L $(cut -d' ' -f1-3 /proc/loadavg)"
+  echo "P ${{pid:-0}} $(awk '/^VmRSS/ {{print $2}}' /proc/${{pid:-0}}/status 2>/dev/null)"
+  echo "C $(cat /sys/class/thermal/thermal_zone0/temp 2>/dev/null)"
+  echo "T $(vcgencmd get_throttled 2>/dev/null | cut -d= -f2)"
+  awk '$3 ~ /^({"|".join(DISK_DEVICES)})$/ {{print "D", $3, $6, $10, $13; exit}}' /proc/diskstats
+  echo .
+  sleep {SAMPLE_INTERVAL_SEC}
+done
+"""
+
+
+class PiMonitorError(RuntimeError):
+    """Pi-monitoring kan niet starten (paramiko ontbreekt, geen config, SSH mislukt)."""
+
+
+def load_ssh_settings(path: str = SSH_CONFIG_FILE) -> dict:
+    """SSH-instellingen zoals setup_regenboog_pi.py ze opslaat (host, ssh_port, username, password, key_path)."""
+    try:
+        with open(path, "r", encoding="utf-8") as fp:
+            cfg = json.load(fp)
+    except (OSError, json.JSONDecodeError) as e:
+        raise PiMonitorError(f"Kan {path} niet lezen ({e}); sla eerst instellingen op in setup_regenboog_pi.py") from None
+    try:
+        port = int(cfg.get("ssh_port") or 22)
+    except ValueError:
+        port = 22
+    return {
+        "host": cfg.get("host") or "raspberrypi.local",
+        "port": port,
+        "username": cfg.get("username") or "pi",
+        "password": cfg.get("password") or None,
+        "key_filename": cfg.get("key_path") or None,
+    }
+
+
+def decode_throttled(value: int) -> list[str]:
+    """Tekst voor de gezette bits van get_throttled ("nu" en "sinds boot")."""
+    out = []
+    for bit, name in THROTTLE_FLAGS:
+        if value & (1 << bit):
+            out.append(f"{name} (nu)")
+        elif value & (1 << (bit + 16)):
+            out.append(f"{name} (eerder)")
+    return out
+
+
+class PiMonitor:
+    """Achtergrondthread die de Pi elke seconde bemeet; start() verbindt, stop() geeft de samples terug."""
+
+    def __init__(self, settings: dict, app_name: str = PM2_APP_NAME):
+        self.settings = settings
+        self.app_name = app_name
+        self.samples: list[dict] = []
+        self.error: str | None = None
+        self.restarts_before: int | None = None
+        self.restarts_after: int | None = None
+        self.pm2_error: str | None = None  # waarom restart_time onbekend bleef
+        self._client = None
+        self._channel = None
+        self._thread = None
+        self._prev: dict = {}
+        self._pid = None
+        self._pid_changes = 0
+
+    def start(self) -> None:
+        if paramiko is None:
+            raise PiMonitorError("paramiko niet gevonden; installeer met: pip install paramiko")
+        s = self.settings
+        kws = {"hostname": s["host"], "port": s["port"], "username": s["username"], "timeout": CONNECT_TIMEOUT_SEC}
+        if s.get("key_filename") and os.path.isfile(s["key_filename"]):
+            kws["key_filename"] = s["key_filename"]
+        if s.get("password"):
+            kws["password"] = s["password"]
+        client = paramiko.SSHClient()
+        client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+        try:
+            client.connect(**kws)
+        except paramiko.AuthenticationException:
+            client.close()
+            raise PiMonitorError(f"Authenticatie mislukt voor {s['username']}@{s['host']}") from None
+        except (paramiko.SSHException, OSError) as e:
+            client.close()
+            raise PiMonitorError(f"SSH naar {s['host']}:{s['port']} mislukt: {e}") from None
+        self._client = client
+        self.restarts_before = self._pm2_restarts()
+        self._channel = client.get_transport().open_session()
+        self._channel.exec_command("sh -c " + shlex.quote(_REMOTE_LOOP))
+        self._thread = threading.Thread(target=self._read_loop, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> list[dict]:
+        if self._channel is not None:
+            self._channel.close()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        if self._client is not None:
+            self.restarts_after = self._pm2_restarts()
+            self._client.close()
+            self._client = None
+        return self.samples
+
+    def _pm2_restarts(self) -> int | None:
+        """restart_time van de pm2-app, of None (reden in pm2_error) als pm2 niet bruikbaar antwoordt."""
+        try:
+            _, stdout, _ = self._client.exec_command("pm2 jlist 2>/dev/null", timeout=30)
+            out = stdout.read().decode("utf-8", errors="replace")
+        except Exception as e:
+            self.pm2_error = f"pm2 jlist mislukt: {str(e) or type(e).__name__}"
+            return None
+        # pm2 kan eerst meldingen over de daemon printen: de JSON-array staat op de laatste regel met "["
+        for line in reversed(out.splitlines()):
+            if line.startswith("["):
+                try:
+                    apps = json.loads(line)
+                except ValueError:
+                    break
+                for app in apps:
+                    if app.get("name") == self.app_name:
+                        return app.get("pm2_env", {}).get("restart_time")
+                self.pm2_error = f"app '{self.app_name}' niet in pm2 jlist"
+                return None
+        self.pm2_error = "geen leesbare JSON in de uitvoer van pm2 jlist"
+        return None
+
+    def _read_loop(self) -> None:
+        raw = {}
+        try:
+            for line in self._channel.makefile("r"):
+                line = line.strip()
+                if line == ".":
+                    self._add_sample(raw, time.time())
+                    raw = {}
+                elif line:
+                    kind, _, rest = line.partition(" ")
+                    raw[kind] = rest.split()
+        except Exception as e:  # verbinding weg: run gaat door zonder Pi-metingen
+            self.error = str(e) or type(e).__name__
+        status = self._channel.exit_status_ready() and self._channel.recv_exit_status()
+        if status and not self.samples:
+            self.error = self.error or f"meetlus op de Pi stopte met exitcode {status}"
+
+    def _add_sample(self, raw: dict, epoch: float) -> None:
+        prev = self._prev
+        sample = {"epoch": int(epoch)}
+        dt = epoch - prev["epoch"] if "epoch" in prev else 0.0
+
+        cpu = [int(x) for x in raw.get("cpu", [])[:8]]
+        if len(cpu) >= 5:
+            total, idle, iowait = sum(cpu), cpu[3] + cpu[4], cpu[4]
+            if "cpu" in prev and total > prev["cpu"][0]:
+                d_total = total - prev["cpu"][0]
+                sample["cpu"] = round(100 * (1 - (idle - prev["cpu"][1]) / d_total), 1)
+                sample["iowait"] = round(100 * (iowait - prev["cpu"][2]) / d_total, 1)
+            prev["cpu"] = (total, idle, iowait)
+        if raw.get("L"):
+            sample["load1"] = float(raw["L"][0])
+        if raw.get("P"):
+            pid = raw["P"][0]
+            if pid != "0":
+                if self._pid is not None and pid != self._pid:
+                    self._pid_changes += 1
+                self._pid = pid
+            if len(raw["P"]) > 1:
+                sample["rss_mb"] = round(int(raw["P"][1]) / 1024, 1)
+        sample["pid_changes"] = self._pid_changes
+        if raw.get("C"):
+            sample["temp_c"] = round(int(raw["C"][0]) / 1000, 1)
+        if raw.get("T"):
+            try:
+                sample["throttled"] = int(raw["T"][0], 16)
+            except ValueError:
+                pass
+        if raw.get("D") and len(raw["D"]) >= 4:
+            sectors_read, sectors_written, io_ms = (int(x) for x in raw["D"][1:4])
+            if "disk" in prev and dt > 0:
+                p_read, p_written, p_io = prev["disk"]
+                sample["read_kbs"] = round((sectors_read - p_read) / 2 / dt, 1)
+                sample["write_kbs"] = round((sectors_written - p_written) / 2 / dt, 1)
+                sample["io_util"] = round(min(100.0, (io_ms - p_io) / (dt * 10)), 1)
+            prev["disk"] = (sectors_read, sectors_written, io_ms)
+        prev["epoch"] = epoch
+        self.samples.append(sample)
+
+
+PI_FIELDS = ("cpu", "iowait", "load1", "rss_mb", "temp_c", "read_kbs", "write_kbs", "io_util")
+
+
+def correlate(samples: list[dict], metrics: RunMetrics, start_epoch: float) -> list[dict]:
+    """
+    Latency en Pi-metingen per seconde naast elkaar: t (s sinds start), requests, fouten, p95
+    en de Pi-velden van dezelfde seconde (ontbreken als er die seconde geen meting was).
+    """
+    by_second = {s["epoch"]: s for s in samples}
+    latency = {row["epoch"]: row for row in metrics.latency_timeline()}
+    seconds = sorted(set(by_second) | set(latency))
+    start = int(start_epoch)
+    rows = []
+    for second in seconds:
+        if second < start:
+            continue
+        row = {"t": second - start, "requests": 0, "errors": 0, "p95": 0}
+        lat = latency.get(second)
+        if lat:
+            row.update(requests=lat["requests"], errors=lat["errors"], p95=lat["p95"])
+        pi = by_second.get(second)
+        if pi:
+            row.update({k: pi[k] for k in (*PI_FIELDS, "throttled", "pid_changes") if k in pi})
+        rows.append(row)
+    return rows
+
+
+def _pearson(xs: list[float], ys: list[float]) -> float | None:
+    n = len(xs)
+    if n < 5:
+        return None
+    mx, my = sum(xs) / n, sum(ys) / n
+    sxy = sum((x - mx) * (y - my) for x, y in zip(xs, ys))
+    sxx = sum((x - mx) ** 2 for x in xs)
+    syy = sum((y - my) ** 2 for y in ys)
+    if sxx == 0 or syy == 0:
+        return None
+    return sxy / math.sqrt(sxx * syy)
+
+
+def pi_summary(monitor: PiMonitor, rows: list[dict]) -> dict:
+    """Samenvatting voor het result dict (r["pi"]): pieken, throttling, herstarts en correlatie met p95."""
+    samples = monitor.samples
+
+    def peak(field: str):
+        values = [s[field] for s in samples if field in s]
+        return max(values) if values else None
+
+    throttled = 0
+    for s in samples:
+        throttled |= s.get("throttled", 0)
+    restarts = None
+    if monitor.restarts_before is not None and monitor.restarts_after is not None:
+        restarts = monitor.restarts_after - monitor.restarts_before
+    busy = [r for r in rows if r["requests"] > 0]
+    correlation = {}
+    for field in ("cpu", "iowait", "io_util", "temp_c", "rss_mb"):
+        pairs = [(r[field], r["p95"]) for r in busy if field in r]
+        c = _pearson([a for a, _ in pairs], [b for _, b in pairs])
+        if c is not None:
+            correlation[field] = round(c, 2)
+    return {
+        "host": monitor.settings["host"],
+        "samples": len(samples),
+        "error": monitor.error,
+        "peak": {f: peak(f) for f in PI_FIELDS},
+        "throttled": throttled,
+        "throttled_text": decode_throttled(throttled),
+        "pm2_restarts": restarts,
+        "pm2_error": monitor.pm2_error,
+        "pid_changes": samples[-1]["pid_changes"] if samples else 0,
+        "p95_correlation": correlation,
+        "timeline": rows,
+    }
+
+
+def _fmt(value, spec: str) -> str:
+    """Getal opmaken; ontbrekende meting als "–" met dezelfde uitlijning."""
+    if value is None:
+        return format("–", spec.split(".")[0])
+    return format(value, spec)
+
+
+def pi_summary_lines(pi: dict) -> list[str]:
+    peak = pi["peak"]
+    lines = [
+        f"Pi ({pi['host']}):        {pi['samples']} metingen"
+        + (f"  |  ⚠ {pi['error']}" if pi.get("error") else ""),
+        f"  CPU max:         {_fmt(peak['cpu'], '.0f')}%  (iowait max {_fmt(peak['iowait'], '.0f')}%)  |  "
+        f"load max {_fmt(peak['load1'], '.2f')}",
+        f"  node RSS max:    {_fmt(peak['rss_mb'], '.0f')} MB  |  temp max {_fmt(peak['temp_c'], '.1f')} °C",
+        f"  Schijf max:      lezen {_fmt(peak['read_kbs'], '.0f')} KB/s  |  schrijven {_fmt(peak['write_kbs'], '.0f')} KB/s"
+        f"  |  bezet {_fmt(peak['io_util'], '.0f')}%",
+        f"  Throttling:      {', '.join(pi['throttled_text']) or 'geen'}",
+    ]
+    restarts = pi["pm2_restarts"]
+    restarts_text = f"onbekend ({pi.get('pm2_error') or 'pm2 jlist'})" if restarts is None else str(restarts)
+    lines.append(f"  pm2-herstarts:   {restarts_text}  |  nieuw pid tijdens de run: {pi['pid_changes']}×")
+    if pi["p95_correlation"]:
+        parts = [f"{k} {v:+.2f}" for k, v in sorted(pi["p95_correlation"].items(), key=lambda kv: -abs(kv[1]))]
+        lines.append(f"  Correlatie p95:  {', '.join(parts)}  (per seconde, −1…+1)")
+    return lines
+
+
+def pi_timeline_lines(rows: list[dict]) -> list[str]:
+    """Latency en Pi-metingen over de tijd; lange runs samengevat in max. 20 rijen (p95 = max per rij)."""
+    if not rows:
+        return []
+    per_row = max(1, -(-len(rows) // 20))
+
+    def avg(chunk, field):
+        values = [r[field] for r in chunk if field in r]
+        return sum(values) / len(values) if values else None
+
+    lines = ["Tijd (s)     req/s   p95  fout   cpu%  iow%  load  RSS MB   °C  schijf%  thr  herstart"]
+    for i in range(0, len(rows), per_row):
+        chunk = rows[i:i + per_row]
+        throttled = 0
+        for r in chunk:
+            throttled |= r.get("throttled", 0)
+        label = f"{chunk[0]['t']}-{chunk[-1]['t'] + 1}"
+        lines.append(
+            f"{label:<11} {sum(r['requests'] for r in chunk) / len(chunk):>6.1f} {max(r['p95'] for r in chunk):>5} "
+            f"{sum(r['errors'] for r in chunk):>5} {_fmt(avg(chunk, 'cpu'), '>6.0f')} {_fmt(avg(chunk, 'iowait'), '>5.0f')} "
+            f"{_fmt(avg(chunk, 'load1'), '>5.2f')} {_fmt(avg(chunk, 'rss_mb'), '>7.0f')} "
+            f"{_fmt(avg(chunk, 'temp_c'), '>5.1f')} {_fmt(avg(chunk, 'io_util'), '>7.0f')} "
+            f"{'ja' if throttled & 0xF else '  ':>4} {max(r.get('pid_changes', 0) for r in chunk):>8}"
+        )
+    return lines
+
+
+def start_pi_monitor(config_path: str = SSH_CONFIG_FILE) -> PiMonitor:
+    """Lees de SSH-instellingen en start de metingen; PiMonitorError als dat niet lukt."""
+    monitor = PiMonitor(load_ssh_settings(config_path))
+    monitor.start()
+    return monitor
+
+
+def attach_pi_results(r: dict, monitor: PiMonitor, metrics: RunMetrics, start_epoch: float) -> None:
+    """Stop de metingen en zet ze als r["pi"] (samenvatting + tijdlijn per seconde) in het resultaat."""
+    monitor.stop()
+    r["pi"] = pi_summary(monitor, correlate(monitor.samples, metrics, start_epoch))
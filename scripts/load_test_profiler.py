@@ -0,0 +1,224 @@
+"""
+Profilering van de load-generator zelf (opt-in), twee bronnen:
+  - een sampler-thread kijkt elke paar ms via sys._current_frames() naar de stacks van alle
+    threads en telt ze; uitvoer als collapsed stacks ("thread;module:functie;... aantal"), direct
+    bruikbaar voor flamegraph.pl, speedscope of inferno. Geen tracing, dus lage overhead (de
+    sampler meet zijn eigen kosten);
+  - tijd per fase uit hooks in de hot path van load_test_core (perf_counter rond JSON opbouwen,
+    verbinden, versturen + antwoord, boekhouding, scenario). Een sampler in hetzelfde proces krijgt
+    de GIL vooral op momenten dat de generator een syscall doet, dus de fasetijden komen uit de
+    hooks en niet uit de samples.
+Werkprocessen (engine processes) profileren zichzelf en sturen alles mee naar de coördinator.
+"""
+
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from itertools import takewhile
+
+DEFAULT_PROFILE_INTERVAL_MS = 10.0
+MIN_PROFILE_INTERVAL_MS = 1.0
+MAX_STACK_DEPTH = 64
+
+# Fasen in de hot path (zie load_test_core); "versturen + antwoord" omvat ook de server en het netwerk
+PHASE_SCENARIO = "scenario (stap invullen)"
+PHASE_ENCODE = "request opbouwen (JSON)"
+PHASE_CONNECT = "verbinden (TCP + TLS)"
+PHASE_EXCHANGE = "versturen + antwoord lezen"
+PHASE_BOOKKEEPING = "boekhouding (metrics)"
+PHASE_ORDER = (PHASE_SCENARIO, PHASE_ENCODE, PHASE_CONNECT, PHASE_EXCHANGE, PHASE_BOOKKEEPING)
+
+_THREAD_NUMBER = re.compile(r"[-_]\d+(?=\D|$)")
+
+_active = None
+
+
+def active_sampler() -> "StackSampler | None":
+    """De sampler die nu loopt (voor run_multiprocess: werkprocessen ook laten sampelen)."""
+    return _active
+
+
+def active_phases() -> "PhaseTimes | None":
+    """Fasetijden van de lopende sampler, of None: dan slaan de hooks in de hot path alles over."""
+    return _active.phases if _active is not None else None
+
+
+class PhaseTimes:
+    """Opgetelde tijd en aantal per fase; add() wordt vanuit alle generator-threads aangeroepen."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.seconds: dict[str, float] = {}
+        self.counts: dict[str, int] = {}
+
+    def add(self, phase: str, seconds: float) -> None:
+        with self._lock:
+            self.seconds[phase] = self.seconds.get(phase, 0.0) + seconds
+            self.counts[phase] = self.counts.get(phase, 0) + 1
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            return {"seconds": dict(self.seconds), "counts": dict(self.counts)}
+
+    def merge_dict(self, data: dict) -> None:
+        with self._lock:
+            for phase, sec in data.get("seconds", {}).items():
+                self.seconds[phase] = self.seconds.get(phase, 0.0) + sec
+            for phase, n in data.get("counts", {}).items():
+                self.counts[phase] = self.counts.get(phase, 0) + n
+
+
+class StackSampler:
+    """
+    Telt stacks van alle threads (behalve zichzelf) elke interval_ms. Threads met een nummer in de
+    naam (ThreadPoolExecutor-0_12) worden samengevoegd, zodat de flame graph per soort thread is.
+    """
+
+    def __init__(self, interval_ms: float = DEFAULT_PROFILE_INTERVAL_MS, prefix: str = ""):
+        self.interval_ms = max(MIN_PROFILE_INTERVAL_MS, interval_ms)
+        self.prefix = prefix
+        self.stacks: Counter = Counter()  # (thread, code-objecten diep → ondiep) → aantal
+        self.extra: Counter = Counter()  # collapsed stacks van werkprocessen
+        self.phases = PhaseTimes()
+        self.samples = 0
+        self.sample_sec = 0.0  # tijd die de sampler zelf kostte
+        self.wall_sec = 0.0
+        self._labels: dict = {}
+        self._modules: dict[str, str] = {}
+        self._stop = threading.Event()
+        self._thread = None
+        self._start = 0.0
+
+    def start(self) -> "StackSampler":
+        global _active
+        self._stop.clear()
+        self._start = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+        self._thread.start()
+        _active = self
+        return self
+
+    def stop(self) -> None:
+        global _active
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.wall_sec = time.perf_counter() - self._start
+        if _active is self:
+            _active = None
+
+    def _module(self, filename: str) -> str:
+        name = self._modules.get(filename)
+        if name is None:
+            name = os.path.splitext(os.path.basename(filename))[0]
+            best = ""
+            for entry in sys.path:
+                entry = os.path.abspath(entry or ".")
+                if filename.startswith(entry + os.sep) and len(entry) > len(best):
+                    best = entry
+            if best:
+                name = os.path.splitext(filename[len(best) + 1:])[0].replace(os.sep, ".")
+                if name.endswith(".__init__"):
+                    name = name[:-len(".__init__")]
+            self._modules[filename] = name
+        return name
+
+    def _label(self, code) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            label = f"{self._module(code.co_filename)}:{getattr(code, 'co_qualname', code.co_name)}"
+            self._labels[code] = label
+        return label
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        interval = self.interval_ms / 1000
+        names = {}
+        while not self._stop.wait(interval):
+            t0 = time.perf_counter()
+            frames = sys._current_frames()
+            if any(ident not in names for ident in frames):
+                names = {
+                    t.ident: _THREAD_NUMBER.sub("", t.name) for t in threading.enumerate() if t.ident is not None
+                }
+            for ident, frame in frames.items():
+                if ident == own:
+                    continue
+                codes = []
+                while frame is not None and len(codes) < MAX_STACK_DEPTH:
+                    codes.append(frame.f_code)
+                    frame = frame.f_back
+                self.stacks[(names.get(ident, "thread"), tuple(codes))] += 1
+            self.samples += 1
+            self.sample_sec += time.perf_counter() - t0
+
+    def collapsed(self) -> dict[str, int]:
+        """Stack (root eerst, gescheiden door ;) → aantal samples, inclusief die van werkprocessen."""
+        out = Counter(self.extra)
+        prefix = [self.prefix] if self.prefix else []
+        for (thread, codes), n in self.stacks.items():
+            out[";".join(prefix + [thread] + [self._label(c) for c in reversed(codes)])] += n
+        return dict(out)
+
+    def to_dict(self) -> dict:
+        """Voor een werkproces: stacks (collapsed) en fasetijden naar de coördinator."""
+        return {"stacks": self.collapsed(), "phases": self.phases.to_dict()}
+
+    def merge_dict(self, data: dict) -> None:
+        self.extra.update(data.get("stacks", {}))
+        self.phases.merge_dict(data.get("phases", {}))
+
+    def write_collapsed(self, path: str) -> int:
+        """Schrijf collapsed stacks (meest voorkomend eerst); geeft het aantal regels terug."""
+        stacks = self.collapsed()
+        with open(path, "w", encoding="utf-8") as fp:
+            for stack, n in sorted(stacks.items(), key=lambda x: -x[1]):
+                fp.write(f"{stack} {n}\n")
+        return len(stacks)
+
+    def summary(self) -> dict:
+        """Fasetijden (totaal en µs per keer) plus samples per soort thread."""
+        threads: Counter = Counter()
+        for stack, n in self.collapsed().items():
+            # Thread (en eventueel werkproces) = de frames vóór het eerste module:functie-frame
+            threads[";".join(takewhile(lambda f: ":" not in f, stack.split(";")))] += n
+        times = self.phases.to_dict()
+        order = [p for p in PHASE_ORDER if p in times["seconds"]]
+        order += sorted(p for p in times["seconds"] if p not in PHASE_ORDER)
+        return {
+            "interval_ms": self.interval_ms,
+            "samples": self.samples,
+            "wall_sec": round(self.wall_sec, 1),
+            "overhead_pct": round(100 * self.sample_sec / self.wall_sec, 2) if self.wall_sec else 0.0,
+            "phases": [
+                {
+                    "phase": p,
+                    "count": times["counts"][p],
+                    "seconds": round(times["seconds"][p], 3),
+                    "us_per_call": round(1e6 * times["seconds"][p] / times["counts"][p]),
+                }
+                for p in order
+            ],
+            "threads": [{"thread": name, "samples": n} for name, n in threads.most_common()],
+        }
+
+
+def profile_summary_lines(s: dict) -> list[str]:
+    lines = [
+        f"Profiel:           {s['samples']} samples elke {s['interval_ms']:g} ms over {s['wall_sec']:g} s, "
+        f"overhead sampler {s['overhead_pct']:.1f}%",
+        f"{'Fase':<30} {'aantal':>9} {'totaal (s)':>11} {'µs/keer':>9}",
+    ]
+    for p in s["phases"]:
+        lines.append(f"{p['phase']:<30} {p['count']:>9} {p['seconds']:>11.2f} {p['us_per_call']:>9}")
+    lines.append("Totalen zijn opgeteld over alle threads/coroutines; versturen + antwoord omvat ook de server.")
+    return lines
+
+
+def profile_paths(report_path: str | None) -> tuple[str, str]:
+    """Bestandsnamen naast het rapport: <rapport>.folded en <rapport>.profiel.txt."""
+    base = os.path.splitext(report_path)[0] if report_path else f"profiel-{time.strftime('%Y%m%d-%H%M%S')}"
+    return base + ".folded", base + ".profiel.txt"
@@ -0,0 +1,313 @@
+"""
+Replay van echt verkeer uit de nginx access log (combined-formaat, zoals /var/log/nginx/regenboog_access.log).
+De log wordt regel voor regel gelezen (ook .gz), dus ook logs van meerdere GB passen niet in het geheugen;
+alleen de regels van één logseconde worden gebufferd om ze gelijkmatig over die seconde te spreiden
+(nginx logt per seconde). Requests vertrekken op hun oorspronkelijke tijdstip, gedeeld door de snelheid.
+
+POST-bodies staan niet in de log: voor de bekende API-routes wordt een plausibele body gemaakt,
+met een visitor_id per bezoeker (IP + user-agent) zodat track-visit/heartbeat/end bij elkaar horen.
+"""
+
+import asyncio
+import gzip
+import hashlib
+import random
+import re
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import NamedTuple
+
+from load_test_core import (
+    ENGINE_ASYNCIO,
+    MAX_CONCURRENT_ASYNC,
+    MODEL_REPLAY,
+    AsyncConnectionPool,
+    RunMetrics,
+    _raise_fd_limit,
+    _summarize,
+)
+
+DEFAULT_ACCESS_LOG = "/var/log/nginx/regenboog_access.log"
+REPLAY_SPEEDS = (1, 5, 10)
+DEFAULT_REPLAY_SPEED = 1
+REPLAY_METHODS = ("GET", "POST")
+IDLE_CLIENT_SEC = 60  # verbindingen van een bezoeker sluiten na zoveel seconden (echte tijd) zonder requests
+MAX_SKIPPED_SAMPLES = 5
+
+# $remote_addr - $remote_user [$time_local] "$request" $status $body_bytes_sent "$http_referer" "$http_user_agent"
+_LINE = re.compile(
+    r'^(?P<ip>\S+) \S+ \S+ \[(?P<time>[^\]]+)\] "(?P<method>[A-Z]+) (?P<path>\S+)[^"]*" (?P<status>\d{3}) \S+'
+    r'(?: "(?P<referer>[^"]*)" "(?P<ua>[^"]*)")?'
+)
+_MONTHS = {m: i for i, m in enumerate(("Jan", "Feb", "Mar", "Apr", "May", "Jun",
+                                        "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"), 1)}
+_GAME_PAGE = re.compile(r"/games/([^/.?]+)\.html")
+
+
+class LogRequest(NamedTuple):
+    """Eén request uit de log; offset in seconden vanaf de eerste regel (nog niet versneld)."""
+
+    offset: float
+    method: str
+    path: str
+    status: int
+    client: str
+    referer: str
+
+
+def _parse_time(text: str) -> float:
+    """"18/Oct/2026:08:15:02 +0200" → epoch-seconden, zonder strptime (scheelt veel bij grote logs)."""
+    day, month, rest = text[:2], text[3:6], text[7:]
+    year, hh, mm, ss = int(rest[:4]), int(rest[5:7]), int(rest[8:10]), int(rest[11:13])
+    tz = rest[14:]
+    offset = timedelta(hours=int(tz[1:3]), minutes=int(tz[3:5]))
+    if tz[0] == "-":
+        offset = -offset
+    dt = datetime(year, _MONTHS[month], int(day), hh, mm, ss, tzinfo=timezone(offset))
+    return dt.timestamp()
+
+
+def open_log(path: str):
+    """Tekststream over de log; gzip herkend aan de extensie of de magic bytes."""
+    with open(path, "rb") as fp:
+        gzipped = fp.read(2) == b"\x1f\x8b"
+    if gzipped or path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8", errors="replace")
+    return open(path, "r", encoding="utf-8", errors="replace")
+
+
+def read_log(path: str, stats: dict | None = None):
+    """
+    Generator van LogRequest in logvolgorde. Regels van dezelfde seconde worden over die seconde
+    gespreid. stats (optioneel) telt lines, skipped en bewaart een paar onleesbare regels.
+    """
+    stats = stats if stats is not None else {}
+    stats.setdefault("lines", 0)
+    stats.setdefault("skipped", 0)
+    stats.setdefault("skipped_samples", [])
+    first = None
+    second = None
+    bucket = []
+    last_time_text, last_time = None, 0.0
+
+    def flush():
+        n = len(bucket)
+        for i, (method, path_, status, client, referer) in enumerate(bucket):
+            yield LogRequest(second - first + i / n, method, path_, status, client, referer)
+        bucket.clear()
+
+    with open_log(path) as fp:
+        for line in fp:
+            stats["lines"] += 1
+            m = _LINE.match(line)
+            if m is None or m["method"] not in REPLAY_METHODS:
+                stats["skipped"] += 1
+                if len(stats["skipped_samples"]) < MAX_SKIPPED_SAMPLES:
+                    stats["skipped_samples"].append(line.strip()[:160])
+                continue
+            time_text = m["time"]
+            if time_text != last_time_text:
+                try:
+                    last_time = _parse_time(time_text)
+                except (ValueError, KeyError, IndexError):
+                    stats["skipped"] += 1
+                    continue
+                last_time_text = time_text
+            if first is None:
+                first = second = last_time
+            if last_time != second:
+                yield from flush()
+                # Logs zijn chronologisch; een enkele regel uit het verleden (gebufferd door nginx) niet terugspoelen
+                second = max(second, last_time)
+            client = m["ip"] + "|" + (m["ua"] or "")
+            bucket.append((m["method"], m["path"], int(m["status"]), client, m["referer"] or ""))
+        if bucket:
+            yield from flush()
+
+
+def _visitor_id(client: str) -> str:
+    return "replay-" + hashlib.sha1(client.encode("utf-8", "replace")).hexdigest()[:12]
+
+
+def _game_from(req: LogRequest) -> str:
+    m = _GAME_PAGE.search(req.referer)
+    return m.group(1) if m else "beren"
+
+
+def replay_body(req: LogRequest) -> dict | None:
+    """Body voor een POST uit de log (die staat er zelf niet in); None voor GET."""
+    if req.method != "POST":
+        return None
+    path = req.path.split("?", 1)[0]
+    visitor = _visitor_id(req.client)
+    page = req.referer.split("//", 1)[-1]
+    page = page[page.find("/"):] if "/" in page else "/"
+    if path == "/api/score":
+        return {"class_name": _game_from(req), "player_name": f"Replay {visitor[-4:]}",
+                "student_class": "Zebra's", "score": random.randint(80, 450)}
+    if path == "/api/track-visit":
+        return {"visitor_id": visitor, "page": page, "user_agent": req.client.split("|", 1)[1], "referrer": ""}
+    if path == "/api/track-visit-heartbeat":
+        return {"visitor_id": visitor, "page": page}
+    if path == "/api/track-visit-end":
+        return {"visitor_id": visitor, "page": page, "duration": random.randint(20, 90)}
+    return {}
+
+
+class _ReplayRun:
+    """Gedeelde staat van één replay: verbindingen per bezoeker en achterstand op het schema."""
+
+    def __init__(self, base_url: str, timeout_sec: int, keep_alive: bool, metrics: RunMetrics):
+        self.base_url = base_url
+        self.timeout_sec = timeout_sec
+        self.keep_alive = keep_alive
+        self.metrics = metrics
+        self.pools: dict[str, list] = {}  # client → [pool, laatst gebruikt]
+        self.replayed = 0
+        self.status_mismatch = 0
+        self.max_lag_ms = 0
+        self.lag_ms_total = 0
+
+    def pool_for(self, client: str, now: float) -> AsyncConnectionPool:
+        entry = self.pools.get(client)
+        if entry is None:
+            entry = self.pools[client] = [AsyncConnectionPool(self.base_url, self.timeout_sec, self.keep_alive), now]
+        entry[1] = now
+        return entry[0]
+
+    def close_idle(self, now: float) -> None:
+        # Na de timeout kan er geen request van die bezoeker meer lopen
+        idle = max(IDLE_CLIENT_SEC, self.timeout_sec + 1)
+        for client in [c for c, (_, used) in self.pools.items() if now - used > idle]:
+            self.close_pool(client)
+
+    def close_pool(self, client: str) -> None:
+        pool, _ = self.pools.pop(client)
+        self.metrics.connections_opened += pool.connections_opened
+        pool.close()
+
+    async def send(self, req: LogRequest, pool: AsyncConnectionPool, lag_ms: int) -> None:
+        self.metrics.request_started()
+        r = await pool.request(req.method, req.path, replay_body(req))
+        r["lag_ms"] = lag_ms  # bedoelde start = tijdstip uit de log; achterstand telt mee in de CO-correctie
+        # Een 4xx (bijv. 404) die ook in de log zo was is geen fout van de server; 5xx telt altijd als fout
+        if not r["ok"] and r.get("status_code") == req.status and 400 <= req.status < 500:
+            r["ok"] = True
+            r.pop("error", None)
+        if r.get("status_code") is not None and r["status_code"] != req.status:
+            self.status_mismatch += 1
+        r["original_status"] = req.status
+        self.metrics.record_request(req.method, req.path, r)
+        self.metrics.record_journey({"results": [r]})
+
+
+async def _run_replay_async(
+    log_path: str,
+    base_url: str,
+    speed: float,
+    timeout_sec: int,
+    cancel_flag: threading.Event,
+    keep_alive: bool,
+    metrics: RunMetrics,
+    max_duration_sec: float,
+    stats: dict,
+) -> dict:
+    loop = asyncio.get_running_loop()
+    run = _ReplayRun(base_url, timeout_sec, keep_alive, metrics)
+    tasks = set()
+    start = loop.time()
+    last_cleanup = start
+    log_span = 0.0
+    for req in read_log(log_path, stats):
+        if cancel_flag.is_set():
+            break
+        due = req.offset / speed
+        if max_duration_sec and due > max_duration_sec:
+            break
+        log_span = req.offset
+        while True:
+            delay = start + due - loop.time()
+            if delay <= 0 or cancel_flag.is_set():
+                break
+            await asyncio.sleep(min(delay, 0.2))
+        # Begrenzen: bij een trage server loopt de replay achter in plaats van onbeperkt taken te stapelen
+        while len(tasks) >= MAX_CONCURRENT_ASYNC and not cancel_flag.is_set():
+            await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        now = loop.time()
+        lag_ms = max(0, int((now - start - due) * 1000))
+        run.max_lag_ms = max(run.max_lag_ms, lag_ms)
+        run.lag_ms_total += lag_ms
+        task = asyncio.create_task(run.send(req, run.pool_for(req.client, now), lag_ms))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+        run.replayed += 1
+        metrics.set_in_flight(len(tasks))
+        if now - last_cleanup > IDLE_CLIENT_SEC:
+            run.close_idle(now)
+            last_cleanup = now
+
+    while tasks:
+        if cancel_flag.is_set():
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            break
+        await asyncio.wait(tasks, timeout=0.2)
+    for client in list(run.pools):
+        run.close_pool(client)
+
+    total_ms = int((loop.time() - start) * 1000)
+    r = _summarize(base_url, run.replayed, total_ms, metrics, ENGINE_ASYNCIO, keep_alive)
+    r.update({
+        "model": MODEL_REPLAY,
+        "log_path": log_path,
+        "speed": speed,
+        "log_lines": stats["lines"],
+        "log_skipped": stats["skipped"],
+        "log_skipped_samples": stats["skipped_samples"],
+        "log_span_sec": round(log_span, 1),
+        "replayed": run.replayed,
+        "status_mismatch": run.status_mismatch,
+        "max_lag_ms": run.max_lag_ms,
+        "avg_lag_ms": round(run.lag_ms_total / run.replayed) if run.replayed else 0,
+    })
+    return r
+
+
+def run_replay(
+    log_path: str,
+    base_url: str,
+    speed: float,
+    timeout_sec: int,
+    cancel_flag: threading.Event,
+    keep_alive: bool = True,
+    metrics: RunMetrics | None = None,
+    max_duration_sec: float = 0,
+) -> dict:
+    """
+    Speel de access log af tegen base_url op speed× de oorspronkelijke snelheid (asyncio-engine).
+    max_duration_sec > 0: stop na zoveel seconden echte tijd. Een journey is hier één request,
+    dus geslaagd/gefaald en p50/p95 "per bezoeker" gelden per request. OSError als de log niet leesbaar is.
+    """
+    open_log(log_path).close()
+    base_url = base_url.rstrip("/")
+    _raise_fd_limit(MAX_CONCURRENT_ASYNC + 256)
+    return asyncio.run(
+        _run_replay_async(
+            log_path, base_url, max(0.01, speed), timeout_sec, cancel_flag, keep_alive,
+            metrics or RunMetrics(), max_duration_sec, {},
+        )
+    )
+
+
+def replay_summary_lines(r: dict) -> list[str]:
+    """Kerncijfers van een replay, voor GUI-log en CLI."""
+    lines = [
+        f"Log:               {r['log_path']}  ({r['log_lines']} regels, {r['log_skipped']} overgeslagen)",
+        f"Snelheid:          {r['speed']:g}×  |  {r['log_span_sec']:g} s log in {r['total_ms'] / 1000:.1f} s",
+        f"Afgespeeld:        {r['replayed']} requests  |  andere status dan in de log: {r['status_mismatch']}",
+        f"Achterstand:       gem {r['avg_lag_ms']} ms  |  max {r['max_lag_ms']} ms t.o.v. het schema",
+    ]
+    for sample in r["log_skipped_samples"][:2]:
+        lines.append(f"Overgeslagen:      {sample}")
+    return lines
@@ -0,0 +1,322 @@
+"""
+Scenario's voor de load test: gewogen routes (journeys) uit JSON- of TOML-bestanden in scenarios/.
+Een bestand wordt één keer ingelezen en gecompileerd tot een stappentabel (vooraf geparste
+templates, cumulatieve gewichten); per virtuele gebruiker wordt daarna alleen nog ingevuld.
+
+Opbouw van een scenariobestand (JSON; TOML met dezelfde sleutels):
+  name, description       – voor GUI en rapport
+  think                   – standaard bedenktijd na elke stap: seconden of [min, max]
+  vars                    – per bezoeker ingevuld, in volgorde: lijst = willekeurige keuze,
+                            tekst = template, {"env": "NAAM", "default": "..."} = omgevingsvariabele
+  journeys                – lijst met name, weight en steps
+  steps[]                 – method, path, body, headers, required (standaard true), think,
+                            only_if ({"var": [waarden]}: stap alleen voor die waarden)
+Templates: {player_id}, {random:MIN:MAX} en elke var, bijv. "/games/{game}.html". Een waarde die
+alleen uit één placeholder bestaat behoudt het type (score: "{random:80:450}" wordt een getal).
+Een verplichte stap die faalt beëindigt de route, net als een browser die de pagina niet krijgt.
+"""
+
+import bisect
+import json
+import os
+import random
+import string
+from typing import NamedTuple
+
+try:
+    import tomllib
+except ImportError:  # Python < 3.11: alleen JSON-scenario's
+    tomllib = None
+
+SCENARIO_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "scenarios")
+SCENARIO_EXTENSIONS = (".json", ".toml")
+DEFAULT_SCENARIO = "standaard"
+METHODS = ("GET", "POST")
+BUILTINS = ("player_id", "random")
+
+
+class ScenarioError(ValueError):
+    """Ongeldig scenariobestand; de melding noemt bestand, route en stap."""
+
+
+class Step(NamedTuple):
+    """Eén ingevulde stap zoals de engine hem uitvoert."""
+
+    method: str
+    path: str
+    body: dict | None
+    required: bool
+    headers: dict | None
+    think: float
+
+
+class _Template:
+    """Vooraf geparste template: literal tekst en velden afwisselend, zonder str.format per request."""
+
+    __slots__ = ("parts", "single")
+
+    def __init__(self, text: str, known: set, where: str):
+        parts = []
+        try:
+            parsed = list(string.Formatter().parse(text))
+        except ValueError as e:
+            raise ScenarioError(f"{where}: ongeldige template {text!r} ({e})") from None
+        for literal, field, spec, _ in parsed:
+            if literal:
+                parts.append(literal)
+            if field is None:
+                continue
+            if field not in known:
+                raise ScenarioError(f"{where}: onbekende placeholder {{{field}}} in {text!r}")
+            if field == "random":
+                try:
+                    low, high = (int(x) for x in (spec or "").split(":"))
+                except ValueError:
+                    raise ScenarioError(f"{where}: gebruik {{random:MIN:MAX}} in {text!r}") from None
+                parts.append(("random", low, high))
+            else:
+                parts.append(("var", field))
+        self.parts = tuple(parts)
+        # "{score}" als volledige waarde: type behouden in plaats van tekst
+        self.single = len(self.parts) == 1 and isinstance(self.parts[0], tuple)
+
+    @staticmethod
+    def _value(part, ctx: dict):
+        if part[0] == "random":
+            return random.randint(part[1], part[2])
+        return ctx[part[1]]
+
+    def render(self, ctx: dict):
+        if self.single:
+            return self._value(self.parts[0], ctx)
+        return "".join(p if isinstance(p, str) else str(self._value(p, ctx)) for p in self.parts)
+
+
+def _compile_value(value, known: set, where: str):
+    """Body/headers vooraf compileren: ("const", v), ("tpl", _Template), ("dict", ...) of ("list", ...)."""
+    if isinstance(value, str):
+        if "{" not in value:
+            return ("const", value)
+        return ("tpl", _Template(value, known, where))
+    if isinstance(value, dict):
+        return ("dict", tuple((str(k), _compile_value(v, known, where)) for k, v in value.items()))
+    if isinstance(value, list):
+        return ("list", tuple(_compile_value(v, known, where) for v in value))
+    return ("const", value)
+
+
+def _render_value(compiled, ctx: dict):
+    kind, data = compiled
+    if kind == "const":
+        return data
+    if kind == "tpl":
+        return data.render(ctx)
+    if kind == "dict":
+        return {k: _render_value(v, ctx) for k, v in data}
+    return [_render_value(v, ctx) for v in data]
+
+
+def _think_range(value, where: str) -> tuple[float, float]:
+    if value is None:
+        return 0.0, 0.0
+    if isinstance(value, (int, float)):
+        return float(value), float(value)
+    if isinstance(value, list) and len(value) == 2 and all(isinstance(x, (int, float)) for x in value):
+        low, high = float(min(value)), float(max(value))
+        return low, high
+    raise ScenarioError(f"{where}: think moet een getal of [min, max] zijn")
+
+
+class _CompiledStep(NamedTuple):
+    method: str
+    path: _Template
+    body: tuple | None
+    headers: tuple | None
+    required: bool
+    think_min: float
+    think_max: float
+    only_if: tuple | None  # (var, frozenset(waarden))
+
+
+class _Journey(NamedTuple):
+    name: str
+    weight: float
+    steps: tuple
+
+
+class Scenario:
+    """Gecompileerd scenario: gewogen keuze van een route en invullen van de stappen per bezoeker."""
+
+    def __init__(self, data: dict, source: str = "<scenario>"):
+        if not isinstance(data, dict):
+            raise ScenarioError(f"{source}: verwacht een object met journeys")
+        self.source = source
+        self.data = data  # ruwe definitie, om het scenario naar load-agents te sturen
+        self.name = str(data.get("name") or os.path.splitext(os.path.basename(source))[0])
+        self.description = str(data.get("description", ""))
+        default_think = _think_range(data.get("think"), source)
+
+        # Vars in volgorde compileren; latere vars mogen eerdere gebruiken
+        known = set(BUILTINS)
+        self._vars = []
+        for name, spec in (data.get("vars") or {}).items():
+            where = f"{source}: var {name}"
+            if name in BUILTINS:
+                raise ScenarioError(f"{where}: naam is gereserveerd")
+            if isinstance(spec, list):
+                if not spec:
+                    raise ScenarioError(f"{where}: lege lijst")
+                self._vars.append((name, "choice", tuple(spec)))
+            elif isinstance(spec, dict) and "env" in spec:
+                self._vars.append((name, "const", os.environ.get(spec["env"], spec.get("default", ""))))
+            elif isinstance(spec, str):
+                self._vars.append((name, "tpl", _compile_value(spec, known, where)))
+            else:
+                self._vars.append((name, "const", spec))
+            known.add(name)
+
+        journeys = []
+        for j, journey in enumerate(data.get("journeys") or []):
+            jname = str(journey.get("name") or f"route {j + 1}")
+            weight = float(journey.get("weight", 1))
+            if weight <= 0:
+                continue
+            steps = []
+            for i, step in enumerate(journey.get("steps") or []):
+                where = f"{source}: {jname}, stap {i + 1}"
+                method = str(step.get("method", "GET")).upper()
+                if method not in METHODS:
+                    raise ScenarioError(f"{where}: methode {method} niet ondersteund ({'/'.join(METHODS)})")
+                if not str(step.get("path", "")).startswith("/"):
+                    raise ScenarioError(f"{where}: path moet met / beginnen")
+                only_if = None
+                if step.get("only_if"):
+                    if not isinstance(step["only_if"], dict) or len(step["only_if"]) != 1:
+                        raise ScenarioError(f"{where}: only_if moet precies één var bevatten")
+                    (var, values), = step["only_if"].items()
+                    if var not in known:
+                        raise ScenarioError(f"{where}: only_if gebruikt onbekende var {var}")
+                    only_if = (var, frozenset(values if isinstance(values, list) else [values]))
+                think = _think_range(step["think"], where) if "think" in step else default_think
+                steps.append(_CompiledStep(
+                    method,
+                    _Template(step["path"], known, where),
+                    _compile_value(step["body"], known, where) if step.get("body") is not None else None,
+                    _compile_value(step["headers"], known, where) if step.get("headers") else None,
+                    bool(step.get("required", True)),
+                    think[0],
+                    think[1],
+                    only_if,
+                ))
+            if not steps:
+                raise ScenarioError(f"{source}: route {jname} heeft geen stappen")
+            journeys.append(_Journey(jname, weight, tuple(steps)))
+        if not journeys:
+            raise ScenarioError(f"{source}: geen routes met gewicht > 0")
+        self.journeys = tuple(journeys)
+        self._cumulative = []
+        total = 0.0
+        for journey in journeys:
+            total += journey.weight
+            self._cumulative.append(total)
+        self._total_weight = total
+
+    def pick(self) -> _Journey:
+        """Gewogen willekeurige route (bisect op de cumulatieve gewichten)."""
+        index = bisect.bisect_right(self._cumulative, random.random() * self._total_weight)
+        return self.journeys[min(index, len(self.journeys) - 1)]
+
+    def _context(self, player_id: int) -> dict:
+        ctx = {"player_id": player_id}
+        for name, kind, spec in self._vars:
+            if kind == "choice":
+                ctx[name] = random.choice(spec)
+            elif kind == "tpl":
+                ctx[name] = _render_value(spec, ctx)
+            else:
+                ctx[name] = spec
+        return ctx
+
+    def journey(self, player_id: int, revisit: bool = False):
+        """Kies een route en geef de generator van run() terug."""
+        return self.run(self.pick(), player_id, revisit)
+
+    def run(self, journey: _Journey, player_id: int, revisit: bool = False):
+        """
+        Generator: levert per stap een Step op en krijgt terug of die gelukt is; zo delen de
+        thread- en asyncio-engine exact dezelfde route.
+        """
+        ctx = self._context(player_id)
+        for step in journey.steps:
+            if step.only_if is not None and ctx.get(step.only_if[0]) not in step.only_if[1]:
+                continue
+            ok = yield Step(
+                step.method,
+                step.path.render(ctx),
+                _render_value(step.body, ctx) if step.body is not None else None,
+                step.required,
+                _render_value(step.headers, ctx) if step.headers is not None else None,
+                random.uniform(step.think_min, step.think_max) if step.think_max else 0.0,
+            )
+            if step.required and not ok:
+                return
+        if revisit:
+            # Browsermodus: terug naar de homepage (herhaalbezoek, revalidatie van de cache)
+            yield Step("GET", "/", None, False, None, 0.0)
+
+    def describe(self) -> str:
+        total = self._total_weight
+        parts = [f"{j.name} {100 * j.weight / total:.0f}%" for j in self.journeys]
+        return f"{self.name} ({', '.join(parts)})"
+
+
+def available_scenarios() -> list[str]:
+    """Namen (zonder extensie) van de scenario's in SCENARIO_DIR, standaard eerst."""
+    try:
+        files = os.listdir(SCENARIO_DIR)
+    except OSError:
+        return []
+    names = sorted({os.path.splitext(f)[0] for f in files if f.endswith(SCENARIO_EXTENSIONS)})
+    if DEFAULT_SCENARIO in names:
+        names.remove(DEFAULT_SCENARIO)
+        names.insert(0, DEFAULT_SCENARIO)
+    return names
+
+
+def _resolve(name_or_path: str) -> str:
+    if os.path.isfile(name_or_path):
+        return name_or_path
+    for ext in SCENARIO_EXTENSIONS:
+        path = os.path.join(SCENARIO_DIR, name_or_path + ext)
+        if os.path.isfile(path):
+            return path
+    raise ScenarioError(f"Scenario niet gevonden: {name_or_path} (zoek in {SCENARIO_DIR})")
+
+
+def load_scenario(name_or_path: str) -> Scenario:
+    """Lees en compileer een scenario (pad of naam in SCENARIO_DIR); ScenarioError bij fouten."""
+    path = _resolve(name_or_path)
+    is_toml = path.endswith(".toml")
+    if is_toml and tomllib is None:
+        raise ScenarioError(f"{path}: TOML vereist Python 3.11+; gebruik een JSON-scenario")
+    try:
+        if is_toml:
+            with open(path, "rb") as fp:
+                data = tomllib.load(fp)
+        else:
+            with open(path, "r", encoding="utf-8") as fp:
+                data = json.load(fp)
+    except (OSError, ValueError) as e:
+        raise ScenarioError(f"{path}: {e}") from None
+    return Scenario(data, path)
+
+
+_default = None
+
+
+def default_scenario() -> Scenario:
+    """Het standaardscenario (homepage → spel → leaderboard → score), één keer geladen."""
+    global _default
+    if _default is None:
+        _default = load_scenario(DEFAULT_SCENARIO)
+    return _default
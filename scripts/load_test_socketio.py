@@ -0,0 +1,762 @@
+"""
+Load test voor de multiplayer-spellen (Socket.IO) van de Regenboog Pi – zonder GUI.
+Simuleert paren spelers in één spel-lobby naar keuze (dammen, schaken, vier op een rij,
+zeeslag, reken-duel): verbinden, setName, invite/acceptInvite, om beurten een zet en chat,
+daarna verbreken. Meet round-trip van events, fan-out van broadcastLobby en het aantal
+spellen dat tegelijk loopt. Alleen standaardbibliotheek: eigen WebSocket- en Socket.IO-client.
+"""
+
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import struct
+import threading
+import time
+from typing import NamedTuple
+
+from load_test_core import (
+    ENGINE_ASYNCIO,
+    MODEL_MULTIPLAYER,
+    USER_AGENT,
+    EndpointStats,
+    LatencyHistogram,
+    RunMetrics,
+    _Target,
+    _get_ssl_context,
+    _raise_fd_limit,
+    _read_http_response,
+    _summarize,
+    _timeout,
+)
+
+CHAT_EVERY = 4  # na elke 4e zet een chatbericht
+THINK_SEC = 0.5  # bedenktijd tussen zetten (server accepteert max. 1 zet per 50 ms per socket)
+RAMP_FRACTION = 0.5  # paren starten gespreid over de eerste helft van de duur
+PAUSE_BETWEEN_GAMES_SEC = 1.0
+
+_WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+_OP_CONT, _OP_TEXT, _OP_BINARY, _OP_CLOSE, _OP_PING, _OP_PONG = 0x0, 0x1, 0x2, 0x8, 0x9, 0xA
+
+
+def _mask(data: bytes, key: bytes) -> bytes:
+    """XOR met de 4-byte masker-sleutel (verplicht voor client → server frames), in één int-bewerking."""
+    n = len(data)
+    if n == 0:
+        return data
+    k = (key * (n // 4 + 1))[:n]
+    return (int.from_bytes(data, "big") ^ int.from_bytes(k, "big")).to_bytes(n, "big")
+
+
+class _WebSocket:
+    """Minimale WebSocket-client (RFC 6455) op asyncio streams: tekstframes, ping/pong, close."""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+        self.closed = False
+
+    @classmethod
+    async def connect(cls, target: _Target, path: str) -> "_WebSocket":
+        reader, writer = await asyncio.open_connection(
+            target.host,
+            target.port,
+            ssl=_get_ssl_context() if target.is_https else None,
+            server_hostname=target.host if target.is_https else None,
+        )
+        key = base64.b64encode(os.urandom(16)).decode("ascii")
+        lines = [
+            f"GET {target.prefix + path} HTTP/1.1",
+            f"Host: {target.host_header}",
+            f"User-Agent: {USER_AGENT}",
+            "Upgrade: websocket",
+            "Connection: Upgrade",
+            f"Sec-WebSocket-Key: {key}",
+            "Sec-WebSocket-Version: 13",
+        ]
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+        await writer.drain()
+        status, headers, _ = await _read_http_response(reader)
+        expected = base64.b64encode(hashlib.sha1((key + _WS_GUID).encode("ascii")).digest()).decode("ascii")
+        if status != 101 or headers.get("sec-websocket-accept") != expected:
+            writer.close()
+            raise ConnectionError(f"WebSocket-upgrade geweigerd (HTTP {status})")
+        return cls(reader, writer)
+
+    def _send_frame(self, opcode: int, payload: bytes) -> None:
+        n = len(payload)
+        if n < 126:
+            header = struct.pack("!BB", 0x80 | opcode, 0x80 | n)
+        elif n < 1 << 16:
+            header = struct.pack("!BBH", 0x80 | opcode, 0x80 | 126, n)
+        else:
+            header = struct.pack("!BBQ", 0x80 | opcode, 0x80 | 127, n)
+        key = os.urandom(4)
+        self.writer.write(header + key + _mask(payload, key))
+
+    async def send_text(self, text: str) -> None:
+        self._send_frame(_OP_TEXT, text.encode("utf-8"))
+        await self.writer.drain()
+
+    async def recv(self) -> str | None:
+        """Volgend tekstbericht (fragmenten samengevoegd); None als de verbinding sluit."""
+        parts = []
+        while True:
+            head = await self.reader.readexactly(2)
+            fin, opcode = head[0] & 0x80, head[0] & 0x0F
+            n = head[1] & 0x7F
+            if n == 126:
+                n = struct.unpack("!H", await self.reader.readexactly(2))[0]
+            elif n == 127:
+                n = struct.unpack("!Q", await self.reader.readexactly(8))[0]
+            key = await self.reader.readexactly(4) if head[1] & 0x80 else None
+            payload = await self.reader.readexactly(n)
+            if key:
+                payload = _mask(payload, key)
+            if opcode == _OP_PING:
+                self._send_frame(_OP_PONG, payload)
+                continue
+            if opcode == _OP_PONG:
+                continue
+            if opcode == _OP_CLOSE:
+                self.closed = True
+                return None
+            parts.append(payload)
+            if fin:
+                return b"".join(parts).decode("utf-8")
+
+    def close(self) -> None:
+        if not self.closed:
+            self.closed = True
+            try:
+                self._send_frame(_OP_CLOSE, struct.pack("!H", 1000))
+            except Exception:
+                pass
+        self.writer.close()
+
+
+def _parse_packet(text: str) -> tuple[str, str, object]:
+    """Socket.IO-pakket (na de Engine.IO "4"): (type, namespace, data)."""
+    kind, rest = text[0], text[1:]
+    namespace = "/"
+    if rest.startswith("/"):
+        namespace, _, rest = rest.partition(",")
+    i = 0
+    while i < len(rest) and rest[i].isdigit():  # ack-id overslaan
+        i += 1
+    return kind, namespace, json.loads(rest[i:]) if rest[i:] else None
+
+
+class SocketIOClient:
+    """
+    Eén speler: Engine.IO v4 over WebSocket, verbonden met één namespace.
+    expect() vóór de emit registreren, anders kan het antwoord binnenkomen voor er iemand wacht.
+    """
+
+    def __init__(self, base_url: str, namespace: str, timeout_sec: int):
+        self.target = _Target(base_url)
+        self.namespace = namespace
+        self.timeout_sec = timeout_sec
+        self.sid = None
+        self.connected_at = 0.0
+        self.listeners: dict[str, list] = {}
+        self._ws = None
+        self._reader_task = None
+        self._waiters: list[tuple[str, object, asyncio.Future]] = []
+        self._prefix = "" if namespace == "/" else namespace + ","
+
+    async def connect(self) -> None:
+        async with _timeout(self.timeout_sec):
+            self._ws = await _WebSocket.connect(self.target, "/socket.io/?EIO=4&transport=websocket")
+            opened = await self._ws.recv()
+            if not opened or not opened.startswith("0"):
+                raise ConnectionError("Geen Engine.IO open-pakket")
+            await self._ws.send_text("40" + self._prefix)
+            while True:
+                text = await self._ws.recv()
+                if text is None:
+                    raise ConnectionResetError("Verbinding gesloten door server")
+                if text == "2":
+                    await self._ws.send_text("3")
+                    continue
+                if text.startswith("4"):
+                    kind, namespace, data = _parse_packet(text[1:])
+                    if namespace != self.namespace:
+                        continue
+                    if kind == "4":
+                        raise ConnectionError(f"Namespace geweigerd: {data}")
+                    if kind == "0":
+                        self.sid = data["sid"]
+                        break
+        self.connected_at = time.perf_counter()
+        self._reader_task = asyncio.create_task(self._read_loop())
+
+    async def _read_loop(self) -> None:
+        try:
+            while True:
+                text = await self._ws.recv()
+                if text is None:
+                    break
+                if text == "2":  # Engine.IO ping → pong, anders verbreekt de server na pingTimeout
+                    await self._ws.send_text("3")
+                    continue
+                if not text.startswith("4"):
+                    continue
+                kind, namespace, data = _parse_packet(text[1:])
+                if namespace != self.namespace or kind != "2" or not data:
+                    continue
+                now = time.perf_counter()
+                event, args = data[0], data[1:]
+                for callback in self.listeners.get(event, ()):
+                    callback(self, args, now)
+                for waiter in list(self._waiters):
+                    name, predicate, fut = waiter
+                    if name == event and not fut.done() and (predicate is None or predicate(args)):
+                        fut.set_result((args, now))
+                        self._waiters.remove(waiter)
+        except (ConnectionError, asyncio.IncompleteReadError, OSError):
+            pass
+        finally:
+            for _, _, fut in self._waiters:
+                if not fut.done():
+                    fut.set_exception(ConnectionResetError("Verbinding gesloten door server"))
+            self._waiters.clear()
+
+    def on(self, event: str, callback) -> None:
+        """callback(client, args, ontvangsttijd) bij elk event (ook zonder wachtende expect)."""
+        self.listeners.setdefault(event, []).append(callback)
+
+    def expect(self, event: str, predicate=None) -> asyncio.Future:
+        fut = asyncio.get_running_loop().create_future()
+        self._waiters.append((event, predicate, fut))
+        return fut
+
+    async def wait(self, fut: asyncio.Future) -> tuple[list, float]:
+        """(args, ontvangsttijd); asyncio.TimeoutError na timeout_sec."""
+        return await asyncio.wait_for(fut, self.timeout_sec)
+
+    async def emit(self, event: str, *args) -> None:
+        await self._ws.send_text("42" + self._prefix + json.dumps([event, *args], separators=(",", ":")))
+
+    async def close(self) -> None:
+        """Netjes verbreken: namespace-disconnect, dan close-frame (server ziet 'disconnect')."""
+        if self._ws is None:
+            return
+        try:
+            await self._ws.send_text("41" + self._prefix)
+        except Exception:
+            pass
+        self._ws.close()
+        for _, _, fut in self._waiters:
+            fut.cancel()
+        self._waiters.clear()
+        if self._reader_task is not None:
+            self._reader_task.cancel()
+            await asyncio.gather(self._reader_task, return_exceptions=True)
+
+
+def _event_result(name: str, start: float, error: str | None = None, end: float | None = None, **extra) -> dict:
+    """Result dict zoals bij HTTP-requests, zodat RunMetrics en de tabellen ongewijzigd werken."""
+    r = {"ok": error is None, "status_code": None, "ms": int(((end or time.perf_counter()) - start) * 1000), "path": name}
+    if error is not None:
+        r["error"] = error
+    r.update(extra)
+    return r
+
+
+class LobbyFanout:
+    """
+    Fan-out van broadcastLobby: na een setName wacht elke client die op dat moment al verbonden
+    was tot het nieuwe id in een 'lobby'-lijst staat. Per ontvanger één meting, en per broadcast
+    de tijd tot de laatste ontvanger. Alleen onze eigen clients zijn zichtbaar; echte bezoekers
+    in dezelfde namespace krijgen de broadcast ook, maar die meten we niet.
+    """
+
+    def __init__(self):
+        self.clients: set[SocketIOClient] = set()
+        self.per_receiver = LatencyHistogram()
+        self.complete = LatencyHistogram()
+        self.incomplete = 0
+        self._pending: dict[str, list] = {}  # sid → [start, wachtende clients, traagste tot nu]
+
+    def add(self, client: SocketIOClient) -> None:
+        self.clients.add(client)
+        client.on("lobby", self._on_lobby)
+
+    def remove(self, client: SocketIOClient) -> None:
+        self.clients.discard(client)
+        for sid, entry in list(self._pending.items()):
+            entry[1].discard(client)
+            if not entry[1]:
+                self._finish(sid)
+
+    def sent(self, sid: str, start: float) -> None:
+        waiting = {c for c in self.clients if c.sid and c.connected_at <= start}
+        if waiting:
+            self._pending[sid] = [start, waiting, 0.0]
+
+    def _on_lobby(self, client: SocketIOClient, args: list, now: float) -> None:
+        if not self._pending or not args or not isinstance(args[0], list):
+            return
+        ids = {u.get("id") for u in args[0] if isinstance(u, dict)}
+        for sid in [s for s in self._pending if s in ids]:
+            entry = self._pending[sid]
+            if client in entry[1]:
+                entry[1].discard(client)
+                ms = (now - entry[0]) * 1000
+                self.per_receiver.record(ms)
+                entry[2] = max(entry[2], ms)
+                if not entry[1]:
+                    self._finish(sid)
+
+    def _finish(self, sid: str) -> None:
+        entry = self._pending.pop(sid)
+        if entry[2] > 0:
+            self.complete.record(entry[2])
+
+    def expire(self, older_than: float) -> None:
+        """Broadcasts waar na de timeout nog ontvangers op wachten tellen als onvolledig."""
+        for sid in [s for s, entry in self._pending.items() if entry[0] < older_than]:
+            self._pending.pop(sid)
+            self.incomplete += 1
+
+
+class GamesTimeline:
+    """
+    Per seconde: spellen tegelijk bezig (max.), gespeelde zetten, p95 van move → gameState en
+    fouten. Zelfde opzet als ArrivalTimeline: geheugen O(duur), niet O(spellen).
+    """
+
+    def __init__(self):
+        self.peak: list[int] = []
+        self.level: list[int | None] = []
+        self.moves: list[LatencyHistogram] = []
+        self.errors: list[int] = []
+        self.active = 0
+        self.start = time.perf_counter()
+
+    def _sec(self) -> int:
+        """Huidige seconde; de lijsten groeien mee, want lopende spellen mogen de duur overschrijden."""
+        sec = int(time.perf_counter() - self.start)
+        while len(self.peak) <= sec:
+            self.peak.append(0)
+            self.level.append(None)
+            self.moves.append(LatencyHistogram())
+            self.errors.append(0)
+        return sec
+
+    def _mark(self) -> None:
+        sec = self._sec()
+        self.peak[sec] = max(self.peak[sec], self.active)
+        self.level[sec] = self.active
+
+    def game_started(self) -> None:
+        self.active += 1
+        self._mark()
+
+    def game_finished(self) -> None:
+        self.active -= 1
+        self._mark()
+
+    def move(self, ms: float) -> None:
+        self.moves[self._sec()].record(ms)
+
+    def error(self) -> None:
+        self.errors[self._sec()] += 1
+
+    def rows(self) -> list:
+        rows = []
+        carry = 0
+        for sec in range(len(self.peak)):
+            rows.append({
+                "t": sec,
+                "games": max(self.peak[sec], carry),
+                "moves": self.moves[sec].count,
+                "move_p95": round(self.moves[sec].percentile(0.95), 1),
+                "errors": self.errors[sec],
+            })
+            if self.level[sec] is not None:
+                carry = self.level[sec]
+        return rows
+
+
+class Turn(NamedTuple):
+    """Eén gemeten stap van een spel: speler mover (0 = uitnodiger) emit event, beide spelers ontvangen expect."""
+    label: str
+    mover: int
+    event: str
+    payload: object
+    expect: tuple  # (event, predicate of None)
+    is_move: bool = True  # telt mee voor de tijdlijn (zetten, p95) en het chatritme
+
+
+def _board_move(move) -> dict:
+    from_r, from_c, to_r, to_c = move
+    return {"fromR": from_r, "fromC": from_c, "toR": to_r, "toC": to_c}
+
+
+class GameProfile:
+    """
+    Eén spel-lobby uit server/sockets.js: namespace, payloads van invite/acceptInvite en de
+    zetten van één spel. Alle zetten zijn geldig en geen enkele beslist het spel, zodat elk
+    spel volledig doorloopt; de server accepteert max. 1 zet per 50 ms per socket.
+    """
+
+    move_label = "move → gameState"
+
+    def __init__(self, namespace: str):
+        self.namespace = namespace
+
+    def invite(self, target_sid: str):
+        return target_sid
+
+    def accept(self, from_sid: str):
+        return from_sid
+
+    def start(self, a: "SocketIOClient", b: "SocketIOClient", timeout_sec: float) -> dict:
+        """Vóór de uitnodiging: listeners zetten en toestand voor turns() aanmaken."""
+        return {}
+
+    async def turns(self, state: dict):
+        """Async generator van Turn's; mag tussendoor (ongemeten) wachten op de server."""
+        raise NotImplementedError
+
+
+class BoardGame(GameProfile):
+    """Bordspel met een vaste reeks zetten om beurten (P1 = uitnodiger begint)."""
+
+    def __init__(self, namespace: str, moves: list):
+        super().__init__(namespace)
+        self.moves = moves
+
+    async def turns(self, state: dict):
+        for i, payload in enumerate(self.moves):
+            yield Turn(self.move_label, i % 2, "move", payload, ("gameState", None))
+
+
+class Zeeslag(GameProfile):
+    """Zeeslag: beide spelers plaatsen hun vloot (placeDone), daarna om beurten schieten."""
+
+    # Lengtes 5, 4, 3, 3, 2 (getRequiredShips), elk schip horizontaal op een eigen rij
+    SHIPS = [[[r, c] for c in range(n)] for r, n in enumerate((5, 4, 3, 3, 2))]
+    SHOTS = 12  # 6 per speler, allemaal raak: ruim onder de 17 scheepsvakjes
+
+    async def turns(self, state: dict):
+        for mover in (0, 1):
+            payload = {"type": "placeDone", "ships": self.SHIPS}
+            yield Turn("placeDone → gameState", mover, "move", payload, ("gameState", None), is_move=False)
+        for i in range(self.SHOTS):
+            yield Turn(self.move_label, i % 2, "move", {"type": "shoot", "r": 0, "c": i // 2}, ("gameState", None))
+
+
+def _answer_result(args) -> bool:
+    return bool(args) and isinstance(args[0], dict) and "answerResult" in args[0]
+
+
+class RekenDuel(GameProfile):
+    """
+    Reken-duel: invite/acceptInvite met een data-object (moeilijkheid). Een zet is het juiste
+    antwoord op de laatste vraag; de volgende vraag stuurt de server 1,5 s na elk juist antwoord.
+    """
+
+    move_label = "answer → gameState"
+    DIFFICULTY = "normal"
+    ANSWERS = 8  # 4 per speler: onder POINTS_TO_WIN (5), dus geen winnaar
+
+    def invite(self, target_sid: str):
+        return {"targetId": target_sid, "difficulty": self.DIFFICULTY}
+
+    def accept(self, from_sid: str):
+        return {"fromId": from_sid, "difficulty": self.DIFFICULTY}
+
+    def start(self, a: "SocketIOClient", b: "SocketIOClient", timeout_sec: float) -> dict:
+        # De eerste vraag volgt direct op gameStart: al luisteren vóór acceptInvite, anders een race
+        state = {"question": asyncio.Event(), "answer": None, "timeout_sec": timeout_sec}
+
+        def on_state(client, args, now):
+            question = args[0].get("newQuestion") if args and isinstance(args[0], dict) else None
+            if question:
+                state["answer"] = question.get("answer")
+                state["question"].set()
+
+        a.on("gameState", on_state)
+        return state
+
+    async def turns(self, state: dict):
+        for i in range(self.ANSWERS):
+            await asyncio.wait_for(state["question"].wait(), state["timeout_sec"])
+            state["question"].clear()
+            yield Turn(self.move_label, i % 2, "answer", {"answer": state["answer"]}, ("gameState", _answer_result))
+
+
+# Zetten met node nagespeeld tegen server/*-game.js: geldig, zonder slagzet (dammen) en zonder winnaar
+_DAMMEN_MOVES = [
+    (6, 1, 5, 0), (3, 0, 4, 1), (6, 3, 5, 4), (2, 1, 3, 0), (6, 5, 5, 6), (1, 0, 2, 1),
+    (6, 7, 5, 8), (0, 1, 1, 0), (5, 8, 4, 9), (3, 4, 4, 3), (7, 4, 6, 5), (2, 3, 3, 4),
+]
+_SCHAKEN_MOVES = [(7, 1, 5, 2), (0, 1, 2, 2), (5, 2, 7, 1), (2, 2, 0, 1)] * 3  # paarden heen en terug
+
+GAMES = {
+    "dammen": BoardGame("/", [{**_board_move(m), "captures": []} for m in _DAMMEN_MOVES]),
+    "schaken": BoardGame("/schaken", [_board_move(m) for m in _SCHAKEN_MOVES]),
+    # Kolommen 0,1,2,...: na 12 zetten nog geen vier op een rij
+    "vieropeenrij": BoardGame("/vieropeenrij", [i % 7 for i in range(12)]),
+    "zeeslag": Zeeslag("/zeeslag"),
+    "reken-duel": RekenDuel("/reken-duel"),
+}
+DEFAULT_GAME = "vieropeenrij"
+
+
+class _MultiplayerRun:
+    """Gedeelde toestand van één run: instellingen, metrics, fan-out en tijdlijn."""
+
+    def __init__(self, base_url, game, duration_sec, timeout_sec, cancel_flag, metrics, think_sec):
+        self.base_url = base_url
+        self.game = game
+        self.timeout_sec = timeout_sec
+        self.cancel_flag = cancel_flag
+        self.metrics = metrics
+        self.think_sec = think_sec
+        self.deadline = time.perf_counter() + duration_sec
+        self.fanout = LobbyFanout()
+        self.timeline = GamesTimeline()
+        self.games_started = 0
+
+
+async def _step(run: _MultiplayerRun, results: list, name: str, action, *waits) -> dict:
+    """
+    Voer action uit (connect of emit) en wacht op de verwachte events (client, future).
+    Eén meting: van vóór de actie tot het laatste antwoord binnen is.
+    """
+    run.metrics.request_started()
+    start = time.perf_counter()
+    try:
+        await action
+        end = time.perf_counter()
+        for client, fut in waits:
+            _, received = await client.wait(fut)
+            end = max(end, received)
+        r = _event_result(name, start, end=end)
+    except asyncio.TimeoutError:
+        r = _event_result(name, start, error="timeout")
+        r["ms"] = run.timeout_sec * 1000
+    except Exception as e:
+        r = _event_result(name, start, error=str(e) or type(e).__name__)
+    if name == "connect":
+        r["connect_ms"] = r["ms"]
+    run.metrics.record_request("WS", name, r)
+    results.append(r)
+    if not r["ok"]:
+        run.timeline.error()
+    return r
+
+
+async def _play_game(run: _MultiplayerRun, pair_id: int, game_no: int) -> None:
+    """
+    Eén spel van een paar: a en b verbinden, setName, a nodigt b uit, b accepteert, om beurten
+    een zet uit het spelprofiel met af en toe een chatbericht, daarna verbreken beide spelers.
+    """
+    game = run.game
+    a = SocketIOClient(run.base_url, game.namespace, run.timeout_sec)
+    b = SocketIOClient(run.base_url, game.namespace, run.timeout_sec)
+    clients = (a, b)
+    results = []
+    in_game = completed = False
+    turns = None
+    try:
+        for c in clients:
+            r = await _step(run, results, "connect", c.connect())
+            if not r["ok"]:
+                return
+            run.fanout.add(c)
+        for c, suffix in ((a, "a"), (b, "b")):
+            fut = c.expect("setNameOk")
+            run.fanout.sent(c.sid, time.perf_counter())
+            r = await _step(run, results, "setName → setNameOk", c.emit("setName", f"Load {pair_id}{suffix}"), (c, fut))
+            if not r["ok"]:
+                return
+
+        state = game.start(a, b, run.timeout_sec)
+        fut = b.expect("invite", lambda args: bool(args) and args[0].get("fromId") == a.sid)
+        r = await _step(run, results, "invite → invite", a.emit("invite", game.invite(b.sid)), (b, fut))
+        if not r["ok"]:
+            return
+        fa, fb = a.expect("gameStart"), b.expect("gameStart")
+        r = await _step(
+            run, results, "acceptInvite → gameStart", b.emit("acceptInvite", game.accept(a.sid)), (a, fa), (b, fb)
+        )
+        if not r["ok"]:
+            return
+        in_game = True
+        run.timeline.game_started()
+
+        moves = 0
+        turns = game.turns(state)
+        while True:
+            start = time.perf_counter()
+            try:
+                turn = await anext(turns)
+            except StopAsyncIteration:
+                break
+            except asyncio.TimeoutError:
+                # Server stuurde de volgende vraag/toestand niet binnen de timeout
+                r = _event_result(game.move_label, start, error="timeout")
+                run.metrics.request_started()
+                run.metrics.record_request("WS", game.move_label, r)
+                results.append(r)
+                run.timeline.error()
+                return
+            mover = clients[turn.mover]
+            fa, fb = a.expect(*turn.expect), b.expect(*turn.expect)
+            r = await _step(run, results, turn.label, mover.emit(turn.event, turn.payload), (a, fa), (b, fb))
+            if not r["ok"]:
+                return
+            if turn.is_move:
+                moves += 1
+                run.timeline.move(r["ms"])
+                if moves % CHAT_EVERY == 0:
+                    text = f"gg {pair_id}-{game_no}-{moves}"
+                    fa = a.expect("chat", lambda args, text=text: bool(args) and args[0].get("text") == text)
+                    fb = b.expect("chat", lambda args, text=text: bool(args) and args[0].get("text") == text)
+                    r = await _step(run, results, "chat → chat", mover.emit("chat", text), (a, fa), (b, fb))
+                    if not r["ok"]:
+                        return
+            await asyncio.sleep(run.think_sec)
+        completed = True
+    finally:
+        if turns is not None:
+            await turns.aclose()
+        if in_game:
+            run.timeline.game_finished()
+        for c in clients:
+            run.fanout.remove(c)
+            await c.close()
+        # Een door Stop afgebroken spel telt niet mee, tenzij er al een fout in zat
+        if completed or not all(r["ok"] for r in results):
+            run.metrics.record_journey({
+                "player_id": pair_id,
+                "results": results,
+                "connections": sum(1 for c in clients if c.sid),
+            })
+
+
+async def _run_pair(run: _MultiplayerRun, pair_id: int, delay: float) -> None:
+    """Speel spel na spel (telkens opnieuw verbinden) tot de duur om is."""
+    await asyncio.sleep(delay)
+    game_no = 0
+    while time.perf_counter() < run.deadline and not run.cancel_flag.is_set():
+        game_no += 1
+        run.games_started += 1
+        await _play_game(run, pair_id, game_no)
+        await asyncio.sleep(PAUSE_BETWEEN_GAMES_SEC)
+
+
+async def _run_multiplayer_async(
+    base_url: str,
+    game: str,
+    pairs: int,
+    duration_sec: float,
+    timeout_sec: int,
+    cancel_flag: threading.Event,
+    metrics: RunMetrics,
+    think_sec: float,
+) -> dict:
+    run = _MultiplayerRun(base_url, GAMES[game], duration_sec, timeout_sec, cancel_flag, metrics, think_sec)
+    start = time.perf_counter()
+    ramp = duration_sec * RAMP_FRACTION
+    pending = {asyncio.create_task(_run_pair(run, i + 1, ramp * i / pairs)) for i in range(pairs)}
+    while pending:
+        _, pending = await asyncio.wait(pending, timeout=0.2)
+        run.fanout.expire(time.perf_counter() - timeout_sec)
+        if cancel_flag.is_set():
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+            break
+    run.fanout.expire(float("inf"))
+    total_ms = int((time.perf_counter() - start) * 1000)
+
+    # Fan-out komt uit de lobby-listeners, niet uit _step: achteraf als extra "endpoints" toevoegen
+    fan = RunMetrics()
+    fan.endpoints["WS lobby fan-out (per ontvanger)"] = EndpointStats()
+    fan.endpoints["WS lobby fan-out (per ontvanger)"].histogram = run.fanout.per_receiver
+    fan.endpoints["WS lobby fan-out (laatste ontvanger)"] = EndpointStats()
+    fan.endpoints["WS lobby fan-out (laatste ontvanger)"].histogram = run.fanout.complete
+    fan.endpoints["WS lobby fan-out (laatste ontvanger)"].errors = run.fanout.incomplete
+    metrics.merge(fan)
+
+    r = _summarize(base_url, pairs * 2, total_ms, metrics, ENGINE_ASYNCIO, True)
+    rows = run.timeline.rows()
+    moves = metrics.endpoints.get("WS " + run.game.move_label)
+    r.update({
+        "model": MODEL_MULTIPLAYER,
+        "game": game,
+        "namespace": run.game.namespace,
+        "pairs": pairs,
+        "duration_sec": duration_sec,
+        "games_started": run.games_started,
+        "peak_games": max((x["games"] for x in rows), default=0),
+        # Hoogste aantal gelijktijdige spellen in een seconde zonder enige fout
+        "sustained_games": max((x["games"] for x in rows if x["errors"] == 0), default=0),
+        "move_p95": round(moves.histogram.percentile(0.95), 1) if moves else 0.0,
+        "fanout_p95": round(run.fanout.complete.percentile(0.95), 1),
+        "fanout_incomplete": run.fanout.incomplete,
+        "games_timeline": rows,
+    })
+    return r
+
+
+def run_multiplayer(
+    base_url: str,
+    players: int,
+    duration_sec: float,
+    timeout_sec: int,
+    cancel_flag: threading.Event,
+    metrics: RunMetrics | None = None,
+    think_sec: float = THINK_SEC,
+    game: str = DEFAULT_GAME,
+) -> dict:
+    """
+    Multiplayer-scenario: players // 2 paren spelen game (sleutel uit GAMES) via Socket.IO, gespreid
+    gestart over de eerste helft van duration_sec zodat het aantal spellen geleidelijk oploopt.
+    Result dict = dat van run_load_test (journey = één spel, endpoints = events), aangevuld met
+    spellen tegelijk per seconde, fan-out van broadcastLobby en round-trip van zetten.
+    """
+    base_url = base_url.rstrip("/")
+    pairs = max(1, players // 2)
+    _raise_fd_limit(pairs * 2 + 256)
+    return asyncio.run(
+        _run_multiplayer_async(
+            base_url, game, pairs, duration_sec, timeout_sec, cancel_flag, metrics or RunMetrics(), max(0.05, think_sec)
+        )
+    )
+
+
+def multiplayer_summary_lines(r: dict) -> list[str]:
+    """Kerncijfers van een multiplayer-run, voor GUI-log en CLI."""
+    return [
+        f"Spel:              {r.get('game', DEFAULT_GAME)} ({r['namespace']})  |  {r['pairs']} paren  |  {r['duration_sec']:g} s",
+        f"Spellen:           {r['games_started']} gestart  |  {r['success_count']} volledig  |  {r['fail_count']} mislukt",
+        f"Spellen tegelijk:  max {r['peak_games']}  |  zonder fouten volgehouden {r['sustained_games']}",
+        f"Zet (round-trip):  p95 {r['move_p95']:.0f} ms",
+        f"Lobby fan-out:     p95 {r['fanout_p95']:.0f} ms tot laatste ontvanger"
+        + (f"  |  {r['fanout_incomplete']} onvolledig" if r["fanout_incomplete"] else ""),
+    ]
+
+
+def games_timeline_lines(rows: list) -> list[str]:
+    """Spellen tegelijk en p95 per zet over de tijd; lange runs samengevat in max. 20 rijen."""
+    if not rows:
+        return []
+    per_row = max(1, -(-len(rows) // 20))
+    lines = ["Tijd (s)    spellen  zetten  p95 zet  fouten"]
+    for i in range(0, len(rows), per_row):
+        chunk = rows[i:i + per_row]
+        label = f"{chunk[0]['t']}-{chunk[-1]['t'] + 1}"
+        games = max(x["games"] for x in chunk)
+        moves = sum(x["moves"] for x in chunk)
+        p95 = max(x["move_p95"] for x in chunk)
+        errors = sum(x["errors"] for x in chunk)
+        lines.append(f"{label:<11} {games:>7}  {moves:>6}  {p95:>7.0f}  {errors:>6}")
+    return lines
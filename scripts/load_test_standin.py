@@ -0,0 +1,359 @@
+"""
+Lokale stand-in voor de Regenboog-server: een kleine asyncio HTTP/1.1-server met dezelfde routes
+als server/routes.js (/, /games/*.html, /api/leaderboard/:class, /api/score, /api/track-visit*,
+/api/vlinders/word/:round, /api/admin/active-visitors en /api/admin/analytics (zonder wachtwoordcontrole)
+en statische CSS/JS), met instelbare latency en paginagrootte.
+Bedoeld om de load-generator zelf te meten: met een server die (bijna) niets doet blijft alleen de
+eigen overhead over. De benchmark draait de stand-in in een apart proces, zodat de CPU-tijd van
+de generator niet vermengd wordt met die van de server.
+"""
+
+import asyncio
+import json
+import multiprocessing
+import threading
+import time
+
+from load_test_core import (
+    DEFAULT_TIMEOUT,
+    ENGINE_PROCESSES,
+    LatencyHistogram,
+    RunMetrics,
+    max_concurrent_for,
+    run_with_engine,
+)
+from load_test_scenarios import Scenario
+
+STANDIN_HOST = "127.0.0.1"
+DEFAULT_STANDIN_LATENCY_MS = 0.0
+DEFAULT_STANDIN_PAYLOAD = 3000  # bytes per HTML-pagina, ongeveer public/index.html
+BENCH_USERS = (1, 10, 50, 200)  # niveaus gelijktijdige gebruikers, begrensd door de engine
+BENCH_LEVEL_SEC = 5.0  # meetduur per niveau
+BENCH_FIELDS = (
+    "users", "requests", "errors", "rps", "cpu_pct", "cpu_us_per_request", "p50", "p99", "server_cpu_pct",
+)
+MAX_HEADER_BYTES = 16384
+
+_STATIC_TYPES = {".css": "text/css", ".js": "application/javascript", ".svg": "image/svg+xml"}
+
+
+def _response(status: int, reason: str, body: bytes, content_type: str, extra: str = "") -> bytes:
+    head = (
+        f"HTTP/1.1 {status} {reason}\r\nContent-Type: {content_type}\r\n"
+        f"Content-Length: {len(body)}\r\n{extra}\r\n"
+    )
+    return head.encode("latin-1") + body
+
+
+def _json(status: int, data, reason: str = "OK") -> bytes:
+    return _response(status, reason, json.dumps(data).encode(), "application/json; charset=utf-8")
+
+
+def _page(title: str, payload_bytes: int) -> bytes:
+    """HTML met dezelfde sub-resources als public/index.html, opgevuld tot payload_bytes."""
+    html = (
+        "<!DOCTYPE html>\n<html lang=\"nl\">\n<head>\n<meta charset=\"UTF-8\">\n"
+        f"<title>{title}</title>\n<link rel=\"stylesheet\" href=\"/css/main.css\">\n</head>\n<body>\n"
+        "<script src=\"/js/main.js\"></script>\n<script src=\"/js/analytics-tracker.js\"></script>\n"
+    )
+    tail = "</body>\n</html>\n"
+    fill = max(0, payload_bytes - len(html) - len(tail) - len("<!--  -->\n"))
+    if fill:
+        html += f"<!-- {'x' * fill} -->\n"
+    return (html + tail).encode()
+
+
+class _Routes:
+    """Vooraf opgebouwde responses; per request alleen nog een keuze op methode en pad."""
+
+    def __init__(self, payload_bytes: int):
+        page_head = "Cache-Control: no-cache\r\n"
+        self.home = _response(200, "OK", _page("Regenboog Spellen", payload_bytes), "text/html; charset=utf-8",
+                              page_head)
+        self.game = _response(200, "OK", _page("Regenboog spel", payload_bytes), "text/html; charset=utf-8",
+                              page_head)
+        rows = [
+            {"id": i, "class_name": "standin", "player_name": f"Speler {i}", "student_class": "Zebra's",
+             "score": 500 - 10 * i, "created_at": "2024-01-01 12:00:00"}
+            for i in range(1, 11)
+        ]
+        self.leaderboard = _json(200, rows)
+        self.score = _json(200, {"id": 1})
+        self.visit = _json(200, {"id": 1, "visitStart": "2024-01-01T12:00:00.000Z"})
+        self.updated = _json(200, {"updated": 1})
+        self.heartbeat = _json(200, {"updated": 1, "lastSeen": "2024-01-01T12:00:00.000Z"})
+        self.active_visitors = _json(200, {"currentVisitors": 0, "activeWindowSeconds": 90})
+        self.analytics = _json(200, {"visitorStats": {"uniqueVisitors": 0, "totalVisits": 0}})
+        self.words = _json(200, {"words": [{"word": "VLINDER", "letters": list("VLINDER")}]})
+        self.bad_round = _json(400, {"error": "Round moet 1, 2 of 3 zijn"}, "Bad Request")
+        self.not_found = _json(404, {"error": "Niet gevonden"}, "Not Found")
+        self.not_modified = b"HTTP/1.1 304 Not Modified\r\nETag: \"standin\"\r\nContent-Length: 0\r\n\r\n"
+        self.static = {}
+        for ext, ctype in _STATIC_TYPES.items():
+            body = b"/* stand-in */\n" + b" " * max(0, payload_bytes // 3)
+            self.static[ext] = _response(200, "OK", body, ctype, "ETag: \"standin\"\r\nCache-Control: no-cache\r\n")
+
+    def handle(self, method: str, path: str, headers: dict) -> bytes:
+        path = path.split("?", 1)[0]
+        if method == "GET":
+            if path == "/":
+                return self.home
+            if path.startswith("/games/"):
+                return self.game
+            if path.startswith("/api/leaderboard/"):
+                return self.leaderboard
+            if path.startswith("/api/vlinders/word/"):
+                return self.words if path.rsplit("/", 1)[-1] in ("1", "2", "3") else self.bad_round
+            if path == "/api/admin/active-visitors":
+                return self.active_visitors
+            if path == "/api/admin/analytics":
+                return self.analytics
+            ext = path[path.rfind("."):] if "." in path else ""
+            if ext in self.static:
+                if headers.get("if-none-match") == "\"standin\"":
+                    return self.not_modified
+                return self.static[ext]
+        elif method == "POST":
+            if path == "/api/score":
+                return self.score
+            if path == "/api/track-visit":
+                return self.visit
+            if path == "/api/track-visit-end":
+                return self.updated
+            if path == "/api/track-visit-heartbeat":
+                return self.heartbeat
+        return self.not_found
+
+
+class StandInServer:
+    """
+    De stand-in in een eigen thread met een eigen event loop. start() geeft de basis-URL terug
+    (port=0: vrije poort); stop() sluit de server en alle verbindingen.
+    """
+
+    def __init__(self, latency_ms: float = DEFAULT_STANDIN_LATENCY_MS, payload_bytes: int = DEFAULT_STANDIN_PAYLOAD,
+                 port: int = 0):
+        self.latency_sec = max(0.0, latency_ms) / 1000
+        self.routes = _Routes(max(0, payload_bytes))
+        self.port = port
+        self.requests = 0
+        self._loop = None
+        self._server = None
+        self._thread = None
+        self._ready = threading.Event()
+        self._error = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{STANDIN_HOST}:{self.port}"
+
+    def start(self) -> str:
+        self._thread = threading.Thread(target=self._run, name="standin", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        if self._error is not None:
+            raise self._error
+        return self.base_url
+
+    def stop(self) -> None:
+        if self._loop is not None and self._loop.is_running():
+            self._loop.call_soon_threadsafe(self._server.close)
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def _run(self) -> None:
+        self._loop = asyncio.new_event_loop()
+        try:
+            self._loop.run_until_complete(self._serve())
+        except OSError as e:
+            self._error = e
+            self._ready.set()
+        finally:
+            self._loop.close()
+
+    async def _serve(self) -> None:
+        self._server = await asyncio.start_server(self._client, STANDIN_HOST, self.port, backlog=1024)
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._ready.set()
+        try:
+            await self._server.serve_forever()
+        except asyncio.CancelledError:
+            pass
+        # Open keep-alive verbindingen sluiten voordat de loop stopt
+        tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    return
+                if len(head) > MAX_HEADER_BYTES:
+                    return
+                lines = head.decode("latin-1").split("\r\n")
+                try:
+                    method, path, version = lines[0].split(" ", 2)
+                except ValueError:
+                    return
+                headers = {}
+                for line in lines[1:]:
+                    name, sep, value = line.partition(":")
+                    if sep:
+                        headers[name.strip().lower()] = value.strip()
+                length = int(headers.get("content-length", 0) or 0)
+                if length:
+                    await reader.readexactly(length)
+                if self.latency_sec:
+                    await asyncio.sleep(self.latency_sec)
+                self.requests += 1
+                writer.write(self.routes.handle(method, path, headers))
+                await writer.drain()
+                if headers.get("connection", "").lower() == "close" or version == "HTTP/1.0":
+                    return
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+def _serve_in_process(latency_ms: float, payload_bytes: int, conn) -> None:
+    """Doel van het stand-in-proces: poort melden, op "cpu" de eigen CPU-tijd melden, stoppen op "stop"."""
+    server = StandInServer(latency_ms, payload_bytes)
+    try:
+        conn.send(server.start())
+    except OSError as e:
+        conn.send(e)
+        return
+    try:
+        while conn.recv() == "cpu":
+            conn.send(time.process_time())
+    except EOFError:
+        pass
+    finally:
+        server.stop()
+
+
+def _cpu_seconds() -> float:
+    """CPU-tijd (user + sys) van dit proces plus afgesloten kindprocessen (werkprocessen van de engine)."""
+    try:
+        import resource
+    except ImportError:
+        return time.process_time()  # Windows: alleen dit proces
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime
+
+
+def run_benchmark(
+    engine: str,
+    cancel_flag: threading.Event,
+    latency_ms: float = DEFAULT_STANDIN_LATENCY_MS,
+    payload_bytes: int = DEFAULT_STANDIN_PAYLOAD,
+    levels: tuple = BENCH_USERS,
+    level_sec: float = BENCH_LEVEL_SEC,
+    keep_alive: bool = True,
+    assets: bool = False,
+    scenario: Scenario | None = None,
+    on_level=None,
+    on_metrics=None,
+) -> dict:
+    """
+    Meet de generator tegen de stand-in: per niveau gelijktijdige gebruikers level_sec lang
+    rondes van het gesloten model achter elkaar. Per niveau req/s, CPU van de generator (% van één
+    core en µs per request), client-latency en CPU van de stand-in (bijna 100% = server was de grens).
+    Gebruik een scenario zonder bedenktijd, anders meet je vooral wachten.
+    """
+    parent, child = multiprocessing.Pipe()
+    proc = multiprocessing.Process(
+        target=_serve_in_process, args=(latency_ms, payload_bytes, child), name="standin", daemon=True
+    )
+    proc.start()
+    base_url = parent.recv()
+    if isinstance(base_url, Exception):
+        proc.join()
+        raise base_url
+    limit = max_concurrent_for(engine)
+    rows = []
+    try:
+        for users in sorted({max(1, min(limit, u)) for u in levels}):
+            if cancel_flag.is_set():
+                break
+            metrics = RunMetrics()
+            if on_metrics is not None:
+                on_metrics(metrics)
+            parent.send("cpu")
+            server_cpu0 = parent.recv()
+            cpu0, start = _cpu_seconds(), time.perf_counter()
+            while not cancel_flag.is_set() and time.perf_counter() - start < level_sec:
+                run_with_engine(
+                    engine, base_url, users, DEFAULT_TIMEOUT, cancel_flag, keep_alive, metrics, assets, scenario
+                )
+            wall = time.perf_counter() - start
+            cpu = _cpu_seconds() - cpu0
+            parent.send("cpu")
+            server_cpu = parent.recv() - server_cpu0
+            total = LatencyHistogram()
+            for stats in metrics.endpoints.values():
+                total.merge(stats.histogram)
+            n = total.count
+            row = {
+                "users": users,
+                "requests": n,
+                "errors": sum(s.errors for s in metrics.endpoints.values()),
+                "rps": round(n / wall, 1) if wall > 0 else 0.0,
+                "cpu_pct": round(100 * cpu / wall, 1) if wall > 0 else 0.0,
+                "cpu_us_per_request": round(1e6 * cpu / n) if n else 0,
+                "p50": round(total.percentile(0.50), 1),
+                "p99": round(total.percentile(0.99), 1),
+                "server_cpu_pct": round(100 * server_cpu / wall, 1) if wall > 0 else 0.0,
+            }
+            rows.append(row)
+            if on_level is not None:
+                on_level(row)
+    finally:
+        parent.send("stop")
+        proc.join(timeout=5)
+    best = max(rows, key=lambda x: x["rps"], default=None)
+    return {
+        "engine": engine,
+        "latency_ms": latency_ms,
+        "payload_bytes": payload_bytes,
+        "keep_alive": keep_alive,
+        "assets": assets,
+        "level_sec": level_sec,
+        "levels": rows,
+        "max_rps": best["rps"] if best else 0.0,
+        "max_rps_users": best["users"] if best else 0,
+        "cpu_us_per_request": best["cpu_us_per_request"] if best else 0,
+        "cancelled": cancel_flag.is_set(),
+    }
+
+
+def benchmark_level_line(row: dict) -> str:
+    return (
+        f"{row['users']:>6} gebruikers: {row['rps']:>8.1f} req/s  CPU {row['cpu_pct']:>5.0f}%  "
+        f"{row['cpu_us_per_request']:>6} µs/request  p50 {row['p50']:>5.0f} ms  p99 {row['p99']:>5.0f} ms  "
+        f"stand-in CPU {row['server_cpu_pct']:>4.0f}%"
+    )
+
+
+def benchmark_summary_lines(r: dict) -> list[str]:
+    """Conclusie: maximale doorvoer van de generator en CPU per request, met een waarschuwing als de
+    stand-in zelf de grens was."""
+    lines = [
+        f"Stand-in:          latency {r['latency_ms']:g} ms, pagina's {r['payload_bytes']} bytes, "
+        f"keep-alive {'aan' if r['keep_alive'] else 'uit'}",
+        f"Generator max:     {r['max_rps']:.1f} req/s met {r['max_rps_users']} gebruikers (engine {r['engine']})",
+        f"CPU per request:   {r['cpu_us_per_request']} µs (generator, incl. werkprocessen)",
+    ]
+    if r["engine"] == ENGINE_PROCESSES:
+        lines.append("                   processes: CPU van werkprocessen telt mee zodra ze afgesloten zijn")
+    if any(row["server_cpu_pct"] >= 90 for row in r["levels"]):
+        lines.append("Let op:            stand-in zat op ~100% CPU; de generator kan nog meer dan gemeten")
+    if r["cancelled"]:
+        lines.append("Gestopt:           benchmark afgebroken, resultaat is voorlopig")
+    return lines
@@ -68,7 +68,7 @@ app.get('/games/:game', (req, res) => {
   res.sendFile(path.join(publicDir, 'games', `${req.params.game}.html`));
 });
 
-attachSockets(server);
+const io = attachSockets(server);
 
 server.on('error', (err) => {
   if (err.code === 'EADDRINUSE') {
@@ -81,4 +81,13 @@ server.on('error', (err) => {
 
 server.listen(PORT, () => {
   console.log(`Regenboog Spellen draait op http://localhost:${PORT}`);
+  // PM2 (--wait-ready): pas na dit bericht stopt een reload de vorige instantie
+  if (process.send) process.send('ready');
+});
+
+// PM2 reload stuurt SIGINT zodra de nieuwe instantie klaar is: geen nieuwe verbindingen meer aannemen,
+// Socket.IO-clients loskoppelen (ze verbinden opnieuw, met de nieuwe instantie) en netjes afsluiten.
+process.on('SIGINT', () => {
+  io.close(() => process.exit(0));
+  setTimeout(() => process.exit(0), 4000).unref();
 });